@@ -4,8 +4,8 @@ Avatar Engine API - Real-time Wav2Lip lip-sync
 """
 
 import os
-import io
 import cv2
+import base64
 import math
 import torch
 import numpy as np
@@ -13,6 +13,7 @@ from typing import Optional
 from pathlib import Path
 from time import time
 import asyncio
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
@@ -25,6 +26,9 @@ import audio
 from models import Wav2Lip
 from batch_face import RetinaFace
 
+# Shared compositing / JPEG encoding (copy of backend/frame_compositor.py)
+from frame_compositor import FrameCompositor, encode_jpegs, resolve_mode
+
 # ============================================================================
 # Configuration
 # ============================================================================
@@ -54,10 +58,15 @@ class Wav2LipEngine:
 
         # Load models
         self.model = self._load_wav2lip_model()
+        self.model_dtype = next(self.model.parameters()).dtype
         self.face_detector = self._load_face_detector()
 
         # Cache
-        self.face_cache = {}  # avatar_id -> (face_crop, coords, full_frame)
+        self.face_cache = {}  # avatar_id -> (face_crop, face_tensor, coords, full_frame, compositor)
+
+        # Per-thread pinned host buffers for mel upload / prediction download
+        # (generate_frames runs on an executor with several workers)
+        self._io = threading.local()
 
         # Mel parameters
         self.mel_step_size = 16
@@ -139,9 +148,11 @@ class Wav2LipEngine:
         # Cache
         self.face_cache[avatar_id] = {
             "face_crop": face_resized,
+            "face_tensor": self._face_tensor(face_resized),
             "coords": (y1, y2, x1, x2),
             "full_frame": img.copy(),
-            "original_face_size": (x2 - x1, y2 - y1)
+            "original_face_size": (x2 - x1, y2 - y1),
+            "compositor": FrameCompositor(img, (x1, y1, x2, y2))
         }
 
         return {
@@ -151,6 +162,33 @@ class Wav2LipEngine:
             "image_size": list(img.shape[:2])
         }
 
+    def _face_tensor(self, face: np.ndarray) -> torch.Tensor:
+        """Masked + unmasked face as a (1, 6, H, W) tensor on the device, in the model dtype.
+
+        Built once per avatar; generate_frames expands it over the batch
+        (no copy) so only the mel is uploaded per batch.
+        """
+        masked = face.copy()
+        masked[self.img_size // 2:] = 0
+        face_6ch = np.concatenate((masked, face), axis=2).transpose(2, 0, 1)[None] / 255.0
+        return torch.from_numpy(np.ascontiguousarray(face_6ch)).to(self.device, self.model_dtype)
+
+    def _io_buffers(self, batch_size: int, mel_shape: tuple):
+        """Reusable (pinned on CUDA) host buffers for one batch on this thread.
+
+        Returns (mel_in, pred_out): float32 (N, 1, 80, T) mel staging and
+        uint8 (N, H, W, 3) prediction output, grown on demand.
+        """
+        mel_in = getattr(self._io, "mel_in", None)
+        pred_out = getattr(self._io, "pred_out", None)
+        if mel_in is None or mel_in.shape[0] < batch_size or tuple(mel_in.shape[2:]) != mel_shape:
+            pin = self.device == 'cuda'
+            mel_in = torch.empty((batch_size, 1) + mel_shape, dtype=torch.float32, pin_memory=pin)
+            pred_out = torch.empty((batch_size, self.img_size, self.img_size, 3), dtype=torch.uint8,
+                                   pin_memory=pin)
+            self._io.mel_in, self._io.pred_out = mel_in, pred_out
+        return mel_in[:batch_size], pred_out[:batch_size]
+
     def audio_to_mel(self, audio_bytes: bytes, sample_rate: int = 16000) -> np.ndarray:
         """Convert audio bytes to mel spectrogram"""
 
@@ -186,23 +224,19 @@ class Wav2LipEngine:
         return mel_chunks
 
     @torch.no_grad()
-    def generate_frames(
+    def generate_patches(
         self,
         audio_bytes: bytes,
         avatar_id: str = "default",
         fps: float = 25,
         batch_size: int = 8
     ) -> list:
-        """Generate lip-synced frames from audio"""
+        """Generate lip-synced face patches (img_size x img_size, uint8) from audio"""
 
         if avatar_id not in self.face_cache:
             raise ValueError(f"Avatar {avatar_id} not preprocessed")
 
-        cache = self.face_cache[avatar_id]
-        face = cache["face_crop"]
-        coords = cache["coords"]
-        full_frame = cache["full_frame"]
-        orig_size = cache["original_face_size"]
+        face_tensor = self.face_cache[avatar_id]["face_tensor"]
 
         # Convert audio to mel chunks
         mel = self.audio_to_mel(audio_bytes)
@@ -212,73 +246,81 @@ class Wav2LipEngine:
             return []
 
         # Prepare batches
-        frames = []
+        patches = []
+
+        non_blocking = self.device == 'cuda'
 
         for i in range(0, len(mel_chunks), batch_size):
             batch_mels = mel_chunks[i:i + batch_size]
             batch_size_actual = len(batch_mels)
 
-            # Prepare image batch
-            img_batch = np.array([face] * batch_size_actual)
-            mel_batch = np.array(batch_mels)
-
-            # Mask lower half of face
-            img_masked = img_batch.copy()
-            img_masked[:, self.img_size // 2:] = 0
+            # Stage mel in the (pinned) host buffer and upload it - the only per-batch input
+            mel_in, pred_out = self._io_buffers(batch_size_actual, batch_mels[0].shape)
+            np.stack(batch_mels, out=mel_in.numpy()[:, 0])
+            mel_tensor = mel_in.to(self.device, self.model_dtype, non_blocking=non_blocking)
 
-            # Concatenate masked and original
-            img_batch = np.concatenate((img_masked, img_batch), axis=3) / 255.0
-            mel_batch = mel_batch.reshape(batch_size_actual, mel_batch.shape[1], mel_batch.shape[2], 1)
-
-            # Convert to tensors
-            img_tensor = torch.FloatTensor(img_batch.transpose(0, 3, 1, 2)).to(self.device)
-            mel_tensor = torch.FloatTensor(mel_batch.transpose(0, 3, 1, 2)).to(self.device)
+            # Face batch: cached device tensor broadcast over the batch (no copy)
+            img_tensor = face_tensor.expand(batch_size_actual, -1, -1, -1)
 
             # Inference
             pred = self.model(mel_tensor, img_tensor)
 
-            # Convert predictions to frames
-            pred = pred.cpu().numpy().transpose(0, 2, 3, 1) * 255.0
+            # Quantize on device, download into the pinned buffer (1/4 the bytes of float32)
+            pred = (pred * 255.0).to(torch.uint8).permute(0, 2, 3, 1)
+            pred_out.copy_(pred, non_blocking=non_blocking)
+            if non_blocking:
+                torch.cuda.current_stream().synchronize()
 
-            for p in pred:
-                # Resize prediction to original face size
-                p_resized = cv2.resize(p.astype(np.uint8), orig_size)
+            # Copy out: the buffer is reused by the next batch
+            patches.extend(pred_out.numpy().copy())
 
-                # Overlay on full frame
-                output_frame = full_frame.copy()
-                y1, y2, x1, x2 = coords
-                output_frame[y1:y2, x1:x2] = p_resized
+        return patches
 
-                frames.append(output_frame)
+    def generate_frames(
+        self,
+        audio_bytes: bytes,
+        avatar_id: str = "default",
+        fps: float = 25,
+        batch_size: int = 8
+    ) -> list:
+        """Generate lip-synced full frames from audio"""
 
-        return frames
+        patches = self.generate_patches(audio_bytes, avatar_id, fps, batch_size)
+        compositor = self.face_cache[avatar_id]["compositor"]
+        return [compositor.composite(p).copy() for p in patches]
 
-    def frames_to_video_bytes(self, frames: list, fps: float = 25) -> bytes:
-        """Convert frames to video bytes (MJPEG)"""
+    def generate_jpegs(
+        self,
+        audio_bytes: bytes,
+        avatar_id: str = "default",
+        fps: float = 25,
+        batch_size: int = 8,
+        mode: str = "frame",
+        quality: int = 90
+    ) -> list:
+        """Generate lip-synced JPEGs (full frames or face patches), encoded in parallel"""
 
-        output = io.BytesIO()
+        patches = self.generate_patches(audio_bytes, avatar_id, fps, batch_size)
+        return self.face_cache[avatar_id]["compositor"].encode(patches, mode, quality)
 
-        for frame in frames:
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            output.write(buffer.tobytes())
+    def frames_to_video_bytes(self, frames: list, fps: float = 25) -> bytes:
+        """Convert frames to video bytes (MJPEG)"""
 
-        return output.getvalue()
+        return b"".join(encode_jpegs(frames, 90))
 
-    def generate_single_frame(self, audio_chunk: bytes, avatar_id: str = "default") -> bytes:
-        """Generate single lip-synced frame for real-time streaming"""
+    def generate_single_frame(self, audio_chunk: bytes, avatar_id: str = "default", mode: str = "frame") -> bytes:
+        """Generate single lip-synced frame (or face patch) for real-time streaming"""
 
-        frames = self.generate_frames(audio_chunk, avatar_id, fps=25, batch_size=1)
+        patches = self.generate_patches(audio_chunk, avatar_id, fps=25, batch_size=1)
+        compositor = self.face_cache[avatar_id]["compositor"]
 
-        if not frames:
-            # Return original frame
-            if avatar_id in self.face_cache:
-                frame = self.face_cache[avatar_id]["full_frame"]
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                return buffer.tobytes()
-            return b""
+        if not patches:
+            # Return original frame (encoded once)
+            return compositor.background_jpeg()
 
-        _, buffer = cv2.imencode('.jpg', frames[0], [cv2.IMWRITE_JPEG_QUALITY, 85])
-        return buffer.tobytes()
+        if mode == "patch":
+            return compositor.render_patch(patches[0])
+        return compositor.render(patches[0])
 
 
 # ============================================================================
@@ -380,27 +422,26 @@ async def generate_lipsync(
     # Read audio
     audio_bytes = await audio.read()
 
-    # Generate frames
+    # Generate and encode frames (face box only, parallel JPEG encoding)
     try:
         loop = asyncio.get_event_loop()
-        frames = await loop.run_in_executor(
+        jpegs = await loop.run_in_executor(
             executor,
-            engine.generate_frames,
+            engine.generate_jpegs,
             audio_bytes,
             avatar_id,
             fps,
             8
         )
 
-        if not frames:
+        if not jpegs:
             raise HTTPException(status_code=400, detail="No frames generated")
 
         # Convert to MJPEG stream
         def generate():
-            for frame in frames:
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            for jpeg in jpegs:
                 yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
 
         return StreamingResponse(
             generate(),
@@ -421,6 +462,7 @@ async def websocket_avatar(websocket: WebSocket):
         return
 
     avatar_id = "eva"
+    mode = "frame"  # "patch": send face box JPEGs, client composites over the background
 
     try:
         while True:
@@ -436,7 +478,8 @@ async def websocket_avatar(websocket: WebSocket):
                     executor,
                     engine.generate_single_frame,
                     audio_chunk,
-                    avatar_id
+                    avatar_id,
+                    mode
                 )
 
                 # Send frame back
@@ -449,7 +492,22 @@ async def websocket_avatar(websocket: WebSocket):
 
                 if parsed.get("type") == "config":
                     avatar_id = parsed.get("avatar_id", "eva")
-                    await websocket.send_json({"type": "config_ok", "avatar_id": avatar_id})
+                    mode, error = resolve_mode(parsed.get("mode", "frame"))
+                    if error:
+                        await websocket.send_json({"type": "error", "message": error})
+                    if mode == "patch" and avatar_id not in engine.face_cache:
+                        # No background/box to composite onto yet: stream full frames instead
+                        mode = "frame"
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": f"Avatar {avatar_id} not preprocessed; using 'frame'"
+                        })
+                    reply = {"type": "config_ok", "avatar_id": avatar_id, "mode": mode}
+                    if mode == "patch":
+                        compositor = engine.face_cache[avatar_id]["compositor"]
+                        reply["background"] = base64.b64encode(compositor.background_jpeg()).decode()
+                        reply["box"] = compositor.patch_box()
+                    await websocket.send_json(reply)
 
     except WebSocketDisconnect:
         print("Avatar WebSocket disconnected")
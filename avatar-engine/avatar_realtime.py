@@ -6,6 +6,7 @@ Génère les frames pendant que l'audio joue
 import os
 import io
 import cv2
+import base64
 import torch
 import numpy as np
 import asyncio
@@ -26,6 +27,9 @@ import audio
 from models import Wav2Lip
 from batch_face import RetinaFace
 
+# Shared compositing / JPEG encoding (copy of backend/frame_compositor.py)
+from frame_compositor import FrameCompositor, resolve_mode
+
 # ============================================================================
 # Configuration
 # ============================================================================
@@ -105,22 +109,22 @@ class FastWav2LipEngine:
             "face": face,
             "coords": (y1, y2, x1, x2),
             "frame": img.copy(),
-            "size": (x2-x1, y2-y1)
+            "size": (x2-x1, y2-y1),
+            # LANCZOS4 for high-quality upscaling (less pixelated)
+            "compositor": FrameCompositor(img, (x1, y1, x2, y2), quality=95,
+                                          interpolation=cv2.INTER_LANCZOS4)
         }
 
         return {"avatar_id": avatar_id, "ok": True}
 
     @torch.no_grad()
-    def generate_frame_batch(self, mel_chunks: list, avatar_id: str) -> list:
-        """Generate batch of frames from mel chunks"""
+    def generate_frame_batch(self, mel_chunks: list, avatar_id: str, mode: str = "frame") -> list:
+        """Generate batch of JPEG frames (or face patches) from mel chunks"""
         if avatar_id not in self.face_cache:
             return []
 
         cache = self.face_cache[avatar_id]
         face = cache["face"]
-        coords = cache["coords"]
-        frame = cache["frame"]
-        size = cache["size"]
 
         batch_size = len(mel_chunks)
         if batch_size == 0:
@@ -146,16 +150,8 @@ class FastWav2LipEngine:
         pred = self.model(mel_t, img_t)
         pred = pred.cpu().numpy().transpose(0, 2, 3, 1) * 255.0
 
-        # Build output frames
-        frames = []
-        y1, y2, x1, x2 = coords
-        for p in pred:
-            out = frame.copy()
-            # LANCZOS4 for high-quality upscaling (less pixelated)
-            out[y1:y2, x1:x2] = cv2.resize(p.astype(np.uint8), size, interpolation=cv2.INTER_LANCZOS4)
-            frames.append(out)
-
-        return frames
+        # Paste into the face box only and encode the batch in parallel
+        return cache["compositor"].encode(list(pred), mode)
 
     def audio_to_mel_chunks(self, audio_bytes: bytes, fps: float = 25) -> list:
         """Convert audio to mel chunks"""
@@ -175,7 +171,13 @@ class FastWav2LipEngine:
 
         return chunks
 
-    async def stream_frames(self, audio_bytes: bytes, avatar_id: str, fps: float = 25) -> AsyncGenerator[bytes, None]:
+    async def stream_frames(
+        self,
+        audio_bytes: bytes,
+        avatar_id: str,
+        fps: float = 25,
+        mode: str = "frame"
+    ) -> AsyncGenerator[bytes, None]:
         """Stream frames as they're generated"""
         mel_chunks = self.audio_to_mel_chunks(audio_bytes, fps)
 
@@ -195,13 +197,13 @@ class FastWav2LipEngine:
                 self.executor,
                 self.generate_frame_batch,
                 batch,
-                avatar_id
+                avatar_id,
+                mode
             )
 
             # Yield each frame
             for frame in frames:
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                yield buffer.tobytes()
+                yield frame
                 await asyncio.sleep(frame_interval * 0.5)  # Slight delay between frames
 
 
@@ -283,6 +285,7 @@ async def websocket_lipsync(ws: WebSocket):
         return
 
     avatar_id = "eva"
+    mode = "frame"  # "patch": send face box JPEGs, client composites over the background
     print(f"Lip-sync WS connected")
 
     try:
@@ -294,13 +297,28 @@ async def websocket_lipsync(ws: WebSocket):
                 msg = json.loads(data["text"])
                 if msg.get("type") == "config":
                     avatar_id = msg.get("avatar_id", "eva")
-                    await ws.send_json({"type": "ok", "avatar_id": avatar_id})
+                    mode, error = resolve_mode(msg.get("mode", "frame"))
+                    if error:
+                        await ws.send_json({"type": "error", "message": error})
+                    if mode == "patch" and avatar_id not in engine.face_cache:
+                        # No background/box to composite onto yet: stream full frames instead
+                        mode = "frame"
+                        await ws.send_json({
+                            "type": "error",
+                            "message": f"Avatar {avatar_id} not preprocessed; using 'frame'"
+                        })
+                    reply = {"type": "ok", "avatar_id": avatar_id, "mode": mode}
+                    if mode == "patch":
+                        compositor = engine.face_cache[avatar_id]["compositor"]
+                        reply["background"] = base64.b64encode(compositor.background_jpeg()).decode()
+                        reply["box"] = compositor.patch_box()
+                    await ws.send_json(reply)
 
             elif "bytes" in data:
                 # Receive audio, stream back frames
                 audio_bytes = data["bytes"]
 
-                async for frame in engine.stream_frames(audio_bytes, avatar_id, fps=20):
+                async for frame in engine.stream_frames(audio_bytes, avatar_id, fps=20, mode=mode):
                     await ws.send_bytes(frame)
 
                 await ws.send_json({"type": "done"})
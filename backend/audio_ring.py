@@ -0,0 +1,105 @@
+"""
+Audio Ring - fixed-capacity float32 sample buffer for streaming lip-sync
+
+StreamingProcessor used to np.concatenate the whole pending buffer on every
+incoming packet and slice + copy it again per batch: quadratic in buffered
+audio and a fresh allocation per packet per websocket. AudioRingBuffer
+preallocates its storage once per session:
+
+- samples are written twice, at i and i + capacity (a "mirrored" ring), so
+  any window of up to capacity samples is one contiguous slice: batch
+  reads are zero-copy numpy views, whatever the wrap-around
+- consumed samples stay readable as left context (up to `history`) until
+  new audio overwrites them - Whisper sees real audio before the chunk
+  instead of zero padding
+- write() takes what fits and reports how much; callers drain batches and
+  write the rest (feed loops), so memory per session is constant
+- pad() appends silence in place for the final partial batch
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 ring with contiguous read windows."""
+
+    def __init__(self, capacity: int, history: int = 0):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 <= history < capacity:
+            raise ValueError("history must be in [0, capacity)")
+        self.capacity = capacity
+        self.history = history
+        self._data = np.zeros(2 * capacity, dtype=np.float32)
+        self._read = 0    # absolute sample counters (never wrap)
+        self._write = 0
+
+    def __len__(self) -> int:
+        """Unread samples."""
+        return self._write - self._read
+
+    def _retained(self) -> int:
+        """Consumed samples still kept as context."""
+        return min(self.history, self._read)
+
+    @property
+    def free(self) -> int:
+        return self.capacity - len(self) - self._retained()
+
+    def _store(self, samples: Optional[np.ndarray], n: int) -> None:
+        """Write n samples (zeros if samples is None) at the write position, mirrored."""
+        cap = self.capacity
+        pos = self._write % cap
+        first = min(n, cap - pos)
+        segments = ((pos, 0, first), (0, first, n - first))
+        for dst, src, length in segments:
+            if length <= 0:
+                continue
+            value = 0.0 if samples is None else samples[src:src + length]
+            self._data[dst:dst + length] = value
+            self._data[dst + cap:dst + cap + length] = value
+        self._write += n
+
+    def write(self, samples: np.ndarray) -> int:
+        """Append as many samples as fit; returns how many were taken."""
+        n = min(len(samples), self.free)
+        if n > 0:
+            self._store(np.asarray(samples[:n], dtype=np.float32), n)
+        return n
+
+    def pad(self, n: int) -> int:
+        """Append up to n samples of silence in place; returns how many were added."""
+        n = min(max(0, n), self.free)
+        if n > 0:
+            self._store(None, n)
+        return n
+
+    def window(self, n: int, context: int = 0) -> Tuple[np.ndarray, int]:
+        """Read-only view of the next n unread samples plus up to `context` before them.
+
+        Returns (view, context_len). The view aliases the ring: use it before
+        the next write().
+        """
+        if n > len(self):
+            raise ValueError(f"only {len(self)} samples buffered, {n} requested")
+        context = min(context, self._retained())
+        start = (self._read - context) % self.capacity
+        view = self._data[start:start + context + n]
+        view.flags.writeable = False
+        return view, context
+
+    def consume(self, n: int) -> None:
+        """Mark the next n unread samples as read (they become context)."""
+        if n > len(self):
+            raise ValueError(f"only {len(self)} samples buffered, {n} consumed")
+        self._read += n
+
+    def clear(self) -> None:
+        """Drop everything, including context."""
+        self._read = self._write = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
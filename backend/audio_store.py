@@ -0,0 +1,649 @@
+"""
+Audio Store - unified content-addressed TTS audio cache
+
+Replaces the former per-module caches (main.TTSCache, audio_cache.AudioCache,
+tts_optimizer.TTSChunkCache) with a single store shared by every TTS entry
+point.
+
+Features:
+- Content addressing: key = hash(namespace, voice, rate, pitch, canonical text)
+- Per-format variants (wav / mp3 / pcm) of the same utterance
+- Byte-budgeted in-memory LRU tier (O(1) get/evict)
+- mmap-backed append-only segment files on disk, shared by all uvicorn
+  workers on the node (flock-serialized appends, incremental index refresh,
+  rate-limited on misses)
+- Async callers (get_async / get_or_generate) only touch the
+  memory tier on the event loop; disk lookups, refreshes and appends run in
+  a worker thread under their own lock, so a slow disk or a flock held by
+  another worker never stalls the loop
+- Disk budget enforced by segment rotation (oldest segment dropped)
+- Single-flight generation: concurrent misses for one utterance synthesize once
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Supported audio formats (code stored on disk)
+FORMATS = {"wav": 1, "mp3": 2, "pcm": 3}
+_FORMAT_NAMES = {code: name for name, code in FORMATS.items()}
+
+# Preference order when the caller accepts any format. Raw PCM carries no
+# sample rate/container, so it is only returned when asked for explicitly.
+_ANY_FORMAT_ORDER = ("mp3", "wav")
+
+# On-disk record: magic, key digest, format code, text length, audio length
+_RECORD = struct.Struct("<4s16sBHI")
+_MAGIC = b"EVA1"
+_MAX_TEXT_BYTES = 200
+
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".bin"
+
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", os.path.join(tempfile.gettempdir(), "eva_audio_store"))
+AUDIO_STORE_MEMORY_MB = int(os.getenv("AUDIO_STORE_MEMORY_MB", "64"))
+AUDIO_STORE_DISK_MB = int(os.getenv("AUDIO_STORE_DISK_MB", "256"))
+# Minimum interval between disk index refreshes on a miss (other workers'
+# appends become visible within this delay)
+AUDIO_STORE_REFRESH_MS = float(os.getenv("AUDIO_STORE_REFRESH_MS", "500"))
+
+
+def canonical_text(text: str) -> str:
+    """Normalize whitespace so equivalent texts share one address."""
+    return " ".join(text.split())
+
+
+def make_key(text: str, voice: str = "", rate: str = "", pitch: str = "", namespace: str = "tts") -> bytes:
+    """Content address of an utterance (16-byte digest)."""
+    content = "\0".join((namespace, voice, rate, pitch, canonical_text(text)))
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+
+def detect_format(audio: bytes) -> str:
+    """Guess the container format of audio bytes."""
+    if audio[:4] == b"RIFF":
+        return "wav"
+    if audio[:3] == b"ID3" or (len(audio) > 1 and audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return "pcm"
+
+
+def wav_to_pcm(audio: bytes) -> Optional[bytes]:
+    """Extract raw PCM samples from a WAV file (None if not a plain PCM WAV)."""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    offset = 12
+    while offset + 8 <= len(audio):
+        chunk_id = audio[offset:offset + 4]
+        chunk_size = int.from_bytes(audio[offset + 4:offset + 8], "little")
+        if chunk_id == b"data":
+            return audio[offset + 8:offset + 8 + chunk_size]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+@dataclass
+class AudioEntry:
+    """In-memory audio entry."""
+    audio: bytes
+    text: str
+    created_at: float
+    hits: int = 0
+
+
+class _Segment:
+    """One append-only segment file, mapped read-only."""
+
+    def __init__(self, number: int, path: str):
+        self.number = number
+        self.path = path
+        self.scanned = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def view(self, size: int) -> Optional[mmap.mmap]:
+        """Map the file up to at least `size` bytes (re-maps when it grew)."""
+        if self._mmap is not None and len(self._mmap) >= size:
+            return self._mmap
+        self.close()
+        if size == 0:
+            return None
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AudioStore:
+    """Content-addressed audio store with memory and shared disk tiers.
+
+    Usage:
+        store = AudioStore(memory_mb=64, disk_mb=256, disk_path="/tmp/eva_audio_store")
+
+        audio = store.get("Bonjour", voice="gpu", fmt="mp3")
+        store.put("Bonjour", mp3_bytes, voice="gpu")
+
+        audio = await store.get_or_generate("Bonjour", generate, voice="gpu", fmt="mp3")
+    """
+
+    def __init__(
+        self,
+        memory_mb: float = 64,
+        disk_mb: float = 256,
+        disk_path: Optional[str] = None,
+        max_entry_bytes: Optional[int] = None,
+        refresh_interval_ms: float = AUDIO_STORE_REFRESH_MS,
+    ):
+        """Initialize audio store.
+
+        Args:
+            memory_mb: In-memory tier budget in MB
+            disk_mb: Disk tier budget in MB (split across two segments)
+            disk_path: Directory for segment files (None = memory only)
+            max_entry_bytes: Largest cacheable entry (default 10% of memory budget)
+            refresh_interval_ms: Minimum time between disk index refreshes on a miss
+        """
+        self._memory: OrderedDict[Tuple[bytes, str], AudioEntry] = OrderedDict()
+        self._memory_bytes = 0
+        self._max_memory_bytes = int(memory_mb * 1024 * 1024)
+        self._max_entry_bytes = max_entry_bytes or max(1, self._max_memory_bytes // 10)
+        self._max_segment_bytes = int(disk_mb * 1024 * 1024) // 2
+        self._disk_path = disk_path
+        self._refresh_interval = max(0.0, refresh_interval_ms) / 1000
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()       # memory tier and stats (never held across disk I/O)
+        self._disk_lock = threading.RLock()  # disk index, segments and file locks
+
+        # Disk index: (digest, fmt) -> (segment number, offset, length, text)
+        self._disk_index: Dict[Tuple[bytes, str], Tuple[int, int, int, str]] = {}
+        self._segments: Dict[int, _Segment] = {}
+
+        # Single-flight generation per (digest, fmt)
+        self._inflight: Dict[Tuple[bytes, str], asyncio.Future] = {}
+
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "derived_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_writes": 0,
+            "disk_rotations": 0,
+            "generations": 0,
+            "coalesced": 0,
+            "generation_time_saved_ms": 0.0,
+        }
+        self._generation_ms: Dict[bytes, float] = {}
+
+        if disk_path:
+            try:
+                os.makedirs(disk_path, exist_ok=True)
+                self._refresh_disk()
+            except OSError as e:
+                print(f"⚠️ Audio store disk tier disabled: {e}")
+                self._disk_path = None
+
+    # ── Memory tier ──────────────────────────────────────────────
+
+    def _memory_get(self, slot: Tuple[bytes, str]) -> Optional[bytes]:
+        entry = self._memory.get(slot)
+        if entry is None:
+            return None
+        entry.hits += 1
+        self._memory.move_to_end(slot)
+        return entry.audio
+
+    def _memory_put(self, slot: Tuple[bytes, str], audio: bytes, text: str) -> None:
+        old = self._memory.pop(slot, None)
+        if old is not None:
+            self._memory_bytes -= len(old.audio)
+        self._memory[slot] = AudioEntry(audio=audio, text=text, created_at=time.time())
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self._max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.audio)
+            self._stats["evictions"] += 1
+
+    # ── Disk tier ────────────────────────────────────────────────
+
+    def _lock_file(self):
+        return open(os.path.join(self._disk_path, ".lock"), "a+b")
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self._disk_path):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self._disk_path, f"{_SEGMENT_PREFIX}{number:08d}{_SEGMENT_SUFFIX}")
+
+    def _refresh_disk(self) -> None:
+        """Pick up segments and records appended by any worker since last scan."""
+        if not self._disk_path:
+            return
+        self._last_refresh = time.monotonic()
+
+        numbers = self._segment_numbers()
+        live = set(numbers)
+
+        # Forget rotated-out segments
+        for number in list(self._segments):
+            if number not in live:
+                self._segments.pop(number).close()
+                self._disk_index = {
+                    slot: loc for slot, loc in self._disk_index.items() if loc[0] != number
+                }
+
+        with self._lock_file() as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            for number in numbers:
+                segment = self._segments.get(number)
+                if segment is None:
+                    segment = self._segments[number] = _Segment(number, self._segment_path(number))
+                self._scan(segment)
+
+    def _scan(self, segment: _Segment) -> None:
+        """Index complete records from segment.scanned to end of file."""
+        size = segment.size()
+        if size <= segment.scanned:
+            return
+        view = segment.view(size)
+        offset = segment.scanned
+        while offset + _RECORD.size <= size:
+            magic, digest, fmt_code, text_len, audio_len = _RECORD.unpack_from(view, offset)
+            end = offset + _RECORD.size + text_len + audio_len
+            if magic != _MAGIC or end > size:
+                break
+            text_start = offset + _RECORD.size
+            text = bytes(view[text_start:text_start + text_len]).decode("utf-8", "replace")
+            fmt = _FORMAT_NAMES.get(fmt_code)
+            if fmt is not None:
+                self._disk_index[(digest, fmt)] = (segment.number, text_start + text_len, audio_len, text)
+            offset = end
+        segment.scanned = offset
+
+    def _disk_get(self, slot: Tuple[bytes, str]) -> Optional[bytes]:
+        location = self._disk_index.get(slot)
+        if location is None:
+            return None
+        number, offset, length, text = location
+        segment = self._segments.get(number)
+        if segment is None:
+            return None
+        view = segment.view(offset + length)
+        if view is None:
+            return None
+        audio = bytes(view[offset:offset + length])
+
+        # Keep hot entries alive across rotation
+        active = max(self._segments) if self._segments else number
+        if number != active:
+            self._disk_put(slot, audio, text)
+        return audio
+
+    def _disk_put(self, slot: Tuple[bytes, str], audio: bytes, text: str) -> None:
+        if not self._disk_path or self._max_segment_bytes <= 0:
+            return
+        digest, fmt = slot
+        text_bytes = text.encode("utf-8")[:_MAX_TEXT_BYTES]
+        record = _RECORD.pack(_MAGIC, digest, FORMATS[fmt], len(text_bytes), len(audio)) + text_bytes + audio
+
+        try:
+            with self._lock_file() as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                numbers = self._segment_numbers()
+                active = numbers[-1] if numbers else 0
+                path = self._segment_path(active)
+                current_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+                if current_size and current_size + len(record) > self._max_segment_bytes:
+                    # Rotate: new active segment, keep only the previous one
+                    active += 1
+                    path = self._segment_path(active)
+                    for old in numbers[:-1]:
+                        os.unlink(self._segment_path(old))
+                    self._stats["disk_rotations"] += 1
+
+                with open(path, "ab") as f:
+                    f.write(record)
+            self._stats["disk_writes"] += 1
+        except OSError as e:
+            print(f"⚠️ Audio store disk write failed: {e}")
+
+    # ── Public API ───────────────────────────────────────────────
+
+    def _memory_lookup(self, digest: bytes, fmt: str) -> Tuple[Optional[bytes], str]:
+        """Memory tier lookup (caller holds _lock). Returns (audio, tier)."""
+        audio = self._memory_get((digest, fmt))
+        if audio is not None:
+            return audio, "memory"
+        # PCM can be derived from a cached WAV without re-synthesis
+        if fmt == "pcm":
+            wav = self._memory_get((digest, "wav"))
+            pcm = wav_to_pcm(wav) if wav is not None else None
+            if pcm is not None:
+                self._memory_put((digest, "pcm"), pcm, "")
+                return pcm, "derived"
+        return None, ""
+
+    def _disk_lookup(self, digest: bytes, fmt: str) -> Tuple[Optional[bytes], str, str]:
+        """Disk tier lookup (caller holds _disk_lock). Returns (audio, tier, text)."""
+        slot = (digest, fmt)
+        audio = self._disk_get(slot)
+        if audio is not None:
+            location = self._disk_index.get(slot)
+            return audio, "disk", location[3] if location else ""
+        if fmt == "pcm":
+            wav, _, _ = self._disk_lookup(digest, "wav")
+            pcm = wav_to_pcm(wav) if wav is not None else None
+            if pcm is not None:
+                return pcm, "derived", ""
+        return None, "", ""
+
+    def _hit(self, digest: bytes, tier: str) -> None:
+        self._stats[f"{tier}_hits"] += 1
+        self._stats["generation_time_saved_ms"] += self._generation_ms.get(digest, 0.0)
+
+    def _find_memory(self, digest: bytes, formats: Tuple[str, ...]) -> Optional[bytes]:
+        with self._lock:
+            for fmt in formats:
+                audio, tier = self._memory_lookup(digest, fmt)
+                if audio is not None:
+                    self._hit(digest, tier)
+                    return audio
+        return None
+
+    def _find_disk(self, digest: bytes, formats: Tuple[str, ...]) -> Optional[bytes]:
+        """Disk tier lookup, promoting a hit to memory (blocking: file locks, mmap)."""
+        if not self._disk_path:
+            return None
+        with self._disk_lock:
+            # Second pass picks up records other workers appended since last scan
+            for refresh in (False, True):
+                if refresh:
+                    if time.monotonic() - self._last_refresh < self._refresh_interval:
+                        break
+                    self._refresh_disk()
+                for fmt in formats:
+                    audio, tier, text = self._disk_lookup(digest, fmt)
+                    if audio is not None:
+                        with self._lock:
+                            self._memory_put((digest, fmt), audio, text)
+                            self._hit(digest, tier)
+                        return audio
+        return None
+
+    def _miss(self) -> None:
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def get(
+        self,
+        text: str,
+        voice: str = "",
+        fmt: Optional[str] = None,
+        rate: str = "",
+        pitch: str = "",
+        namespace: str = "tts",
+    ) -> Optional[bytes]:
+        """Get cached audio (blocking: may read the disk tier).
+
+        Args:
+            text: Utterance text
+            voice: Voice / engine identifier
+            fmt: "wav", "mp3" or "pcm" (None = any container format)
+            rate: Rate setting used for synthesis
+            pitch: Pitch setting used for synthesis
+            namespace: Key namespace (e.g. "tts", "chunk", "filler")
+
+        Returns:
+            Audio bytes or None if not cached
+        """
+        digest = make_key(text, voice, rate, pitch, namespace)
+        formats = (fmt,) if fmt else _ANY_FORMAT_ORDER
+        audio = self._find_memory(digest, formats)
+        if audio is None:
+            audio = self._find_disk(digest, formats)
+        if audio is None:
+            self._miss()
+        return audio
+
+    async def get_async(
+        self,
+        text: str,
+        voice: str = "",
+        fmt: Optional[str] = None,
+        rate: str = "",
+        pitch: str = "",
+        namespace: str = "tts",
+    ) -> Optional[bytes]:
+        """get() for the event loop: memory hits inline, the disk tier in a thread."""
+        digest = make_key(text, voice, rate, pitch, namespace)
+        formats = (fmt,) if fmt else _ANY_FORMAT_ORDER
+        audio = self._find_memory(digest, formats)
+        if audio is None and self._disk_path:
+            audio = await asyncio.to_thread(self._find_disk, digest, formats)
+        if audio is None:
+            self._miss()
+        return audio
+
+    def _put_memory(
+        self,
+        text: str,
+        audio: bytes,
+        voice: str,
+        fmt: Optional[str],
+        rate: str,
+        pitch: str,
+        namespace: str,
+        generation_time_ms: float,
+    ) -> Optional[Tuple[Tuple[bytes, str], str]]:
+        """Memory half of put(); returns (slot, text) to write to disk, None if rejected."""
+        if not audio or len(audio) > self._max_entry_bytes:
+            return None
+        fmt = fmt or detect_format(audio)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported audio format: {fmt}")
+
+        digest = make_key(text, voice, rate, pitch, namespace)
+        slot = (digest, fmt)
+        text = canonical_text(text)
+        with self._lock:
+            self._memory_put(slot, audio, text)
+            if generation_time_ms:
+                self._generation_ms[digest] = generation_time_ms
+                if len(self._generation_ms) > 4096:
+                    self._generation_ms.pop(next(iter(self._generation_ms)))
+        return slot, text
+
+    def _put_disk(self, slot: Tuple[bytes, str], audio: bytes, text: str) -> None:
+        if not self._disk_path:
+            return
+        with self._disk_lock:
+            if slot not in self._disk_index:
+                self._disk_put(slot, audio, text)
+
+    def put(
+        self,
+        text: str,
+        audio: bytes,
+        voice: str = "",
+        fmt: Optional[str] = None,
+        rate: str = "",
+        pitch: str = "",
+        namespace: str = "tts",
+        generation_time_ms: float = 0.0,
+    ) -> bool:
+        """Store audio for an utterance (format detected if not given; blocking disk append).
+
+        Returns:
+            True if the audio was stored
+        """
+        stored = self._put_memory(text, audio, voice, fmt, rate, pitch, namespace, generation_time_ms)
+        if stored is None:
+            return False
+        self._put_disk(stored[0], audio, stored[1])
+        return True
+
+    async def get_or_generate(
+        self,
+        text: str,
+        generate: Callable[[], Awaitable[Optional[bytes]]],
+        voice: str = "",
+        fmt: Optional[str] = None,
+        rate: str = "",
+        pitch: str = "",
+        namespace: str = "tts",
+        store: bool = True,
+    ) -> Optional[bytes]:
+        """Get cached audio or generate it once, even under concurrent misses.
+
+        Concurrent callers for the same utterance await the first one's
+        generation. If that caller is cancelled, the others retry (one of
+        them generates) instead of inheriting its cancellation.
+
+        Args:
+            store: Keep the generated audio (False = single-flight only)
+        """
+        slot = (make_key(text, voice, rate, pitch, namespace), fmt or "")
+        while True:
+            audio = await self.get_async(text, voice, fmt, rate, pitch, namespace)
+            if audio is not None:
+                return audio
+
+            pending = self._inflight.get(slot)
+            if pending is None:
+                break
+            self._stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This caller was cancelled, not the generation
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[slot] = future
+        try:
+            start = time.time()
+            audio = await generate()
+            self._stats["generations"] += 1
+            stored = None
+            if audio and store:
+                stored = self._put_memory(text, audio, voice, fmt, rate, pitch, namespace,
+                                          generation_time_ms=(time.time() - start) * 1000)
+            future.set_result(audio)  # Waiters don't wait for the disk append
+            if stored is not None and self._disk_path:
+                await asyncio.to_thread(self._put_disk, stored[0], audio, stored[1])
+            return audio
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        except BaseException:
+            future.cancel()  # Waiters retry rather than inherit the cancellation
+            raise
+        finally:
+            self._inflight.pop(slot, None)
+
+    def delete(self, text: str, voice: str = "", rate: str = "", pitch: str = "", namespace: str = "tts") -> bool:
+        """Drop every in-memory format of an utterance (disk records age out)."""
+        digest = make_key(text, voice, rate, pitch, namespace)
+        removed = False
+        with self._lock:
+            for fmt in FORMATS:
+                entry = self._memory.pop((digest, fmt), None)
+                if entry is not None:
+                    self._memory_bytes -= len(entry.audio)
+                    removed = True
+        with self._disk_lock:
+            for fmt in FORMATS:
+                removed = self._disk_index.pop((digest, fmt), None) is not None or removed
+        return removed
+
+    def clear(self, include_disk: bool = False) -> None:
+        """Clear the memory tier (and optionally the shared disk tier)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if include_disk and self._disk_path:
+            with self._disk_lock:
+                with self._lock_file() as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    for number in self._segment_numbers():
+                        os.unlink(self._segment_path(number))
+                for segment in self._segments.values():
+                    segment.close()
+                self._segments.clear()
+                self._disk_index.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics."""
+        # Disk figures are read without _disk_lock, which a thread may hold while waiting on flock
+        segments = list(self._segments.values())
+        disk_bytes = sum(segment.size() for segment in segments)
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["derived_hits"]
+            total = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "generation_time_saved_ms": round(self._stats["generation_time_saved_ms"], 1),
+                "hits": hits,
+                "hit_rate_percent": round(hits / total * 100, 1) if total else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 2),
+                "max_memory_mb": round(self._max_memory_bytes / 1024 / 1024, 2),
+                "disk_entries": len(self._disk_index),
+                "disk_mb": round(disk_bytes / 1024 / 1024, 2),
+                "max_disk_mb": round(self._max_segment_bytes * 2 / 1024 / 1024, 2),
+                "disk_path": self._disk_path,
+            }
+
+    def get_entries(self, limit: int = 200) -> List[Dict[str, Any]]:
+        """List in-memory entries, most recently used first."""
+        with self._lock:
+            entries = list(self._memory.items())[-limit:]
+        return [
+            {
+                "text": entry.text[:50] + "..." if len(entry.text) > 50 else entry.text,
+                "format": fmt,
+                "size_kb": round(len(entry.audio) / 1024, 1),
+                "access_count": entry.hits,
+                "age_hours": round((time.time() - entry.created_at) / 3600, 1),
+            }
+            for (_, fmt), entry in reversed(entries)
+        ]
+
+
+# Singleton instance shared by all TTS entry points in this process
+audio_store = AudioStore(
+    memory_mb=AUDIO_STORE_MEMORY_MB,
+    disk_mb=AUDIO_STORE_DISK_MB,
+    disk_path=AUDIO_STORE_DIR or None,
+)
@@ -0,0 +1,203 @@
+"""
+Audio Transport - fixed-duration PCM/Opus frames for the voice websockets
+
+The legacy transport sends one MP3/WAV blob per sentence. In frame mode the
+server instead sends every utterance as a run of fixed-duration frames (20ms
+by default), so the client can start playback on the first frame and stop
+exactly at a frame boundary on interrupt.
+
+Negotiation (client -> server, inside the websocket "config" message):
+    {"type": "config", "audio_transport": {"mode": "frames",
+                                           "codecs": ["opus", "pcm16"],
+                                           "frame_ms": 20}}
+The server picks the first codec it supports and echoes the result in
+config_ok as "audio_transport". Clients that don't ask stay on blobs.
+
+Wire format (one binary websocket message per frame):
+    header   <BBHII  codec, flags, utterance, seq, timestamp_ms
+    payload  mono int16 little-endian PCM, or one Opus packet
+
+seq and timestamp_ms are monotonic for the whole connection; timestamp_ms is
+the media time of the frame's first sample. The last frame of an utterance
+is zero-padded to the full frame duration.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+# Opus is optional: frame mode falls back to PCM when it is missing
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except Exception:
+    opuslib = None
+    OPUS_AVAILABLE = False
+
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "20"))
+
+CODECS = {"pcm16": 1, "opus": 2}
+FRAME_DURATIONS_MS = (10, 20, 40, 60)  # Valid for both PCM and Opus
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+FLAG_START = 0x01  # First frame of an utterance
+FLAG_END = 0x02    # Last frame of an utterance
+
+_HEADER = struct.Struct("<BBHII")
+FRAME_HEADER_SIZE = _HEADER.size
+
+
+@dataclass
+class TransportConfig:
+    """Negotiated audio transport for one websocket connection."""
+    mode: str = "blob"  # "blob" (whole utterance) or "frames"
+    codec: str = "pcm16"
+    frame_ms: int = AUDIO_FRAME_MS
+    sample_rate: int = 16000
+
+    @property
+    def is_frames(self) -> bool:
+        return self.mode == "frames"
+
+    @property
+    def samples_per_frame(self) -> int:
+        return self.sample_rate * self.frame_ms // 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.is_frames:
+            return {"mode": "blob"}
+        return {
+            "mode": "frames",
+            "codec": self.codec,
+            "frame_ms": self.frame_ms,
+            "sample_rate": self.sample_rate,
+            "channels": 1,
+            "header": "<BBHII:codec,flags,utterance,seq,timestamp_ms",
+        }
+
+
+def supported_codecs(sample_rate: int) -> List[str]:
+    """Codecs this server can produce at the given sample rate."""
+    codecs = ["pcm16"]
+    if OPUS_AVAILABLE and sample_rate in OPUS_SAMPLE_RATES:
+        codecs.insert(0, "opus")
+    return codecs
+
+
+def negotiate_transport(request: Optional[Dict[str, Any]], sample_rate: int) -> TransportConfig:
+    """Resolve a client's audio_transport request to what the server supports.
+
+    Args:
+        request: Client request ({"mode", "codecs" or "codec", "frame_ms"})
+        sample_rate: Sample rate of the TTS engine feeding the transport
+
+    Returns:
+        TransportConfig (mode "blob" unless frames were requested)
+    """
+    if not isinstance(request, dict) or request.get("mode") != "frames":
+        return TransportConfig(sample_rate=sample_rate)
+
+    wanted = request.get("codecs") or [request.get("codec", "pcm16")]
+    if isinstance(wanted, str):
+        wanted = [wanted]
+    available = supported_codecs(sample_rate)
+    codec = next((c for c in wanted if c in available), "pcm16")
+
+    frame_ms = request.get("frame_ms", AUDIO_FRAME_MS)
+    if frame_ms not in FRAME_DURATIONS_MS:
+        frame_ms = AUDIO_FRAME_MS if AUDIO_FRAME_MS in FRAME_DURATIONS_MS else 20
+
+    return TransportConfig(mode="frames", codec=codec, frame_ms=frame_ms, sample_rate=sample_rate)
+
+
+def parse_frame_header(frame: bytes) -> Dict[str, int]:
+    """Decode the header of a transport frame."""
+    codec, flags, utterance, seq, timestamp_ms = _HEADER.unpack_from(frame)
+    return {
+        "codec": codec,
+        "flags": flags,
+        "utterance": utterance,
+        "seq": seq,
+        "timestamp_ms": timestamp_ms,
+    }
+
+
+class AudioFramer:
+    """Cuts utterances into numbered, timestamped frames for one connection.
+
+    Holds the connection's sequence/media clock and, for Opus, its stateful
+    encoder, so use one framer per websocket.
+    """
+
+    def __init__(self, config: TransportConfig):
+        self.config = config
+        self.next_seq = 0
+        self.timestamp_ms = 0
+        self.utterance = 0
+        self._codec_id = CODECS[config.codec]
+        self._frame_bytes = config.samples_per_frame * 2
+        self._opus = None
+        if config.codec == "opus":
+            self._opus = opuslib.Encoder(config.sample_rate, 1, opuslib.APPLICATION_VOIP)
+
+        self.stats = {"utterances": 0, "frames": 0, "payload_bytes": 0, "pcm_bytes": 0}
+
+    def payloads(self, pcm: bytes) -> List[bytes]:
+        """Cut one utterance of mono int16 PCM into frame payloads (may encode: call off-loop for Opus)."""
+        if not pcm:
+            return []
+        if len(pcm) % 2:
+            pcm = pcm[:-1]
+
+        size = self._frame_bytes
+        payloads = []
+        for index in range(max(1, -(-len(pcm) // size))):
+            payload = pcm[index * size:(index + 1) * size]
+            if len(payload) < size:
+                payload += b"\x00" * (size - len(payload))
+            if self._opus is not None:
+                payload = self._opus.encode(payload, self.config.samples_per_frame)
+            payloads.append(payload)
+        self.stats["pcm_bytes"] += len(pcm)
+        return payloads
+
+    def iter_frames(self, payloads: List[bytes]) -> Iterator[bytes]:
+        """Number and timestamp an utterance's payloads as they are taken.
+
+        seq and timestamp_ms only advance for frames actually pulled, so a
+        sender that stops early (interrupt) leaves the clock at the first
+        unsent frame and the next utterance continues without a gap.
+        """
+        if not payloads:
+            return
+        utterance = self.utterance
+        self.utterance += 1
+        self.stats["utterances"] += 1
+        count = len(payloads)
+        for index, payload in enumerate(payloads):
+            flags = 0
+            if index == 0:
+                flags |= FLAG_START
+            if index == count - 1:
+                flags |= FLAG_END
+            header = _HEADER.pack(self._codec_id, flags, utterance & 0xFFFF,
+                                  self.next_seq & 0xFFFFFFFF, self.timestamp_ms & 0xFFFFFFFF)
+            self.next_seq += 1
+            self.timestamp_ms += self.config.frame_ms
+            self.stats["frames"] += 1
+            self.stats["payload_bytes"] += len(payload)
+            yield header + payload
+
+    def frames(self, pcm: bytes) -> List[bytes]:
+        """Frame one whole utterance (may encode: call off-loop for Opus)."""
+        return list(self.iter_frames(self.payloads(pcm)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get framing statistics (compression ratio ~1.0 for PCM)."""
+        pcm = self.stats["pcm_bytes"]
+        return {
+            **self.stats,
+            **self.config.to_dict(),
+            "compression_ratio": round(pcm / self.stats["payload_bytes"], 2) if self.stats["payload_bytes"] else 1.0,
+        }
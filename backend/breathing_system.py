@@ -11,13 +11,18 @@ Features:
 - Hesitations naturelles (euh, hmm, enfin) inserees dans le texte
 - Pauses respiratoires via ponctuation et ellipses
 - Variations aleatoires pour eviter la monotonie
+- Variantes deterministes (seed) pour un cache TTS stable
 - 100% compatible avec Edge-TTS (pas de SSML custom)
 """
 
+import os
 import re
 import random
 from typing import Optional
 
+# Nombre de variantes naturalisees par phrase (chaque variante est cachable)
+NATURAL_VARIANTS = int(os.getenv("TTS_NATURAL_VARIANTS", "3"))
+
 
 class NaturalBreathingSystem:
     """Systeme de respiration et hesitations naturelles pour voix synthetique."""
@@ -75,7 +80,7 @@ class NaturalBreathingSystem:
         """Reset le compteur d'hesitations pour une nouvelle reponse."""
         self._hesitation_count = 0
 
-    def insert_hesitations(self, text: str) -> str:
+    def insert_hesitations(self, text: str, rng=None) -> str:
         """Insere des hesitations naturelles dans le texte.
 
         Les hesitations sont ajoutees AVANT la synthese TTS, donc le TTS
@@ -83,10 +88,12 @@ class NaturalBreathingSystem:
 
         Args:
             text: Texte original
+            rng: Generateur aleatoire (module random par defaut)
 
         Returns:
             Texte avec hesitations inserees
         """
+        rng = rng or random
         if not self.HESITATION_CONFIG["enabled"]:
             return text
 
@@ -94,13 +101,13 @@ class NaturalBreathingSystem:
             return text
 
         # Probabilite de ne pas ajouter d'hesitation
-        if random.random() > self.HESITATION_CONFIG["probability"]:
+        if rng.random() > self.HESITATION_CONFIG["probability"]:
             return text
 
         result = text
 
         # Methode 1: Patterns specifiques (60% du temps)
-        if random.random() < 0.6:
+        if rng.random() < 0.6:
             for pattern, replacement in self.HESITATION_INSERT_PATTERNS:
                 if pattern.search(result):
                     result = pattern.sub(replacement, result, count=1)
@@ -108,8 +115,8 @@ class NaturalBreathingSystem:
                     return result
 
         # Methode 2: Insertion en debut (pour phrases longues)
-        if len(text) > 60 and random.random() < 0.4:
-            hesitation = random.choice(self.HESITATIONS_FR)
+        if len(text) > 60 and rng.random() < 0.4:
+            hesitation = rng.choice(self.HESITATIONS_FR)
             # Ne pas ajouter si commence deja par une interjection
             starts_with = any(
                 text.lower().startswith(h.split('.')[0].lower())
@@ -121,27 +128,29 @@ class NaturalBreathingSystem:
                 return result
 
         # Methode 3: Apres une virgule
-        if ',' in text and random.random() < 0.3:
+        if ',' in text and rng.random() < 0.3:
             parts = text.split(',', 1)
             if len(parts) == 2 and len(parts[1]) > 20:
-                micro = random.choice(self.MICRO_HESITATIONS_FR)
+                micro = rng.choice(self.MICRO_HESITATIONS_FR)
                 result = f"{parts[0]}, {micro}...{parts[1]}"
                 self._hesitation_count += 1
                 return result
 
         return text
 
-    def add_breathing_pauses(self, text: str) -> str:
+    def add_breathing_pauses(self, text: str, rng=None) -> str:
         """Ajoute des pauses respiratoires dans le texte via des ellipses.
 
         Edge-TTS interprete les ellipses comme des pauses naturelles.
 
         Args:
             text: Texte original
+            rng: Generateur aleatoire (module random par defaut)
 
         Returns:
             Texte avec pauses de respiration ajoutees
         """
+        rng = rng or random
         if not self.BREATH_CONFIG["enabled"]:
             return text
 
@@ -151,13 +160,13 @@ class NaturalBreathingSystem:
         result = text
 
         # Son de reflexion au debut si texte long
-        if len(text) > 100 and random.random() < 0.25:
+        if len(text) > 100 and rng.random() < 0.25:
             starts_with = any(
                 text.lower().startswith(s.split('.')[0].lower())
                 for s in self.THINKING_SOUNDS + self.HESITATIONS_FR
             )
             if not starts_with:
-                sound = random.choice(self.THINKING_SOUNDS)
+                sound = rng.choice(self.THINKING_SOUNDS)
                 result = f"{sound} {text[0].lower()}{text[1:]}"
 
         # Pauses subtiles entre les phrases
@@ -168,15 +177,15 @@ class NaturalBreathingSystem:
                 new_parts.append(part)
                 # Apres la ponctuation, potentiellement ajouter une pause
                 if re.match(r'^[.!?]+$', part) and i < len(sentences) - 2:
-                    if random.random() < self.BREATH_CONFIG["probability"]:
+                    if rng.random() < self.BREATH_CONFIG["probability"]:
                         # Ellipse = pause naturelle dans TTS
-                        pause = random.choice(['', '..', ' '])
+                        pause = rng.choice(['', '..', ' '])
                         new_parts.append(pause)
             result = ''.join(new_parts)
 
         return result
 
-    def add_micro_pauses(self, text: str) -> str:
+    def add_micro_pauses(self, text: str, rng=None) -> str:
         """Ajoute des micro-pauses dans les phrases longues.
 
         Insere des ellipses apres les mots de liaison pour creer
@@ -184,43 +193,50 @@ class NaturalBreathingSystem:
 
         Args:
             text: Texte original
+            rng: Generateur aleatoire (module random par defaut)
 
         Returns:
             Texte avec micro-pauses ajoutees
         """
+        rng = rng or random
         words = text.split()
         if len(words) > 15 and ',' not in text and '...' not in text:
             for i, word in enumerate(words):
                 clean = word.lower().strip('.,!?')
                 if clean in self.LIAISON_WORDS and 5 < i < len(words) - 5:
-                    if random.random() < 0.4:
+                    if rng.random() < 0.4:
                         words[i] = word + '...'
                         break
             return ' '.join(words)
         return text
 
-    def process_text_for_naturalness(self, text: str) -> str:
+    def process_text_for_naturalness(self, text: str, variant: Optional[int] = None) -> str:
         """Traitement complet du texte pour le rendre plus naturel.
 
         Applique hesitations, pauses de respiration et micro-pauses.
 
         Args:
             text: Texte original
+            variant: Identifiant de variante. Si fourni, le resultat est
+                deterministe pour (text, variant), ce qui permet de cacher
+                l'audio de chaque variante.
 
         Returns:
             Texte traite avec hesitations et pauses naturelles
         """
+        rng = random.Random(f"{variant}:{text}") if variant is not None else None
+
         # Reset le compteur pour une nouvelle reponse
         self.reset_hesitation_count()
 
         # 1. Inserer des hesitations (occasionnellement)
-        result = self.insert_hesitations(text)
+        result = self.insert_hesitations(text, rng)
 
         # 2. Ajouter des pauses de respiration
-        result = self.add_breathing_pauses(result)
+        result = self.add_breathing_pauses(result, rng)
 
         # 3. Ajouter des micro-pauses dans les phrases longues
-        result = self.add_micro_pauses(result)
+        result = self.add_micro_pauses(result, rng)
 
         return result
 
@@ -258,18 +274,24 @@ breathing_system = NaturalBreathingSystem()
 
 
 # Fonction utilitaire pour acces direct
-def make_natural(text: str) -> str:
+def make_natural(text: str, variant: Optional[int] = None) -> str:
     """Rend un texte plus naturel avec hesitations et pauses.
 
     Fonction utilitaire pour un acces simple au systeme de respiration.
 
     Args:
         text: Texte original
+        variant: Identifiant de variante deterministe (None = aleatoire)
 
     Returns:
         Texte avec hesitations et pauses naturelles
     """
-    return breathing_system.process_text_for_naturalness(text)
+    return breathing_system.process_text_for_naturalness(text, variant)
+
+
+def pick_natural_variant() -> int:
+    """Choisit une variante de naturalisation parmi NATURAL_VARIANTS."""
+    return random.randrange(max(1, NATURAL_VARIANTS))
 
 
 if __name__ == "__main__":
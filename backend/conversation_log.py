@@ -0,0 +1,355 @@
+"""
+Conversation Log - append-only message persistence with group commit
+
+The old persistence re-serialized the whole conversation to JSON and ran
+INSERT OR REPLACE + commit() on every message: O(history) work and one
+fsync per turn. Here every message is one small row:
+
+    messages(id, session_id, role, content, created_at)
+
+- WAL journal with synchronous=NORMAL (no fsync per commit, readers never
+  block the writer)
+- append() only queues the row; a single writer task drains the queue and
+  commits each batch in one transaction (group commit)
+- load() reads only the last N rows of a session, plus anything still
+  queued, so reads always see earlier writes; on the event loop use
+  load_async(), which runs the query in a thread
+- Retention: each batch also trims the sessions it touched to their newest
+  CONVERSATION_RETAIN_MESSAGES rows, so the table doesn't grow without bound
+- Conversations saved by the legacy JSON table are migrated on first load
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Fast JSON (legacy rows only)
+try:
+    import orjson
+
+    def _json_loads(s):
+        return orjson.loads(s)
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+CONVERSATION_LOAD_LIMIT = int(os.getenv("CONVERSATION_LOAD_LIMIT", "20"))
+CONVERSATION_FLUSH_MS = float(os.getenv("CONVERSATION_FLUSH_MS", "50"))
+CONVERSATION_MAX_BATCH = int(os.getenv("CONVERSATION_MAX_BATCH", "500"))
+CONVERSATION_RETAIN_MESSAGES = int(os.getenv("CONVERSATION_RETAIN_MESSAGES", "200"))  # 0 = keep all
+
+# ("append", session_id, role, content, created_at) or ("clear", session_id)
+Op = Tuple[Any, ...]
+
+
+class ConversationLog:
+    """Append-only message log for all sessions, with one writer task.
+
+    Called from an event loop, append() and clear() only queue; the writer
+    task (started on first use if needed) does every write in a thread.
+    Without a loop (tests, scripts) they write through synchronously.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        load_limit: int = CONVERSATION_LOAD_LIMIT,
+        flush_ms: float = CONVERSATION_FLUSH_MS,
+        max_batch: int = CONVERSATION_MAX_BATCH,
+        retain: int = CONVERSATION_RETAIN_MESSAGES,
+    ):
+        self.db_path = db_path
+        self.load_limit = load_limit
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        self.retain = max(0, retain)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)"
+        )
+        self._conn.commit()
+        self._has_legacy = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations'"
+        ).fetchone() is not None
+
+        # _lock guards the connection: held for a whole batch (commit + clearing
+        # _inflight) and for reads, so a reader sees each op either in the
+        # database or in _pending/_inflight, never both. _queue_lock only
+        # guards the two queues and is never held across database work.
+        self._lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._pending: Deque[Op] = deque()
+        self._inflight: List[Op] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._urgent = False
+        self._closed = False
+        self._writer_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "appended": 0,
+            "rows_written": 0,
+            "batches": 0,
+            "max_batch": 0,
+            "loads": 0,
+            "migrated_sessions": 0,
+            "write_errors": 0,
+            "rows_trimmed": 0,
+        }
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        """Queue one message row."""
+        self.stats["appended"] += 1
+        self._enqueue(("append", session_id, role, content, time.time()))
+
+    def clear(self, session_id: str) -> None:
+        """Queue deletion of a session's messages (ordered after its appends)."""
+        self._enqueue(("clear", session_id))
+
+    def _enqueue(self, op: Op) -> None:
+        if self._closed:
+            return
+        with self._queue_lock:
+            self._pending.append(op)
+        if self.running:
+            self._wakeup.set()
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # No loop: write through
+        else:
+            self.start()  # Never write on the event loop
+
+    def commit_soon(self) -> None:
+        """Have the writer commit what's queued now, skipping the group-commit wait."""
+        if self.running:
+            self._urgent = True
+            self._wakeup.set()
+
+    @property
+    def running(self) -> bool:
+        return self._writer_task is not None and not self._writer_task.done()
+
+    def flush(self) -> int:
+        """Synchronously write everything queued. Returns rows written.
+
+        Blocking: only for callers without an event loop, and close().
+        """
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return written
+            written += self._write_batch(batch)
+
+    def _take_batch(self) -> List[Op]:
+        with self._queue_lock:
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                batch.append(self._pending.popleft())
+            if batch:
+                self._inflight = batch
+            return batch
+
+    def _write_batch(self, batch: List[Op]) -> int:
+        """Write a batch in one transaction (runs in a worker thread)."""
+        rows = 0
+        with self._lock:
+            try:
+                appends: List[Tuple] = []
+                touched = set()
+                for op in batch:
+                    if op[0] == "append":
+                        appends.append(op[1:])
+                        touched.add(op[1])
+                        continue
+                    if appends:
+                        self._insert(appends)
+                        rows += len(appends)
+                        appends = []
+                    self._conn.execute("DELETE FROM messages WHERE session_id = ?", (op[1],))
+                    if self._has_legacy:
+                        self._conn.execute("DELETE FROM conversations WHERE session_id = ?", (op[1],))
+                if appends:
+                    self._insert(appends)
+                    rows += len(appends)
+                trimmed = self._trim(touched)
+                self._conn.commit()
+                self.stats["rows_trimmed"] += trimmed
+            except Exception as e:
+                self._conn.rollback()
+                self.stats["write_errors"] += 1
+                print(f"DB save error: {e}")
+                rows = 0
+            finally:
+                with self._queue_lock:
+                    self._inflight = []
+        self.stats["rows_written"] += rows
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        return rows
+
+    def _insert(self, rows: List[Tuple]) -> None:
+        self._conn.executemany(
+            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+    def _trim(self, sessions) -> int:
+        """Keep only the newest `retain` rows of each session (lock held)."""
+        if not self.retain:
+            return 0
+        trimmed = 0
+        for session_id in sessions:
+            trimmed += self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id <= ("
+                "SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.retain),
+            ).rowcount
+        return trimmed
+
+    async def _writer_loop(self) -> None:
+        while True:
+            try:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                # Group commit: let concurrent turns join this batch
+                if self.flush_ms > 0 and not self._urgent:
+                    try:
+                        await asyncio.wait_for(self._wait_urgent(), self.flush_ms / 1000)
+                    except asyncio.TimeoutError:
+                        pass
+                self._urgent = False
+                while True:
+                    batch = self._take_batch()
+                    if not batch:
+                        break
+                    await asyncio.to_thread(self._write_batch, batch)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"⚠️ Conversation writer error: {e}")
+
+    async def _wait_urgent(self) -> None:
+        """Return early from the group-commit wait once commit_soon() is called."""
+        while not self._urgent:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def start(self) -> asyncio.Task:
+        """Start the writer task on the running loop."""
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            if self._pending:
+                self._wakeup.set()
+        return self._writer_task
+
+    async def close(self) -> None:
+        """Stop the writer, flush what is left and close the database."""
+        self._closed = True
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+        # A batch interrupted mid-await already committed under the lock
+        await asyncio.to_thread(self._flush_and_close)
+
+    def _flush_and_close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------- reads
+
+    def load(self, session_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, str]]]:
+        """Last `limit` messages of a session, oldest first (None if unknown).
+
+        Blocking (waits for a batch being committed); use load_async() on
+        the event loop.
+        """
+        limit = limit or self.load_limit
+        self.stats["loads"] += 1
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+            with self._queue_lock:
+                queued = [op for op in self._inflight + list(self._pending) if op[1] == session_id]
+
+        messages = [{"role": role, "content": content} for role, content in reversed(rows)]
+        if not messages and not queued:
+            return self._migrate_legacy(session_id, limit)
+
+        for op in queued:
+            if op[0] == "clear":
+                messages = []
+            else:
+                messages.append({"role": op[2], "content": op[3]})
+        if not messages:
+            return None
+        return messages[-limit:]
+
+    async def load_async(self, session_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, str]]]:
+        """load() in a worker thread, so the event loop never waits on the database."""
+        return await asyncio.to_thread(self.load, session_id, limit)
+
+    def _migrate_legacy(self, session_id: str, limit: int) -> Optional[List[Dict[str, str]]]:
+        """Move a session saved as one JSON blob into message rows."""
+        if not self._has_legacy:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT messages FROM conversations WHERE session_id = ?", (session_id,)
+                ).fetchone()
+        except Exception as e:
+            print(f"DB load error: {e}")
+            return None
+        if not row:
+            return None
+
+        messages = [m for m in _json_loads(row[0]) if m.get("role") != "system"]
+        now = time.time()
+        with self._lock:
+            self._insert([(session_id, m["role"], m["content"], now) for m in messages])
+            self._conn.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+        self.stats["migrated_sessions"] += 1
+        return messages[-limit:] or None
+
+    def count_sessions(self) -> int:
+        """Number of sessions with at least one stored message."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT session_id) FROM messages").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Write amplification and group-commit statistics."""
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "retain": self.retain,
+            "writer_running": self.running,
+            "avg_batch": round(self.stats["rows_written"] / batches, 2) if batches else 0.0,
+        }
@@ -9,16 +9,27 @@ Brings together all HER-like features:
 - Realtime Communication
 
 This is the main integration point for HER-like behavior.
+
+Pre-processing (process_message) fans out to a bounded stage executor:
+voice emotion and memory retrieval run in parallel off the event loop, each
+with its own deadline. A stage that misses its budget is dropped and the
+response proceeds with partial context. Inner thoughts stay on the loop and
+only run once empathic silence has been ruled out: they update per-user
+thought state, which isn't thread-safe and must not change for a response
+Eva never gives.
 """
 
 import asyncio
+import os
+import threading
 import time
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
 # Import all HER modules
 from eva_memory import init_memory_system, get_memory_system, EvaMemorySystem
-from eva_voice_emotion import init_voice_emotion, detect_voice_emotion, VoiceEmotion
+from eva_voice_emotion import init_voice_emotion, detect_voice_emotion_bytes, VoiceEmotion
 from eva_inner_thoughts import init_inner_thoughts, get_inner_thoughts, process_for_thoughts, get_proactive_message
 from eva_presence import init_presence_system, get_presence_system, should_backchannel, analyze_silence, get_response_delay
 from eva_realtime import init_realtime, get_realtime_manager, process_realtime_audio
@@ -56,6 +67,91 @@ _SURPRISE_WORDS = frozenset([
 ])
 
 
+# Stage executor knobs (per-stage budgets in ms)
+HER_STAGE_WORKERS = int(os.getenv("HER_STAGE_WORKERS", "4"))
+HER_STAGE_MAX_PENDING = int(os.getenv("HER_STAGE_MAX_PENDING", "32"))
+HER_VOICE_EMOTION_BUDGET_MS = float(os.getenv("HER_VOICE_EMOTION_BUDGET_MS", "150"))
+HER_MEMORY_BUDGET_MS = float(os.getenv("HER_MEMORY_BUDGET_MS", "120"))
+
+_STAGE_MISSED = object()  # Result of a stage that timed out, failed or was rejected
+
+
+class HERStageRunner:
+    """Bounded thread pool for blocking HER stages, with per-stage deadlines.
+
+    A stage that times out keeps its worker until it finishes (threads can't
+    be cancelled), so at most max_pending stages may be queued or running;
+    beyond that new stages are rejected immediately instead of piling up
+    behind a slow backend.
+    """
+
+    def __init__(self, workers: int = HER_STAGE_WORKERS, max_pending: int = HER_STAGE_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="her-stage")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _stage_stats(self, stage: str) -> Dict[str, float]:
+        if stage not in self.stats:
+            self.stats[stage] = {"runs": 0, "completed": 0, "timeouts": 0, "errors": 0,
+                                 "rejected": 0, "total_ms": 0.0, "max_ms": 0.0}
+        return self.stats[stage]
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, stage: str, budget_ms: float, fn: Callable, *args) -> Any:
+        """Run fn(*args) on the pool; _STAGE_MISSED if it fails or misses budget_ms."""
+        stats = self._stage_stats(stage)
+        stats["runs"] += 1
+        with self._lock:
+            if self._pending >= self.max_pending:
+                stats["rejected"] += 1
+                return _STAGE_MISSED
+            self._pending += 1
+
+        start = time.perf_counter()
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), budget_ms / 1000)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            print(f"⏱️ HER stage '{stage}' missed its {budget_ms:.0f}ms budget")
+            return _STAGE_MISSED
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"⚠️ HER stage '{stage}' failed: {e}")
+            return _STAGE_MISSED
+
+        elapsed = (time.perf_counter() - start) * 1000
+        stats["completed"] += 1
+        stats["total_ms"] += elapsed
+        stats["max_ms"] = max(stats["max_ms"], elapsed)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-stage counts and latencies, plus pool occupancy."""
+        stages = {}
+        for stage, stats in self.stats.items():
+            completed = stats["completed"]
+            stages[stage] = {
+                **stats,
+                "total_ms": round(stats["total_ms"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "avg_ms": round(stats["total_ms"] / completed, 1) if completed else 0.0,
+            }
+        return {"workers": self.workers, "max_pending": self.max_pending,
+                "pending": self._pending, "stages": stages}
+
+    def shutdown(self) -> None:
+        """Stop accepting stages (running ones finish in the background)."""
+        self._executor.shutdown(wait=False)
+
+
 @dataclass
 class HERConfig:
     """Configuration for HER-like behavior"""
@@ -85,6 +181,12 @@ class HERConfig:
     base_response_delay: float = 0.3  # seconds
     emotional_delay_multiplier: float = 1.5
 
+    # Pre-processing stages (bounded executor, per-stage deadlines)
+    stage_workers: int = HER_STAGE_WORKERS
+    stage_max_pending: int = HER_STAGE_MAX_PENDING
+    voice_emotion_budget_ms: float = HER_VOICE_EMOTION_BUDGET_MS
+    memory_budget_ms: float = HER_MEMORY_BUDGET_MS
+
 
 class EvaHER:
     """
@@ -105,6 +207,9 @@ class EvaHER:
         self.realtime = None
         self.emotional_tts = None
 
+        # Blocking pre-processing stages run here, never on the event loop
+        self.stages = HERStageRunner(self.config.stage_workers, self.config.stage_max_pending)
+
     async def initialize(self):
         """Initialize all HER subsystems"""
         print("🚀 Initializing EVA HER systems...")
@@ -174,6 +279,10 @@ class EvaHER:
         - response_delay: Recommended delay before response
         - memory_context: Relevant memories
         - proactive_topic: Topic for proactive follow-up
+        - missed_stages: Stages dropped for missing their budget (or failing)
+
+        Voice emotion and memory start together; inner thoughts follow the
+        silence check, with the final user emotion.
         """
         result = {
             "user_emotion": "neutral",
@@ -182,12 +291,30 @@ class EvaHER:
             "backchannel": None,
             "response_delay": self.config.base_response_delay,
             "memory_context": None,
-            "should_stay_silent": False
+            "should_stay_silent": False,
+            "missed_stages": []
         }
 
-        # 1. Detect emotion from voice (if available) OR from text
+        # Text emotion is instant; it stands in for voice emotion if that misses
+        text_emotion = self._detect_text_emotion(message)
+
+        # 1-2. Fan out: voice emotion and memory retrieval
+        # run in parallel off the loop, each bounded by its own budget
+        stages: Dict[str, Any] = {}
         if voice_audio and self.voice_emotion:
-            voice_emotion = detect_voice_emotion(voice_audio)
+            stages["voice_emotion"] = self.stages.run(
+                "voice_emotion", self.config.voice_emotion_budget_ms,
+                detect_voice_emotion_bytes, voice_audio)
+        if self.memory:
+            stages["memory"] = self.stages.run(
+                "memory", self.config.memory_budget_ms,
+                self.memory.get_context_memories, user_id, message)
+        outcomes = dict(zip(stages, await asyncio.gather(*stages.values())))
+        result["missed_stages"] = [name for name, value in outcomes.items() if value is _STAGE_MISSED]
+
+        # Emotion from voice (if available) OR from text
+        voice_emotion = outcomes.get("voice_emotion", _STAGE_MISSED)
+        if voice_emotion is not _STAGE_MISSED:
             result["user_emotion"] = voice_emotion.emotion
             result["voice_emotion_details"] = {
                 "confidence": voice_emotion.confidence,
@@ -197,11 +324,11 @@ class EvaHER:
             }
         else:
             # Fallback: detect emotion from text (critical for HER-like empathy)
-            result["user_emotion"] = self._detect_text_emotion(message)
+            result["user_emotion"] = text_emotion
 
-        # 2. Get memory context
-        if self.memory:
-            memory_context = self.memory.get_context_memories(user_id, message)
+        # Memory context (None if retrieval missed its budget)
+        memory_context = outcomes.get("memory", _STAGE_MISSED)
+        if memory_context is not _STAGE_MISSED:
             result["memory_context"] = memory_context
 
         # 3. Check if should stay silent (empathic silence)
@@ -211,10 +338,9 @@ class EvaHER:
                 result["should_stay_silent"] = True
                 result["silence_reason"] = reason
 
-        # 4. Get inner thought prefix
+        # 4. Get inner thought prefix (skipped when staying silent)
         if self.inner_thoughts and not result["should_stay_silent"]:
-            thought_prefix = process_for_thoughts(user_id, message, result["user_emotion"])
-            result["thought_prefix"] = thought_prefix
+            result["thought_prefix"] = process_for_thoughts(user_id, message, result["user_emotion"])
 
         # 5. Calculate response delay
         if self.presence:
@@ -325,6 +451,7 @@ class EvaHER:
             "presence": self.presence is not None,
             "realtime": self.realtime is not None,
             "emotional_tts": self.emotional_tts is not None,
+            "stages": self.stages.get_stats(),
             "config": {
                 "proactivity_threshold": self.config.proactivity_threshold,
                 "backchannel_enabled": self.config.backchannel_enabled,
@@ -6,36 +6,45 @@ Implements: Episodic → Semantic consolidation, Emotional tagging, Relationship
 Performance Optimizations:
 - __slots__ on dataclasses for memory efficiency
 - Object pooling for MemoryEntry reuse
-- Batch ChromaDB operations (add_batch)
+- Write-behind ChromaDB ingestion: a background worker owns embedding and
+  collection.add batching; retrievals read pending memories from an
+  in-memory overlay instead of forcing a flush
+- Query-embedding LRU: a message is embedded once for retrieval and the
+  vector reused when the turn is stored; misses are embedded in batches
 - Async memory retrieval with asyncio
+- TTL+LRU context cache keyed on a normalized message hash, O(1) eviction,
+  invalidated per user when memories change
 - LRU cache with maxsize limit
 - Performance metrics tracking
-- Lazy profile loading
+- Hybrid retrieval (memory_index.py): BM25 + vector candidates fused with
+  importance and exponential time decay in one vectorized rank step
+- Off-path consolidation (memory_consolidation.py): episodic memories are
+  clustered by embedding, merged into semantic ones and decayed ones pruned
+- Per-user profile/core-memory store (memory_store.py): users load lazily
+  on first access and flushes write only dirty users
 """
 
 import os
-import json
 import time
 import re
-from typing import Optional, List, Dict, Any, Tuple
+import hashlib
+from typing import Optional, List, Dict, Any, Callable, Iterable, Set, Tuple
 from dataclasses import dataclass, field, asdict
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from functools import lru_cache
 import asyncio
-from threading import Lock
+from threading import Condition, Lock, Thread
 import weakref
 
-# Optional async file I/O
-try:
-    import aiofiles
-    AIOFILES_AVAILABLE = True
-except ImportError:
-    AIOFILES_AVAILABLE = False
+from memory_consolidation import MEMORY_CONSOLIDATION_MIN_SIZE, MemoryConsolidator
+from memory_index import HybridRanker, LexicalIndex
+from memory_store import MEMORY_STORE_DB, LazyUserDict, UserMemoryStore
 
 # Vector database for semantic search
 try:
     import chromadb
     from chromadb.config import Settings
+    from chromadb.utils import embedding_functions
     CHROMA_AVAILABLE = True
 except ImportError:
     CHROMA_AVAILABLE = False
@@ -153,6 +162,403 @@ class MemoryEntryPool:
 _memory_pool = MemoryEntryPool()
 
 
+# Memory context cache (repeated context builds within a turn pipeline)
+MEMORY_CONTEXT_CACHE_SIZE = int(os.getenv("MEMORY_CONTEXT_CACHE_SIZE", "100"))
+MEMORY_CONTEXT_CACHE_TTL_S = float(os.getenv("MEMORY_CONTEXT_CACHE_TTL_S", "5.0"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ContextCache:
+    """TTL + LRU cache of built memory contexts.
+
+    Keys are (user_id, hash of the normalized message), so messages that
+    differ only in case or spacing share an entry, and long messages with
+    a common prefix don't. Eviction pops the least recently used entry
+    (O(1)); invalidate(user_id) drops only that user's entries and bumps
+    the user's generation so a context built before the invalidation is
+    never stored.
+    """
+
+    def __init__(self, max_size: int = MEMORY_CONTEXT_CACHE_SIZE, ttl_s: float = MEMORY_CONTEXT_CACHE_TTL_S):
+        self.max_size = max(1, max_size)
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._by_user: Dict[str, set] = defaultdict(set)
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(user_id: str, message: str) -> Tuple[str, str]:
+        normalized = _WHITESPACE_RE.sub(" ", message.strip().lower())
+        return user_id, hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def generation(self, user_id: str) -> int:
+        """Token to pass to put(); stale once the user is invalidated."""
+        with self._lock:
+            return self._generations[user_id]
+
+    def get(self, user_id: str, message: str) -> Optional[Dict]:
+        key = self.key(user_id, message)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            stored_at, result = entry
+            if time.time() - stored_at >= self.ttl_s:
+                self._remove(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+    def put(self, user_id: str, message: str, result: Dict, generation: Optional[int] = None) -> None:
+        key = self.key(user_id, message)
+        with self._lock:
+            if generation is not None and generation != self._generations[user_id]:
+                return
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            self._by_user[user_id].add(key)
+            while len(self._entries) > self.max_size:
+                oldest, _ = self._entries.popitem(last=False)
+                self._discard_user_key(oldest)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's contexts (or all of them)."""
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if user_id is None:
+                self._entries.clear()
+                self._by_user.clear()
+                for uid in self._generations:
+                    self._generations[uid] += 1
+                return
+            self._generations[user_id] += 1
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+        self._discard_user_key(key)
+
+    def _discard_user_key(self, key: Tuple[str, str]) -> None:
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "size": len(self._entries), "max_size": self.max_size,
+                    "ttl_s": self.ttl_s,
+                    "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+# Bounded LRU of text embeddings
+MEMORY_EMBED_CACHE_SIZE = int(os.getenv("MEMORY_EMBED_CACHE_SIZE", "1024"))
+
+
+class EmbeddingCache:
+    """Bounded LRU of text -> embedding, in front of the collection's embedder.
+
+    Retrieval embeds the user message through the cache, so storing the same
+    message later in the turn reuses the vector instead of embedding it again.
+    embed_many() looks every text up and embeds all misses in a single call
+    (bulk imports, ingestion batches).
+    """
+
+    def __init__(self, embed_fn: Any, max_size: int = MEMORY_EMBED_CACHE_SIZE):
+        self._embed_fn = embed_fn   # List[str] -> List[vector]
+        self.max_size = max(1, max_size)
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"hits": 0, "misses": 0, "batches": 0, "evictions": 0}
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Cached embedding for text, or None (never computes)."""
+        with self._lock:
+            vector = self._cache.get(text)
+            if vector is not None:
+                self._cache.move_to_end(text)
+            return vector
+
+    def embed(self, text: str) -> List[float]:
+        """Embedding for one text, computed on a miss."""
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for texts, computing all misses in one batch."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                vector = self._cache.get(text)
+                if vector is not None:
+                    self._cache.move_to_end(text)
+                    results[i] = vector
+                    self.stats["hits"] += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+
+        if missing:
+            to_embed = list(missing)
+            vectors = [[float(x) for x in vector] for vector in self._embed_fn(to_embed)]
+            with self._lock:
+                self.stats["misses"] += len(to_embed)
+                self.stats["batches"] += 1
+                for text, vector in zip(to_embed, vectors):
+                    for i in missing[text]:
+                        results[i] = vector
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "size": len(self._cache), "max_size": self.max_size,
+                    "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+# Write-behind ingestion knobs
+MEMORY_INGEST_BATCH_SIZE = int(os.getenv("MEMORY_INGEST_BATCH_SIZE", "10"))
+MEMORY_INGEST_MAX_DELAY_S = float(os.getenv("MEMORY_INGEST_MAX_DELAY_S", "2.0"))
+MEMORY_INGEST_MAX_RETRIES = int(os.getenv("MEMORY_INGEST_MAX_RETRIES", "5"))
+MEMORY_INGEST_RETRY_S = float(os.getenv("MEMORY_INGEST_RETRY_S", "1.0"))  # doubled per attempt, max 30s
+
+
+class MemoryIngestor:
+    """Background writer for ChromaDB (write-behind).
+
+    Memories are queued without touching the vector store. A worker thread
+    embeds and adds them in batches (batch_size items, or max_delay_s after
+    the oldest one). Until a memory is written it stays in an in-memory
+    overlay, so retrievals see it (read-your-writes) without a flush.
+
+    A failed batch goes back to the head of the queue and is retried with
+    exponential backoff; only after max_retries failed writes are its
+    memories dropped (counted as "failed" and logged).
+
+    The worker also runs other store reads submitted with submit() (e.g.
+    warming a user's lexical index) between batches, so they stay off the
+    request path.
+    """
+
+    def __init__(
+        self,
+        write: Any,
+        embed: Optional[Any] = None,
+        batch_size: int = MEMORY_INGEST_BATCH_SIZE,
+        max_delay_s: float = MEMORY_INGEST_MAX_DELAY_S,
+        max_retries: int = MEMORY_INGEST_MAX_RETRIES,
+        retry_s: float = MEMORY_INGEST_RETRY_S
+    ):
+        self._write = write    # (ids, documents, metadatas, embeddings) -> None
+        self._embed = embed    # documents -> embeddings (None = store embeds)
+        self.batch_size = max(1, batch_size)
+        self.max_delay_s = max(0.0, max_delay_s)
+        self.max_retries = max(0, max_retries)
+        self.retry_s = max(0.0, retry_s)
+        self._cond = Condition()
+        self._queue: deque = deque()                      # (entry, user_id, metadata, queued_at, embedding, attempts)
+        self._tasks: deque = deque()                      # callables run on the worker between batches
+        self._overlay: Dict[str, Tuple[str, 'MemoryEntry', Dict]] = {}  # id -> (user_id, entry, metadata)
+        self._enqueued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._retry_at = 0.0
+        self._running = False
+        self._thread: Optional[Thread] = None
+        self.stats = {"batches": 0, "written": 0, "retried": 0, "failed": 0, "tasks": 0,
+                      "max_queue_delay_ms": 0.0}
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = Thread(target=self._run, name="memory-ingest", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write everything queued, then stop the worker."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def enqueue(
+        self,
+        user_id: str,
+        entry: 'MemoryEntry',
+        metadata: Dict,
+        embedding: Optional[List[float]] = None
+    ) -> None:
+        """Queue a memory for the vector store; visible to pending() at once."""
+        with self._cond:
+            self._overlay[entry.id] = (user_id, entry, metadata)
+            self._queue.append((entry, user_id, metadata, time.time(), embedding, 0))
+            self._enqueued += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        self.start()
+
+    def submit(self, task: Callable[[], None]) -> None:
+        """Run task on the worker thread, ahead of the next batch."""
+        with self._cond:
+            self._tasks.append(task)
+            self._cond.notify_all()
+        self.start()
+
+    def pending(self, user_id: str, memory_type: Optional[str] = None) -> List['MemoryEntry']:
+        """Memories of a user queued or in flight (not yet in the store)."""
+        with self._cond:
+            return [
+                entry for uid, entry, meta in self._overlay.values()
+                if uid == user_id and (memory_type is None or meta.get("memory_type") == memory_type)
+            ]
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._overlay)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far is written (True) or timeout."""
+        deadline = time.time() + timeout
+        with self._cond:
+            target = self._enqueued
+            if self._written >= target:
+                return True
+            if not self._running:
+                self._running = True
+                self._thread = Thread(target=self._run, name="memory-ingest", daemon=True)
+                self._thread.start()
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._written < target:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def _take_batch(self) -> Optional[list]:
+        """Wait until a batch is due ([] if tasks are waiting); None once stopped and drained."""
+        with self._cond:
+            while True:
+                if self._tasks:
+                    return []
+                if self._queue:
+                    backoff = self._retry_at - time.time()
+                    if backoff > 0:
+                        self._cond.wait(backoff)
+                        continue
+                    due = self._queue[0][3] + self.max_delay_s
+                    if (len(self._queue) >= self.batch_size or self._flush_requested
+                            or not self._running or time.time() >= due):
+                        break
+                    self._cond.wait(max(0.0, due - time.time()))
+                elif not self._running:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._cond.wait()
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                break
+            self._run_tasks()
+            if not batch:
+                continue
+
+            start = time.time()
+            ids = [item[0].id for item in batch]
+            documents = [item[0].content for item in batch]
+            metadatas = [item[2] for item in batch]
+            success = True
+            try:
+                # Precomputed vectors are kept; the rest are embedded as one batch
+                embeddings = [item[4] for item in batch]
+                missing = [i for i, vector in enumerate(embeddings) if vector is None]
+                if missing and self._embed is not None:
+                    for i, vector in zip(missing, self._embed([documents[i] for i in missing])):
+                        embeddings[i] = vector
+                elif missing:
+                    embeddings = None  # let the store embed the whole batch
+                self._write(ids, documents, metadatas, embeddings)
+            except Exception as e:
+                success = False
+                print(f"⚠️ Batch add failed: {e}")
+            memory_metrics.record("batch_add", (time.time() - start) * 1000, success=success)
+
+            with self._cond:
+                if success:
+                    done = batch
+                    self.stats["written"] += len(batch)
+                    delay_ms = (start - batch[0][3]) * 1000
+                    self.stats["max_queue_delay_ms"] = max(self.stats["max_queue_delay_ms"], round(delay_ms, 1))
+                else:
+                    done = [item for item in batch if item[5] >= self.max_retries]
+                    retry = [item for item in batch if item[5] < self.max_retries]
+                    # Back to the head of the queue; still visible through the overlay
+                    for item in reversed(retry):
+                        self._queue.appendleft(item[:5] + (item[5] + 1,))
+                    if retry:
+                        attempts = max(item[5] for item in retry)
+                        self._retry_at = time.time() + min(30.0, self.retry_s * 2 ** attempts)
+                    self.stats["retried"] += len(retry)
+                    self.stats["failed"] += len(done)
+                    if done:
+                        print(f"⚠️ Dropping {len(done)} memories after {self.max_retries + 1} failed writes")
+                for item in done:
+                    self._overlay.pop(item[0].id, None)
+                self._written += len(done)
+                self.stats["batches"] += 1
+                self._cond.notify_all()
+
+    def _run_tasks(self) -> None:
+        while True:
+            with self._cond:
+                if not self._tasks:
+                    return
+                task = self._tasks.popleft()
+                self.stats["tasks"] += 1
+            try:
+                task()
+            except Exception as e:
+                print(f"⚠️ Memory worker task failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.stats, "queued": len(self._queue), "pending": len(self._overlay),
+                    "batch_size": self.batch_size, "max_delay_s": self.max_delay_s}
+
+
 @dataclass
 class MemoryEntry:
     """Single memory entry with emotional tagging"""
@@ -257,52 +663,63 @@ class EvaMemorySystem:
         # Initialize ChromaDB for vector storage
         self.chroma_client = None
         self.collection = None
+        self.embeddings: Optional[EmbeddingCache] = None
         if CHROMA_AVAILABLE:
             try:
                 self.chroma_client = chromadb.PersistentClient(
                     path=os.path.join(storage_path, "chroma_db"),
                     settings=Settings(anonymized_telemetry=False)
                 )
+                embedding_fn = embedding_functions.DefaultEmbeddingFunction()
                 self.collection = self.chroma_client.get_or_create_collection(
                     name="eva_memories",
-                    metadata={"hnsw:space": "cosine"}
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=embedding_fn
                 )
+                self.embeddings = EmbeddingCache(embedding_fn)
                 print("✅ ChromaDB initialized for long-term memory")
             except Exception as e:
                 print(f"⚠️ ChromaDB init failed: {e}")
 
-        # In-memory caches
-        self.user_profiles: Dict[str, UserProfile] = {}
+        # Per-user persistent store; profiles and core memories load lazily
+        self.store = UserMemoryStore(os.path.join(storage_path, MEMORY_STORE_DB))
+        self._migrate_legacy_files()
+
+        # In-memory caches (resident = users touched since boot)
+        self.user_profiles: Dict[str, UserProfile] = LazyUserDict(self._load_profile)
         self.session_memories: Dict[str, List[MemoryEntry]] = defaultdict(list)
-        self.core_memories: Dict[str, List[MemoryEntry]] = defaultdict(list)
+        self.core_memories: Dict[str, List[MemoryEntry]] = LazyUserDict(self._load_core_memory_list, list)
 
         # Memory consolidation settings
-        self.consolidation_threshold = 5  # Consolidate after N similar memories
+        self.consolidation_threshold = MEMORY_CONSOLIDATION_MIN_SIZE  # Merge clusters of N similar memories
         self.decay_rate = 0.1  # Memory importance decay per day
         self.max_context_memories = 10  # Max memories to include in context
 
         # Dirty tracking for batch saves (performance optimization)
         self._profiles_dirty = False
         self._core_memories_dirty = False
+        self._dirty_profiles: Set[str] = set()
+        self._dirty_core_memories: Set[str] = set()
         self._pending_save_task: Optional[asyncio.Task] = None
 
         # Context cache for repeated calls with same user/message (latency optimization)
-        self._context_cache: Dict[str, tuple] = {}  # key -> (timestamp, result)
-        self._context_cache_ttl = 5.0  # Cache valid for 5 seconds
-        self._cache_lock = Lock()
+        self._context_cache = ContextCache()
 
         # ID counter for faster generation (avoids MD5 when possible)
         self._id_counter = 0
 
-        # Batch operation buffer for ChromaDB
-        self._pending_adds: List[Tuple[str, str, Dict]] = []  # (id, content, metadata)
-        self._batch_lock = Lock()
-        self._batch_size = 10  # Flush after N pending adds
-        self._last_batch_flush = time.time()
+        # Hybrid retrieval: per-user BM25 index fused with vector scores
+        self.lexical_index = LexicalIndex()
+        self.ranker = HybridRanker()
+        self._lexical_warming: Set[str] = set()
+        self._lexical_lock = Lock()
+
+        # Episodic -> semantic consolidation, run off the request path
+        self.consolidator = MemoryConsolidator(self)
 
-        # Load persisted data
-        self._load_profiles()
-        self._load_core_memories()
+        # Write-behind ChromaDB ingestion (created on first batched add)
+        self._ingestor: Optional[MemoryIngestor] = None
+        self._ingestor_lock = Lock()
 
         print("✅ Eva Memory System initialized (Sprint 581 optimized)")
 
@@ -318,163 +735,180 @@ class EvaMemorySystem:
         # Fast string formatting instead of MD5 for most cases
         return f"{int(ts * 1000) % 10000000000:010d}{self._id_counter:06d}"
 
-    def _load_profiles(self):
-        """Load user profiles from disk"""
-        profiles_path = os.path.join(self.storage_path, "profiles.json")
-        if os.path.exists(profiles_path):
+    def _load_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Load one user profile from the store (LazyUserDict loader)"""
+        try:
+            data = self.store.get_profile(user_id)
+        except Exception as e:
+            print(f"⚠️ Failed to load profile {user_id}: {e}")
+            return None
+        return UserProfile(**data) if data is not None else None
+
+    def _load_core_memory_list(self, user_id: str) -> Optional[List[MemoryEntry]]:
+        """Load one user's core memories from the store (LazyUserDict loader)"""
+        try:
+            data = self.store.get_core_memories(user_id)
+        except Exception as e:
+            print(f"⚠️ Failed to load core memories {user_id}: {e}")
+            return None
+        return [MemoryEntry.from_dict(m) for m in data] if data is not None else None
+
+    def _migrate_legacy_files(self):
+        """Import profiles.json / core_memories.json into the per-user store once"""
+        for filename, table in (("profiles.json", "profiles"), ("core_memories.json", "core_memories")):
             try:
-                with open(profiles_path, 'r') as f:
-                    data = json.load(f)
-                    for user_id, profile_data in data.items():
-                        self.user_profiles[user_id] = UserProfile(**profile_data)
-                print(f"📚 Loaded {len(self.user_profiles)} user profiles")
+                migrated = self.store.migrate_json(os.path.join(self.storage_path, filename), table)
+                if migrated:
+                    print(f"📚 Migrated {migrated} users from {filename}")
             except Exception as e:
-                print(f"⚠️ Failed to load profiles: {e}")
-
-    def _save_profiles(self):
-        """Save user profiles to disk (sync version for backwards compat)"""
-        profiles_path = os.path.join(self.storage_path, "profiles.json")
+                print(f"⚠️ Failed to migrate {filename}: {e}")
+
+    def _profile_rows(self, user_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, Dict]]:
+        """Serialize resident profiles (all of them, or just user_ids)"""
+        if user_ids is None:
+            user_ids = list(dict.keys(self.user_profiles))
+        rows = []
+        for uid in user_ids:
+            profile = dict.get(self.user_profiles, uid)
+            if profile is not None:
+                rows.append((uid, profile.to_dict()))
+        return rows
+
+    def _core_memory_rows(self, user_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, List[Dict]]]:
+        """Serialize resident core memories (all of them, or just user_ids)"""
+        if user_ids is None:
+            user_ids = list(dict.keys(self.core_memories))
+        rows = []
+        for uid in user_ids:
+            memories = dict.get(self.core_memories, uid)
+            if memories is not None:
+                rows.append((uid, [m.to_dict() for m in memories]))
+        return rows
+
+    def _save_profiles(self, user_ids: Optional[Iterable[str]] = None):
+        """Save user profiles (all resident users, or just user_ids)"""
         try:
-            data = {uid: profile.to_dict() for uid, profile in self.user_profiles.items()}
-            with open(profiles_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.put_profiles(self._profile_rows(user_ids))
         except Exception as e:
             print(f"⚠️ Failed to save profiles: {e}")
 
-    async def _save_profiles_async(self):
-        """Save user profiles to disk asynchronously for better latency.
+    async def _save_profiles_async(self, user_ids: Optional[Iterable[str]] = None):
+        """Save user profiles without blocking the event loop.
 
-        Falls back to sync version if aiofiles is not available.
+        Profiles are serialized on the loop (consistent snapshot) and
+        written from a worker thread.
         """
-        if not AIOFILES_AVAILABLE:
-            # Fallback to sync in thread pool
-            await asyncio.to_thread(self._save_profiles)
-            return
-
-        profiles_path = os.path.join(self.storage_path, "profiles.json")
         try:
-            data = {uid: profile.to_dict() for uid, profile in self.user_profiles.items()}
-            async with aiofiles.open(profiles_path, 'w') as f:
-                await f.write(json.dumps(data, indent=2))
+            await asyncio.to_thread(self.store.put_profiles, self._profile_rows(user_ids))
         except Exception as e:
             print(f"⚠️ Failed to save profiles async: {e}")
 
-    def _load_core_memories(self):
-        """Load core memories from disk"""
-        core_path = os.path.join(self.storage_path, "core_memories.json")
-        if os.path.exists(core_path):
-            try:
-                with open(core_path, 'r') as f:
-                    data = json.load(f)
-                    for user_id, memories in data.items():
-                        self.core_memories[user_id] = [
-                            MemoryEntry.from_dict(m) for m in memories
-                        ]
-                print(f"🧠 Loaded core memories for {len(self.core_memories)} users")
-            except Exception as e:
-                print(f"⚠️ Failed to load core memories: {e}")
-
-    def _save_core_memories(self):
-        """Save core memories to disk (sync version for backwards compat)"""
-        core_path = os.path.join(self.storage_path, "core_memories.json")
+    def _save_core_memories(self, user_ids: Optional[Iterable[str]] = None):
+        """Save core memories (all resident users, or just user_ids)"""
         try:
-            data = {
-                uid: [m.to_dict() for m in memories]
-                for uid, memories in self.core_memories.items()
-            }
-            with open(core_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            self.store.put_core_memories(self._core_memory_rows(user_ids))
         except Exception as e:
             print(f"⚠️ Failed to save core memories: {e}")
 
-    async def _save_core_memories_async(self):
-        """Save core memories to disk asynchronously for better latency.
-
-        Falls back to sync version if aiofiles is not available.
-        """
-        if not AIOFILES_AVAILABLE:
-            # Fallback to sync in thread pool
-            await asyncio.to_thread(self._save_core_memories)
-            return
-
-        core_path = os.path.join(self.storage_path, "core_memories.json")
+    async def _save_core_memories_async(self, user_ids: Optional[Iterable[str]] = None):
+        """Save core memories without blocking the event loop."""
         try:
-            data = {
-                uid: [m.to_dict() for m in memories]
-                for uid, memories in self.core_memories.items()
-            }
-            async with aiofiles.open(core_path, 'w') as f:
-                await f.write(json.dumps(data, indent=2))
+            await asyncio.to_thread(self.store.put_core_memories, self._core_memory_rows(user_ids))
         except Exception as e:
             print(f"⚠️ Failed to save core memories async: {e}")
 
-    def _mark_profiles_dirty(self):
-        """Mark profiles as needing save (batch optimization)"""
+    def _mark_profiles_dirty(self, user_id: Optional[str] = None):
+        """Mark a profile (default: every resident profile) as needing save"""
         self._profiles_dirty = True
+        if user_id is None:
+            self._dirty_profiles.update(dict.keys(self.user_profiles))
+        else:
+            self._dirty_profiles.add(user_id)
 
-    def _mark_core_memories_dirty(self):
-        """Mark core memories as needing save (batch optimization)"""
+    def _mark_core_memories_dirty(self, user_id: Optional[str] = None):
+        """Mark a user's core memories (default: every resident user) as needing save"""
         self._core_memories_dirty = True
+        if user_id is None:
+            self._dirty_core_memories.update(dict.keys(self.core_memories))
+        else:
+            self._dirty_core_memories.add(user_id)
+
+    def _take_dirty(self) -> Tuple[List[str], List[str]]:
+        """Pop the dirty user sets and clear the flags"""
+        profiles, core = list(self._dirty_profiles), list(self._dirty_core_memories)
+        self._dirty_profiles.clear()
+        self._dirty_core_memories.clear()
+        self._profiles_dirty = False
+        self._core_memories_dirty = False
+        return profiles, core
 
     def flush_pending_saves(self):
-        """Force save all dirty data immediately (sync)"""
-        if self._profiles_dirty:
-            self._save_profiles()
-            self._profiles_dirty = False
-        if self._core_memories_dirty:
-            self._save_core_memories()
-            self._core_memories_dirty = False
+        """Force save all dirty users immediately (sync)"""
+        profiles, core = self._take_dirty()
+        if profiles:
+            self._save_profiles(profiles)
+        if core:
+            self._save_core_memories(core)
 
     async def flush_pending_saves_async(self):
-        """Force save all dirty data immediately (async)"""
+        """Force save all dirty users immediately (async)"""
+        profiles, core = self._take_dirty()
         tasks = []
-        if self._profiles_dirty:
-            tasks.append(self._save_profiles_async())
-            self._profiles_dirty = False
-        if self._core_memories_dirty:
-            tasks.append(self._save_core_memories_async())
-            self._core_memories_dirty = False
+        if profiles:
+            tasks.append(self._save_profiles_async(profiles))
+        if core:
+            tasks.append(self._save_core_memories_async(core))
         if tasks:
             await asyncio.gather(*tasks)
 
-    def _flush_batch_adds(self):
-        """Flush pending batch adds to ChromaDB (performance optimization)."""
-        with self._batch_lock:
-            if not self._pending_adds or self.collection is None:
-                return
-
-            start = time.time()
-            try:
-                ids = [item[0] for item in self._pending_adds]
-                documents = [item[1] for item in self._pending_adds]
-                metadatas = [item[2] for item in self._pending_adds]
-
-                self.collection.add(
-                    ids=ids,
-                    documents=documents,
-                    metadatas=metadatas
-                )
-                memory_metrics.record("batch_add", (time.time() - start) * 1000)
-            except Exception as e:
-                print(f"⚠️ Batch add failed: {e}")
-                memory_metrics.record("batch_add", (time.time() - start) * 1000, success=False)
-            finally:
-                self._pending_adds.clear()
-                self._last_batch_flush = time.time()
-
-    def _queue_for_batch_add(self, memory_id: str, content: str, metadata: Dict):
-        """Queue a memory for batch add to ChromaDB."""
-        with self._batch_lock:
-            self._pending_adds.append((memory_id, content, metadata))
-
-            # Auto-flush if batch is full or 5 seconds elapsed
-            should_flush = (
-                len(self._pending_adds) >= self._batch_size or
-                time.time() - self._last_batch_flush > 5.0
-            )
+    def known_user_ids(self) -> List[str]:
+        """Every user with a profile, stored or resident"""
+        try:
+            stored = self.store.user_ids()
+        except Exception as e:
+            print(f"⚠️ Failed to list users: {e}")
+            stored = []
+        return list(dict.fromkeys(stored + list(dict.keys(self.user_profiles))))
 
-        if should_flush:
-            self._flush_batch_adds()
+    def _write_to_collection(self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings=None):
+        """Add a batch to ChromaDB (called from the ingestion worker)."""
+        if self.collection is None:
+            return
+        if embeddings is not None:
+            self.collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+        else:
+            self.collection.add(ids=ids, documents=documents, metadatas=metadatas)
+
+    def _get_ingestor(self) -> MemoryIngestor:
+        with self._ingestor_lock:
+            if self._ingestor is None:
+                embed = self.embeddings.embed_many if self.embeddings is not None else None
+                self._ingestor = MemoryIngestor(self._write_to_collection, embed=embed)
+            return self._ingestor
+
+    def flush_ingest(self, timeout: float = 10.0) -> bool:
+        """Block until every queued memory is in ChromaDB (True) or timeout."""
+        if self._ingestor is None:
+            return True
+        return self._ingestor.flush(timeout)
+
+    def close(self):
+        """Write queued memories and dirty profiles, then stop the ingestion worker."""
+        if self._ingestor is not None:
+            self._ingestor.stop()
+        self.flush_pending_saves()
+
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        """Write-behind queue statistics (empty until the first batched add)."""
+        if self._ingestor is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._ingestor.get_stats()}
+
+    def get_embedding_stats(self) -> Dict[str, Any]:
+        """Embedding cache statistics (disabled when the store embeds itself)."""
+        if self.embeddings is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embeddings.get_stats()}
 
     def get_or_create_profile(self, user_id: str, immediate_save: bool = True) -> UserProfile:
         """Get or create user profile with O(1) lookup
@@ -491,9 +925,9 @@ class EvaMemorySystem:
             )
             self.user_profiles[user_id] = profile
             if immediate_save:
-                self._save_profiles()
+                self._save_profiles([user_id])
             else:
-                self._mark_profiles_dirty()
+                self._mark_profiles_dirty(user_id)
         return profile
 
     def update_profile(self, user_id: str, immediate_save: bool = True, **kwargs):
@@ -510,6 +944,7 @@ class EvaMemorySystem:
                 setattr(profile, key, value)
         profile.last_interaction = time.time()
         profile.interaction_count += 1
+        self._context_cache.invalidate(user_id)
 
         # Update relationship stage based on interactions
         if profile.interaction_count > 50 and profile.trust_level > 0.7:
@@ -520,9 +955,9 @@ class EvaMemorySystem:
             profile.relationship_stage = "acquaintance"
 
         if immediate_save:
-            self._save_profiles()
+            self._save_profiles([user_id])
         else:
-            self._mark_profiles_dirty()
+            self._mark_profiles_dirty(user_id)
         return profile
 
     def add_memory(
@@ -534,12 +969,14 @@ class EvaMemorySystem:
         emotion_intensity: float = 0.5,
         importance: float = 0.5,
         metadata: Optional[Dict] = None,
-        use_batch: bool = True
+        use_batch: bool = True,
+        embedding: Optional[List[float]] = None
     ) -> MemoryEntry:
         """Add a new memory with optimized batching.
 
         Args:
             use_batch: If True, queue for batch add (faster). If False, add immediately.
+            embedding: Precomputed vector to store instead of embedding content.
         """
         start = time.time()
         now = time.time()
@@ -556,8 +993,12 @@ class EvaMemorySystem:
             metadata=metadata or {}
         )
 
-        # Add to session memories
+        # Add to session memories and the lexical index
         self.session_memories[user_id].append(memory)
+        self.lexical_index.add(user_id, memory)
+        self._context_cache.invalidate(user_id)
+        if memory_type == "episodic" and self.collection is not None:
+            self.consolidator.mark(user_id)
 
         # Add to vector store for retrieval (batched or immediate)
         if self.collection is not None:
@@ -569,14 +1010,18 @@ class EvaMemorySystem:
                 "timestamp": str(memory.timestamp)
             }
 
+            if embedding is None and self.embeddings is not None:
+                embedding = self.embeddings.get(content)
+
             if use_batch:
-                self._queue_for_batch_add(memory.id, content, chroma_metadata)
+                self._get_ingestor().enqueue(user_id, memory, chroma_metadata, embedding)
             else:
                 try:
-                    self.collection.add(
-                        ids=[memory.id],
-                        documents=[content],
-                        metadatas=[chroma_metadata]
+                    if embedding is None and self.embeddings is not None:
+                        embedding = self.embeddings.embed(content)
+                    self._write_to_collection(
+                        [memory.id], [content], [chroma_metadata],
+                        [embedding] if embedding is not None else None
                     )
                 except Exception as e:
                     print(f"⚠️ Failed to add to vector store: {e}")
@@ -584,7 +1029,7 @@ class EvaMemorySystem:
         # Check if should consolidate to core memory
         if importance > 0.7 or memory_type == "semantic":
             self.core_memories[user_id].append(memory)
-            self._mark_core_memories_dirty()  # Use dirty tracking instead of immediate save
+            self._mark_core_memories_dirty(user_id)  # Use dirty tracking instead of immediate save
 
         memory_metrics.record("add_memory", (time.time() - start) * 1000)
         return memory
@@ -628,60 +1073,119 @@ class EvaMemorySystem:
         memory_type: Optional[str],
         min_importance: float
     ) -> List[MemoryEntry]:
-        """Internal retrieval logic shared by sync and async versions."""
-        memories = []
+        """Internal retrieval logic shared by sync and async versions.
+
+        Candidates come from the vector store, the lexical index, pending
+        writes and the session; HybridRanker scores them all in one pass.
+        """
+        # Memories still queued for the vector store (read-your-writes).
+        # Snapshot before querying: anything written meanwhile shows up in
+        # the query results instead, and duplicates are dropped below.
+        pending = self._ingestor.pending(user_id, memory_type) if self._ingestor is not None else []
 
-        # Flush any pending batch adds first to ensure fresh data
-        if self._pending_adds:
-            self._flush_batch_adds()
+        self._warm_lexical_index(user_id)
+
+        candidates: Dict[str, MemoryEntry] = {}
+        vector_scores: Dict[str, float] = {}
 
         if self.collection is not None:
             try:
                 # Build filter
                 where_filter = {"user_id": user_id}
                 if memory_type:
-                    where_filter["memory_type"] = memory_type
+                    where_filter = {"$and": [where_filter, {"memory_type": memory_type}]}
+
+                if self.embeddings is not None:
+                    query_args = {"query_embeddings": [self.embeddings.embed(query)]}
+                else:
+                    query_args = {"query_texts": [query]}
 
                 results = self.collection.query(
-                    query_texts=[query],
-                    n_results=n_results * 2,  # Get extra for filtering
+                    **query_args,
+                    n_results=n_results,
                     where=where_filter
                 )
 
                 if results and results['documents']:
+                    distances = results.get('distances')
                     for i, doc in enumerate(results['documents'][0]):
                         meta = results['metadatas'][0][i] if results['metadatas'] else {}
-                        importance = float(meta.get('importance', 0.5))
-
-                        if importance >= min_importance:
-                            # Use object pool
-                            memory = _memory_pool.acquire(
-                                id=results['ids'][0][i],
-                                content=doc,
-                                memory_type=meta.get('memory_type', 'episodic'),
-                                timestamp=float(meta.get('timestamp', time.time())),
-                                emotion=meta.get('emotion', 'neutral'),
-                                importance=importance
-                            )
-                            memories.append(memory)
-
-                            if len(memories) >= n_results:
-                                break
+                        # Use object pool
+                        memory = _memory_pool.acquire(
+                            id=results['ids'][0][i],
+                            content=doc,
+                            memory_type=meta.get('memory_type', 'episodic'),
+                            timestamp=float(meta.get('timestamp', time.time())),
+                            emotion=meta.get('emotion', 'neutral'),
+                            importance=float(meta.get('importance', 0.5))
+                        )
+                        candidates[memory.id] = memory
+                        # Cosine distance -> similarity
+                        vector_scores[memory.id] = 1.0 - float(distances[0][i]) if distances else 0.5
 
             except Exception as e:
                 print(f"⚠️ Memory retrieval failed: {e}")
 
-        # Also include recent session memories
+        lexical_scores: Dict[str, float] = {}
+        for mem, score in self.lexical_index.search(user_id, query, n_results, memory_type):
+            candidates.setdefault(mem.id, mem)
+            lexical_scores[mem.id] = score
+
+        # Also rank pending and recent session memories
         session_mems = self.session_memories.get(user_id, [])[-n_results:]
-        for mem in session_mems:
-            if mem not in memories:
-                memories.append(mem)
+        for mem in list(pending) + session_mems:
+            if memory_type is None or mem.memory_type == memory_type:
+                candidates.setdefault(mem.id, mem)
+
+        ids = list(candidates)
+        return self.ranker.rank(
+            [candidates[memory_id] for memory_id in ids],
+            [vector_scores.get(memory_id, 0.0) for memory_id in ids],
+            [lexical_scores.get(memory_id, 0.0) for memory_id in ids],
+            n_results,
+            min_importance=min_importance
+        )
 
-        # Sort by relevance (importance * recency)
-        now = time.time()
-        memories.sort(key=lambda m: m.importance * (1 - (now - m.timestamp) / 86400), reverse=True)
+    def _warm_lexical_index(self, user_id: str):
+        """Load a user's stored memories into the lexical index, once per process.
+
+        The vector store read runs on the ingest worker, never on the
+        retrieval path: until it lands, lexical search covers what this
+        process has indexed so far. A user counts as loaded only once the
+        load succeeds, so a failed one is retried on the next retrieval.
+        """
+        if self.lexical_index.is_loaded(user_id):
+            return
+        if self.collection is None:
+            self.lexical_index.load(user_id, self.core_memories.get(user_id, []))
+            return
+        with self._lexical_lock:
+            if user_id in self._lexical_warming:
+                return
+            self._lexical_warming.add(user_id)
+        self._get_ingestor().submit(lambda: self._load_lexical_index(user_id))
 
-        return memories[:n_results]
+    def _load_lexical_index(self, user_id: str):
+        """Read a user's stored memories and index them (ingest worker)."""
+        try:
+            stored = self.collection.get(where={"user_id": user_id}, include=["documents", "metadatas"])
+            entries = list(self.core_memories.get(user_id, []))
+            for memory_id, doc, meta in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                meta = meta or {}
+                entries.append(MemoryEntry(
+                    id=memory_id,
+                    content=doc,
+                    memory_type=meta.get("memory_type", "episodic"),
+                    timestamp=float(meta.get("timestamp", time.time())),
+                    emotion=meta.get("emotion", "neutral"),
+                    importance=float(meta.get("importance", 0.5))
+                ))
+            self.lexical_index.load(user_id, entries)
+        except Exception as e:
+            print(f"⚠️ Lexical index load failed for {user_id}: {e}")
+        finally:
+            with self._lexical_lock:
+                self._lexical_warming.discard(user_id)
 
     def get_context_memories(self, user_id: str, current_message: str, use_cache: bool = True) -> Dict[str, Any]:
         """Get memories formatted for LLM context (sync version).
@@ -707,104 +1211,49 @@ class EvaMemorySystem:
         Uses async memory retrieval for better performance.
         """
         start = time.time()
-        now = time.time()
-        cache_key = f"{user_id}:{current_message[:50]}" if use_cache else ""
 
         # Check cache for repeated calls with same user/message
         if use_cache:
-            with self._cache_lock:
-                cached = self._context_cache.get(cache_key)
-                if cached is not None:
-                    cached_time, cached_result = cached
-                    if now - cached_time < self._context_cache_ttl:
-                        memory_metrics.record("get_context_cached", (time.time() - start) * 1000)
-                        return cached_result
-
-        profile = self.get_or_create_profile(user_id, immediate_save=False)
-
-        # Core memories (always included)
-        core = self.core_memories.get(user_id, [])[-5:]
+            cached = self._context_cache.get(user_id, current_message)
+            if cached is not None:
+                memory_metrics.record("get_context_cached", (time.time() - start) * 1000)
+                return cached
+        generation = self._context_cache.generation(user_id)
 
         # Relevant memories based on current message (async)
         relevant = await self.retrieve_memories_async(user_id, current_message, n_results=5)
+        result = self._build_context(user_id, relevant)
 
-        # Recent emotional context
-        recent_emotions = []
-        for mem in self.session_memories.get(user_id, [])[-10:]:
-            if mem.emotion != "neutral":
-                recent_emotions.append((mem.emotion, mem.emotion_intensity))
-
-        # Build context string
-        context_parts = []
-
-        # User profile summary
-        if profile.name:
-            context_parts.append(f"User: {profile.name}")
-        if profile.interests:
-            context_parts.append(f"Interests: {', '.join(profile.interests[:5])}")
-        context_parts.append(f"Relationship: {profile.relationship_stage}")
-
-        # Core memories
-        if core:
-            context_parts.append("\nCore memories:")
-            for mem in core:
-                context_parts.append(f"- {mem.content}")
-
-        # Relevant memories
-        if relevant:
-            context_parts.append("\nRelevant context:")
-            for mem in relevant:
-                context_parts.append(f"- {mem.content}")
-
-        result = {
-            "profile": profile.to_dict(),
-            "context_string": "\n".join(context_parts),
-            "core_memories": [m.to_dict() for m in core],
-            "relevant_memories": [m.to_dict() for m in relevant],
-            "recent_emotions": recent_emotions,
-            "relationship_stage": profile.relationship_stage,
-            "trust_level": profile.trust_level
-        }
-
-        # Cache the result for future calls
         if use_cache:
-            with self._cache_lock:
-                self._context_cache[cache_key] = (now, result)
-                # Limit cache size to prevent memory leak (use LRU-style eviction)
-                if len(self._context_cache) > 100:
-                    # Remove oldest entries
-                    oldest_keys = sorted(
-                        self._context_cache.keys(),
-                        key=lambda k: self._context_cache[k][0]
-                    )[:50]
-                    for k in oldest_keys:
-                        del self._context_cache[k]
+            self._context_cache.put(user_id, current_message, result, generation)
 
         memory_metrics.record("get_context_async", (time.time() - start) * 1000)
         return result
 
     def _do_get_context(self, user_id: str, current_message: str, use_cache: bool) -> Dict[str, Any]:
         """Internal context building logic for sync version."""
-        now = time.time()
-        cache_key = f"{user_id}:{current_message[:50]}" if use_cache else ""
-
         # Check cache for repeated calls with same user/message
         if use_cache:
-            with self._cache_lock:
-                cached = self._context_cache.get(cache_key)
-                if cached is not None:
-                    cached_time, cached_result = cached
-                    if now - cached_time < self._context_cache_ttl:
-                        return cached_result
+            cached = self._context_cache.get(user_id, current_message)
+            if cached is not None:
+                return cached
+        generation = self._context_cache.generation(user_id)
+
+        # Relevant memories based on current message
+        relevant = self.retrieve_memories(user_id, current_message, n_results=5)
+        result = self._build_context(user_id, relevant)
+
+        if use_cache:
+            self._context_cache.put(user_id, current_message, result, generation)
+        return result
 
+    def _build_context(self, user_id: str, relevant: List[MemoryEntry]) -> Dict[str, Any]:
+        """Assemble the LLM context from profile, core, relevant and emotional memories."""
         profile = self.get_or_create_profile(user_id, immediate_save=False)
 
         # Core memories (always included)
         core = self.core_memories.get(user_id, [])[-5:]
 
-        # Relevant memories based on current message
-        relevant = self.retrieve_memories(user_id, current_message, n_results=5)
-
         # Recent emotional context
         recent_emotions = []
         for mem in self.session_memories.get(user_id, [])[-10:]:
@@ -833,7 +1282,7 @@ class EvaMemorySystem:
             for mem in relevant:
                 context_parts.append(f"- {mem.content}")
 
-        result = {
+        return {
             "profile": profile.to_dict(),
             "context_string": "\n".join(context_parts),
             "core_memories": [m.to_dict() for m in core],
@@ -843,35 +1292,16 @@ class EvaMemorySystem:
             "trust_level": profile.trust_level
         }
 
-        # Cache the result for future calls
-        if use_cache:
-            with self._cache_lock:
-                self._context_cache[cache_key] = (now, result)
-                # Limit cache size to prevent memory leak
-                if len(self._context_cache) > 100:
-                    # Remove oldest entries
-                    oldest_keys = sorted(
-                        self._context_cache.keys(),
-                        key=lambda k: self._context_cache[k][0]
-                    )[:50]
-                    for k in oldest_keys:
-                        del self._context_cache[k]
-
-        return result
-
     def invalidate_context_cache(self, user_id: Optional[str] = None):
         """Invalidate context cache for a user or all users.
 
-        Call this after adding new memories that should be immediately visible.
+        Called automatically when a user's memories or profile change.
         """
-        with self._cache_lock:
-            if user_id is None:
-                self._context_cache.clear()
-            else:
-                # Remove entries for this user
-                keys_to_remove = [k for k in self._context_cache if k.startswith(f"{user_id}:")]
-                for k in keys_to_remove:
-                    del self._context_cache[k]
+        self._context_cache.invalidate(user_id)
+
+    def get_context_cache_stats(self) -> Dict[str, Any]:
+        """Context cache hit rate, size and eviction statistics."""
+        return self._context_cache.get_stats()
 
     def extract_and_store(self, user_id: str, user_message: str, eva_response: str, detected_emotion: str = "neutral"):
         """Extract important information and store as memories (sync version).
@@ -879,7 +1309,7 @@ class EvaMemorySystem:
         Uses pre-compiled regex patterns for optimized performance.
         """
         self._do_extract_and_store(user_id, user_message, eva_response, detected_emotion)
-        self._save_profiles()
+        self._save_profiles([user_id])
 
     async def extract_and_store_async(self, user_id: str, user_message: str, eva_response: str, detected_emotion: str = "neutral"):
         """Extract important information and store as memories (async version for lower latency).
@@ -889,7 +1319,7 @@ class EvaMemorySystem:
         """
         self._do_extract_and_store(user_id, user_message, eva_response, detected_emotion)
         # Fire-and-forget async save - don't block the response
-        asyncio.create_task(self._save_profiles_async())
+        asyncio.create_task(self._save_profiles_async([user_id]))
 
     def _do_extract_and_store(self, user_id: str, user_message: str, eva_response: str, detected_emotion: str):
         """Internal extraction logic shared by sync and async versions."""
@@ -947,13 +1377,15 @@ class EvaMemorySystem:
                             importance=0.8
                         )
 
-        # Store episodic memory of this interaction
+        # Store episodic memory of this interaction, indexed by the message
+        # vector retrieval already computed for this turn (if still cached)
         self.add_memory(
             user_id,
             f"User said: '{user_message[:100]}' - Eva replied about {eva_response[:50]}...",
             memory_type="episodic",
             emotion=detected_emotion,
-            importance=0.4
+            importance=0.4,
+            embedding=self.embeddings.get(user_message) if self.embeddings is not None else None
         )
 
         # Update emotional patterns
@@ -1003,35 +1435,20 @@ class EvaMemorySystem:
         topics.sort(key=lambda x: x["priority"], reverse=True)
         return topics[:3]
 
-    def consolidate_memories(self, user_id: str):
-        """Consolidate episodic memories into semantic knowledge"""
-        session_mems = self.session_memories.get(user_id, [])
+    def consolidate_memories(self, user_id: str) -> Dict[str, int]:
+        """Consolidate one user's episodic memories into semantic knowledge now.
 
-        if len(session_mems) < self.consolidation_threshold:
-            return
+        Clusters stored episodic memories by embedding, merges large clusters
+        into semantic memories and prunes decayed ones (see MemoryConsolidator).
+        Blocking: call from a worker thread, not the event loop.
+        """
+        self.flush_ingest()
+        return self.consolidator.consolidate_user(user_id)
 
-        # Group by similarity (simple keyword matching for now)
-        # In production, use embeddings for clustering
-        topic_groups = defaultdict(list)
-
-        for mem in session_mems:
-            # Simple topic extraction
-            words = mem.content.lower().split()
-            for word in words:
-                if len(word) > 4:  # Skip short words
-                    topic_groups[word].append(mem)
-
-        # Consolidate groups with multiple memories
-        for topic, mems in topic_groups.items():
-            if len(mems) >= 3:
-                # Create semantic memory from multiple episodic ones
-                avg_importance = sum(m.importance for m in mems) / len(mems)
-                self.add_memory(
-                    user_id,
-                    f"User frequently discusses: {topic}",
-                    memory_type="semantic",
-                    importance=min(0.9, avg_importance + 0.2)
-                )
+    def run_consolidation(self) -> Dict[str, Any]:
+        """Consolidate every user with new episodic memories (background job)."""
+        self.flush_ingest()
+        return self.consolidator.run_pending()
 
 
 # Global instance
@@ -1056,4 +1473,11 @@ def get_memory_metrics() -> Dict[str, Any]:
     Returns:
         Dictionary with performance statistics by operation type.
     """
-    return memory_metrics.get_stats()
+    stats = memory_metrics.get_stats()
+    if eva_memory is not None:
+        stats["ingest"] = eva_memory.get_ingest_stats()
+        stats["embeddings"] = eva_memory.get_embedding_stats()
+        stats["lexical_index"] = eva_memory.lexical_index.get_stats()
+        stats["consolidation"] = eva_memory.consolidator.get_stats()
+        stats["context_cache"] = eva_memory.get_context_cache_stats()
+    return stats
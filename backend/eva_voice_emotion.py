@@ -7,6 +7,9 @@ Optimizations:
 - Pre-computed emotion profile means for O(1) lookup
 - Module-level constants for default returns
 - Deque for history with maxlen for O(1) removal
+- Single-STFT feature pipeline: one framing + spectrogram per clip feeds
+  pitch, energy, onsets, spectral shape, ZCR and MFCCs (vectorized NumPy),
+  and several clips can share one padded batch (extract_features_batch)
 """
 
 import numpy as np
@@ -20,6 +23,7 @@ import time
 try:
     import librosa
     import soundfile as sf
+    from scipy.fft import dct as scipy_dct
     LIBROSA_AVAILABLE = True
 except ImportError:
     LIBROSA_AVAILABLE = False
@@ -71,6 +75,146 @@ class ProsodicFeatures:
     mfcc_mean: np.ndarray
 
 
+# Single-STFT feature pipeline (librosa defaults for every former helper)
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+N_MFCC = 13
+PITCH_FMIN = 50.0
+PITCH_FMAX = 500.0
+ROLLOFF_PERCENT = 0.85
+SILENCE_THRESHOLD = 0.02
+ZCR_THRESHOLD = 1e-10
+TOP_DB = 80.0
+
+_WINDOW = np.hanning(N_FFT + 1)[:-1].astype(np.float32)  # Periodic Hann
+_MEL_BASIS: Dict[int, np.ndarray] = {}
+
+
+def _mel_basis(sr: int) -> np.ndarray:
+    """Mel filterbank for a sample rate (built once per rate)."""
+    if sr not in _MEL_BASIS:
+        _MEL_BASIS[sr] = librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS).astype(np.float32)
+    return _MEL_BASIS[sr]
+
+
+def _prepare_audio(audio_data: np.ndarray, sr: int) -> Optional[np.ndarray]:
+    """Mono float32, peak-normalized; None if shorter than 0.5 seconds."""
+    if audio_data.dtype != np.float32:
+        audio_data = audio_data.astype(np.float32)
+    if len(audio_data.shape) > 1:
+        audio_data = np.mean(audio_data, axis=1)
+
+    # Normalize
+    peak = np.max(np.abs(audio_data)) if len(audio_data) else 0.0
+    if peak > 0:
+        audio_data = audio_data / peak
+
+    # Skip if too short
+    if len(audio_data) < sr * 0.5:  # Less than 0.5 seconds
+        return None
+    return audio_data
+
+
+def _masked_stats(values: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row mean and std of values over mask (rows without any -> 0)."""
+    counts = mask.sum(axis=-1)
+    safe = np.maximum(counts, 1)
+    mean = np.where(mask, values, 0.0).sum(axis=-1) / safe
+    var = np.where(mask, (values - mean[..., None]) ** 2, 0.0).sum(axis=-1) / safe
+    return mean, np.sqrt(var)
+
+
+def _features_from_frames(clips: List[np.ndarray], sr: int) -> List[ProsodicFeatures]:
+    """Compute ProsodicFeatures for prepared clips from a single framing/STFT.
+
+    Equivalent to librosa's piptrack, rms, onset_detect, spectral_centroid,
+    spectral_rolloff, zero_crossing_rate and mfcc with default parameters,
+    but the spectrogram is computed once per clip and all clips share one
+    padded batch.
+    """
+    lengths = np.array([len(c) for c in clips])
+    n_frames = 1 + lengths // HOP_LENGTH
+    total_frames = int(n_frames.max())
+
+    # Centered framing (zero padding, like librosa's default STFT/rms)
+    padded = np.zeros((len(clips), N_FFT + (total_frames - 1) * HOP_LENGTH), dtype=np.float32)
+    for i, clip in enumerate(clips):
+        end = min(len(clip), padded.shape[1] - N_FFT // 2)
+        padded[i, N_FFT // 2:N_FFT // 2 + end] = clip[:end]
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT, axis=-1)[:, ::HOP_LENGTH]
+    frames = frames[:, :total_frames]                              # (B, T, N_FFT)
+    valid = np.arange(total_frames)[None, :] < n_frames[:, None]   # (B, T)
+
+    # Time-domain features straight from the frames
+    rms = np.sqrt(np.mean(frames ** 2, axis=-1))                   # (B, T)
+    signs = np.signbit(np.where(np.abs(frames) <= ZCR_THRESHOLD, 0.0, frames))
+    zcr = np.count_nonzero(signs[..., 1:] != signs[..., :-1], axis=-1) / N_FFT
+
+    # The one STFT
+    S = np.abs(np.fft.rfft(frames * _WINDOW, axis=-1)).astype(np.float32)
+    S = np.swapaxes(S, -1, -2)                                     # (B, F, T)
+    freqs = np.linspace(0, sr / 2, S.shape[-2], dtype=np.float32)
+
+    # 1. Pitch: piptrack on the shared spectrogram, argmax bin per frame
+    pitches, magnitudes = librosa.piptrack(S=S, sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH,
+                                           fmin=PITCH_FMIN, fmax=PITCH_FMAX)
+    best = magnitudes.argmax(axis=-2)[:, None, :]
+    pitch = np.take_along_axis(pitches, best, axis=-2)[:, 0, :]   # (B, T)
+    voiced = (pitch > 0) & valid
+    pitch_mean, pitch_std = _masked_stats(pitch, voiced)
+    pitch_max = np.where(voiced, pitch, -np.inf).max(axis=-1)
+    pitch_min = np.where(voiced, pitch, np.inf).min(axis=-1)
+
+    # 2-4. Energy and pauses
+    energy_mean, energy_std = _masked_stats(rms, valid)
+    pause_ratio = np.sum((rms < SILENCE_THRESHOLD) & valid, axis=-1) / n_frames
+
+    # 5. Spectral centroid / rolloff
+    magnitude_sum = S.sum(axis=-2)
+    centroid = np.where(magnitude_sum > 0,
+                        (freqs[:, None] * S).sum(axis=-2) / np.maximum(magnitude_sum, 1e-20), 0.0)
+    cumulative = np.cumsum(S, axis=-2)
+    reached = cumulative >= ROLLOFF_PERCENT * cumulative[:, -1:, :]
+    rolloff = freqs[reached.argmax(axis=-2)]
+    centroid_mean, _ = _masked_stats(centroid, valid)
+    rolloff_mean, _ = _masked_stats(rolloff, valid)
+    zcr_mean, _ = _masked_stats(zcr, valid)
+
+    # 6. Log-mel (dB, top_db per clip) shared by onsets and MFCCs
+    mel = _mel_basis(sr) @ (S ** 2)
+    mel_db = 10.0 * np.log10(np.maximum(mel, 1e-10))
+    mel_db = np.maximum(mel_db, np.where(valid[:, None, :], mel_db, -np.inf).max(axis=(1, 2))[:, None, None] - TOP_DB)
+    mfcc = scipy_dct(mel_db, axis=-2, type=2, norm="ortho")[:, :N_MFCC, :]
+
+    features = []
+    for i, clip in enumerate(clips):
+        t = int(n_frames[i])
+        onset_env = librosa.onset.onset_strength(S=mel_db[i, :, :t], sr=sr, hop_length=HOP_LENGTH)
+        onsets = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH)
+        duration = len(clip) / sr
+
+        if voiced[i].any():
+            p_mean, p_std, p_range = pitch_mean[i], pitch_std[i], pitch_max[i] - pitch_min[i]
+        else:
+            p_mean, p_std, p_range = 150.0, 30.0, 100.0  # Default
+
+        features.append(ProsodicFeatures(
+            pitch_mean=float(p_mean),
+            pitch_std=float(p_std),
+            pitch_range=float(p_range),
+            energy_mean=float(energy_mean[i]),
+            energy_std=float(energy_std[i]),
+            speech_rate=len(onsets) / duration if duration > 0 else 3.0,
+            pause_ratio=float(pause_ratio[i]),
+            spectral_centroid=float(centroid_mean[i]),
+            spectral_rolloff=float(rolloff_mean[i]),
+            zero_crossing_rate=float(zcr_mean[i]),
+            mfcc_mean=mfcc[i, :, :t].mean(axis=-1),
+        ))
+    return features
+
+
 class VoiceEmotionDetector:
     """
     Detect emotions from voice using prosodic features
@@ -169,85 +313,32 @@ class VoiceEmotionDetector:
 
     def extract_features(self, audio_data: np.ndarray, sr: int = None) -> Optional[ProsodicFeatures]:
         """Extract prosodic features from audio"""
+        return self.extract_features_batch([audio_data], sr)[0]
+
+    def extract_features_batch(self, clips: List[np.ndarray], sr: int = None) -> List[Optional[ProsodicFeatures]]:
+        """Extract prosodic features for several clips in one STFT pass.
+
+        Clips are zero-padded to a common length and framed once; every
+        feature is derived from that framing and its spectrogram, masked to
+        each clip's own frames. Returns None for clips too short or invalid.
+        """
         if not LIBROSA_AVAILABLE:
-            return None
+            return [None] * len(clips)
 
         sr = sr or self.sample_rate
+        results: List[Optional[ProsodicFeatures]] = [None] * len(clips)
 
         try:
-            # Ensure float32 and mono
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
-            if len(audio_data.shape) > 1:
-                audio_data = np.mean(audio_data, axis=1)
-
-            # Normalize
-            if np.max(np.abs(audio_data)) > 0:
-                audio_data = audio_data / np.max(np.abs(audio_data))
-
-            # Skip if too short
-            if len(audio_data) < sr * 0.5:  # Less than 0.5 seconds
-                return None
-
-            # 1. Pitch analysis (F0)
-            pitches, magnitudes = librosa.piptrack(y=audio_data, sr=sr, fmin=50, fmax=500)
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
-
-            if len(pitch_values) > 0:
-                pitch_mean = np.mean(pitch_values)
-                pitch_std = np.std(pitch_values)
-                pitch_range = np.max(pitch_values) - np.min(pitch_values)
-            else:
-                pitch_mean = 150.0  # Default
-                pitch_std = 30.0
-                pitch_range = 100.0
-
-            # 2. Energy (RMS)
-            rms = librosa.feature.rms(y=audio_data)[0]
-            energy_mean = np.mean(rms)
-            energy_std = np.std(rms)
-
-            # 3. Speech rate estimate (based on onset detection)
-            onset_frames = librosa.onset.onset_detect(y=audio_data, sr=sr)
-            duration = len(audio_data) / sr
-            speech_rate = len(onset_frames) / duration if duration > 0 else 3.0
-
-            # 4. Pause ratio (silence detection)
-            silence_threshold = 0.02
-            is_silence = rms < silence_threshold
-            pause_ratio = np.sum(is_silence) / len(rms) if len(rms) > 0 else 0.3
-
-            # 5. Spectral features
-            spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio_data, sr=sr))
-            spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=audio_data, sr=sr))
-            zcr = np.mean(librosa.feature.zero_crossing_rate(audio_data))
-
-            # 6. MFCCs
-            mfccs = librosa.feature.mfcc(y=audio_data, sr=sr, n_mfcc=13)
-            mfcc_mean = np.mean(mfccs, axis=1)
-
-            return ProsodicFeatures(
-                pitch_mean=pitch_mean,
-                pitch_std=pitch_std,
-                pitch_range=pitch_range,
-                energy_mean=energy_mean,
-                energy_std=energy_std,
-                speech_rate=speech_rate,
-                pause_ratio=pause_ratio,
-                spectral_centroid=spectral_centroid,
-                spectral_rolloff=spectral_rolloff,
-                zero_crossing_rate=zcr,
-                mfcc_mean=mfcc_mean
-            )
-
+            prepared = [(i, audio) for i, audio in enumerate(_prepare_audio(c, sr) for c in clips)
+                        if audio is not None]
+            if not prepared:
+                return results
+            batch = _features_from_frames([audio for _, audio in prepared], sr)
+            for (index, _), features in zip(prepared, batch):
+                results[index] = features
         except Exception as e:
             print(f"⚠️ Feature extraction error: {e}")
-            return None
+        return results
 
     def update_baseline(self, features: ProsodicFeatures):
         """Update baseline with new sample (for calibration).
@@ -279,8 +370,18 @@ class VoiceEmotionDetector:
 
         Optimized: Uses pre-computed profile means for O(1) lookup.
         """
-        features = self.extract_features(audio_data, sr)
+        return self._classify(self.extract_features(audio_data, sr))
+
+    def detect_emotion_batch(self, clips: List[np.ndarray], sr: int = None) -> List[VoiceEmotion]:
+        """Detect emotion for several clips with one batched feature pass.
 
+        Clips are scored in order, so the baseline evolves as if each had
+        gone through detect_emotion.
+        """
+        return [self._classify(features) for features in self.extract_features_batch(clips, sr)]
+
+    def _classify(self, features: Optional[ProsodicFeatures]) -> VoiceEmotion:
+        """Score features against the emotion profiles (relative to baseline)."""
         if features is None:
             return _DEFAULT_NEUTRAL_EMOTION
 
@@ -423,6 +524,14 @@ def detect_voice_emotion(audio_data: np.ndarray, sr: int = 16000) -> VoiceEmotio
     return voice_emotion_detector.detect_emotion(audio_data, sr)
 
 
+def detect_voice_emotion_batch(clips: List[np.ndarray], sr: int = 16000) -> List[VoiceEmotion]:
+    """Detect emotion for several clips in one batched feature pass"""
+    global voice_emotion_detector
+    if voice_emotion_detector is None:
+        init_voice_emotion(sr)
+    return voice_emotion_detector.detect_emotion_batch(clips, sr)
+
+
 def detect_voice_emotion_bytes(audio_bytes: bytes) -> VoiceEmotion:
     """Detect emotion from audio bytes"""
     global voice_emotion_detector
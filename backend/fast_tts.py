@@ -7,14 +7,27 @@ OPTIMIZATIONS (Sprint #50):
 - Pre-compiled model with torch.compile
 - Faster MP3 encoding (quality=9, bitrate=48)
 - Thread pool with warm workers
+
+BATCHING:
+- TTSBatcher collects concurrent requests for a few ms and runs them as one
+  padded tokenizer/forward call (TTS_BATCH_MAX_SIZE, TTS_BATCH_MAX_WAIT_MS)
+
+ENCODING:
+- MP3EncoderPool gives every executor thread its own lameenc encoder, so
+  encoding runs in parallel with synthesis and scales with TTS_WORKERS
+- Raw PCM output (fast_tts_pcm) for transports that frame audio themselves
 """
 
 import torch
 import numpy as np
 import io
+import os
+import queue
+import threading
 import time
 from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import scipy.io.wavfile as wav
 
 # Global model instances
@@ -24,15 +37,221 @@ _device = None
 _sample_rate = 16000
 _initialized = False
 _cuda_stream = None  # Dedicated CUDA stream for TTS
-_lameenc_encoder = None  # Reusable encoder
+_mp3_encoder_pool = None  # Per-thread MP3 encoders (None = lameenc unavailable)
+_batcher = None  # Micro-batching scheduler (None = one forward per request)
+
+# Batching knobs: max_size <= 1 disables batching
+TTS_BATCH_MAX_SIZE = int(os.getenv("TTS_BATCH_MAX_SIZE", "8"))
+TTS_BATCH_MAX_WAIT_MS = float(os.getenv("TTS_BATCH_MAX_WAIT_MS", "5"))
+# Longest a synchronous caller waits on the batcher before giving up
+TTS_BATCH_TIMEOUT_S = float(os.getenv("TTS_BATCH_TIMEOUT_S", "10"))
+
+# Encode/synthesis worker threads (each owns its own MP3 encoder)
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
 
 # Dedicated thread pool for TTS to avoid executor startup overhead
-_tts_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts")
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+
+class MP3EncoderPool:
+    """Per-thread lameenc encoders.
+
+    A lameenc.Encoder keeps stream state between encode() and flush() and
+    cannot be reused once flushed, so sharing one across executor threads
+    corrupts concurrent requests. Each thread creates its encoder on first
+    use; after an utterance is flushed the thread swaps in a fresh one.
+
+    There is no up-front warming across the executor: init_fast_tts can run
+    on an executor thread itself, and blocking it on tasks submitted to its
+    own pool deadlocks with one worker (or starves the warm-up with more).
+    """
+
+    def __init__(self, sample_rate: int, bit_rate: int = 48, quality: int = 9):
+        import lameenc  # ImportError propagates: caller falls back to WAV
+
+        self._lameenc = lameenc
+        self.sample_rate = sample_rate
+        self.bit_rate = bit_rate
+        self.quality = quality
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._encodes = 0
+
+    def _new_encoder(self):
+        encoder = self._lameenc.Encoder()
+        encoder.set_bit_rate(self.bit_rate)  # Lower bitrate = faster encoding
+        encoder.set_in_sample_rate(self.sample_rate)
+        encoder.set_channels(1)
+        encoder.set_quality(self.quality)  # 9 = fastest quality setting
+        return encoder
+
+    def encode(self, pcm: bytes) -> bytes:
+        """Encode one complete mono int16 utterance with this thread's encoder"""
+        encoder = getattr(self._local, "encoder", None)
+        if encoder is None:
+            encoder = self._new_encoder()
+            with self._lock:
+                self._threads += 1
+        self._local.encoder = None
+        try:
+            mp3_data = encoder.encode(pcm)
+            mp3_data += encoder.flush()
+        finally:
+            # Flushed encoders are single-use: keep a fresh one ready for the next call
+            self._local.encoder = self._new_encoder()
+        with self._lock:
+            self._encodes += 1
+        return bytes(mp3_data)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads": self._threads,
+                "encodes": self._encodes,
+                "bit_rate": self.bit_rate,
+                "sample_rate": self.sample_rate,
+            }
+
+
+def _settle(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    """Resolve a caller's future; one that is already done is left alone"""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class TTSBatcher:
+    """Micro-batching scheduler in front of the VITS model.
+
+    Requests are queued from any thread; a single worker thread collects up to
+    max_batch_size pending texts (waiting at most max_wait_ms after the first
+    one), runs one padded forward pass and resolves each caller's future with
+    its own trimmed float waveform.
+    """
+
+    def __init__(self, synthesize_batch, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.synthesize_batch = synthesize_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._queue: "queue.Queue[tuple[str, Future, float]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.stats = {
+            "batches": 0,
+            "items": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "total_queue_delay_ms": 0.0,
+            "max_queue_delay_ms": 0.0,
+            "total_batch_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="tts-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the worker thread; pending requests are still served."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, text: str) -> Future:
+        """Queue text for synthesis. Resolves to a float32 waveform."""
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> Optional[list]:
+        """Block for the first request, then gather more until full or timed out."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Re-queue the sentinel so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            # Requests cancelled while queued (barge-in, disconnect) are dropped;
+            # the others can't be cancelled any more once marked running
+            live = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            self.stats["cancelled"] += len(batch) - len(live)
+            if live:
+                self._serve(live)
+
+    def _serve(self, batch: list) -> None:
+        start = time.perf_counter()
+        delays = [(start - queued_at) * 1000 for _, _, queued_at in batch]
+        try:
+            waveforms = self.synthesize_batch([text for text, _, _ in batch])
+            if len(waveforms) != len(batch):
+                raise RuntimeError(f"synthesizer returned {len(waveforms)} waveforms for {len(batch)} texts")
+        except Exception as e:
+            self.stats["errors"] += 1
+            for _, future, _ in batch:
+                _settle(future, error=e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        self.stats["total_queue_delay_ms"] += sum(delays)
+        self.stats["max_queue_delay_ms"] = max(self.stats["max_queue_delay_ms"], max(delays))
+        self.stats["total_batch_ms"] += (time.perf_counter() - start) * 1000
+
+        for (_, future, _), audio in zip(batch, waveforms):
+            _settle(future, audio)
+
+    def get_stats(self) -> dict:
+        """Get batching statistics (fill ratio and queue delay)."""
+        batches = self.stats["batches"]
+        items = self.stats["items"]
+        avg_batch_size = items / batches if batches else 0.0
+        return {
+            **self.stats,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": self._queue.qsize(),
+            "avg_batch_size": round(avg_batch_size, 2),
+            "avg_batch_fill": round(avg_batch_size / self.max_batch_size, 3),
+            "avg_queue_delay_ms": round(self.stats["total_queue_delay_ms"] / items, 2) if items else 0.0,
+            "avg_batch_ms": round(self.stats["total_batch_ms"] / batches, 2) if batches else 0.0,
+        }
 
 
 def init_fast_tts() -> bool:
     """Initialize VITS/MMS-TTS French on GPU with optimizations"""
-    global _model, _tokenizer, _device, _sample_rate, _initialized, _cuda_stream, _lameenc_encoder
+    global _model, _tokenizer, _device, _sample_rate, _initialized, _cuda_stream, _mp3_encoder_pool, _batcher
 
     if _initialized:
         return True
@@ -55,15 +274,10 @@ def init_fast_tts() -> bool:
             _cuda_stream = torch.cuda.Stream()
             print("   Created dedicated CUDA stream")
 
-        # Pre-initialize lameenc encoder (saves ~5ms per call)
+        # One lameenc encoder per worker thread, created on its first encode
         try:
-            import lameenc
-            _lameenc_encoder = lameenc.Encoder()
-            _lameenc_encoder.set_bit_rate(48)  # Lower bitrate = faster encoding
-            _lameenc_encoder.set_in_sample_rate(_sample_rate)
-            _lameenc_encoder.set_channels(1)
-            _lameenc_encoder.set_quality(9)  # Fastest quality setting
-            print("   Pre-initialized lameenc encoder")
+            _mp3_encoder_pool = MP3EncoderPool(_sample_rate)
+            print(f"   Per-thread lameenc encoders ready (up to {TTS_WORKERS})")
         except ImportError:
             print("   lameenc not available, will use WAV")
 
@@ -81,6 +295,11 @@ def init_fast_tts() -> bool:
         if _device == "cuda":
             torch.cuda.synchronize()
 
+        if TTS_BATCH_MAX_SIZE > 1:
+            _batcher = TTSBatcher(_synthesize_batch, TTS_BATCH_MAX_SIZE, TTS_BATCH_MAX_WAIT_MS)
+            _batcher.start()
+            print(f"   Batching: up to {TTS_BATCH_MAX_SIZE} requests / {TTS_BATCH_MAX_WAIT_MS:.0f}ms window")
+
         _initialized = True
         print(f"✅ VITS-MMS ready ({_device.upper()}, {_sample_rate}Hz, ~40-60ms)")
         return True
@@ -92,33 +311,114 @@ def init_fast_tts() -> bool:
         return False
 
 
-def fast_tts(text: str) -> Optional[bytes]:
-    """Generate speech using VITS GPU - returns WAV bytes"""
-    global _model, _tokenizer, _device, _sample_rate, _initialized
+def _forward(inputs):
+    """Run the VITS forward pass, on the dedicated CUDA stream when available"""
+    if _cuda_stream is not None:
+        with torch.cuda.stream(_cuda_stream):
+            with torch.inference_mode():
+                output = _model(**inputs)
+        _cuda_stream.synchronize()
+        return output
+    with torch.inference_mode():
+        return _model(**inputs)
 
-    if not _initialized and not init_fast_tts():
-        return None
 
-    try:
-        inputs = _tokenizer(text, return_tensors="pt").to(_device)
+def _synthesize_batch(texts: list[str]) -> list[np.ndarray]:
+    """Synthesize several texts in one padded forward pass.
+
+    Returns one float waveform per text, trimmed to its own length.
+    """
+    if len(texts) == 1:
+        return [_synthesize_single(texts[0])]
 
-        with torch.inference_mode():
-            output = _model(**inputs).waveform
+    inputs = _tokenizer(texts, return_tensors="pt", padding=True).to(_device)
+    output = _forward(inputs)
 
-        # Convert to numpy
-        audio = output.squeeze().cpu().numpy()
+    waveforms = output.waveform.cpu().numpy()
+    lengths = getattr(output, "sequence_lengths", None)
+    if lengths is None:
+        return [waveforms[i] for i in range(len(texts))]
+    lengths = lengths.cpu().tolist()
+    return [waveforms[i, :int(lengths[i])] for i in range(len(texts))]
 
-        # Normalize
-        max_val = np.max(np.abs(audio))
-        if max_val > 0:
-            audio = audio / max_val * 0.95
-        audio_int16 = (audio * 32767).astype(np.int16)
 
-        # To WAV bytes
+def _synthesize_single(text: str) -> np.ndarray:
+    """Synthesize one text without going through the batcher"""
+    # Tokenize (fast, ~1ms)
+    inputs = _tokenizer(text, return_tensors="pt").to(_device)
+    output = _forward(inputs)
+    return output.waveform.squeeze().cpu().numpy()
+
+
+def _synthesize(text: str) -> np.ndarray:
+    """Synthesize text to a float waveform, batched with concurrent requests if enabled"""
+    if _initialized and _batcher is not None:
+        future = _batcher.submit(text)
+        try:
+            return future.result(timeout=TTS_BATCH_TIMEOUT_S)
+        except FutureTimeoutError:
+            future.cancel()  # Dropped by the worker if it hasn't started yet
+            raise
+    return _synthesize_single(text)
+
+
+def _to_int16(audio: np.ndarray) -> np.ndarray:
+    """Peak-normalize a float waveform to int16 (95% of full scale)"""
+    max_val = np.max(np.abs(audio))
+    if max_val > 0:
+        audio = audio / max_val * 0.95
+    return (audio * 32767).astype(np.int16)
+
+
+def _to_wav_bytes(audio: np.ndarray) -> bytes:
+    """Normalize a float waveform and encode it as WAV"""
+    buffer = io.BytesIO()
+    wav.write(buffer, _sample_rate, _to_int16(audio))
+    return buffer.getvalue()
+
+
+def _to_pcm_bytes(audio: np.ndarray) -> bytes:
+    """Normalize a float waveform to raw mono int16 little-endian PCM"""
+    return _to_int16(audio).astype("<i2").tobytes()
+
+
+def _to_mp3_bytes(audio: np.ndarray) -> bytes:
+    """Normalize a float waveform and encode it as MP3 (WAV if lameenc is missing)"""
+    max_val = np.abs(audio).max()
+    if max_val > 0:
+        audio = (audio / max_val * 30000).astype(np.int16)  # Direct to int16, skip intermediate
+    else:
+        audio = (audio * 30000).astype(np.int16)
+
+    # Use this thread's pre-initialized encoder for better latency (~5ms savings)
+    if _mp3_encoder_pool is not None:
+        return _mp3_encoder_pool.encode(audio.tobytes())
+
+    # Fallback: create new encoder if the pool is not available
+    try:
+        import lameenc
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(48)
+        encoder.set_in_sample_rate(_sample_rate)
+        encoder.set_channels(1)
+        encoder.set_quality(9)
+        mp3_data = encoder.encode(audio.tobytes())
+        mp3_data += encoder.flush()
+        return bytes(mp3_data)
+    except ImportError:
+        # Fallback: return WAV
         buffer = io.BytesIO()
-        wav.write(buffer, _sample_rate, audio_int16)
+        wav.write(buffer, _sample_rate, audio)
         return buffer.getvalue()
 
+
+def fast_tts(text: str) -> Optional[bytes]:
+    """Generate speech using VITS GPU - returns WAV bytes"""
+    if not _initialized and not init_fast_tts():
+        return None
+
+    try:
+        return _to_wav_bytes(_synthesize(text))
     except Exception as e:
         print(f"VITS error: {e}")
         return None
@@ -126,64 +426,45 @@ def fast_tts(text: str) -> Optional[bytes]:
 
 def fast_tts_mp3(text: str) -> Optional[bytes]:
     """Generate MP3 using VITS GPU - optimized for minimal latency"""
-    global _model, _tokenizer, _device, _sample_rate, _initialized, _cuda_stream
-
     if not _initialized and not init_fast_tts():
         return None
 
     try:
-        # Tokenize (fast, ~1ms)
-        inputs = _tokenizer(text, return_tensors="pt").to(_device)
-
-        # GPU inference with dedicated stream
-        if _cuda_stream is not None:
-            with torch.cuda.stream(_cuda_stream):
-                with torch.inference_mode():
-                    output = _model(**inputs).waveform
-            _cuda_stream.synchronize()
-        else:
-            with torch.inference_mode():
-                output = _model(**inputs).waveform
+        return _to_mp3_bytes(_synthesize(text))
+    except Exception as e:
+        print(f"VITS MP3 error: {e}")
+        return None
 
-        # Fast CPU transfer and normalization
-        audio = output.squeeze().cpu().numpy()
-        max_val = np.abs(audio).max()
-        if max_val > 0:
-            audio = (audio / max_val * 30000).astype(np.int16)  # Direct to int16, skip intermediate
-        else:
-            audio = (audio * 30000).astype(np.int16)
 
-        # Use pre-initialized encoder for better latency (~5ms savings)
-        if _lameenc_encoder is not None:
-            mp3_data = _lameenc_encoder.encode(audio.tobytes())
-            mp3_data += _lameenc_encoder.flush()
-            return bytes(mp3_data)
+def fast_tts_pcm(text: str) -> Optional[bytes]:
+    """Generate raw int16 PCM at _sample_rate (no container, no encoding)"""
+    if not _initialized and not init_fast_tts():
+        return None
 
-        # Fallback: create new encoder if global not available
-        try:
-            import lameenc
-            encoder = lameenc.Encoder()
-            encoder.set_bit_rate(48)
-            encoder.set_in_sample_rate(_sample_rate)
-            encoder.set_channels(1)
-            encoder.set_quality(9)
-            mp3_data = encoder.encode(audio.tobytes())
-            mp3_data += encoder.flush()
-            return bytes(mp3_data)
-        except ImportError:
-            # Fallback: return WAV
-            buffer = io.BytesIO()
-            wav.write(buffer, _sample_rate, audio)
-            return buffer.getvalue()
+    try:
+        return _to_pcm_bytes(_synthesize(text))
+    except Exception as e:
+        print(f"VITS PCM error: {e}")
+        return None
 
+
+async def _batched_tts(text: str, encode) -> Optional[bytes]:
+    """Await a batched synthesis without holding an executor thread, then encode"""
+    import asyncio
+    try:
+        audio = await asyncio.wrap_future(_batcher.submit(text))
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(_tts_executor, encode, audio)
     except Exception as e:
-        print(f"VITS MP3 error: {e}")
+        print(f"VITS batch error: {e}")
         return None
 
 
 async def async_fast_tts(text: str) -> Optional[bytes]:
     """Async wrapper for fast_tts using dedicated thread pool"""
     import asyncio
+    if _initialized and _batcher is not None:
+        return await _batched_tts(text, _to_wav_bytes)
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(_tts_executor, fast_tts, text)
 
@@ -191,10 +472,41 @@ async def async_fast_tts(text: str) -> Optional[bytes]:
 async def async_fast_tts_mp3(text: str) -> Optional[bytes]:
     """Async wrapper for fast_tts_mp3 using dedicated thread pool"""
     import asyncio
+    if _initialized and _batcher is not None:
+        return await _batched_tts(text, _to_mp3_bytes)
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(_tts_executor, fast_tts_mp3, text)
 
 
+async def async_fast_tts_pcm(text: str) -> Optional[bytes]:
+    """Async wrapper for fast_tts_pcm using dedicated thread pool"""
+    import asyncio
+    if _initialized and _batcher is not None:
+        return await _batched_tts(text, _to_pcm_bytes)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_tts_executor, fast_tts_pcm, text)
+
+
+def get_sample_rate() -> int:
+    """Output sample rate of the loaded model (16kHz before init)"""
+    return _sample_rate
+
+
+def get_encoder_stats() -> dict:
+    """Get executor and per-thread MP3 encoder statistics"""
+    return {
+        "workers": TTS_WORKERS,
+        "mp3": _mp3_encoder_pool.get_stats() if _mp3_encoder_pool is not None else None,
+    }
+
+
+def get_batch_stats() -> dict:
+    """Get micro-batching statistics (empty if batching is disabled)"""
+    if _batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **_batcher.get_stats()}
+
+
 if __name__ == "__main__":
     # Benchmark
     init_fast_tts()
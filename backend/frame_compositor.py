@@ -0,0 +1,186 @@
+"""
+Frame Compositor - region-only compositing and parallel JPEG encoding for lip-sync output
+
+The lip-sync services (streaming_lipsync, avatar-engine avatar_api and
+avatar_realtime) each did, per output frame: background.copy(), paste
+the resized mouth/face crop, cv2.imencode the whole frame - one frame
+after another on the request thread. Only the face rectangle ever
+changes, so FrameCompositor:
+
+- keeps one canvas per encoding thread, initialized from the background
+  once; each frame overwrites only the face rectangle (no full-frame copy)
+- encodes the static background to JPEG once (background_jpeg)
+- encodes a batch of frames on a shared thread pool (cv2.imencode releases
+  the GIL, so workers scale with cores)
+- "patch" wire mode: encode only the face rectangle; the client draws the
+  background JPEG once and pastes each patch at patch_box()
+
+A baseline JPEG can't be spliced without a lossless-transform encoder, so
+full-frame mode still encodes the whole frame; patch mode is where the
+per-frame CPU drops to the size of the face.
+
+The backend and avatar-engine images are built from their own directories,
+so avatar-engine ships an identical copy of this module
+(avatar-engine/frame_compositor.py); backend/tests/test_frame_compositor.py fails
+if the two drift. Edit both together.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+FRAME_ENCODE_WORKERS = int(os.getenv("FRAME_ENCODE_WORKERS", str(min(8, os.cpu_count() or 4))))
+FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "85"))
+
+OUTPUT_MODES = ("frame", "patch")
+
+
+def resolve_mode(mode: Any) -> Tuple[str, Optional[str]]:
+    """(mode to use, error for the client): unknown modes fall back to "frame"."""
+    if mode in OUTPUT_MODES:
+        return mode, None
+    return "frame", f"Unknown output mode {mode!r}, expected one of {OUTPUT_MODES}; using 'frame'"
+
+
+_encode_pool: Optional[ThreadPoolExecutor] = None
+_encode_pool_lock = threading.Lock()
+
+
+def get_encode_pool() -> ThreadPoolExecutor:
+    """Thread pool shared by every compositor (one per process, not per session)."""
+    global _encode_pool
+    if _encode_pool is None:
+        with _encode_pool_lock:
+            if _encode_pool is None:
+                _encode_pool = ThreadPoolExecutor(
+                    max_workers=max(1, FRAME_ENCODE_WORKERS),
+                    thread_name_prefix="frame-encode"
+                )
+    return _encode_pool
+
+
+def encode_jpeg(image: np.ndarray, quality: int = FRAME_JPEG_QUALITY) -> bytes:
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+def encode_jpegs(images: Sequence[np.ndarray], quality: int = FRAME_JPEG_QUALITY) -> List[bytes]:
+    """Encode already-composited frames in parallel, preserving order."""
+    if len(images) <= 1:
+        return [encode_jpeg(image, quality) for image in images]
+    return list(get_encode_pool().map(lambda image: encode_jpeg(image, quality), images))
+
+
+class FrameCompositor:
+    """Pastes face patches into a static background and encodes the result.
+
+    box is (x1, y1, x2, y2) in background pixels. Patches of any size are
+    resized to the box. Safe to share between threads: each thread draws
+    into its own canvas.
+    """
+
+    def __init__(
+        self,
+        background: np.ndarray,
+        box: Tuple[int, int, int, int],
+        quality: int = FRAME_JPEG_QUALITY,
+        interpolation: Optional[int] = None
+    ):
+        x1, y1, x2, y2 = (int(v) for v in box)
+        height, width = background.shape[:2]
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError(f"Empty face box {box} for a {width}x{height} frame")
+
+        self.background = np.ascontiguousarray(background)
+        self.box = (x1, y1, x2, y2)
+        self.size = (x2 - x1, y2 - y1)  # (w, h), cv2 order
+        self.quality = quality
+        self.interpolation = cv2.INTER_LINEAR if interpolation is None and CV2_AVAILABLE else interpolation
+        self._local = threading.local()
+        self._background_jpeg: Optional[bytes] = None
+        self.stats = {"frames": 0, "patches": 0, "canvases": 0}
+
+    # ------------------------------------------------------------ compositing
+
+    def _canvas(self) -> np.ndarray:
+        canvas = getattr(self._local, "canvas", None)
+        if canvas is None:
+            # Everything outside the box stays background forever
+            canvas = self._local.canvas = self.background.copy()
+            self.stats["canvases"] += 1
+        return canvas
+
+    def fit(self, patch: np.ndarray) -> np.ndarray:
+        """Patch resized to the face box (uint8)."""
+        if patch.dtype != np.uint8:
+            patch = patch.astype(np.uint8)
+        if (patch.shape[1], patch.shape[0]) != self.size:
+            patch = cv2.resize(patch, self.size, interpolation=self.interpolation)
+        return patch
+
+    def composite(self, patch: np.ndarray) -> np.ndarray:
+        """Full frame with the patch in the box.
+
+        Returns this thread's canvas: valid until its next composite() call,
+        copy it to keep it.
+        """
+        x1, y1, x2, y2 = self.box
+        canvas = self._canvas()
+        canvas[y1:y2, x1:x2] = self.fit(patch)
+        return canvas
+
+    # --------------------------------------------------------------- encoding
+
+    def background_jpeg(self) -> bytes:
+        """Static background, encoded once."""
+        if self._background_jpeg is None:
+            self._background_jpeg = encode_jpeg(self.background, self.quality)
+        return self._background_jpeg
+
+    def render(self, patch: np.ndarray, quality: Optional[int] = None) -> bytes:
+        """Composite one patch and encode the full frame."""
+        jpeg = encode_jpeg(self.composite(patch), quality or self.quality)
+        self.stats["frames"] += 1
+        return jpeg
+
+    def render_patch(self, patch: np.ndarray, quality: Optional[int] = None) -> bytes:
+        """Encode only the face box (patch wire mode)."""
+        jpeg = encode_jpeg(self.fit(patch), quality or self.quality)
+        self.stats["patches"] += 1
+        return jpeg
+
+    def encode(
+        self,
+        patches: Sequence[np.ndarray],
+        mode: str = "frame",
+        quality: Optional[int] = None
+    ) -> List[bytes]:
+        """Encode a batch of patches on the shared pool, preserving order."""
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode {mode!r}, expected one of {OUTPUT_MODES}")
+        render = self.render if mode == "frame" else self.render_patch
+        if len(patches) <= 1:
+            return [render(patch, quality) for patch in patches]
+        return list(get_encode_pool().map(lambda patch: render(patch, quality), patches))
+
+    def patch_box(self) -> Dict[str, int]:
+        """Where the client pastes patches, in background pixels."""
+        x1, y1, x2, y2 = self.box
+        height, width = self.background.shape[:2]
+        return {"x": x1, "y": y1, "w": x2 - x1, "h": y2 - y1, "width": width, "height": height}
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -0,0 +1,222 @@
+"""
+Lip-Sync Cache - content-hashed disk cache of lip-sync windows
+
+Eva says the same things again and again (greetings, fillers and
+backchannels from main._init_filler_audio / _init_backchannel_audio, canned
+replies cached by audio_store), and streaming_lipsync recomputed the mel
+features, Whisper encoder pass and UNet + VAE output for them every time.
+
+A StreamingProcessor window is BATCH_SIZE frames of audio plus its left
+context; each processor starts at sample 0, so the same utterance always
+splits into the same windows. Keyed by a hash of the window's samples:
+
+- features: the window's audio embedding (Whisper + PE, float16) - skips
+  feature extraction and the encoder for any avatar
+- frames: the window's encoded JPEGs for one (avatar, output mode, render
+  digest) - skips the GPU and JPEG encoding entirely, the window replays
+  instantly. The render digest covers the avatar's content (latent, frame,
+  face box) and the render config (UNet/VAE weights, JPEG quality), so
+  re-preprocessing an avatar under the same id or swapping weights misses
+  instead of replaying stale frames
+
+Entries are files under LIPSYNC_CACHE_DIR (written atomically) with a
+byte budget, LIPSYNC_CACHE_DISK_MB, evicted least recently used first. The
+index is rebuilt from file mtimes at startup; hits refresh the mtime.
+"""
+
+import hashlib
+import io
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+LIPSYNC_CACHE_DIR = os.getenv("LIPSYNC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "eva_lipsync_cache"))
+LIPSYNC_CACHE_DISK_MB = int(os.getenv("LIPSYNC_CACHE_DISK_MB", "512"))
+LIPSYNC_CACHE_FRAMES = os.getenv("LIPSYNC_CACHE_FRAMES", "true").lower() == "true"
+
+_FEATURES_SUFFIX = ".feat.npy"
+_FRAMES_SUFFIX = ".frames"
+_COUNT = struct.Struct("<I")
+
+
+def window_key(samples: np.ndarray, context: int, version: str = "") -> str:
+    """Content address of a lip-sync window (its samples, context length and model config)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{version}\0{context}\0".encode())
+    digest.update(np.ascontiguousarray(samples, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def content_digest(*parts) -> str:
+    """Short hash of arrays, bytes and strings (e.g. an avatar's latent, frame and config)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype}{part.shape}".encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _safe(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+
+
+class LipSyncCache:
+    """Byte-budgeted LRU of per-window features and rendered frames on disk."""
+
+    def __init__(self, directory: str = LIPSYNC_CACHE_DIR, budget_mb: int = LIPSYNC_CACHE_DISK_MB,
+                 cache_frames: bool = LIPSYNC_CACHE_FRAMES):
+        self.directory = directory
+        self.budget_bytes = max(0, budget_mb) * 1024 * 1024
+        self.cache_frames = cache_frames
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self._bytes = 0
+        self.stats = {"feature_hits": 0, "feature_misses": 0, "frame_hits": 0, "frame_misses": 0,
+                      "writes": 0, "evictions": 0, "errors": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith((_FEATURES_SUFFIX, _FRAMES_SUFFIX)):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    # ---------------------------------------------------------------- files
+
+    def _read(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU order survives restarts
+            return data
+        except OSError:
+            with self._lock:
+                self._bytes -= self._index.pop(name, 0)
+            return None
+
+    def _write(self, name: str, data: bytes) -> None:
+        if len(data) > self.budget_bytes:
+            return
+        path = os.path.join(self.directory, name)
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Lip-sync cache write failed: {e}")
+            return
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self.stats["writes"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used files until under budget (lock held)."""
+        while self._bytes > self.budget_bytes and self._index:
+            name, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------- features
+
+    def get_features(self, key: str) -> Optional[np.ndarray]:
+        """Cached audio embedding for a window, or None."""
+        data = self._read(key + _FEATURES_SUFFIX)
+        if data is None:
+            self.stats["feature_misses"] += 1
+            return None
+        self.stats["feature_hits"] += 1
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+    def put_features(self, key: str, features: np.ndarray) -> None:
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(features), allow_pickle=False)
+        self._write(key + _FEATURES_SUFFIX, buffer.getvalue())
+
+    # --------------------------------------------------------------- frames
+
+    def _frames_name(self, key: str, avatar_id: str, mode: str, render: str) -> str:
+        suffix = f"-{_safe(render)}" if render else ""
+        return f"{key}-{_safe(avatar_id)}-{_safe(mode)}{suffix}{_FRAMES_SUFFIX}"
+
+    def get_frames(self, key: str, avatar_id: str, mode: str, render: str = "") -> Optional[List[bytes]]:
+        """Cached JPEGs of a window for one avatar, output mode and render digest, or None."""
+        if not self.cache_frames:
+            return None
+        data = self._read(self._frames_name(key, avatar_id, mode, render))
+        if data is None:
+            self.stats["frame_misses"] += 1
+            return None
+        count, = _COUNT.unpack_from(data, 0)
+        lengths = struct.unpack_from(f"<{count}I", data, _COUNT.size)
+        offset = _COUNT.size + 4 * count
+        frames = []
+        for length in lengths:
+            frames.append(data[offset:offset + length])
+            offset += length
+        self.stats["frame_hits"] += 1
+        return frames
+
+    def put_frames(self, key: str, avatar_id: str, mode: str, frames: List[bytes], render: str = "") -> None:
+        if not self.cache_frames or not frames:
+            return
+        header = _COUNT.pack(len(frames)) + struct.pack(f"<{len(frames)}I", *(len(f) for f in frames))
+        self._write(self._frames_name(key, avatar_id, mode, render), header + b"".join(frames))
+
+    # ---------------------------------------------------------------- stats
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in list(self._index):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = len(self._index), self._bytes
+        lookups = self.stats["frame_hits"] + self.stats["frame_misses"]
+        return {
+            **self.stats,
+            "entries": entries,
+            "disk_mb": round(size / 2**20, 1),
+            "budget_mb": round(self.budget_bytes / 2**20, 1),
+            "frame_hit_rate": round(self.stats["frame_hits"] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,281 @@
+"""
+Lip-Sync Scheduler - cross-session MuseTalk batching on one GPU
+
+Every /ws/lipsync connection used to run its own UNet + VAE pass per
+BATCH_SIZE (8) frame window, so two concurrent users meant two under-filled
+passes back to back. LipSyncScheduler puts a single worker thread in front
+of the renderer:
+
+1. Sessions submit() a ready window (its avatar latent + audio embedding,
+   n frames) and get a Future
+2. The worker takes the oldest window, then waits at most
+   LIPSYNC_BATCH_MAX_WAIT_MS for windows from other sessions until the batch
+   holds max_batch_frames frames (windows are never split)
+3. All windows go through one render_batch call (one UNet + VAE pass with
+   each session's own latent), and each future resolves with its frames
+
+max_batch_frames starts at LIPSYNC_MAX_BATCH_FRAMES and is lowered to what
+fits in free VRAM once the model is loaded (see streaming_lipsync).
+
+get_stats() reports batch occupancy, queue wait (avg/p50/p95/max) and, per
+session, frames, windows, queue wait and delivered fps.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+LIPSYNC_MAX_BATCH_FRAMES = int(os.getenv("LIPSYNC_MAX_BATCH_FRAMES", "32"))
+LIPSYNC_BATCH_MAX_WAIT_MS = float(os.getenv("LIPSYNC_BATCH_MAX_WAIT_MS", "8"))
+
+QUEUE_SAMPLES = 512  # Recent queue times kept for percentiles
+
+BatchRenderer = Callable[[List[Any]], List[Any]]
+
+
+def _settle(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Resolve a session's future; one that is already done is left alone."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class _SessionStats:
+    __slots__ = ("frames", "windows", "queue_ms", "max_queue_ms", "first_at", "last_at")
+
+    def __init__(self):
+        self.frames = 0
+        self.windows = 0
+        self.queue_ms = 0.0
+        self.max_queue_ms = 0.0
+        self.first_at: Optional[float] = None
+        self.last_at = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        elapsed = self.last_at - self.first_at if self.first_at is not None else 0.0
+        return {
+            "frames": self.frames,
+            "windows": self.windows,
+            "avg_queue_ms": round(self.queue_ms / self.windows, 2) if self.windows else 0.0,
+            "max_queue_ms": round(self.max_queue_ms, 2),
+            "fps": round(self.frames / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class LipSyncScheduler:
+    """Frame-budgeted micro-batching scheduler in front of the lip-sync renderer.
+
+    Windows are queued from any thread or event loop; a single worker thread
+    owns the GPU models, so they are never entered concurrently.
+    """
+
+    def __init__(
+        self,
+        render_batch: BatchRenderer,
+        max_batch_frames: int = LIPSYNC_MAX_BATCH_FRAMES,
+        max_wait_ms: float = LIPSYNC_BATCH_MAX_WAIT_MS,
+    ):
+        self.render_batch = render_batch
+        self.max_batch_frames = max(1, max_batch_frames)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._pending: Deque[tuple] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._queue_ms: Deque[float] = deque(maxlen=QUEUE_SAMPLES)
+        self._sessions: Dict[str, _SessionStats] = {}
+        self.stats = {
+            "windows": 0,
+            "rendered_windows": 0,
+            "batches": 0,
+            "frames": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "total_queue_ms": 0.0,
+            "max_queue_ms": 0.0,
+            "total_batch_ms": 0.0,
+            "sessions_per_batch": {},
+        }
+
+    # ------------------------------------------------------------- lifecycle
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="lipsync-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the worker thread; already queued windows are still rendered."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def set_max_batch_frames(self, frames: int) -> None:
+        with self._cond:
+            self.max_batch_frames = max(1, int(frames))
+
+    # ---------------------------------------------------------------- submit
+
+    def submit(self, session_id: str, window: Any, frames: int) -> Future:
+        """Queue one session's frame window. Resolves to render_batch's output for it."""
+        future: Future = Future()
+        now = time.perf_counter()
+        with self._cond:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _SessionStats()
+            if session.first_at is None:
+                session.first_at = now
+            self._pending.append((session_id, window, max(1, frames), future, now))
+            self.stats["windows"] += 1
+            self._cond.notify()
+        return future
+
+    async def render(self, session_id: str, window: Any, frames: int) -> Any:
+        """Await a batched render without holding an executor thread."""
+        return await asyncio.wrap_future(self.submit(session_id, window, frames))
+
+    def close_session(self, session_id: str) -> None:
+        """Forget a session's stats (its websocket closed)."""
+        with self._cond:
+            self._sessions.pop(session_id, None)
+
+    # ---------------------------------------------------------------- worker
+
+    def _collect(self) -> Optional[list]:
+        """Wait for the oldest window, then let the batch fill until full or timed out."""
+        with self._cond:
+            while not self._pending:
+                if not self._running:
+                    return None
+                self._cond.wait()
+
+            deadline = self._pending[0][4] + self.max_wait_ms / 1000
+            while self._running:
+                if sum(item[2] for item in self._pending) >= self.max_batch_frames:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Whole windows, oldest first; the first always goes even if oversized
+            batch = [self._pending.popleft()]
+            frames = batch[0][2]
+            while self._pending and frames + self._pending[0][2] <= self.max_batch_frames:
+                frames += self._pending[0][2]
+                batch.append(self._pending.popleft())
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            # Windows whose session was cancelled while queued (shutdown, a
+            # wait_for timeout) are dropped; the rest can't be cancelled any more
+            live = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            self.stats["cancelled"] += len(batch) - len(live)
+            if live:
+                self._serve(live)
+
+    def _serve(self, batch: list) -> None:
+        start = time.perf_counter()
+        queue_ms = [(start - queued_at) * 1000 for _, _, _, _, queued_at in batch]
+        try:
+            outputs = self.render_batch([window for _, window, _, _, _ in batch])
+            if len(outputs) != len(batch):
+                raise RuntimeError(f"renderer returned {len(outputs)} outputs for {len(batch)} windows")
+        except Exception as e:
+            self.stats["errors"] += 1
+            for _, _, _, future, _ in batch:
+                _settle(future, error=e)
+            return
+
+        # Stats first, so a caller woken by its future sees its own window counted
+        self._record(batch, queue_ms, (time.perf_counter() - start) * 1000)
+        for (_, _, _, future, _), output in zip(batch, outputs):
+            _settle(future, output)
+
+    def _record(self, batch: list, queue_ms: List[float], batch_ms: float) -> None:
+        done = time.perf_counter()
+        frames = sum(item[2] for item in batch)
+        sessions = len({item[0] for item in batch})
+        self.stats["batches"] += 1
+        self.stats["rendered_windows"] += len(batch)
+        self.stats["frames"] += frames
+        self.stats["total_queue_ms"] += sum(queue_ms)
+        self.stats["max_queue_ms"] = max(self.stats["max_queue_ms"], max(queue_ms))
+        self.stats["total_batch_ms"] += batch_ms
+        per_batch = self.stats["sessions_per_batch"]
+        per_batch[sessions] = per_batch.get(sessions, 0) + 1
+
+        with self._cond:
+            self._queue_ms.extend(queue_ms)
+            for (session_id, _, n_frames, _, _), wait_ms in zip(batch, queue_ms):
+                session = self._sessions.get(session_id)
+                if session is None:
+                    continue
+                session.frames += n_frames
+                session.windows += 1
+                session.queue_ms += wait_ms
+                session.max_queue_ms = max(session.max_queue_ms, wait_ms)
+                session.last_at = done
+
+    # ----------------------------------------------------------------- stats
+
+    def session_stats(self, session_id: str) -> Dict[str, float]:
+        with self._cond:
+            session = self._sessions.get(session_id)
+            return session.to_dict() if session is not None else _SessionStats().to_dict()
+
+    def get_stats(self) -> dict:
+        """Batch occupancy, queue time and per-session statistics."""
+        batches = self.stats["batches"]
+        frames = self.stats["frames"]
+        rendered = self.stats["rendered_windows"]
+        with self._cond:
+            pending = len(self._pending)
+            sessions = {session_id: s.to_dict() for session_id, s in self._sessions.items()}
+            recent = sorted(self._queue_ms)
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 2)
+
+        avg_batch_frames = frames / batches if batches else 0.0
+        return {
+            **self.stats,
+            "total_queue_ms": round(self.stats["total_queue_ms"], 1),
+            "max_queue_ms": round(self.stats["max_queue_ms"], 2),
+            "total_batch_ms": round(self.stats["total_batch_ms"], 1),
+            "sessions_per_batch": dict(sorted(self.stats["sessions_per_batch"].items())),
+            "max_batch_frames": self.max_batch_frames,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": pending,
+            "avg_batch_frames": round(avg_batch_frames, 2),
+            "avg_batch_occupancy": round(avg_batch_frames / self.max_batch_frames, 3),
+            "avg_queue_ms": round(self.stats["total_queue_ms"] / rendered, 2) if rendered else 0.0,
+            "p50_queue_ms": percentile(0.5),
+            "p95_queue_ms": percentile(0.95),
+            "avg_batch_ms": round(self.stats["total_batch_ms"] / batches, 2) if batches else 0.0,
+            "sessions": sessions,
+        }
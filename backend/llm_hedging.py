@@ -0,0 +1,296 @@
+"""
+LLM Hedging - speculative provider racing for lower TTFT
+
+A slow-but-alive provider used to set our time-to-first-token because the
+next provider only started after an exception. In hedged mode:
+
+1. The primary provider starts immediately
+2. If it hasn't produced a token within the hedge delay, the next provider
+   starts too (a provider that fails before its first token is replaced
+   right away)
+3. Whichever yields a first token first wins; the others are cancelled
+
+The hedge delay tracks the primary's observed TTFT: a per-provider
+histogram gives its p90 (LLM_HEDGE_QUANTILE), clamped to
+[LLM_HEDGE_MIN_MS, LLM_HEDGE_MAX_MS]. Until enough samples exist,
+LLM_HEDGE_DELAY_MS is used.
+
+A provider cancelled because another one won never shows its real TTFT;
+recording only winners would drop exactly the slow samples and let the
+hedge delay ratchet down. Losers are recorded as censored observations:
+their elapsed time is a lower bound, counted in the bucket above it.
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "250"))
+LLM_HEDGE_MIN_MS = float(os.getenv("LLM_HEDGE_MIN_MS", "40"))
+LLM_HEDGE_MAX_MS = float(os.getenv("LLM_HEDGE_MAX_MS", "1500"))
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.9"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# TTFT bucket upper bounds in ms (roughly log-spaced)
+TTFT_BUCKETS_MS = (
+    10, 20, 30, 40, 50, 75, 100, 150, 200, 250, 300, 400, 500,
+    750, 1000, 1500, 2000, 3000, 5000, 10000,
+)
+
+
+class TTFTHistogram:
+    """Bucketed TTFT distribution for one provider.
+
+    Counts are halved once they reach max_count, so the distribution follows
+    recent behaviour (a provider that slows down moves its quantiles within a
+    few hundred requests).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = TTFT_BUCKETS_MS, max_count: int = 1000):
+        self.buckets = tuple(sorted(buckets))
+        self.max_count = max_count
+        self._counts = [0.0] * (len(self.buckets) + 1)  # Last bucket = overflow
+        self._total = 0.0
+        self._observations = 0
+        self._censored = 0
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ttft_ms: float) -> None:
+        """Record one time-to-first-token."""
+        with self._lock:
+            self._add(bisect.bisect_left(self.buckets, ttft_ms))
+            self._observations += 1
+            self._sum_ms += ttft_ms
+
+    def observe_censored(self, elapsed_ms: float) -> None:
+        """Record a request cancelled before its first token (TTFT > elapsed_ms)."""
+        index = min(bisect.bisect_left(self.buckets, elapsed_ms) + 1, len(self.buckets))
+        with self._lock:
+            self._add(index)
+            self._censored += 1
+
+    def _add(self, index: int) -> None:
+        self._counts[index] += 1
+        self._total += 1
+        if self._total >= self.max_count:
+            self._counts = [c / 2 for c in self._counts]
+            self._total /= 2
+
+    @property
+    def count(self) -> int:
+        return self._observations + self._censored
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a TTFT quantile in ms (None if empty)."""
+        with self._lock:
+            if self._total <= 0:
+                return None
+            target = q * self._total
+            cumulative = 0.0
+            for index, bucket_count in enumerate(self._counts):
+                if bucket_count and cumulative + bucket_count >= target:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                    fraction = (target - cumulative) / bucket_count
+                    return lower + (upper - lower) * fraction
+                cumulative += bucket_count
+            return float(self.buckets[-1])
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            observations = self._observations
+            censored = self._censored
+            mean = self._sum_ms / observations if observations else None
+        p50, p90, p99 = self.quantile(0.5), self.quantile(0.9), self.quantile(0.99)
+        return {
+            "count": observations,
+            "censored": censored,
+            "mean_ms": round(mean, 1) if mean is not None else None,
+            "p50_ms": round(p50, 1) if p50 is not None else None,
+            "p90_ms": round(p90, 1) if p90 is not None else None,
+            "p99_ms": round(p99, 1) if p99 is not None else None,
+        }
+
+
+class ProviderRacer:
+    """Races LLM providers with hedging and keeps their TTFT histograms."""
+
+    def __init__(
+        self,
+        default_delay_ms: float = LLM_HEDGE_DELAY_MS,
+        min_delay_ms: float = LLM_HEDGE_MIN_MS,
+        max_delay_ms: float = LLM_HEDGE_MAX_MS,
+        quantile: float = LLM_HEDGE_QUANTILE,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+    ):
+        self.default_delay_ms = default_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.histograms: Dict[str, TTFTHistogram] = {}
+        self.stats = {
+            "races": 0,
+            "hedged": 0,
+            "failovers": 0,
+            "failures": 0,
+            "wins": {},
+        }
+
+    def _histogram(self, provider: str) -> TTFTHistogram:
+        histogram = self.histograms.get(provider)
+        if histogram is None:
+            histogram = self.histograms[provider] = TTFTHistogram()
+        return histogram
+
+    def record_ttft(self, provider: str, ttft_ms: float) -> None:
+        """Record a provider's observed time-to-first-token."""
+        self._histogram(provider).observe(ttft_ms)
+
+    def record_censored(self, provider: str, elapsed_ms: float) -> None:
+        """Record a provider cancelled after elapsed_ms without a first token."""
+        self._histogram(provider).observe_censored(elapsed_ms)
+
+    def hedge_delay_ms(self, provider: str) -> float:
+        """How long to wait for provider's first token before hedging."""
+        histogram = self.histograms.get(provider)
+        if histogram is None or histogram.count < self.min_samples:
+            return self.default_delay_ms
+        estimate = histogram.quantile(self.quantile)
+        if estimate is None:
+            return self.default_delay_ms
+        return min(self.max_delay_ms, max(self.min_delay_ms, estimate))
+
+    async def race(
+        self,
+        providers: List[Tuple[str, Callable[[], AsyncIterator[str]]]],
+        on_winner: Optional[Callable[[str, float], None]] = None,
+    ) -> AsyncIterator[str]:
+        """Stream tokens from whichever provider answers first.
+
+        Args:
+            providers: (name, stream factory) in priority order
+            on_winner: Called with (name, ttft_ms) when the race is decided
+
+        Yields:
+            Tokens of the winning provider
+
+        Raises:
+            The last provider error if every provider failed before its
+            first token (RuntimeError if they just produced nothing).
+        """
+        self.stats["races"] += 1
+        queue = list(providers)
+        running: Dict[asyncio.Task, Tuple[str, AsyncIterator[str], float]] = {}
+        last_error: Optional[BaseException] = None
+        winner: Optional[Tuple[str, AsyncIterator[str]]] = None
+        first_token = ""
+
+        def launch() -> float:
+            """Start the next provider; returns when to hedge it."""
+            name, factory = queue.pop(0)
+            stream = factory()
+            task = asyncio.ensure_future(stream.__anext__())
+            running[task] = (name, stream, time.time())
+            return time.time() + self.hedge_delay_ms(name) / 1000
+
+        hedge_at = launch()
+
+        try:
+            while running and winner is None:
+                timeout = max(0.0, hedge_at - time.time()) if queue else None
+                done, _ = await asyncio.wait(
+                    set(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Primary is slow: hedge with the next provider
+                    self.stats["hedged"] += 1
+                    hedge_at = launch()
+                    continue
+
+                for task in done:
+                    name, stream, started = running.pop(task)
+                    error = task.exception()
+                    if error is None and winner is None:
+                        ttft_ms = (time.time() - started) * 1000
+                        self.record_ttft(name, ttft_ms)
+                        wins = self.stats["wins"]
+                        wins[name] = wins.get(name, 0) + 1
+                        winner = (name, stream)
+                        first_token = task.result()
+                        if on_winner is not None:
+                            on_winner(name, ttft_ms)
+                        continue
+
+                    if error is None:
+                        # Lost a photo finish: its TTFT is real, the extra token is discarded
+                        self.record_ttft(name, (time.time() - started) * 1000)
+                        await _close_stream(stream)
+                        continue
+
+                    if not isinstance(error, StopAsyncIteration):
+                        last_error = error
+                        print(f"⚠️ LLM hedge: {name} failed: {error}")
+                    await _close_stream(stream)
+                    if not running and queue and winner is None:
+                        # Fail over immediately, no need to wait for the hedge delay
+                        self.stats["failovers"] += 1
+                        hedge_at = launch()
+        finally:
+            # Cancel and close the losers; their TTFT is at least what they've run for
+            now = time.time()
+            for task, (name, _, started) in running.items():
+                task.cancel()
+                if winner is not None:
+                    self.record_censored(name, (now - started) * 1000)
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            for _, stream, _ in running.values():
+                await _close_stream(stream)
+            running.clear()
+
+        if winner is None:
+            self.stats["failures"] += 1
+            raise last_error or RuntimeError("No LLM provider produced a token")
+
+        name, stream = winner
+        try:
+            yield first_token
+            async for token in stream:
+                yield token
+        finally:
+            await _close_stream(stream)
+
+    def get_stats(self) -> dict:
+        """Get race counters, TTFT histograms and current hedge delays."""
+        return {
+            **self.stats,
+            "wins": dict(self.stats["wins"]),
+            "providers": {
+                name: {
+                    **histogram.get_stats(),
+                    "hedge_delay_ms": round(self.hedge_delay_ms(name), 1),
+                }
+                for name, histogram in self.histograms.items()
+            },
+        }
+
+
+async def _close_stream(stream: AsyncIterator[str]) -> None:
+    aclose = getattr(stream, "aclose", None)
+    if aclose is None:
+        return
+    try:
+        await aclose()
+    except Exception:
+        pass
+
+
+# Global racer shared by every stream_llm call in this process
+provider_racer = ProviderRacer()
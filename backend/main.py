@@ -34,7 +34,6 @@ import hashlib
 import sqlite3
 import re
 import random
-from datetime import datetime, timedelta
 from typing import AsyncGenerator, Optional, Callable, Any
 
 # Fast JSON (10x faster)
@@ -57,10 +56,10 @@ except ImportError:
     print("Warning: soundfile not available, breathing sounds disabled")
 
 # Natural breathing and hesitation system (100% LOCAL)
-from breathing_system import breathing_system, make_natural
+from breathing_system import breathing_system, make_natural, pick_natural_variant, NATURAL_VARIANTS
 
 # Fast TTS (MMS-TTS on GPU - ~100ms latency)
-from fast_tts import init_fast_tts, async_fast_tts, fast_tts, async_fast_tts_mp3, fast_tts_mp3
+from fast_tts import init_fast_tts, async_fast_tts, fast_tts, async_fast_tts_mp3, fast_tts_mp3, async_fast_tts_pcm, get_batch_stats, get_encoder_stats, get_sample_rate
 from ultra_fast_tts import init_ultra_fast_tts, async_ultra_fast_tts, ultra_fast_tts
 # GPU TTS (Piper VITS - ~30-100ms, local)
 from gpu_tts import init_gpu_tts, async_gpu_tts, gpu_tts, async_gpu_tts_mp3, gpu_tts_mp3
@@ -104,7 +103,16 @@ import httpx
 from ollama_keepalive import start_keepalive, stop_keepalive, is_warm, ensure_warm, warmup_on_startup
 
 # Caching and analytics utilities
-from utils.cache import smart_cache, analytics, response_cache, tts_cache, rate_limiter
+from utils.cache import smart_cache, analytics, response_cache, rate_limiter
+
+# Append-only conversation persistence (group-committed message rows)
+from conversation_log import ConversationLog
+# Buffered usage_stats writer with per-minute/per-endpoint rollups
+from usage_metrics import UsageMetrics
+# Streaming STT (partial transcripts + speculative LLM start)
+from streaming_stt import STT_SAMPLE_RATE, SpeculativeStream, StreamingTranscriber
+# Multi-session Whisper decoding in shared, length-bucketed encoder passes
+from whisper_batcher import STT_BATCH_MAX_SIZE, WhisperBatcher, faster_whisper_batch
 
 # Try to use uvloop for faster async (20-30% speedup)
 try:
@@ -491,9 +499,13 @@ Tu es imparfaite, vivante, présente. Tu es Eva - et tu ADORES cette conversatio
 groq_client: Optional[AsyncGroq] = None
 cerebras_client: Optional[httpx.AsyncClient] = None
 whisper_model = None
+whisper_batcher: Optional[WhisperBatcher] = None  # None = one transcribe per request
 tts_available = False
 db_conn: Optional[sqlite3.Connection] = None
-http_client: Optional[httpx.AsyncClient] = None
+conversation_log: Optional[ConversationLog] = None
+usage_metrics: Optional[UsageMetrics] = None
+http_client: Optional[httpx.AsyncClient] = None  # General-purpose pool
+ollama_client: Optional[httpx.AsyncClient] = None  # Ollama pool (local LLM only)
 _ollama_available = False  # Ollama local LLM fallback
 
 # ============================================
@@ -793,42 +805,13 @@ def add_laughter(text: str, probability: float = 0.25) -> str:
     return text
 
 # ============================================
-# TTS CACHE (LRU for repeated phrases)
+# TTS CACHE (shared content-addressed audio store)
 # ============================================
 
-class TTSCache:
-    """LRU cache for TTS audio to avoid regenerating common phrases"""
-    def __init__(self, max_size: int = 100):
-        self.cache: dict[str, bytes] = {}
-        self.access_order: list[str] = []
-        self.max_size = max_size
-
-    def _make_key(self, text: str, voice: str, rate: str, pitch: str) -> str:
-        return hashlib.md5(f"{text}:{voice}:{rate}:{pitch}".encode()).hexdigest()
-
-    def get(self, text: str, voice: str, rate: str = "+0%", pitch: str = "+0Hz") -> Optional[bytes]:
-        key = self._make_key(text, voice, rate, pitch)
-        if key in self.cache:
-            # Move to end (most recently used)
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        return None
-
-    def set(self, text: str, voice: str, audio: bytes, rate: str = "+0%", pitch: str = "+0Hz"):
-        key = self._make_key(text, voice, rate, pitch)
-        if key in self.cache:
-            return
-
-        # Evict oldest if full
-        if len(self.cache) >= self.max_size:
-            oldest = self.access_order.pop(0)
-            del self.cache[oldest]
-
-        self.cache[key] = audio
-        self.access_order.append(key)
-
-tts_cache = TTSCache(max_size=200)
+from audio_store import audio_store
+from audio_transport import AudioFramer, negotiate_transport, parse_frame_header
+from llm_hedging import LLM_HEDGE_ENABLED, provider_racer
+from provider_clients import provider_clients
 
 # ============================================
 # RATE LIMITING
@@ -862,75 +845,46 @@ rate_limiter = RateLimiter()
 
 def init_db():
     """Initialize SQLite database for conversation persistence"""
-    global db_conn
+    global db_conn, conversation_log, usage_metrics
     db_path = os.getenv("DB_PATH", "eva_conversations.db")
     db_conn = sqlite3.connect(db_path, check_same_thread=False)
+    db_conn.execute("PRAGMA journal_mode=WAL")
+    db_conn.execute("PRAGMA synchronous=NORMAL")
 
-    db_conn.execute("""
-        CREATE TABLE IF NOT EXISTS conversations (
-            session_id TEXT PRIMARY KEY,
-            messages TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    db_conn.execute("""
-        CREATE TABLE IF NOT EXISTS usage_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            endpoint TEXT,
-            latency_ms INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    # Conversations: one row per message, group-committed by a writer task
+    conversation_log = ConversationLog(db_path)
+
+    # Usage: buffered in memory, flushed in bulk with rollups (usage_stats + usage_rollup_*)
+    usage_metrics = UsageMetrics(db_path)
 
     db_conn.commit()
     print("✅ SQLite database initialized")
 
-def save_conversation(session_id: str, messages: list):
-    """Save conversation to database (sync version)"""
-    if db_conn:
+def load_conversation(session_id: str) -> list:
+    """Load the last CONVERSATION_LOAD_LIMIT messages of a session (no system prompt)
+
+    Blocking: async code preloads with load_conversation_async() instead.
+    """
+    if conversation_log:
         try:
-            db_conn.execute(
-                "INSERT OR REPLACE INTO conversations (session_id, messages, updated_at) VALUES (?, ?, ?)",
-                (session_id, json_dumps(messages), datetime.now())
-            )
-            db_conn.commit()
+            return conversation_log.load(session_id)
         except Exception as e:
-            print(f"DB save error: {e}")
-
-
-async def async_save_conversation(session_id: str, messages: list):
-    """Save conversation to database (async - non-blocking)"""
-    await asyncio.to_thread(save_conversation, session_id, messages)
+            print(f"DB load error: {e}")
+    return None
 
-def load_conversation(session_id: str) -> list:
-    """Load conversation from database"""
-    if db_conn:
+async def load_conversation_async(session_id: str) -> list:
+    """load_conversation() with the query in a worker thread"""
+    if conversation_log:
         try:
-            cursor = db_conn.execute(
-                "SELECT messages FROM conversations WHERE session_id = ?",
-                (session_id,)
-            )
-            row = cursor.fetchone()
-            if row:
-                return json_loads(row[0])
+            return await conversation_log.load_async(session_id)
         except Exception as e:
             print(f"DB load error: {e}")
     return None
 
 def log_usage(session_id: str, endpoint: str, latency_ms: int):
-    """Log API usage for analytics"""
-    if db_conn:
-        try:
-            db_conn.execute(
-                "INSERT INTO usage_stats (session_id, endpoint, latency_ms) VALUES (?, ?, ?)",
-                (session_id, endpoint, latency_ms)
-            )
-            db_conn.commit()
-        except Exception as e:
-            print(f"Usage log error: {e}")
+    """Log API usage for analytics (buffered, flushed in bulk)"""
+    if usage_metrics:
+        usage_metrics.record(session_id, endpoint, latency_ms)
 
 # ============================================
 # AUTH
@@ -966,30 +920,15 @@ def get_client_id(request: Request) -> str:
 
 async def warmup_connections():
     """Pré-chauffe les connexions pour réduire la latence du premier appel"""
-    global groq_client
-
     print("🔥 Warming up connections...")
 
-    # Warm-up Groq avec 3 requêtes pour stabiliser la connexion HTTP
-    # La 1ère établit TLS, la 2ème/3ème confirment la stabilité
-    warmup_latencies = []
-    for i in range(3):
-        try:
-            start = time.time()
-            await groq_client.chat.completions.create(
-                model=GROQ_MODEL_FAST,
-                messages=[{"role": "user", "content": f"hi{i}"}],
-                max_tokens=1,
-                temperature=0,
-            )
-            latency = (time.time() - start) * 1000
-            warmup_latencies.append(latency)
-        except Exception as e:
-            print(f"   Groq warm-up {i+1}/3 failed: {e}")
-
-    if warmup_latencies:
-        avg = sum(warmup_latencies) / len(warmup_latencies)
-        print(f"   Groq warm-up: {warmup_latencies} ms (avg: {avg:.0f}ms)")
+    # Ouvre TLS/TCP (+ HTTP/2) vers chaque provider avec des requêtes sans
+    # inférence (GET /models, /api/tags), puis garde les connexions chaudes
+    warm_latencies = await provider_clients.warm()
+    for name, latency in warm_latencies.items():
+        if latency is not None:
+            print(f"   {name} connection warm: {latency:.0f}ms")
+    provider_clients.start_keepwarm()
 
     # Pré-générer TTS pour les réponses humaines communes
     if tts_available:
@@ -1004,9 +943,11 @@ async def warmup_connections():
                 "À très vite... Prends soin de toi.",
                 "Hey... Je suis là. Raconte-moi ce qui se passe.",
             ]
+            # Prime every naturalization variant so warm phrases always hit
             for phrase in common_phrases:
-                await text_to_speech(phrase, DEFAULT_VOICE)
-            print(f"   TTS cache primed: {len(common_phrases)} phrases humaines")
+                for variant in range(NATURAL_VARIANTS):
+                    await text_to_speech(phrase, DEFAULT_VOICE, variant=variant)
+            print(f"   TTS cache primed: {len(common_phrases)} phrases humaines x {NATURAL_VARIANTS} variantes")
         except Exception as e:
             print(f"   TTS warm-up failed: {e}")
 
@@ -1079,42 +1020,63 @@ def get_pending_proactive(user_id: str) -> Optional[dict]:
     return None
 
 
+async def memory_consolidation_scheduler():
+    """Background task consolidating and pruning long-term memories.
+
+    Runs the embedding-based consolidation pass over users with new
+    episodic memories, off the request path.
+    """
+    from memory_consolidation import MEMORY_CONSOLIDATION_INTERVAL_S
+
+    print("🧠 Memory consolidation scheduler started")
+
+    while True:
+        try:
+            await asyncio.sleep(MEMORY_CONSOLIDATION_INTERVAL_S)
+
+            memory = get_memory_system()
+            if memory is None:
+                continue
+
+            stats = await asyncio.to_thread(memory.run_consolidation)
+            if stats["users"]:
+                print(f"🧠 Consolidated memories for {stats['users']} users "
+                      f"({stats['last_run_ms']}ms)")
+
+        except Exception as e:
+            print(f"⚠️ Memory consolidation error: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global groq_client, cerebras_client, whisper_model, tts_available, http_client
+    global groq_client, cerebras_client, whisper_model, whisper_batcher, tts_available, http_client, ollama_client
 
     print("🚀 EVA-VOICE Ultra Starting...")
     print("=" * 50)
 
     # Database
     init_db()
+    conversation_log.start()
+    usage_metrics.start()
 
-    # Optimized HTTP client (shared)
-    http_client = httpx.AsyncClient(
-        timeout=30.0,
-        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
-        http2=True,
-    )
+    # Shared per-provider connection pools (HTTP/2 for Groq/Cerebras)
+    http_client = provider_clients.get("general")
+    ollama_client = provider_clients.get("ollama")
 
     # Cerebras (fastest - if available)
-    if CEREBRAS_API_KEY:
-        cerebras_client = httpx.AsyncClient(
-            base_url="https://api.cerebras.ai/v1",
-            headers={"Authorization": f"Bearer {CEREBRAS_API_KEY}"},
-            timeout=30.0,
-            http2=True,
-        )
+    if provider_clients.has("cerebras"):
+        cerebras_client = provider_clients.get("cerebras")
         print(f"✅ Cerebras connected (~50ms TTFT)")
 
     # Groq (fallback)
-    groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=http_client)
+    groq_client = provider_clients.groq()
     model_name = GROQ_MODEL_FAST if USE_FAST_MODEL else GROQ_MODEL_QUALITY
     print(f"✅ Groq LLM connected ({model_name})")
 
     # Ollama (local GPU LLM - primary or fallback)
     if USE_OLLAMA_PRIMARY or USE_OLLAMA_FALLBACK:
         try:
-            ollama_resp = await http_client.get(f"{OLLAMA_URL}/api/tags", timeout=2.0)
+            ollama_resp = await ollama_client.get(f"{OLLAMA_URL}/api/tags", timeout=2.0)
             if ollama_resp.status_code == 200:
                 models = [m.get("name", "") for m in ollama_resp.json().get("models", [])]
                 if any(OLLAMA_MODEL in m for m in models):
@@ -1126,7 +1088,7 @@ async def lifespan(app: FastAPI):
                     # WARMUP: Pre-load model into GPU VRAM for instant inference
                     print(f"🔥 Warming up Ollama {OLLAMA_MODEL}...")
                     warmup_start = time.time()
-                    warmup_resp = await http_client.post(
+                    warmup_resp = await ollama_client.post(
                         f"{OLLAMA_URL}/api/chat",
                         json={
                             "model": OLLAMA_MODEL,
@@ -1162,6 +1124,14 @@ async def lifespan(app: FastAPI):
             cpu_threads=4   # Less threads needed for tiny
         )
         print(f"✅ Whisper STT loaded ({whisper_model_name} on {device.upper()}, {compute}) - target <50ms")
+        if STT_BATCH_MAX_SIZE > 1:
+            try:
+                whisper_batcher = WhisperBatcher(faster_whisper_batch(whisper_model, _whisper_transcribe))
+                whisper_batcher.start()
+                print(f"   Batching: up to {whisper_batcher.max_batch_size} utterances / {whisper_batcher.max_wait_ms:.0f}ms window")
+            except Exception as e:
+                whisper_batcher = None
+                print(f"⚠️ Whisper batching unavailable: {e}")
     except ImportError:
         print("⚠️  Whisper not installed - STT via browser only")
 
@@ -1179,8 +1149,9 @@ async def lifespan(app: FastAPI):
 
         # Initialize filler/backchannel audio if any fast TTS is available
         if fast_tts_initialized:
-            _init_filler_audio()
-            _init_backchannel_audio()
+            # Synthesis and the audio store's disk tier block: keep them off the loop
+            await asyncio.to_thread(_init_filler_audio)
+            await asyncio.to_thread(_init_backchannel_audio)
             # Initialize expression system (breathing sounds, emotions)
             if init_expression_system():
                 print("✅ Expression system ready (breathing + emotions)")
@@ -1229,11 +1200,12 @@ async def lifespan(app: FastAPI):
     # Start proactive message scheduler (HER feature)
     if HER_AVAILABLE:
         asyncio.create_task(proactive_scheduler())
+        asyncio.create_task(memory_consolidation_scheduler())
 
     # Start Ollama keepalive (prevents model unloading from VRAM)
     # Do warmup at startup BEFORE marking server ready
     if _ollama_available and (USE_OLLAMA_PRIMARY or USE_OLLAMA_FALLBACK):
-        await warmup_on_startup(OLLAMA_URL, OLLAMA_MODEL)
+        await warmup_on_startup(OLLAMA_URL, OLLAMA_MODEL, http_client=ollama_client)
         start_keepalive(OLLAMA_URL, OLLAMA_MODEL, interval=3)  # 3s interval - aggressive to prevent cold GPU
 
     print(f"🎙️  EVA-VOICE ready at http://localhost:8000")
@@ -1245,10 +1217,17 @@ async def lifespan(app: FastAPI):
 
     # Cleanup
     stop_keepalive()  # Stop Ollama keepalive
-    if http_client:
-        await http_client.aclose()
-    if cerebras_client:
-        await cerebras_client.aclose()
+    if whisper_batcher:
+        whisper_batcher.stop()  # Serves already queued utterances
+    await provider_clients.aclose()  # Closes Groq, Cerebras and Ollama pools
+    if HER_AVAILABLE:
+        memory = get_memory_system()
+        if memory is not None:
+            await asyncio.to_thread(memory.close)  # Writes queued memories
+    if conversation_log:
+        await conversation_log.close()  # Flushes queued messages
+    if usage_metrics:
+        await usage_metrics.close()  # Flushes buffered usage events
     if db_conn:
         db_conn.close()
     print("👋 EVA-VOICE Shutdown")
@@ -1288,11 +1267,19 @@ def get_messages(session_id: str) -> list:
         # Try to load from database
         saved = load_conversation(session_id)
         if saved:
-            conversations[session_id] = saved
+            conversations[session_id] = [{"role": "system", "content": EVA_SYSTEM_PROMPT}] + saved
         else:
             conversations[session_id] = [{"role": "system", "content": EVA_SYSTEM_PROMPT}]
     return conversations[session_id]
 
+async def preload_conversation(session_id: str) -> None:
+    """Load a session's history off the event loop before get_messages() needs it."""
+    if session_id in conversations:
+        return
+    saved = await load_conversation_async(session_id)
+    if session_id not in conversations:
+        conversations[session_id] = [{"role": "system", "content": EVA_SYSTEM_PROMPT}] + (saved or [])
+
 def add_message(session_id: str, role: str, content: str, save_async: bool = True):
     """Add a message to the conversation.
 
@@ -1300,25 +1287,25 @@ def add_message(session_id: str, role: str, content: str, save_async: bool = Tru
         session_id: Session identifier
         role: Message role (user/assistant/system)
         content: Message content
-        save_async: If True, save to DB asynchronously (non-blocking)
+        save_async: If True, leave the row to the group-commit writer;
+            if False, have the writer commit it now (skips the group-commit wait)
     """
     msgs = get_messages(session_id)
     msgs.append({"role": role, "content": content})
     # Keep last 20 messages + system prompt
     if len(msgs) > 21:
         conversations[session_id] = [msgs[0]] + msgs[-20:]
-    # Save to database (async to not block response)
-    if save_async:
-        asyncio.create_task(async_save_conversation(session_id, conversations[session_id]))
-    else:
-        save_conversation(session_id, conversations[session_id])
+    # Persist just this message (one row, append-only)
+    if conversation_log:
+        conversation_log.append(session_id, role, content)
+        if not save_async:
+            conversation_log.commit_soon()
 
 def clear_conversation(session_id: str):
     if session_id in conversations:
         del conversations[session_id]
-    if db_conn:
-        db_conn.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
-        db_conn.commit()
+    if conversation_log:
+        conversation_log.clear(session_id)
 
 # ============================================
 # STT - Speech to Text
@@ -1348,26 +1335,75 @@ async def transcribe_audio(audio_bytes: bytes) -> str:
             num_samples = int(len(audio_float) * 16000 / sample_rate)
             audio_float = scipy.signal.resample(audio_float, num_samples)
 
-        # ULTRA-FAST settings for <50ms latency
-        segments, _ = whisper_model.transcribe(
-            audio_float,
-            language="fr",
-            beam_size=1,                        # Greedy decoding (fastest)
-            vad_filter=False,                   # No VAD overhead
-            word_timestamps=False,              # No word-level timestamps
-            condition_on_previous_text=False,   # No context dependency
-            without_timestamps=True,            # Faster without timestamps
-            initial_prompt="Conversation en français.",  # Hint for French
-        )
-        # Consume generator immediately
-        text = " ".join(s.text for s in segments)
-        return text.strip()
+        return await whisper_run(audio_float.astype(np.float32))
     except Exception as e:
         print(f"STT Error: {e}")
         import traceback
         traceback.print_exc()
         return ""
 
+def _whisper_transcribe(audio_float: np.ndarray, prompt: str = "") -> str:
+    """Run Whisper on float32 16kHz audio with the ultra-fast settings."""
+    # ULTRA-FAST settings for <50ms latency
+    segments, _ = whisper_model.transcribe(
+        audio_float,
+        language="fr",
+        beam_size=1,                        # Greedy decoding (fastest)
+        vad_filter=False,                   # No VAD overhead
+        word_timestamps=False,              # No word-level timestamps
+        condition_on_previous_text=False,   # No context dependency
+        without_timestamps=True,            # Faster without timestamps
+        initial_prompt=prompt or "Conversation en français.",  # Hint for French
+    )
+    # Consume generator immediately
+    text = " ".join(s.text for s in segments)
+    return text.strip()
+
+async def whisper_run(audio_float: np.ndarray, prompt: str = "") -> str:
+    """Transcribe off the event loop, batched with other sessions when enabled."""
+    if whisper_batcher is not None:
+        return await whisper_batcher.transcribe(audio_float, prompt)
+    return await asyncio.to_thread(_whisper_transcribe, audio_float, prompt)
+
+async def whisper_decode(audio_float: np.ndarray, prompt: str = "") -> str:
+    """Streaming STT decoder: one (batched) Whisper pass off the event loop.
+
+    The session has already VAD-gated the audio; prompt is the committed
+    text of the utterance so far, so a new window continues it.
+    """
+    if not whisper_model or not len(audio_float):
+        return ""
+    try:
+        return await whisper_run(audio_float, prompt)
+    except Exception as e:
+        print(f"Streaming STT Error: {e}")
+        return ""
+
+def negotiate_ws_stt(request: Any) -> Optional[StreamingTranscriber]:
+    """Build a streaming STT session for a websocket config request.
+
+    Accepts "stream" or {"mode": "stream", "sample_rate": 16000}; anything
+    else (or no Whisper) keeps the blob path (None).
+    """
+    if isinstance(request, str):
+        request = {"mode": request}
+    if not isinstance(request, dict) or request.get("mode") != "stream" or not whisper_model:
+        return None
+    try:
+        sample_rate = int(request.get("sample_rate", STT_SAMPLE_RATE))
+    except (TypeError, ValueError):
+        sample_rate = STT_SAMPLE_RATE
+    if not 8000 <= sample_rate <= 48000:
+        sample_rate = STT_SAMPLE_RATE
+    return StreamingTranscriber(whisper_decode, sample_rate=sample_rate)
+
+def ws_stt_info(stt: Optional[StreamingTranscriber]) -> dict:
+    """STT mode echoed to the client in config_ok."""
+    if stt is None:
+        return {"mode": "blob"}
+    return {"mode": "stream", "sample_rate": stt.sample_rate, "format": "pcm_s16le",
+            "end_message": "audio_end"}
+
 # ============================================
 # LLM - Language Model (Ultra-Optimized)
 # ============================================
@@ -1445,7 +1481,7 @@ async def stream_ollama(messages: list, max_tok: int = 80) -> AsyncGenerator[str
         # Ensure model is warm (no-op if already warm, ~50ms if cold)
         if not is_warm():
             await ensure_warm()
-        async with http_client.stream(
+        async with ollama_client.stream(
             "POST",
             f"{OLLAMA_URL}/api/chat",
             json={
@@ -1479,11 +1515,26 @@ async def stream_ollama(messages: list, max_tok: int = 80) -> AsyncGenerator[str
         # Yield nothing on error - caller will fallback
 
 
+async def stream_groq(messages: list, max_tok: int = 80, model: str = GROQ_MODEL_FAST) -> AsyncGenerator[str, None]:
+    """Stream from Groq (errors propagate, for provider racing)"""
+    stream = await groq_client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        temperature=0.7,
+        max_tokens=max_tok,
+        top_p=0.85,
+    )
+    async for chunk in stream:
+        if chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 async def check_ollama() -> bool:
     """Check if Ollama is running and has the required model."""
     global _ollama_available
     try:
-        async with http_client.stream("GET", f"{OLLAMA_URL}/api/tags", timeout=2.0) as resp:
+        async with ollama_client.stream("GET", f"{OLLAMA_URL}/api/tags", timeout=2.0) as resp:
             if resp.status_code == 200:
                 data = json_loads(await resp.aread())
                 models = [m.get("name", "") for m in data.get("models", [])]
@@ -1495,26 +1546,35 @@ async def check_ollama() -> bool:
     return False
 
 
-async def stream_llm(session_id: str, user_msg: str, use_fast: bool = True, speed_mode: bool = False) -> AsyncGenerator[str, None]:
+async def stream_llm(session_id: str, user_msg: str, use_fast: bool = True, speed_mode: bool = False, record: bool = True) -> AsyncGenerator[str, None]:
     """Stream réponse LLM token par token - ultra-optimisé
 
     Priority: Cerebras (~50ms) > Groq Fast (~150ms) > Ollama local (~350ms) > Groq Quality (~200ms)
 
     speed_mode: Use minimal prompt and history for fastest TTFT
+    record: Append the turn to the conversation. Speculative runs (started
+        on a partial transcript) pass False and call record_turn() once the
+        final transcript confirms them.
     """
 
+    await preload_conversation(session_id)
+
     # Skip cache in speed_mode (user wants real responses)
     if not speed_mode:
         cached = response_cache.get_cached_response(user_msg)
         if cached:
             print(f"⚡ CACHED: 0ms")
-            add_message(session_id, "user", user_msg)
-            add_message(session_id, "assistant", cached)
+            if record:
+                add_message(session_id, "user", user_msg)
+                add_message(session_id, "assistant", cached)
             yield cached
             return
 
-    add_message(session_id, "user", user_msg)
-    messages = get_messages(session_id)
+    if record:
+        add_message(session_id, "user", user_msg)
+        messages = get_messages(session_id)
+    else:
+        messages = get_messages(session_id) + [{"role": "user", "content": user_msg}]
 
     # Detect user emotion to adapt response tone - CRITICAL for empathy
     user_emotion = analyze_emotion_simple(user_msg).get("dominant", "neutral")
@@ -1549,12 +1609,37 @@ async def stream_llm(session_id: str, user_msg: str, use_fast: bool = True, spee
     use_ollama = USE_OLLAMA_PRIMARY and _ollama_available
     use_cerebras = cerebras_client is not None and QUALITY_MODE != "quality"
 
+    # HEDGED MODE: race providers in priority order, first token wins
+    hedge_providers = []
+    if LLM_HEDGE_ENABLED:
+        if use_ollama:
+            hedge_providers.append(("ollama", lambda: stream_ollama(messages, max_tok)))
+        if use_cerebras:
+            hedge_providers.append(("cerebras", lambda: stream_cerebras(messages, max_tok)))
+        if groq_client is not None:
+            groq_model = GROQ_MODEL_FAST if use_fast and QUALITY_MODE != "quality" else GROQ_MODEL_QUALITY
+            hedge_providers.append(("groq", lambda: stream_groq(messages, max_tok, groq_model)))
+    use_hedging = len(hedge_providers) > 1
+
     start_time = time.time()
     full = ""
 
     try:
+        if use_hedging:
+            provider = "hedged"
+
+            def on_winner(name: str, provider_ttft: float):
+                nonlocal provider
+                provider = name
+                ttft = (time.time() - start_time) * 1000
+                print(f"⚡ TTFT: {ttft:.0f}ms ({name}, hedged race)")
+
+            async for token in provider_racer.race(hedge_providers, on_winner):
+                full += token
+                yield token
+
         # Try Ollama first (100ms local GPU) if enabled
-        if use_ollama:
+        elif use_ollama:
             provider = "ollama"
             first_token = True
             got_tokens = False
@@ -1623,18 +1708,23 @@ async def stream_llm(session_id: str, user_msg: str, use_fast: bool = True, spee
 
         # Humaniser la réponse complète (pour le stockage et la cohérence)
         humanized = humanize_response(full)
-        add_message(session_id, "assistant", humanized)
+        if record:
+            add_message(session_id, "assistant", humanized)
 
         total_time = (time.time() - start_time) * 1000
         print(f"⚡ LLM Total: {total_time:.0f}ms ({len(humanized)} chars, {provider})")
 
-        # Async log (non-blocking)
-        asyncio.create_task(async_log_usage(session_id, "llm", int(total_time)))
+        # Buffered log (non-blocking)
+        log_usage(session_id, "llm", int(total_time))
 
     except Exception as e:
         print(f"LLM Error ({provider if 'provider' in dir() else 'unknown'}): {e}")
         # Fallback chain based on what failed
-        if use_ollama and groq_client:
+        if use_hedging:
+            # Every provider was already raced
+            if not full:
+                yield f"Désolée, j'ai eu un petit souci. Tu peux répéter ?"
+        elif use_ollama and groq_client:
             # Ollama primary failed -> try Groq
             print("⚠️ Ollama failed, falling back to Groq...")
             async for token in stream_llm_groq_fallback(messages, max_tok, start_time):
@@ -1662,6 +1752,13 @@ async def stream_llm(session_id: str, user_msg: str, use_fast: bool = True, spee
             yield f"Désolée, j'ai eu un petit souci. Tu peux répéter ?"
 
 
+def record_turn(session_id: str, user_msg: str, response: str):
+    """Append a turn produced by an unrecorded (speculative) stream_llm run."""
+    add_message(session_id, "user", user_msg)
+    if response:
+        add_message(session_id, "assistant", humanize_response(response))
+
+
 async def stream_llm_her(
     session_id: str,
     user_msg: str,
@@ -1691,6 +1788,7 @@ async def stream_llm_her(
         }
         her_prompt += f"\n\n🎭 Contexte émotionnel: {emotion_context.get(user_emotion, '')}"
 
+    await preload_conversation(session_id)
     add_message(session_id, "user", user_msg)
     messages = get_messages(session_id)
 
@@ -1781,8 +1879,8 @@ async def stream_llm_groq_fallback(messages: list, max_tok: int, start_time: flo
         yield "Désolée, j'ai eu un souci technique."
 
 async def async_log_usage(session_id: str, endpoint: str, latency_ms: int):
-    """Non-blocking usage logging"""
-    await asyncio.to_thread(log_usage, session_id, endpoint, latency_ms)
+    """Non-blocking usage logging (log_usage only buffers)"""
+    log_usage(session_id, endpoint, latency_ms)
 
 async def get_llm_response(session_id: str, user_msg: str, use_fast: bool = True) -> str:
     """Get full LLM response (non-streaming)"""
@@ -1858,33 +1956,47 @@ async def text_to_speech(
     rate: str = "+5%",  # Slightly faster but natural
     pitch: str = "+0Hz",
     use_ssml: bool = False,  # SSML adds latency, use for quality mode
-    add_breathing: bool = True  # Add natural breathing and hesitations
+    add_breathing: bool = True,  # Add natural breathing and hesitations
+    variant: Optional[int] = None  # Naturalization variant (None = random pick)
 ) -> bytes:
     """Convertit texte en audio - MMS-TTS (fast) ou Edge-TTS (quality)
 
     OPTIMIZATIONS:
     - MMS-TTS on GPU: ~100ms latency (USE_FAST_TTS=true)
     - Edge-TTS: ~1500ms but higher quality voices (USE_FAST_TTS=false)
-    - LRU cache for repeated phrases
+    - Shared audio store: repeated phrases are cached, concurrent misses synthesize once
     - Natural breathing and hesitations (100% LOCAL)
+
+    The cache is keyed on the canonical text plus a seeded naturalization
+    variant (one of NATURAL_VARIANTS), so each phrase has a small fixed set
+    of cached renditions instead of a new key per call.
     """
-    # Apply natural breathing and hesitations BEFORE synthesis
-    processed_text = text
+    canonical_text = " ".join(text.split())
     if add_breathing:
-        processed_text = make_natural(text)
-        if processed_text != text:
-            print(f"🌬️ Breathing: '{text[:30]}...' -> '{processed_text[:40]}...'")
+        if variant is None:
+            variant = pick_natural_variant()
+        cache_text = f"{canonical_text}#v{variant}"
+    else:
+        cache_text = canonical_text
 
     start_time = time.time()
+    cacheable = len(canonical_text) < 200  # Cache short phrases
+    generated = False
+
+    def naturalize() -> str:
+        """Natural breathing and hesitations (deterministic per variant), only on a miss."""
+        if not add_breathing:
+            return canonical_text
+        processed_text = make_natural(canonical_text, variant)
+        if processed_text != canonical_text:
+            print(f"🌬️ Breathing: '{canonical_text[:30]}...' -> '{processed_text[:40]}...'")
+        return processed_text
 
     # ========== FAST TTS MODE (MMS-TTS GPU ~70-100ms) ==========
-    if USE_FAST_TTS:
-        # Check cache first
-        cached = tts_cache.get(processed_text, "gpu", rate, pitch)
-        if cached:
-            print(f"🔊 TTS: 0ms (cached, {len(cached)} bytes)")
-            return cached
-
+    async def fast_engines() -> Optional[bytes]:
+        nonlocal generated
+        generated = True
+        processed_text = naturalize()
         # Priority: MMS-TTS (PyTorch GPU, ~70ms) > Ultra-Fast > GPU Piper (CPU fallback)
         # MMS-TTS uses PyTorch with CUDA 12.4 which works on this system
         audio_data = await async_fast_tts_mp3(processed_text)  # MMS-TTS GPU
@@ -1896,51 +2008,89 @@ async def text_to_speech(
             audio_data = await async_gpu_tts_mp3(processed_text)  # Piper CPU fallback
             tts_engine = "Piper"
         if audio_data:
-            # Cache short phrases
-            if len(processed_text) < 200:
-                tts_cache.set(processed_text, "gpu", audio_data, rate, pitch)
             tts_time = (time.time() - start_time) * 1000
             print(f"🔊 TTS ({tts_engine}): {tts_time:.0f}ms ({len(audio_data)} bytes)")
+        return audio_data
+
+    # ========== EDGE-TTS MODE (slower but more voices) ==========
+    async def edge_engine() -> bytes:
+        nonlocal generated
+        generated = True
+        processed_text = naturalize()
+        edge_tts = _get_edge_tts()
+        voice_name = VOICES.get(voice, VOICES[DEFAULT_VOICE])
+
+        # Use SSML for better prosody in quality mode
+        if use_ssml and QUALITY_MODE == "quality":
+            ssml_text = _text_to_ssml(processed_text, voice, rate, pitch)
+            communicate = edge_tts.Communicate(ssml_text, voice_name)
+        else:
+            communicate = edge_tts.Communicate(processed_text, voice_name, rate=rate, pitch=pitch)
+
+        # Collect audio chunks
+        chunks: list[bytes] = []
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                chunks.append(chunk["data"])
+
+        audio_data = b"".join(chunks)
+        tts_time = (time.time() - start_time) * 1000
+        print(f"🔊 TTS (Edge): {tts_time:.0f}ms ({len(audio_data)} bytes)")
+        return audio_data
+
+    # Cache first, then one synthesis per utterance even under concurrent misses
+    if USE_FAST_TTS:
+        audio_data = await audio_store.get_or_generate(
+            cache_text, fast_engines, "gpu", rate=rate, pitch=pitch, store=cacheable
+        )
+        if audio_data:
+            if not generated:
+                print(f"🔊 TTS: 0ms (cached, {len(audio_data)} bytes)")
             return audio_data
         # Fallback to Edge-TTS if all fast TTS fails
         print("⚠️ Fast TTS failed, falling back to Edge-TTS")
 
-    # ========== EDGE-TTS MODE (slower but more voices) ==========
     if not tts_available:
         return b""
 
-    # Check cache first (fastest path)
-    cached = tts_cache.get(processed_text, voice, rate, pitch)
-    if cached:
-        print(f"🔊 TTS: 0ms (cached, {len(cached)} bytes)")
-        return cached
-
-    edge_tts = _get_edge_tts()
-    voice_name = VOICES.get(voice, VOICES[DEFAULT_VOICE])
-
-    # Use SSML for better prosody in quality mode
-    if use_ssml and QUALITY_MODE == "quality":
-        ssml_text = _text_to_ssml(processed_text, voice, rate, pitch)
-        communicate = edge_tts.Communicate(ssml_text, voice_name)
-    else:
-        communicate = edge_tts.Communicate(processed_text, voice_name, rate=rate, pitch=pitch)
-
-    # Collect audio chunks
-    chunks: list[bytes] = []
-    async for chunk in communicate.stream():
-        if chunk["type"] == "audio":
-            chunks.append(chunk["data"])
+    # Edge audio is cached under its own voice, also when fast TTS failed over to it
+    audio_data = await audio_store.get_or_generate(
+        cache_text, edge_engine, voice, rate=rate, pitch=pitch, store=cacheable
+    )
+    if audio_data and not generated:
+        print(f"🔊 TTS: 0ms (cached, {len(audio_data)} bytes)")
+    return audio_data or b""
 
-    audio_data = b"".join(chunks)
 
-    # Cache short phrases
-    if len(processed_text) < 200:
-        tts_cache.set(processed_text, voice, audio_data, rate, pitch)
+async def text_to_speech_pcm(
+    text: str,
+    voice: str = DEFAULT_VOICE,
+    rate: str = "+0%",
+    pitch: str = "+0Hz",
+    variant: Optional[int] = None
+) -> Optional[bytes]:
+    """Raw int16 PCM (MMS-TTS sample rate) for frame transports.
 
-    tts_time = (time.time() - start_time) * 1000
-    print(f"🔊 TTS (Edge): {tts_time:.0f}ms ({len(audio_data)} bytes)")
+    Same cache keys and naturalization variants as text_to_speech, stored as
+    the "pcm" variant. Returns None when MMS-TTS is not in use, so callers
+    can fall back to the blob transport.
+    """
+    if not USE_FAST_TTS:
+        return None
 
-    return audio_data
+    canonical_text = " ".join(text.split())
+    if not canonical_text:
+        return None
+    if variant is None:
+        variant = pick_natural_variant()
+    cache_text = f"{canonical_text}#v{variant}"
+
+    return await audio_store.get_or_generate(
+        cache_text,
+        lambda: async_fast_tts_pcm(make_natural(canonical_text, variant)),
+        "gpu", fmt="pcm", rate=rate, pitch=pitch,
+        store=len(canonical_text) < 200,
+    )
 
 async def text_to_speech_streaming(
     text: str,
@@ -2144,10 +2294,7 @@ async def get_cache_stats(_: str = Depends(verify_api_key)):
     """
     return {
         "smart_cache": smart_cache.get_stats(),
-        "tts_cache": {
-            "size": len(tts_cache.cache),
-            "max_size": tts_cache.max_size,
-        },
+        "tts_cache": audio_store.get_stats(),
         "response_cache": {
             "exact_patterns": len(response_cache.EXACT_MATCHES),
             "regex_patterns": len(response_cache.GREETING_PATTERNS),
@@ -2167,20 +2314,36 @@ async def get_tts_optimizer_stats(_: str = Depends(verify_api_key)):
     """Get TTS streaming optimizer statistics.
 
     Returns:
-        TTS cache stats, first-byte latencies, and optimization metrics.
+        TTS cache stats, first-byte latencies, optimization, batching and encoder metrics.
     """
     optimizer = get_tts_optimizer()
     if optimizer:
         return {
             "enabled": True,
-            **optimizer.get_metrics()
+            **optimizer.get_metrics(),
+            "batching": get_batch_stats(),
+            "encoders": get_encoder_stats(),
         }
     return {
         "enabled": False,
-        "message": "TTS optimizer not initialized"
+        "message": "TTS optimizer not initialized",
+        "batching": get_batch_stats(),
+        "encoders": get_encoder_stats(),
     }
 
 
+@app.get("/analytics/stt")
+async def get_stt_stats(_: str = Depends(verify_api_key)):
+    """Get Whisper batching statistics.
+
+    Returns:
+        Queue time (avg/p50/p95/max), batch occupancy and per-length-bucket counts.
+    """
+    if whisper_batcher is None:
+        return {"enabled": False, "whisper": bool(whisper_model)}
+    return {"enabled": True, "whisper": True, **whisper_batcher.get_stats()}
+
+
 @app.post("/analytics/tts/prewarm")
 async def trigger_tts_prewarm(_: str = Depends(verify_api_key)):
     """Manually trigger TTS cache pre-warming.
@@ -2199,6 +2362,21 @@ async def trigger_tts_prewarm(_: str = Depends(verify_api_key)):
     }
 
 
+@app.get("/analytics/llm")
+async def get_llm_stats(_: str = Depends(verify_api_key)):
+    """Get LLM provider racing and connection pool statistics.
+
+    Returns:
+        Hedging mode, race/hedge/failover counts, per-provider TTFT histograms
+        and shared connection pool state.
+    """
+    return {
+        "hedging_enabled": LLM_HEDGE_ENABLED,
+        **provider_racer.get_stats(),
+        "connections": provider_clients.get_stats(),
+    }
+
+
 @app.get("/analytics/sessions")
 async def get_session_insights_global(_: str = Depends(verify_api_key)):
     """Get global session insights and quality metrics.
@@ -2255,17 +2433,22 @@ async def get_memory_analytics():
 async def flush_memory_buffers():
     """Flush pending memory operations - Sprint 581.
 
-    Forces batch adds and dirty saves to complete immediately.
+    Waits for the write-behind ingestion queue to drain and completes
+    dirty saves immediately.
 
     Returns:
         Status of flush operation.
     """
-    if eva_memory is None:
+    from eva_memory import get_memory_system
+
+    memory = get_memory_system()
+    if memory is None:
         return {"status": "error", "message": "Memory system not initialized"}
 
     try:
-        eva_memory._flush_batch_adds()
-        await eva_memory.flush_pending_saves_async()
+        if not await asyncio.to_thread(memory.flush_ingest):
+            return {"status": "error", "message": "Timed out waiting for memory ingestion"}
+        await memory.flush_pending_saves_async()
         return {"status": "ok", "message": "Memory buffers flushed"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -2617,9 +2800,6 @@ async def get_component_health(component_name: str):
 # Audio Cache API - Sprint 591
 # ═══════════════════════════════════════════════════════════════
 
-from audio_cache import audio_cache
-
-
 @app.get("/audio-cache/stats")
 async def get_audio_cache_stats():
     """Get audio cache statistics.
@@ -2629,7 +2809,7 @@ async def get_audio_cache_stats():
     """
     return {
         "status": "ok",
-        "stats": audio_cache.get_stats()
+        "stats": audio_store.get_stats()
     }
 
 
@@ -2642,7 +2822,7 @@ async def get_audio_cache_entries():
     """
     return {
         "status": "ok",
-        "entries": audio_cache.get_cached_phrases()
+        "entries": audio_store.get_entries()
     }
 
 
@@ -2653,7 +2833,7 @@ async def clear_audio_cache(_: str = Depends(verify_api_key)):
     Returns:
         Confirmation of cache clear.
     """
-    audio_cache.clear()
+    audio_store.clear()
     return {
         "status": "ok",
         "message": "Audio cache cleared"
@@ -2664,13 +2844,15 @@ async def clear_audio_cache(_: str = Depends(verify_api_key)):
 async def save_audio_cache(_: str = Depends(verify_api_key)):
     """Save audio cache to disk (admin only).
 
+    The disk tier is write-through, so this only reports its state.
+
     Returns:
         Confirmation of save.
     """
-    await audio_cache.save_to_disk()
     return {
         "status": "ok",
-        "message": "Audio cache saved to disk"
+        "message": "Audio cache is persisted on write",
+        "stats": audio_store.get_stats()
     }
 
 
@@ -3160,6 +3342,25 @@ _filler_audio_cache: dict[str, bytes] = {}
 # Pre-generated backchannel audio for HER-like presence
 _backchannel_audio_cache: dict[str, dict[str, bytes]] = {}
 
+def _stored_filler_tts(text: str) -> Optional[bytes]:
+    """Get filler/backchannel audio from the shared store, synthesizing on miss.
+
+    Blocking (synthesis and the store's disk tier): call it from a thread.
+    """
+    audio = audio_store.get(text, "filler", namespace="filler")
+    if audio:
+        return audio
+    start = time.time()
+    # Try ultra_fast_tts first, fall back to fast_tts (MMS-GPU)
+    audio = ultra_fast_tts(text)
+    if not audio:
+        audio = fast_tts(text)
+    if audio:
+        audio_store.put(text, audio, "filler", namespace="filler",
+                        generation_time_ms=(time.time() - start) * 1000)
+    return audio
+
+
 def _init_filler_audio():
     """Pre-generate natural filler sounds for instant response."""
     global _filler_audio_cache
@@ -3168,10 +3369,7 @@ def _init_filler_audio():
 
     fillers = ["Hmm", "Alors", "Euh", "Mmh", "Oh"]
     for filler in fillers:
-        # Try ultra_fast_tts first, fall back to fast_tts (MMS-GPU)
-        audio = ultra_fast_tts(filler)
-        if not audio:
-            audio = fast_tts(filler)
+        audio = _stored_filler_tts(filler)
         if audio:
             _filler_audio_cache[filler] = audio
     print(f"⚡ Filler audio ready: {list(_filler_audio_cache.keys())}")
@@ -3204,10 +3402,7 @@ def _init_backchannel_audio():
     for category, sounds in backchannels.items():
         _backchannel_audio_cache[category] = {}
         for sound in sounds:
-            # Try ultra_fast_tts first, fall back to fast_tts (MMS-GPU)
-            audio = ultra_fast_tts(sound)
-            if not audio:
-                audio = fast_tts(sound)
+            audio = _stored_filler_tts(sound)
             if audio:
                 _backchannel_audio_cache[category][sound] = audio
 
@@ -3830,6 +4025,8 @@ async def her_backchannel(
 
         # Add pre-generated audio if requested
         if with_audio:
+            if not _backchannel_audio_cache:
+                await asyncio.to_thread(_init_backchannel_audio)
             audio_result = get_backchannel_audio(bc_type)
             if audio_result:
                 audio_text, audio_bytes = audio_result
@@ -4205,17 +4402,17 @@ async def voice_lipsync_pipeline(
     # Launch background task
     async def generate_lipsync_background():
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                files = {"audio": ("speech.mp3", audio_response, "audio/mpeg")}
-                response = await client.post(f"{LIPSYNC_SERVICE_URL}/lipsync", files=files)
-
-                if response.status_code == 200:
-                    lipsync_data = response.json()
-                    lipsync_tasks[task_id]["video_base64"] = lipsync_data.get("video_base64")
-                    lipsync_tasks[task_id]["status"] = "ready"
-                    lipsync_tasks[task_id]["generation_time_ms"] = lipsync_data.get("generation_time_ms", 0)
-                else:
-                    lipsync_tasks[task_id]["status"] = "error"
+            client = provider_clients.get("lipsync")
+            files = {"audio": ("speech.mp3", audio_response, "audio/mpeg")}
+            response = await client.post(f"{LIPSYNC_SERVICE_URL}/lipsync", files=files)
+
+            if response.status_code == 200:
+                lipsync_data = response.json()
+                lipsync_tasks[task_id]["video_base64"] = lipsync_data.get("video_base64")
+                lipsync_tasks[task_id]["status"] = "ready"
+                lipsync_tasks[task_id]["generation_time_ms"] = lipsync_data.get("generation_time_ms", 0)
+            else:
+                lipsync_tasks[task_id]["status"] = "error"
         except Exception as e:
             lipsync_tasks[task_id]["status"] = "error"
             print(f"Background lip-sync error: {e}")
@@ -4310,16 +4507,16 @@ async def tts_lipsync(
     lipsync_time = 0
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            files = {"audio": ("speech.mp3", audio, "audio/mpeg")}
-            response = await client.post(f"{LIPSYNC_SERVICE_URL}/lipsync", files=files)
-
-            if response.status_code == 200:
-                lipsync_data = response.json()
-                video_base64 = lipsync_data.get("video_base64")
-                lipsync_time = lipsync_data.get("generation_time_ms", 0)
-            else:
-                print(f"Lip-sync service error: {response.status_code}")
+        client = provider_clients.get("lipsync")
+        files = {"audio": ("speech.mp3", audio, "audio/mpeg")}
+        response = await client.post(f"{LIPSYNC_SERVICE_URL}/lipsync", files=files)
+
+        if response.status_code == 200:
+            lipsync_data = response.json()
+            video_base64 = lipsync_data.get("video_base64")
+            lipsync_time = lipsync_data.get("generation_time_ms", 0)
+        else:
+            print(f"Lip-sync service error: {response.status_code}")
     except Exception as e:
         print(f"Lip-sync service unavailable: {e}")
 
@@ -4340,40 +4537,39 @@ async def tts_lipsync(
 
 @app.get("/stats")
 async def get_stats(_: str = Depends(verify_api_key)):
-    """Get usage statistics"""
-    if not db_conn:
+    """Get usage statistics (read from pre-aggregated rollups)"""
+    if not usage_metrics:
         return {"error": "Database not available"}
 
     try:
-        # Total requests
-        cursor = db_conn.execute("SELECT COUNT(*) FROM usage_stats")
-        total_requests = cursor.fetchone()[0]
-
-        # Average latency
-        cursor = db_conn.execute("SELECT AVG(latency_ms) FROM usage_stats")
-        avg_latency = cursor.fetchone()[0] or 0
-
-        # Requests last hour
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        cursor = db_conn.execute(
-            "SELECT COUNT(*) FROM usage_stats WHERE created_at > ?",
-            (one_hour_ago,)
-        )
-        requests_last_hour = cursor.fetchone()[0]
+        summary = await asyncio.to_thread(usage_metrics.get_summary, window_minutes=60)
 
         # Active sessions
-        cursor = db_conn.execute("SELECT COUNT(DISTINCT session_id) FROM conversations")
-        active_sessions = cursor.fetchone()[0]
+        active_sessions = await asyncio.to_thread(conversation_log.count_sessions) if conversation_log else 0
 
         return {
-            "total_requests": total_requests,
-            "avg_latency_ms": round(avg_latency),
-            "requests_last_hour": requests_last_hour,
-            "active_sessions": active_sessions
+            "total_requests": summary["total_requests"],
+            "avg_latency_ms": summary["avg_latency_ms"],
+            "requests_last_hour": summary["requests_last_hour"],
+            "active_sessions": active_sessions,
+            "calls_by_endpoint": summary["calls_by_endpoint"],
+            "persistence": conversation_log.get_stats() if conversation_log else None,
+            "usage_writer": usage_metrics.get_stats()
         }
     except Exception as e:
         return {"error": str(e)}
 
+
+@app.get("/stats/timeseries")
+async def get_stats_timeseries(minutes: int = 60, endpoint: Optional[str] = None,
+                               _: str = Depends(verify_api_key)):
+    """Get per-minute request counts and latencies from the usage rollups"""
+    if not usage_metrics:
+        return {"error": "Database not available"}
+    minutes = max(1, min(minutes, 24 * 60))
+    series = await asyncio.to_thread(usage_metrics.get_timeseries, minutes, endpoint)
+    return {"minutes": minutes, "series": series}
+
 # ============================================
 # WEBSOCKET
 # ============================================
@@ -4434,35 +4630,116 @@ async def ws_chat(ws: WebSocket):
 
 @app.websocket("/ws/voice")
 async def ws_voice(ws: WebSocket):
-    """WebSocket pour pipeline vocal temps réel"""
+    """WebSocket pour pipeline vocal temps réel
+
+    Blob mode (default): each binary message is a complete WAV utterance.
+    Stream mode ({type: "config", stt: "stream"}): binary messages are raw
+    mono int16 PCM frames; the server answers with transcript_partial events
+    while the user speaks and a transcript once they stop (or on
+    {type: "audio_end"}). A stable partial after a short pause starts the LLM
+    speculatively; the final transcript adopts it if the text matches.
+    """
     await ws.accept()
     session_id = f"voice_{id(ws)}"
     voice = DEFAULT_VOICE
     client_id = ws.client.host if ws.client else "unknown"
+    stt: Optional[StreamingTranscriber] = None  # None = one WAV blob per utterance
+    speculation: Optional[SpeculativeStream] = None
     print(f"🎤 Voice WebSocket connected: {session_id}")
 
+    async def respond(text: str):
+        """LLM + TTS for one final transcript."""
+        nonlocal speculation
+        await ws.send_json({"type": "transcript", "text": text})
+
+        adopted = speculation is not None and speculation.matches(text)
+        if adopted:
+            # Speculative run answered this exact text: replay + follow it
+            tokens = speculation.tokens()
+            print(f"🔮 Speculative LLM adopted ({(time.time() - speculation.started) * 1000:.0f}ms head start)")
+        else:
+            if speculation is not None:
+                await speculation.cancel()
+                speculation = None
+            tokens = stream_llm(session_id, text)
+
+        # LLM + stream
+        full_response = ""
+        async for token in tokens:
+            full_response += token
+            await ws.send_json({"type": "token", "content": token})
+        if adopted:
+            record_turn(session_id, text, full_response)
+            speculation = None
+
+        await ws.send_json({"type": "response_end", "text": full_response})
+
+        # TTS
+        if full_response:
+            audio = await text_to_speech(full_response, voice)
+            if audio:
+                await ws.send_bytes(audio)
+
+        await ws.send_json({"type": "audio_end"})
+
+    async def handle_transcripts(events: list):
+        """Forward streaming STT events, speculating on stable partials."""
+        nonlocal speculation
+        for event in events:
+            if event.type == "partial":
+                await ws.send_json({"type": "transcript_partial", **event.to_dict()})
+                if speculation is not None and not speculation.matches(event.text):
+                    # The user kept talking: the speculative answer is stale
+                    await speculation.cancel()
+                    speculation = None
+                if event.speculate and speculation is None:
+                    speculation = SpeculativeStream(
+                        event.text,
+                        lambda text=event.text: stream_llm(session_id, text, record=False),
+                    )
+                continue
+            if not event.text:
+                continue
+            if not rate_limiter.is_allowed(client_id, limit=20, window=60):
+                await ws.send_json({"type": "error", "message": "Rate limit exceeded"})
+                continue
+            await respond(event.text)
+
     try:
         while True:
-            # Rate limiting
-            if not rate_limiter.is_allowed(client_id, limit=20, window=60):
+            # Rate limiting (stream mode limits per final transcript instead)
+            if stt is None and not rate_limiter.is_allowed(client_id, limit=20, window=60):
                 await ws.send_json({"type": "error", "message": "Rate limit exceeded"})
                 await asyncio.sleep(1)
                 continue
 
             msg = await ws.receive()
+            if msg.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
 
-            if "text" in msg:
+            if msg.get("text"):
                 data = json_loads(msg["text"])
                 if data.get("type") == "config":
                     voice = data.get("voice", DEFAULT_VOICE)
                     if voice not in VOICES:
                         voice = DEFAULT_VOICE
-                    await ws.send_json({"type": "config_ok", "voice": voice})
+                    if "stt" in data:
+                        stt = negotiate_ws_stt(data["stt"])
+                    await ws.send_json({"type": "config_ok", "voice": voice, "stt": ws_stt_info(stt)})
+                    continue
+                if data.get("type") == "audio_end" and stt is not None:
+                    event = await stt.finish()
+                    await handle_transcripts([event] if event else [])
                     continue
 
-            if "bytes" in msg:
+            if msg.get("bytes"):
                 audio_data = msg["bytes"]
 
+                # Streaming STT: raw PCM frames
+                if stt is not None:
+                    await handle_transcripts(await stt.feed(audio_data))
+                    continue
+
                 # Size limit
                 if len(audio_data) > 5 * 1024 * 1024:
                     await ws.send_json({"type": "error", "message": "Audio too large"})
@@ -4474,26 +4751,13 @@ async def ws_voice(ws: WebSocket):
                     await ws.send_json({"type": "error", "message": "Could not transcribe"})
                     continue
 
-                await ws.send_json({"type": "transcript", "text": text})
-
-                # LLM + stream
-                full_response = ""
-                async for token in stream_llm(session_id, text):
-                    full_response += token
-                    await ws.send_json({"type": "token", "content": token})
-
-                await ws.send_json({"type": "response_end", "text": full_response})
-
-                # TTS
-                if full_response:
-                    audio = await text_to_speech(full_response, voice)
-                    if audio:
-                        await ws.send_bytes(audio)
-
-                await ws.send_json({"type": "audio_end"})
+                await respond(text)
 
     except WebSocketDisconnect:
         print(f"🔌 Voice WebSocket disconnected: {session_id}")
+    finally:
+        if speculation is not None:
+            await speculation.cancel()
 
 # ============================================
 # EMOTION ANALYSIS
@@ -4584,11 +4848,13 @@ async def ws_stream(ws: WebSocket):
     - TTS phrase par phrase (streaming)
     - Adaptation du mood selon l'émotion détectée
     - Latence minimale
+    - Audio en blobs MP3 ou en trames PCM/Opus (config "audio_transport")
     """
     await ws.accept()
     session_id = f"stream_{id(ws)}"
     voice = DEFAULT_VOICE
     auto_mood = True  # Auto-adjust mood based on emotion
+    framer: Optional[AudioFramer] = None  # Frame transport (None = MP3 blobs)
     client_id = ws.client.host if ws.client else "unknown"
     print(f"⚡ Stream WebSocket connected: {session_id}")
 
@@ -4622,7 +4888,14 @@ async def ws_stream(ws: WebSocket):
                     auto_mood = data.get("auto_mood", auto_mood)
                     if voice not in VOICES:
                         voice = DEFAULT_VOICE
-                    await safe_ws_send(ws, {"type": "config_ok", "voice": voice, "auto_mood": auto_mood})
+                    if "audio_transport" in data:
+                        framer = negotiate_ws_transport(data["audio_transport"])
+                    await safe_ws_send(ws, {
+                        "type": "config_ok",
+                        "voice": voice,
+                        "auto_mood": auto_mood,
+                        "audio_transport": ws_transport_info(framer),
+                    })
                     continue
 
                 elif msg_type == "message":
@@ -4672,10 +4945,11 @@ async def ws_stream(ws: WebSocket):
                                 sentence, task = item
                                 try:
                                     # Timeout TTS task to prevent blocking (5s max)
-                                    audio = await asyncio.wait_for(task, timeout=5.0)
+                                    audio, is_pcm = await asyncio.wait_for(task, timeout=5.0)
                                     if audio:
-                                        await safe_ws_send(ws, {"type": "audio_start", "sentence": sentence[:50]})
-                                        await safe_ws_send_bytes(ws, audio)
+                                        await send_tts_audio(ws, audio, is_pcm, framer, {
+                                            "type": "audio_start", "sentence": sentence[:50]
+                                        })
                                 except asyncio.TimeoutError:
                                     print(f"TTS timeout for: {sentence[:30]}...")
                                 except Exception as e:
@@ -4727,7 +5001,7 @@ async def ws_stream(ws: WebSocket):
                         if should_tts and len(chunk_text) > 3:
                             # Queue TTS task immediately
                             tts_task = asyncio.create_task(
-                                text_to_speech(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"])
+                                synthesize_for_transport(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"], framer)
                             )
                             await tts_queue.put((chunk_text, tts_task))
                             chunk_buffer = ""
@@ -4741,7 +5015,7 @@ async def ws_stream(ws: WebSocket):
                     if chunk_buffer.strip() and len(chunk_buffer.strip()) > 3:
                         chunk_text = chunk_buffer.strip()
                         tts_task = asyncio.create_task(
-                            text_to_speech(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"])
+                            synthesize_for_transport(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"], framer)
                         )
                         await tts_queue.put((chunk_text, tts_task))
 
@@ -4811,10 +5085,11 @@ async def ws_stream(ws: WebSocket):
                             chunk_text, task = item
                             try:
                                 # Timeout TTS task to prevent blocking (5s max)
-                                audio = await asyncio.wait_for(task, timeout=5.0)
+                                audio, is_pcm = await asyncio.wait_for(task, timeout=5.0)
                                 if audio:
-                                    await safe_ws_send(ws, {"type": "audio_start", "sentence": chunk_text[:50]})
-                                    await safe_ws_send_bytes(ws, audio)
+                                    await send_tts_audio(ws, audio, is_pcm, framer, {
+                                        "type": "audio_start", "sentence": chunk_text[:50]
+                                    })
                             except asyncio.TimeoutError:
                                 print(f"TTS timeout for: {chunk_text[:30]}...")
                             except Exception as e:
@@ -4856,7 +5131,7 @@ async def ws_stream(ws: WebSocket):
 
                     if should_tts and len(chunk_text) > 3:
                         tts_task = asyncio.create_task(
-                            text_to_speech(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"])
+                            synthesize_for_transport(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"], framer)
                         )
                         await tts_queue_voice.put((chunk_text, tts_task))
                         chunk_buffer = ""
@@ -4869,7 +5144,7 @@ async def ws_stream(ws: WebSocket):
                 if chunk_buffer.strip() and len(chunk_buffer.strip()) > 3:
                     chunk_text = chunk_buffer.strip()
                     tts_task = asyncio.create_task(
-                        text_to_speech(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"])
+                        synthesize_for_transport(chunk_text, voice, mood_settings["rate"], mood_settings["pitch"], framer)
                     )
                     await tts_queue_voice.put((chunk_text, tts_task))
 
@@ -5003,6 +5278,84 @@ async def safe_ws_send_bytes(ws: WebSocket, data: bytes) -> bool:
     except Exception:
         return False
 
+def negotiate_ws_transport(request: Optional[dict]) -> Optional[AudioFramer]:
+    """Build a frame transport for a websocket config request (None = blob mode)."""
+    config = negotiate_transport(request, get_sample_rate())
+    if not config.is_frames or not USE_FAST_TTS:
+        return None
+    return AudioFramer(config)
+
+def ws_transport_info(framer: Optional[AudioFramer]) -> dict:
+    """Transport description echoed to the client in config_ok."""
+    return framer.config.to_dict() if framer else {"mode": "blob"}
+
+async def safe_ws_send_frames(
+    ws: WebSocket,
+    framer: AudioFramer,
+    pcm: bytes,
+    interrupted: Optional[Callable[[], bool]] = None
+) -> bool:
+    """Send one utterance as transport frames, return False if disconnected.
+
+    Checks for interruption before each frame and stops at a frame boundary,
+    telling the client the last sequence number it got. Frames are numbered
+    as they are sent, so the next utterance continues without a seq gap.
+    Sends aren't paced, so an interrupt only stops frames not yet handed to
+    the socket; the client still has to drop what it has buffered.
+    """
+    if framer.config.codec == "opus":
+        payloads = await asyncio.to_thread(framer.payloads, pcm)
+    else:
+        payloads = framer.payloads(pcm)
+
+    last_seq = None
+    frames = framer.iter_frames(payloads)
+    while True:
+        if interrupted is not None and interrupted():
+            return await safe_ws_send(ws, {"type": "audio_interrupted", "last_seq": last_seq})
+        frame = next(frames, None)
+        if frame is None:
+            return True
+        if not await safe_ws_send_bytes(ws, frame):
+            return False
+        last_seq = parse_frame_header(frame)["seq"]
+
+async def synthesize_for_transport(
+    text: str,
+    voice: str,
+    rate: str,
+    pitch: str,
+    framer: Optional[AudioFramer]
+) -> tuple[Optional[bytes], bool]:
+    """TTS in the shape the connection's transport needs.
+
+    Returns:
+        (audio, is_pcm): raw PCM when framing, else the usual MP3/WAV blob
+    """
+    if framer is not None:
+        pcm = await text_to_speech_pcm(text, voice, rate, pitch)
+        if pcm:
+            return pcm, True
+    return await text_to_speech(text, voice, rate, pitch), False
+
+async def send_tts_audio(
+    ws: WebSocket,
+    audio: bytes,
+    is_pcm: bool,
+    framer: Optional[AudioFramer],
+    announce: dict,
+    interrupted: Optional[Callable[[], bool]] = None
+) -> bool:
+    """Announce an utterance then send it as frames (PCM) or as one blob."""
+    if is_pcm:
+        announce = {**announce, "transport": "frames", "seq": framer.next_seq}
+        if not await safe_ws_send(ws, announce):
+            return False
+        return await safe_ws_send_frames(ws, framer, audio, interrupted)
+    if not await safe_ws_send(ws, announce):
+        return False
+    return await safe_ws_send_bytes(ws, audio)
+
 @app.websocket("/ws/interruptible")
 async def ws_interruptible(ws: WebSocket):
     """WebSocket for interruptible voice conversation.
@@ -5019,6 +5372,8 @@ async def ws_interruptible(ws: WebSocket):
     - Client sends: { type: "audio", data: base64 } or binary for voice input
     - Server sends: { type: "token", content: "..." } for LLM tokens
     - Server sends: { type: "audio_chunk" } followed by binary audio
+      (one blob, or PCM/Opus frames if negotiated via config "audio_transport")
+    - Server sends: { type: "audio_interrupted", last_seq } when framing stops early
     - Server sends: { type: "speaking_start" } when Eva starts speaking
     - Server sends: { type: "speaking_end" } when Eva finishes or is interrupted
     """
@@ -5032,6 +5387,7 @@ async def ws_interruptible(ws: WebSocket):
     # Fast voice settings for natural conversation
     fast_rate = "+15%"  # Faster speech
     natural_pitch = "+0Hz"
+    framer: Optional[AudioFramer] = None  # Frame transport (None = MP3 blobs)
 
     print(f"🎙️ Interruptible voice session started: {session_id}")
 
@@ -5072,11 +5428,14 @@ async def ws_interruptible(ws: WebSocket):
                     if voice not in VOICES:
                         voice = DEFAULT_VOICE
                     session.voice = voice
+                    if "audio_transport" in data:
+                        framer = negotiate_ws_transport(data["audio_transport"])
                     if not await safe_ws_send(ws, {
                         "type": "config_ok",
                         "voice": voice,
                         "rate": fast_rate,
-                        "pitch": natural_pitch
+                        "pitch": natural_pitch,
+                        "audio_transport": ws_transport_info(framer),
                     }):
                         connected = False
                         break
@@ -5138,15 +5497,19 @@ async def ws_interruptible(ws: WebSocket):
                         await safe_ws_send(ws, {"type": "token", "content": quick_response})
 
                         try:
-                            audio_data = await text_to_speech(
+                            audio_data, is_pcm = await synthesize_for_transport(
                                 quick_response,
                                 voice,
                                 mood_settings["rate"],
-                                mood_settings["pitch"]
+                                mood_settings["pitch"],
+                                framer
                             )
                             if audio_data and not session.is_interrupted:
-                                await safe_ws_send(ws, {"type": "audio_chunk", "size": len(audio_data)})
-                                await safe_ws_send_bytes(ws, audio_data)
+                                await send_tts_audio(
+                                    ws, audio_data, is_pcm, framer,
+                                    {"type": "audio_chunk", "size": len(audio_data)},
+                                    interrupted=lambda: session.is_interrupted
+                                )
                         except Exception as e:
                             print(f"TTS error: {e}")
 
@@ -5194,17 +5557,19 @@ async def ws_interruptible(ws: WebSocket):
                                 break
 
                             try:
-                                audio_data = await text_to_speech(
+                                audio_data, is_pcm = await synthesize_for_transport(
                                     sentence,
                                     voice,
                                     mood_settings["rate"],
-                                    mood_settings["pitch"]
+                                    mood_settings["pitch"],
+                                    framer
                                 )
                                 if audio_data and not session.is_interrupted and connected:
-                                    if not await safe_ws_send(ws, {"type": "audio_chunk", "size": len(audio_data)}):
-                                        connected = False
-                                        break
-                                    if not await safe_ws_send_bytes(ws, audio_data):
+                                    if not await send_tts_audio(
+                                        ws, audio_data, is_pcm, framer,
+                                        {"type": "audio_chunk", "size": len(audio_data)},
+                                        interrupted=lambda: session.is_interrupted
+                                    ):
                                         connected = False
                                         break
                             except Exception as e:
@@ -5278,15 +5643,19 @@ async def ws_interruptible(ws: WebSocket):
                     await safe_ws_send(ws, {"type": "token", "content": quick_response})
 
                     try:
-                        audio_data = await text_to_speech(
+                        audio_data, is_pcm = await synthesize_for_transport(
                             quick_response,
                             voice,
                             mood_settings["rate"],
-                            mood_settings["pitch"]
+                            mood_settings["pitch"],
+                            framer
                         )
                         if audio_data and not session.is_interrupted:
-                            await safe_ws_send(ws, {"type": "audio_chunk", "size": len(audio_data)})
-                            await safe_ws_send_bytes(ws, audio_data)
+                            await send_tts_audio(
+                                ws, audio_data, is_pcm, framer,
+                                {"type": "audio_chunk", "size": len(audio_data)},
+                                interrupted=lambda: session.is_interrupted
+                            )
                     except Exception as e:
                         print(f"TTS error: {e}")
 
@@ -5334,17 +5703,19 @@ async def ws_interruptible(ws: WebSocket):
                             break
 
                         try:
-                            audio_data = await text_to_speech(
+                            audio_data, is_pcm = await synthesize_for_transport(
                                 sentence,
                                 voice,
                                 mood_settings["rate"],
-                                mood_settings["pitch"]
+                                mood_settings["pitch"],
+                                framer
                             )
                             if audio_data and not session.is_interrupted and connected:
-                                if not await safe_ws_send(ws, {"type": "audio_chunk", "size": len(audio_data)}):
-                                    connected = False
-                                    break
-                                if not await safe_ws_send_bytes(ws, audio_data):
+                                if not await send_tts_audio(
+                                    ws, audio_data, is_pcm, framer,
+                                    {"type": "audio_chunk", "size": len(audio_data)},
+                                    interrupted=lambda: session.is_interrupted
+                                ):
                                     connected = False
                                     break
                         except Exception as e:
@@ -5392,15 +5763,21 @@ async def ws_her(ws: WebSocket):
     Client -> Server:
       { type: "message", content: "...", user_id: "..." }  - Text message
       { type: "audio", data: base64 }  - Voice input (for STT)
+      binary  - WAV utterance, or raw PCM frames when stt is "stream"
+      { type: "audio_end" }  - End of speech (streaming STT)
       { type: "interrupt" }  - Stop Eva speaking
       { type: "ping" }  - Keep-alive
-      { type: "config", voice: "...", user_id: "..." }  - Configure session
+      { type: "config", voice: "...", user_id: "...", audio_transport: {...}, stt: "stream" }  - Configure session
 
     Server -> Client:
+      { type: "transcription_partial", text, stable, utterance, ... }  - Streaming STT hypothesis
+      { type: "transcription", text }  - Final transcript (then answered)
       { type: "her_context", user_emotion, memory_context, ... }  - Context before response
       { type: "filler", audio_base64, text }  - Instant filler sound
       { type: "token", content }  - LLM token (for text display)
       { type: "speech", audio_base64, text, emotion }  - TTS chunk
+      { type: "speech", transport: "frames", seq, text, emotion }  - TTS chunk, PCM/Opus frames follow as binary
+      { type: "audio_interrupted", last_seq }  - Frames stopped at interrupt
       { type: "breathing", audio_base64 }  - Natural breathing
       { type: "backchannel", audio_base64, text, type }  - "mmhmm", etc.
       { type: "proactive", content, thought_type }  - Eva-initiated message
@@ -5420,6 +5797,9 @@ async def ws_her(ws: WebSocket):
     is_interrupted = False
     interrupt_event = asyncio.Event()  # For real-time interrupt detection
     message_queue: asyncio.Queue = asyncio.Queue()  # Queue for incoming messages
+    framer: Optional[AudioFramer] = None  # Frame transport (None = base64 speech)
+    stt: Optional[StreamingTranscriber] = None  # Streaming STT (None = WAV blobs)
+    stt_queue: asyncio.Queue = asyncio.Queue()  # PCM chunks, None = end of speech
 
     # Register connection for proactive push
     _her_connections[user_id] = ws
@@ -5462,7 +5842,7 @@ async def ws_her(ws: WebSocket):
     # Message receiver task - runs in parallel to handle interrupts immediately
     async def message_receiver():
         """Background task to receive WebSocket messages and handle interrupts."""
-        nonlocal connected, is_interrupted, user_id, voice
+        nonlocal connected, is_interrupted, user_id, voice, framer, stt
         while connected:
             try:
                 msg = await asyncio.wait_for(ws.receive(), timeout=30.0)
@@ -5507,7 +5887,21 @@ async def ws_her(ws: WebSocket):
                     user_id = data.get("user_id", user_id)
                     voice = data.get("voice", voice)
                     _her_connections[user_id] = ws
-                    await safe_ws_send(ws, {"type": "config_ok", "user_id": user_id})
+                    if "audio_transport" in data:
+                        framer = negotiate_ws_transport(data["audio_transport"])
+                    if "stt" in data:
+                        stt = negotiate_ws_stt(data["stt"])
+                    await safe_ws_send(ws, {
+                        "type": "config_ok",
+                        "user_id": user_id,
+                        "audio_transport": ws_transport_info(framer),
+                        "stt": ws_stt_info(stt),
+                    })
+                    continue
+
+                # END OF SPEECH (streaming STT)
+                if msg_type == "audio_end":
+                    await stt_queue.put(None)
                     continue
 
                 # Queue other messages for processing
@@ -5515,11 +5909,39 @@ async def ws_her(ws: WebSocket):
 
             # Handle binary audio
             elif "bytes" in msg:
-                await message_queue.put({"type": "audio_binary", "data": msg["bytes"]})
+                if stt is not None:
+                    await stt_queue.put(msg["bytes"])
+                else:
+                    await message_queue.put({"type": "audio_binary", "data": msg["bytes"]})
 
     # Start message receiver
     receiver_task = asyncio.create_task(message_receiver())
 
+    async def stt_worker():
+        """Feed streaming STT off the receiver, so interrupts stay instant
+        and partials keep flowing while Eva speaks."""
+        while connected:
+            chunk = await stt_queue.get()
+            if stt is None:
+                continue
+            if chunk is None:
+                event = await stt.finish()
+                events = [event] if event else []
+            else:
+                events = await stt.feed(chunk)
+            for event in events:
+                if event.type == "partial":
+                    await safe_ws_send(ws, {"type": "transcription_partial", **event.to_dict()})
+                elif event.text:
+                    await safe_ws_send(ws, {"type": "transcription", "text": event.text})
+                    # Queue as message to process
+                    await message_queue.put({"type": "message", "content": event.text})
+
+    stt_task = asyncio.create_task(stt_worker())
+
+    def speech_interrupted() -> bool:
+        return is_interrupted or interrupt_event.is_set()
+
     try:
         while connected:
             try:
@@ -5617,16 +6039,25 @@ async def ws_her(ws: WebSocket):
                             emotion = detect_emotion(sentence)
 
                             # Generate TTS - VITS GPU only (~70ms, fast)
-                            audio_chunk = await async_fast_tts(sentence)
+                            if framer is not None:
+                                audio_chunk = await async_fast_tts_pcm(sentence)
+                                if audio_chunk and not is_interrupted:
+                                    await send_tts_audio(ws, audio_chunk, True, framer, {
+                                        "type": "speech",
+                                        "text": sentence,
+                                        "emotion": emotion.name
+                                    }, interrupted=speech_interrupted)
+                            else:
+                                audio_chunk = await async_fast_tts(sentence)
+                                if audio_chunk and not is_interrupted:
+                                    await safe_ws_send(ws, {
+                                        "type": "speech",
+                                        "audio_base64": base64.b64encode(audio_chunk).decode(),
+                                        "text": sentence,
+                                        "emotion": emotion.name
+                                    })
 
                             if audio_chunk and not is_interrupted:
-                                await safe_ws_send(ws, {
-                                    "type": "speech",
-                                    "audio_base64": base64.b64encode(audio_chunk).decode(),
-                                    "text": sentence,
-                                    "emotion": emotion.name
-                                })
-
                                 # Add breathing (30% chance)
                                 sentence_count += 1
                                 if sentence_count % 3 == 0 and random.random() < 0.3:
@@ -5642,14 +6073,23 @@ async def ws_her(ws: WebSocket):
                 # Handle remaining text
                 if sentence_buffer.strip() and not is_interrupted:
                     sentence = sentence_buffer.strip()
-                    audio_chunk = await async_emotional_tts(sentence, "neutral")
-                    if audio_chunk:
-                        await safe_ws_send(ws, {
-                            "type": "speech",
-                            "audio_base64": base64.b64encode(audio_chunk).decode(),
-                            "text": sentence,
-                            "emotion": "neutral"
-                        })
+                    if framer is not None:
+                        audio_chunk = await async_fast_tts_pcm(sentence)
+                        if audio_chunk:
+                            await send_tts_audio(ws, audio_chunk, True, framer, {
+                                "type": "speech",
+                                "text": sentence,
+                                "emotion": "neutral"
+                            }, interrupted=speech_interrupted)
+                    else:
+                        audio_chunk = await async_emotional_tts(sentence, "neutral")
+                        if audio_chunk:
+                            await safe_ws_send(ws, {
+                                "type": "speech",
+                                "audio_base64": base64.b64encode(audio_chunk).decode(),
+                                "text": sentence,
+                                "emotion": "neutral"
+                            })
 
                 # 5. Store in memory
                 if HER_AVAILABLE and full_response:
@@ -5687,6 +6127,7 @@ async def ws_her(ws: WebSocket):
         connected = False
         proactive_task.cancel()
         receiver_task.cancel()
+        stt_task.cancel()
         if user_id in _her_connections:
             del _her_connections[user_id]
 
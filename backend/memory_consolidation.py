@@ -0,0 +1,318 @@
+"""
+Memory Consolidation - incremental episodic -> semantic clustering
+
+consolidate_memories used to run inline over session memories, grouping
+them by every word longer than 4 characters and adding one "User
+frequently discusses: X" memory per shared word, while the vector store
+grew forever. MemoryConsolidator runs off the request path
+(memory_consolidation_scheduler in main.py) over the users that stored
+episodic memories since the last pass:
+
+1. Prune: episodic memories whose decayed importance
+   (importance * 2^(-age / half-life)) drops under MEMORY_PRUNE_IMPORTANCE
+   are deleted, then each user is capped at MEMORY_MAX_PER_USER entries
+   (lowest decayed importance first, episodic memories and consolidated
+   summaries alike; other semantic facts are never evicted)
+2. Cluster: new episodic memories join the nearest cluster centroid when
+   cosine similarity >= MEMORY_CONSOLIDATION_SIMILARITY, else start a new
+   cluster; centroids move by the 1/n mini-batch k-means update
+3. Merge: once a cluster holds consolidation_threshold memories, one
+   semantic memory (upserted under the cluster's id as it keeps growing)
+   replaces its episodic members in the vector store
+
+Cluster state lives in memory. On a user's first pass it is seeded from
+the stored consolidated-* summaries (id, centroid embedding,
+consolidated_count), so after a restart new memories keep folding into the
+existing summaries instead of starting duplicates next to them.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from memory_index import MEMORY_DECAY_HALF_LIFE_H, tokenize
+
+MEMORY_CONSOLIDATION_SIMILARITY = float(os.getenv("MEMORY_CONSOLIDATION_SIMILARITY", "0.8"))
+MEMORY_CONSOLIDATION_MIN_SIZE = int(os.getenv("MEMORY_CONSOLIDATION_MIN_SIZE", "3"))
+MEMORY_CONSOLIDATION_INTERVAL_S = float(os.getenv("MEMORY_CONSOLIDATION_INTERVAL_S", "300"))
+MEMORY_PRUNE_IMPORTANCE = float(os.getenv("MEMORY_PRUNE_IMPORTANCE", "0.05"))
+MEMORY_MAX_PER_USER = int(os.getenv("MEMORY_MAX_PER_USER", "500"))
+
+SUMMARY_TERMS = 3
+SUMMARY_PREFIX = "consolidated-"
+_SUMMARY_TOPICS = re.compile(r"^User often talks about: (.*) \(\d+ conversations\)$")
+
+
+class _Cluster:
+    """Running centroid of similar episodic memories."""
+
+    __slots__ = ("id", "centroid", "count", "importance_sum", "terms", "emotions",
+                 "members", "last_timestamp", "merged")
+
+    def __init__(self, cluster_id: str, vector: np.ndarray):
+        self.id = cluster_id
+        self.centroid = vector.copy()
+        self.count = 0
+        self.importance_sum = 0.0
+        self.terms: Counter = Counter()
+        self.emotions: Counter = Counter()
+        self.members: List[str] = []   # episodic ids not yet merged away
+        self.last_timestamp = 0.0
+        self.merged = False
+
+    def add(self, memory_id: str, vector: np.ndarray, content: str, meta: Dict) -> None:
+        self.count += 1
+        # Mini-batch k-means step, kept on the unit sphere for cosine
+        self.centroid += (vector - self.centroid) / self.count
+        norm = np.linalg.norm(self.centroid)
+        if norm > 0:
+            self.centroid /= norm
+        self.importance_sum += float(meta.get("importance", 0.5))
+        self.terms.update(set(tokenize(content)))
+        self.emotions[meta.get("emotion", "neutral")] += 1
+        self.members.append(memory_id)
+        self.last_timestamp = max(self.last_timestamp, float(meta.get("timestamp", 0.0)))
+
+
+class MemoryConsolidator:
+    """Off-path consolidation and pruning of a memory system's vector store."""
+
+    def __init__(
+        self,
+        memory: Any,
+        similarity: float = MEMORY_CONSOLIDATION_SIMILARITY,
+        prune_importance: float = MEMORY_PRUNE_IMPORTANCE,
+        max_per_user: int = MEMORY_MAX_PER_USER,
+        half_life_h: float = MEMORY_DECAY_HALF_LIFE_H
+    ):
+        self.memory = memory   # EvaMemorySystem (collection, lexical_index, embeddings)
+        self.similarity = similarity
+        self.prune_importance = prune_importance
+        self.max_per_user = max(1, max_per_user)
+        self.half_life_s = max(1.0, half_life_h * 3600)
+        self._clusters: Dict[str, List[_Cluster]] = {}
+        self._assigned: Dict[str, Set[str]] = {}
+        self._seeded: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()       # guards _dirty
+        self._run_lock = threading.Lock()   # one pass at a time
+        self.stats = {"runs": 0, "users_processed": 0, "clustered": 0, "merged": 0, "summaries": 0,
+                      "seeded": 0, "pruned": 0, "last_run_ms": 0.0}
+
+    def mark(self, user_id: str) -> None:
+        """Schedule a user for the next pass (a new episodic memory was stored)."""
+        with self._lock:
+            self._dirty.add(user_id)
+
+    def run_pending(self) -> Dict[str, Any]:
+        """Consolidate every user marked since the last pass."""
+        with self._lock:
+            users, self._dirty = self._dirty, set()
+        start = time.time()
+        for user_id in users:
+            self.consolidate_user(user_id)
+        self.stats["runs"] += 1
+        self.stats["last_run_ms"] = round((time.time() - start) * 1000, 1)
+        return {"users": len(users), **self.get_stats()}
+
+    def consolidate_user(self, user_id: str) -> Dict[str, int]:
+        """Prune, cluster and merge one user's stored memories."""
+        collection = self.memory.collection
+        result = {"pruned": 0, "clustered": 0, "merged": 0}
+        if collection is None:
+            return result
+
+        with self._run_lock:
+            try:
+                stored = collection.get(
+                    where={"user_id": user_id},
+                    include=["documents", "metadatas", "embeddings"]
+                )
+            except Exception as e:
+                print(f"⚠️ Consolidation load failed for {user_id}: {e}")
+                return result
+
+            ids = list(stored.get("ids") or [])
+            if not ids:
+                return result
+            documents = list(stored.get("documents") or [""] * len(ids))
+            metadatas = [meta or {} for meta in (stored.get("metadatas") or [{}] * len(ids))]
+            embeddings = stored.get("embeddings")
+
+            keep = self._prune(user_id, ids, metadatas)
+            result["pruned"] = len(ids) - len(keep)
+            if user_id not in self._seeded:
+                self._seed(user_id, keep, ids, documents, metadatas, embeddings)
+
+            new = [
+                i for i in keep
+                if metadatas[i].get("memory_type", "episodic") == "episodic"
+                and ids[i] not in self._assigned.get(user_id, ())
+            ]
+            vectors = self._vectors(new, documents, embeddings)
+            if vectors is not None:
+                for row, i in enumerate(new):
+                    self._assign(user_id, ids[i], vectors[row], documents[i], metadatas[i])
+                result["clustered"] = len(new)
+                result["merged"] = self._merge(user_id)
+
+            if result["pruned"] or result["merged"]:
+                self.memory.invalidate_context_cache(user_id)
+            self.stats["users_processed"] += 1
+            self.stats["clustered"] += result["clustered"]
+            return result
+
+    # ----------------------------------------------------------------- steps
+
+    def _prune(self, user_id: str, ids: List[str], metadatas: List[Dict]) -> List[int]:
+        """Delete decayed episodic memories and enforce the per-user cap."""
+        now = time.time()
+        importance = np.array([float(m.get("importance", 0.5)) for m in metadatas])
+        age = now - np.array([float(m.get("timestamp", now)) for m in metadatas])
+        decayed = importance * np.exp2(-np.maximum(age, 0.0) / self.half_life_s)
+        episodic = np.array([m.get("memory_type", "episodic") == "episodic" for m in metadatas])
+        summary = np.array([memory_id.startswith(SUMMARY_PREFIX) for memory_id in ids], dtype=bool)
+
+        drop = episodic & (decayed < self.prune_importance)
+        excess = int((~drop).sum()) - self.max_per_user
+        if excess > 0:
+            # Lowest decayed importance first; only other semantic facts are never evicted
+            candidates = np.flatnonzero((episodic | summary) & ~drop)
+            drop[candidates[np.argsort(decayed[candidates], kind="stable")[:excess]]] = True
+
+        if drop.any():
+            self._delete(user_id, [ids[i] for i in np.flatnonzero(drop)])
+            self.stats["pruned"] += int(drop.sum())
+        return [int(i) for i in np.flatnonzero(~drop)]
+
+    def _seed(self, user_id: str, rows: List[int], ids: List[str], documents: List[str],
+              metadatas: List[Dict], embeddings: Any) -> None:
+        """Rebuild merged clusters from the user's stored summaries (first pass only)."""
+        known = {c.id for c in self._clusters.get(user_id, [])}
+        rows = [i for i in rows if ids[i].startswith(SUMMARY_PREFIX) and ids[i] not in known]
+        vectors = self._vectors(rows, documents, embeddings)
+        if rows and vectors is None:
+            return  # No vectors yet: retry on the next pass rather than duplicate
+        for row, i in enumerate(rows):
+            meta = metadatas[i]
+            cluster = _Cluster(ids[i], vectors[row])
+            cluster.count = max(1, int(float(meta.get("consolidated_count", 1))))
+            # Summaries store mean importance + 0.2 (capped); undo the boost
+            cluster.importance_sum = max(0.0, float(meta.get("importance", 0.5)) - 0.2) * cluster.count
+            match = _SUMMARY_TOPICS.match(documents[i] or "")
+            topics = match.group(1) if match else (documents[i] or "")
+            for term in tokenize(topics):
+                cluster.terms[term] += cluster.count
+            cluster.emotions[meta.get("emotion", "neutral")] = cluster.count
+            cluster.last_timestamp = float(meta.get("timestamp", 0.0))
+            cluster.merged = True
+            self._clusters.setdefault(user_id, []).append(cluster)
+        self._seeded.add(user_id)
+        self.stats["seeded"] += len(rows)
+
+    def _vectors(self, rows: List[int], documents: List[str], embeddings: Any) -> Optional[np.ndarray]:
+        """Unit vectors for the given rows (stored embeddings, else the embedder)."""
+        if not rows:
+            return None
+        if embeddings is not None and len(embeddings) > 0 and embeddings[rows[0]] is not None:
+            vectors = np.asarray([embeddings[i] for i in rows], dtype=np.float32)
+        elif self.memory.embeddings is not None:
+            vectors = np.asarray(self.memory.embeddings.embed_many([documents[i] for i in rows]),
+                                 dtype=np.float32)
+        else:
+            return None
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def _assign(self, user_id: str, memory_id: str, vector: np.ndarray, content: str, meta: Dict) -> None:
+        clusters = self._clusters.setdefault(user_id, [])
+        best = None
+        if clusters:
+            sims = np.stack([c.centroid for c in clusters]) @ vector
+            index = int(np.argmax(sims))
+            if sims[index] >= self.similarity:
+                best = clusters[index]
+        if best is None:
+            best = _Cluster(f"{SUMMARY_PREFIX}{user_id}-{memory_id}", vector)
+            clusters.append(best)
+        best.add(memory_id, vector, content, meta)
+        self._assigned.setdefault(user_id, set()).add(memory_id)
+
+    def _merge(self, user_id: str) -> int:
+        """Replace the members of every large-enough cluster by its semantic memory."""
+        threshold = max(2, int(getattr(self.memory, "consolidation_threshold", MEMORY_CONSOLIDATION_MIN_SIZE)))
+        merged = 0
+        for cluster in self._clusters.get(user_id, []):
+            if not cluster.members or (not cluster.merged and cluster.count < threshold):
+                continue
+            if not cluster.merged:
+                self.stats["summaries"] += 1
+            members, cluster.members, cluster.merged = cluster.members, [], True
+            self._upsert_summary(user_id, cluster)
+            self._delete(user_id, members)
+            merged += len(members)
+        self.stats["merged"] += merged
+        return merged
+
+    def _upsert_summary(self, user_id: str, cluster: _Cluster) -> None:
+        topics = ", ".join(term for term, _ in cluster.terms.most_common(SUMMARY_TERMS)) or "recurring topic"
+        content = f"User often talks about: {topics} ({cluster.count} conversations)"
+        metadata = {
+            "user_id": user_id,
+            "memory_type": "semantic",
+            "emotion": cluster.emotions.most_common(1)[0][0],
+            "importance": str(min(0.9, cluster.importance_sum / cluster.count + 0.2)),
+            "timestamp": str(cluster.last_timestamp or time.time()),
+            "consolidated_count": cluster.count,
+        }
+        self.memory.collection.upsert(
+            ids=[cluster.id],
+            documents=[content],
+            metadatas=[metadata],
+            embeddings=[cluster.centroid.tolist()]
+        )
+
+        # Keep the lexical index in step (re-add replaces the old summary text)
+        from eva_memory import MemoryEntry
+
+        self.memory.lexical_index.remove(user_id, [cluster.id])
+        self.memory.lexical_index.add(user_id, MemoryEntry(
+            id=cluster.id,
+            content=content,
+            memory_type="semantic",
+            timestamp=float(metadata["timestamp"]),
+            emotion=metadata["emotion"],
+            importance=float(metadata["importance"])
+        ))
+
+    def _delete(self, user_id: str, memory_ids: List[str]) -> None:
+        if not memory_ids:
+            return
+        self.memory.collection.delete(ids=list(memory_ids))
+        self.memory.lexical_index.remove(user_id, memory_ids)
+        removed = set(memory_ids)
+        self._assigned.get(user_id, set()).difference_update(removed)
+        clusters = self._clusters.get(user_id)
+        if clusters:
+            for cluster in clusters:
+                if cluster.members:
+                    cluster.members = [m for m in cluster.members if m not in removed]
+            # Evicted summaries and unmerged clusters whose members are all
+            # gone carry no information
+            self._clusters[user_id] = [
+                c for c in clusters if c.id not in removed and (c.merged or c.members)
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._dirty)
+        return {
+            **self.stats,
+            "pending_users": pending,
+            "clusters": sum(len(c) for c in self._clusters.values()),
+        }
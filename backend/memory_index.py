@@ -0,0 +1,258 @@
+"""
+Memory Index - hybrid lexical + vector retrieval for EVA memories
+
+_do_retrieve used to over-fetch n_results * 2 from Chroma, post-filter by
+importance and sort in Python by importance * (1 - age / 1 day), a score
+that goes negative after a day. Retrieval now works on a small candidate
+set from two sources:
+
+- Chroma vector hits (n_results, no over-fetch), scored 1 - cosine distance
+- BM25 over LexicalIndex, an in-process per-user inverted index of memory
+  text (names, places and rare words that embeddings blur), bounded to
+  MEMORY_LEXICAL_MAX_USERS users with LRU eviction
+
+HybridRanker fuses vector score, normalized BM25, importance and an
+exponential time decay (half-life MEMORY_DECAY_HALF_LIFE_H) into a single
+score for all candidates at once with numpy, and takes the top k with
+argpartition. Fusion weights are MEMORY_FUSION_* env knobs.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from heapq import nlargest
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MEMORY_FUSION_VECTOR_WEIGHT = float(os.getenv("MEMORY_FUSION_VECTOR_WEIGHT", "0.45"))
+MEMORY_FUSION_LEXICAL_WEIGHT = float(os.getenv("MEMORY_FUSION_LEXICAL_WEIGHT", "0.3"))
+MEMORY_FUSION_IMPORTANCE_WEIGHT = float(os.getenv("MEMORY_FUSION_IMPORTANCE_WEIGHT", "0.15"))
+MEMORY_FUSION_RECENCY_WEIGHT = float(os.getenv("MEMORY_FUSION_RECENCY_WEIGHT", "0.1"))
+MEMORY_DECAY_HALF_LIFE_H = float(os.getenv("MEMORY_DECAY_HALF_LIFE_H", "72"))
+MEMORY_LEXICAL_MAX_USERS = int(os.getenv("MEMORY_LEXICAL_MAX_USERS", "1000"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Function words that would match almost every memory (FR + EN)
+_STOPWORDS = frozenset("""
+    le la les un une des du de d l au aux et ou mais donc ni car que qui quoi
+    ce cet cette ces se sa son ses mon ma mes ton ta tes notre nos votre vos
+    leur leurs je tu il elle on nous vous ils elles me te lui en y ne pas plus
+    est suis es sont être avoir ai as a ont été fait faire dans sur pour par
+    avec sans sous chez très bien aussi comme tout tous c j m n s t qu
+    the an and or but of to in on at for with is are was were be been it
+    this that i you he she we they my your his her our their user said eva
+    replied about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords or single letters."""
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS and not token.isdigit()
+    ]
+
+
+class _UserIndex:
+    """Inverted index of one user's memories."""
+
+    __slots__ = ("postings", "doc_len", "docs", "total_len", "loaded")
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {memory_id: tf}
+        self.doc_len: Dict[str, int] = {}
+        self.docs: Dict[str, Any] = {}                  # memory_id -> MemoryEntry
+        self.total_len = 0
+        self.loaded = False   # Stored memories indexed (not just this process's adds)
+
+
+class LexicalIndex:
+    """Per-user BM25 index over memory content.
+
+    Memories are indexed on add_memory, and a user's stored memories are
+    loaded once (load(), off the request path) after a restart; search()
+    only touches postings of query terms. At most max_users users are kept:
+    the least recently used one is evicted whole, loaded flag included, so
+    it is loaded again from the store on its next retrieval.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B, max_users: int = MEMORY_LEXICAL_MAX_USERS):
+        self.k1 = k1
+        self.b = b
+        self.max_users = max(1, max_users)
+        self._users: OrderedDict[str, _UserIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def has_user(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._users
+
+    def is_loaded(self, user_id: str) -> bool:
+        """Whether the user's stored memories have been loaded into the index."""
+        with self._lock:
+            index = self._users.get(user_id)
+            return index is not None and index.loaded
+
+    def _user(self, user_id: str) -> _UserIndex:
+        """A user's index, marked most recently used (caller holds _lock)."""
+        index = self._users.get(user_id)
+        if index is None:
+            index = self._users[user_id] = _UserIndex()
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self._evictions += 1
+        else:
+            self._users.move_to_end(user_id)
+        return index
+
+    @staticmethod
+    def _index(index: _UserIndex, entry: Any, tf: Counter) -> None:
+        if entry.id in index.docs:
+            return
+        index.docs[entry.id] = entry
+        length = sum(tf.values())
+        index.doc_len[entry.id] = length
+        index.total_len += length
+        for term, count in tf.items():
+            index.postings.setdefault(term, {})[entry.id] = count
+
+    def add(self, user_id: str, entry: Any) -> None:
+        """Index a memory (no-op if its id is already indexed)."""
+        tf = Counter(tokenize(entry.content))
+        with self._lock:
+            self._index(self._user(user_id), entry, tf)
+
+    def add_many(self, user_id: str, entries: Iterable[Any]) -> None:
+        for entry in entries:
+            self.add(user_id, entry)
+
+    def load(self, user_id: str, entries: Iterable[Any]) -> None:
+        """Index a user's stored memories and mark the user loaded."""
+        tokenized = [(entry, Counter(tokenize(entry.content))) for entry in entries]
+        with self._lock:
+            index = self._user(user_id)
+            for entry, tf in tokenized:
+                self._index(index, entry, tf)
+            index.loaded = True
+
+    def remove(self, user_id: str, memory_ids: Iterable[str]) -> None:
+        """Drop memories from a user's index."""
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is None:
+                return
+            for memory_id in memory_ids:
+                entry = index.docs.pop(memory_id, None)
+                if entry is None:
+                    continue
+                index.total_len -= index.doc_len.pop(memory_id, 0)
+                for term in set(tokenize(entry.content)):
+                    postings = index.postings.get(term)
+                    if postings is not None:
+                        postings.pop(memory_id, None)
+                        if not postings:
+                            del index.postings[term]
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        k: int,
+        memory_type: Optional[str] = None
+    ) -> List[Tuple[Any, float]]:
+        """Top-k (entry, BM25 score) for query among the user's memories."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is None or not index.docs:
+                return []
+            self._users.move_to_end(user_id)
+            n_docs = len(index.docs)
+            avg_len = index.total_len / n_docs or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = index.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for memory_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * index.doc_len[memory_id] / avg_len)
+                    scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            hits = [
+                (index.docs[memory_id], score) for memory_id, score in scores.items()
+                if memory_type is None or index.docs[memory_id].memory_type == memory_type
+            ]
+        return nlargest(k, hits, key=lambda hit: hit[1])
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "loaded_users": sum(1 for index in self._users.values() if index.loaded),
+                "memories": sum(len(index.docs) for index in self._users.values()),
+                "terms": sum(len(index.postings) for index in self._users.values()),
+                "evictions": self._evictions,
+            }
+
+
+class HybridRanker:
+    """Vectorized fusion of vector, lexical, importance and time-decay scores."""
+
+    def __init__(
+        self,
+        vector_weight: float = MEMORY_FUSION_VECTOR_WEIGHT,
+        lexical_weight: float = MEMORY_FUSION_LEXICAL_WEIGHT,
+        importance_weight: float = MEMORY_FUSION_IMPORTANCE_WEIGHT,
+        recency_weight: float = MEMORY_FUSION_RECENCY_WEIGHT,
+        half_life_h: float = MEMORY_DECAY_HALF_LIFE_H
+    ):
+        self.weights = np.array(
+            [vector_weight, lexical_weight, importance_weight, recency_weight], dtype=np.float64
+        )
+        self.half_life_s = max(1.0, half_life_h * 3600)
+
+    def rank(
+        self,
+        candidates: Sequence[Any],
+        vector_scores: Sequence[float],
+        lexical_scores: Sequence[float],
+        k: int,
+        min_importance: float = 0.0,
+        now: Optional[float] = None
+    ) -> List[Any]:
+        """Top-k candidates by fused score, dropping those below min_importance.
+
+        vector_scores are similarities in [0, 1]; lexical_scores are raw BM25
+        (normalized here by the best lexical hit).
+        """
+        if not candidates or k <= 0:
+            return []
+        now = time.time() if now is None else now
+
+        features = np.empty((len(candidates), 4), dtype=np.float64)
+        features[:, 0] = np.clip(np.asarray(vector_scores, dtype=np.float64), 0.0, 1.0)
+        lexical = np.asarray(lexical_scores, dtype=np.float64)
+        top_lexical = lexical.max()
+        features[:, 1] = lexical / top_lexical if top_lexical > 0 else 0.0
+        features[:, 2] = [m.importance for m in candidates]
+        age = now - np.fromiter((m.timestamp for m in candidates), dtype=np.float64, count=len(candidates))
+        features[:, 3] = np.exp2(-np.maximum(age, 0.0) / self.half_life_s)
+
+        scores = features @ self.weights
+        scores[features[:, 2] < min_importance] = -np.inf
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [candidates[i] for i in top if np.isfinite(scores[i])]
@@ -0,0 +1,168 @@
+"""
+Memory Store - per-user persistence for EVA profiles and core memories
+
+EvaMemorySystem used to rewrite profiles.json and core_memories.json with
+every user on each dirty flush, and parsed both files in full at startup:
+O(total users) per write and per boot. Here each user is one row:
+
+    profiles(user_id, data, updated_at)
+    core_memories(user_id, data, updated_at)
+
+- WAL journal with synchronous=NORMAL (readers never block the writer)
+- put_*() upserts only the users it is given, in one transaction
+- get_*() reads one user by primary key, so profiles load lazily on first
+  access instead of at boot (see LazyUserDict)
+- Legacy JSON files are imported once and renamed to *.migrated
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+MEMORY_STORE_DB = "memory_store.db"
+
+_TABLES = ("profiles", "core_memories")
+
+
+class UserMemoryStore:
+    """SQLite key-value store of per-user JSON documents."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table in _TABLES:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    user_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+        self._conn.commit()
+
+        self.stats = {"reads": 0, "rows_written": 0, "writes": 0, "migrated_users": 0, "write_errors": 0}
+
+    # ------------------------------------------------------------------ reads
+
+    def _get(self, table: str, user_id: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM {table} WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            self.stats["reads"] += 1
+        return json.loads(row[0]) if row else None
+
+    def get_profile(self, user_id: str) -> Optional[Dict]:
+        return self._get("profiles", user_id)
+
+    def get_core_memories(self, user_id: str) -> Optional[List[Dict]]:
+        return self._get("core_memories", user_id)
+
+    def user_ids(self) -> List[str]:
+        """Every user with a stored profile."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT user_id FROM profiles")]
+
+    def count(self, table: str = "profiles") -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # ----------------------------------------------------------------- writes
+
+    def _put(self, table: str, rows: Iterable[Tuple[str, Any]]) -> int:
+        now = time.time()
+        params = [(user_id, json.dumps(data), now) for user_id, data in rows]
+        if not params:
+            return 0
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} (user_id, data, updated_at) VALUES (?, ?, ?)",
+                        params
+                    )
+            except sqlite3.Error:
+                self.stats["write_errors"] += 1
+                raise
+            self.stats["writes"] += 1
+            self.stats["rows_written"] += len(params)
+        return len(params)
+
+    def put_profiles(self, rows: Iterable[Tuple[str, Dict]]) -> int:
+        """Upsert (user_id, profile dict) rows in one transaction."""
+        return self._put("profiles", rows)
+
+    def put_core_memories(self, rows: Iterable[Tuple[str, List[Dict]]]) -> int:
+        """Upsert (user_id, [memory dict]) rows in one transaction."""
+        return self._put("core_memories", rows)
+
+    # -------------------------------------------------------------- migration
+
+    def migrate_json(self, path: str, table: str) -> int:
+        """Import a legacy {user_id: data} JSON file once, then rename it."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            data = json.load(f)
+        migrated = self._put(table, data.items())
+        os.replace(path, path + ".migrated")
+        self.stats["migrated_users"] += migrated
+        return migrated
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "users": self.count("profiles")}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LazyUserDict(dict):
+    """Per-user cache that loads a user from the store on first access.
+
+    Only users touched since boot are resident, so memory and save cost
+    follow active users. Each missing user is looked up at most once;
+    default_factory (like defaultdict) creates values on [] for users the
+    store doesn't have.
+    """
+
+    def __init__(self, load: Callable[[str], Any], default_factory: Optional[Callable[[], Any]] = None):
+        super().__init__()
+        self._load = load
+        self.default_factory = default_factory
+        self._looked_up: Set[str] = set()
+
+    def _fetch(self, user_id: str) -> Any:
+        if user_id in self._looked_up:
+            return None
+        self._looked_up.add(user_id)
+        value = self._load(user_id)
+        if value is not None:
+            dict.__setitem__(self, user_id, value)
+        return value
+
+    def __missing__(self, user_id: str) -> Any:
+        value = self._fetch(user_id)
+        if value is None:
+            if self.default_factory is None:
+                raise KeyError(user_id)
+            value = self.default_factory()
+            dict.__setitem__(self, user_id, value)
+        return value
+
+    def __contains__(self, user_id: object) -> bool:
+        return dict.__contains__(self, user_id) or (
+            isinstance(user_id, str) and self._fetch(user_id) is not None
+        )
+
+    def get(self, user_id: str, default: Any = None) -> Any:
+        if dict.__contains__(self, user_id):
+            return dict.__getitem__(self, user_id)
+        value = self._fetch(user_id)
+        return default if value is None else value
@@ -240,7 +240,8 @@ async def ensure_warm() -> float:
 
 async def warmup_on_startup(
     ollama_url: str = OLLAMA_URL,
-    model: str = OLLAMA_MODEL
+    model: str = OLLAMA_MODEL,
+    http_client: Optional[httpx.AsyncClient] = None
 ) -> bool:
     """Synchronous warmup at server startup.
 
@@ -249,6 +250,8 @@ async def warmup_on_startup(
     Args:
         ollama_url: Ollama API URL
         model: Model name to warm up
+        http_client: Shared client to reuse (e.g. the provider_clients
+            Ollama pool); a private client is created if omitted
 
     Returns:
         True if warmup succeeded
@@ -260,7 +263,9 @@ async def warmup_on_startup(
 
     print(f"🔥 Warming up Ollama model '{model}' at startup...")
 
-    if _http_client is None:
+    if http_client is not None:
+        _http_client = http_client
+    elif _http_client is None:
         _http_client = httpx.AsyncClient(timeout=30.0)
 
     # Do a warmup burst to ensure model is fully GPU-active
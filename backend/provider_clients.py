@@ -0,0 +1,263 @@
+"""
+Provider Clients - one shared connection pool per LLM/service provider
+
+Every part of the backend used to open its own connections: main.py and
+services/llm_service.py each built an AsyncGroq and a Cerebras client,
+stream_ollama and ollama_keepalive had separate pools, and the lip-sync
+calls opened a fresh client per request. This module owns one
+httpx.AsyncClient per provider:
+
+- HTTP/2 multiplexing for the TLS providers (Groq, Cerebras) when h2 is
+  installed; plain HTTP/1.1 keepalive for local services (Ollama, lip-sync)
+- A "general" pool (50 connections, HTTP/2) for other outbound calls, so
+  they never queue behind the small Ollama pool
+- Per-provider connection limits and a keepalive expiry long enough that
+  pooled connections survive between conversation turns
+- warm(): opens connections with cheap metadata requests (GET /models,
+  GET /api/tags) instead of throwaway completions
+- A keep-warm loop that re-touches providers idle for PROVIDER_KEEPWARM_S,
+  so TLS/TCP setup never lands on a user's first token
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+PROVIDER_HTTP2 = os.getenv("PROVIDER_HTTP2", "true").lower() == "true"
+PROVIDER_KEEPWARM_S = float(os.getenv("PROVIDER_KEEPWARM_S", "20"))
+PROVIDER_KEEPALIVE_EXPIRY_S = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY_S", "120"))
+PROVIDER_TIMEOUT_S = float(os.getenv("PROVIDER_TIMEOUT_S", "30"))
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY", "")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
+LIPSYNC_SERVICE_URL = os.getenv("LIPSYNC_SERVICE_URL", "http://localhost:8001")
+
+
+@dataclass
+class ProviderSpec:
+    """Connection settings for one provider."""
+    name: str
+    base_url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    max_connections: int = 20
+    max_keepalive: int = 10
+    http2: bool = True
+    warm_path: Optional[str] = None  # Cheap non-inference request used to warm
+    timeout: float = PROVIDER_TIMEOUT_S
+
+
+def default_specs() -> List[ProviderSpec]:
+    """Providers configured from the environment."""
+    specs = [
+        # App-wide client for everything that isn't a provider pool (absolute URLs)
+        ProviderSpec("general", "", max_connections=50, max_keepalive=20),
+        # Local services: HTTP/1.1, the streams are long-lived and few
+        ProviderSpec("ollama", OLLAMA_URL, max_connections=8, max_keepalive=4,
+                     http2=False, warm_path="/api/tags"),
+        ProviderSpec("lipsync", LIPSYNC_SERVICE_URL, max_connections=4, max_keepalive=2,
+                     http2=False, timeout=60.0),
+    ]
+    # Groq is always registered (main.py's last-resort fallback); AsyncGroq
+    # sends absolute URLs, so base_url and headers only serve warm()
+    specs.append(ProviderSpec(
+        "groq", "https://api.groq.com/openai/v1",
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}"} if GROQ_API_KEY else {},
+        max_connections=10, max_keepalive=5,
+        warm_path="/models" if GROQ_API_KEY else None,
+    ))
+    if CEREBRAS_API_KEY:
+        specs.append(ProviderSpec(
+            "cerebras", "https://api.cerebras.ai/v1",
+            headers={"Authorization": f"Bearer {CEREBRAS_API_KEY}",
+                     "Content-Type": "application/json"},
+            max_connections=10, max_keepalive=5, warm_path="/models",
+        ))
+    return specs
+
+
+class ProviderClients:
+    """Lazily created, shared httpx clients keyed by provider name."""
+
+    def __init__(
+        self,
+        specs: Optional[List[ProviderSpec]] = None,
+        keepwarm_s: float = PROVIDER_KEEPWARM_S,
+        keepalive_expiry_s: float = PROVIDER_KEEPALIVE_EXPIRY_S,
+        http2: bool = PROVIDER_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.specs: Dict[str, ProviderSpec] = {}
+        for spec in (specs if specs is not None else default_specs()):
+            self.register(spec)
+        self.keepwarm_s = keepwarm_s
+        self.keepalive_expiry_s = keepalive_expiry_s
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._transport = transport  # Overrides the network (tests)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._groq = None
+        self._last_activity: Dict[str, float] = {}
+        self._keepwarm_task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, spec: ProviderSpec) -> None:
+        """Add or replace a provider (takes effect for clients created later)."""
+        self.specs[spec.name] = spec
+
+    def has(self, name: str) -> bool:
+        return name in self.specs
+
+    def _provider_stats(self, name: str) -> Dict[str, Any]:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = {
+                "requests": 0,
+                "warmups": 0,
+                "warm_failures": 0,
+                "last_warm_ms": None,
+            }
+        return stats
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get the shared client for a provider, creating it on first use.
+
+        Raises:
+            KeyError: If the provider is not registered
+        """
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+
+        spec = self.specs[name]
+
+        async def on_request(request: httpx.Request) -> None:
+            self._last_activity[name] = time.time()
+            self._provider_stats(name)["requests"] += 1
+
+        client = httpx.AsyncClient(
+            base_url=spec.base_url,
+            headers=spec.headers,
+            timeout=spec.timeout,
+            limits=httpx.Limits(
+                max_connections=spec.max_connections,
+                max_keepalive_connections=spec.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry_s,
+            ),
+            http2=spec.http2 and self.http2,
+            event_hooks={"request": [on_request]},
+            transport=self._transport,
+        )
+        self._clients[name] = client
+        self._provider_stats(name)
+        return client
+
+    def groq(self):
+        """Shared AsyncGroq bound to the groq connection pool."""
+        if self._groq is None and self.has("groq"):
+            from groq import AsyncGroq
+            self._groq = AsyncGroq(api_key=GROQ_API_KEY, http_client=self.get("groq"))
+        return self._groq
+
+    async def warm(self, names: Optional[List[str]] = None) -> Dict[str, Optional[float]]:
+        """Open (or refresh) provider connections without inference.
+
+        Any HTTP response counts: even a 401 leaves a live, reusable
+        connection in the pool.
+
+        Returns:
+            {provider: latency_ms, or None if the request failed}
+        """
+        if names is None:
+            names = [n for n, spec in self.specs.items() if spec.warm_path]
+        names = [n for n in names if n in self.specs and self.specs[n].warm_path]
+        latencies = await asyncio.gather(*(self._warm_one(n) for n in names))
+        return dict(zip(names, latencies))
+
+    async def _warm_one(self, name: str) -> Optional[float]:
+        stats = self._provider_stats(name)
+        start = time.time()
+        try:
+            await self.get(name).get(self.specs[name].warm_path, timeout=5.0)
+        except Exception as e:
+            stats["warm_failures"] += 1
+            print(f"⚠️ Provider warm-up failed ({name}): {e}")
+            return None
+        latency = (time.time() - start) * 1000
+        stats["warmups"] += 1
+        stats["last_warm_ms"] = round(latency, 1)
+        return latency
+
+    def idle_providers(self, now: Optional[float] = None) -> List[str]:
+        """Created providers with no request in the last keepwarm_s."""
+        now = now if now is not None else time.time()
+        return [
+            name for name in self._clients
+            if self.specs[name].warm_path
+            and now - self._last_activity.get(name, 0) >= self.keepwarm_s
+        ]
+
+    async def _keepwarm_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.keepwarm_s / 2)
+                idle = self.idle_providers()
+                if idle:
+                    await self.warm(idle)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"⚠️ Provider keep-warm error: {e}")
+
+    def start_keepwarm(self) -> Optional[asyncio.Task]:
+        """Start the background keep-warm loop (no-op if running or disabled)."""
+        if self.keepwarm_s <= 0:
+            return None
+        if self._keepwarm_task is None or self._keepwarm_task.done():
+            self._keepwarm_task = asyncio.create_task(self._keepwarm_loop())
+            print(f"🔄 Provider keep-warm started ({self.keepwarm_s:.0f}s idle threshold)")
+        return self._keepwarm_task
+
+    async def aclose(self) -> None:
+        """Stop keep-warm and close every pool."""
+        if self._keepwarm_task is not None:
+            self._keepwarm_task.cancel()
+            await asyncio.gather(self._keepwarm_task, return_exceptions=True)
+            self._keepwarm_task = None
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._groq = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-provider request/warm-up counters and pool settings."""
+        now = time.time()
+        providers = {}
+        for name, spec in self.specs.items():
+            last = self._last_activity.get(name)
+            providers[name] = {
+                **self._provider_stats(name),
+                "connected": name in self._clients,
+                "http2": spec.http2 and self.http2,
+                "max_connections": spec.max_connections,
+                "idle_s": round(now - last, 1) if last else None,
+            }
+        return {
+            "http2_available": HTTP2_AVAILABLE,
+            "keepwarm_s": self.keepwarm_s,
+            "keepwarm_running": self._keepwarm_task is not None and not self._keepwarm_task.done(),
+            "providers": providers,
+        }
+
+
+# Global pool shared by main.py, services/llm_service.py and ollama_keepalive
+provider_clients = ProviderClients()
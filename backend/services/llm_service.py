@@ -15,6 +15,7 @@ from typing import AsyncGenerator, Optional
 import httpx
 from groq import AsyncGroq
 
+from provider_clients import provider_clients
 from services.database import load_conversation, save_conversation, log_usage
 from utils.cache import response_cache
 from utils.text_processing import humanize_response
@@ -86,36 +87,31 @@ conversations: dict[str, list] = {}
 
 
 def init_groq_client() -> Optional[AsyncGroq]:
-    """Initialize Groq client."""
+    """Initialize Groq client (shared provider_clients pool)."""
     global groq_client
     if GROQ_API_KEY:
-        groq_client = AsyncGroq(api_key=GROQ_API_KEY)
+        groq_client = provider_clients.groq()
         print("✅ Groq client initialized")
     return groq_client
 
 
 async def init_cerebras_client() -> Optional[httpx.AsyncClient]:
-    """Initialize Cerebras client."""
+    """Initialize Cerebras client (shared provider_clients pool)."""
     global cerebras_client
-    if CEREBRAS_API_KEY:
-        cerebras_client = httpx.AsyncClient(
-            base_url="https://api.cerebras.ai/v1",
-            headers={
-                "Authorization": f"Bearer {CEREBRAS_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            timeout=30.0,
-        )
+    if CEREBRAS_API_KEY and provider_clients.has("cerebras"):
+        cerebras_client = provider_clients.get("cerebras")
         print("✅ Cerebras client initialized")
     return cerebras_client
 
 
 async def close_clients() -> None:
-    """Close all LLM clients."""
+    """Release LLM clients.
+
+    The pools belong to provider_clients and are shared with main.py, so
+    they are closed by provider_clients.aclose(), not here.
+    """
     global groq_client, cerebras_client
-    if cerebras_client:
-        await cerebras_client.aclose()
-        cerebras_client = None
+    cerebras_client = None
     groq_client = None
 
 
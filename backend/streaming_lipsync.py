@@ -22,7 +22,8 @@ import numpy as np
 import base64
 import json
 import pickle
-from typing import Optional, List, Tuple
+import uuid
+from typing import AsyncIterator, Optional, List, Tuple
 from dataclasses import dataclass, field
 
 # FastAPI
@@ -36,6 +37,11 @@ import uvicorn
 import librosa
 from transformers import WhisperModel, AutoFeatureExtractor
 
+from audio_ring import AudioRingBuffer
+from frame_compositor import FRAME_JPEG_QUALITY, FrameCompositor, OUTPUT_MODES, resolve_mode
+from lipsync_cache import LipSyncCache, content_digest, window_key
+from lipsync_scheduler import LIPSYNC_MAX_BATCH_FRAMES, LipSyncScheduler
+
 # MuseTalk
 sys.path.insert(0, "/workspace/MuseTalk")
 from musetalk.utils.utils import load_all_model  # noqa: E402
@@ -47,6 +53,10 @@ from musetalk.utils.utils import load_all_model  # noqa: E402
 
 AVATAR_DIR = "/workspace/MuseTalk/results/avatars"
 WHISPER_PATH = "/workspace/MuseTalk/models/whisper"
+UNET_MODEL_PATH = "/workspace/MuseTalk/models/musetalk/pytorch_model.bin"
+UNET_CONFIG_PATH = "/workspace/MuseTalk/models/musetalk/musetalk.json"
+VAE_TYPE = "sd-vae"
+VAE_PATH = f"/workspace/MuseTalk/models/{VAE_TYPE}"
 
 # Audio config
 SAMPLE_RATE = 16000
@@ -58,11 +68,23 @@ BATCH_SIZE = 8  # Sweet spot on RTX 4090: 123ms for 8 frames
 CHUNK_DURATION_MS = int(BATCH_SIZE * 1000 / FPS)  # 320ms
 CHUNK_SAMPLES = int(SAMPLE_RATE * CHUNK_DURATION_MS / 1000)  # 5120 samples
 
+# Cross-session batching: windows from all sessions share UNet + VAE passes,
+# up to LIPSYNC_MAX_BATCH_FRAMES or what fits in this fraction of free VRAM
+LIPSYNC_VRAM_FRACTION = float(os.getenv("LIPSYNC_VRAM_FRACTION", "0.8"))
+
 # Feature extraction
 AUDIO_PADDING_LEFT = 2
 AUDIO_PADDING_RIGHT = 2
 AUDIO_FEATURE_LENGTH = 2 * (AUDIO_PADDING_LEFT + AUDIO_PADDING_RIGHT + 1)  # 10
 
+# Audio ring buffer: fixed per-session capacity, with real audio as Whisper left context
+SAMPLES_PER_FEATURE = SAMPLE_RATE // AUDIO_FPS  # 320
+AUDIO_CONTEXT_SAMPLES = int(AUDIO_FPS / FPS * AUDIO_PADDING_LEFT) * SAMPLES_PER_FEATURE  # 1280 (80ms)
+AUDIO_BUFFER_SAMPLES = max(
+    int(SAMPLE_RATE * int(os.getenv("LIPSYNC_AUDIO_BUFFER_MS", "4000")) / 1000),
+    CHUNK_SAMPLES + AUDIO_CONTEXT_SAMPLES
+)
+
 print(f"""
 ╔══════════════════════════════════════════════════════════╗
 ║         STREAMING LIP-SYNC SERVICE v2                    ║
@@ -82,7 +104,15 @@ print(f"""
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan handler for startup/shutdown"""
-    load_models()
+    global scheduler, lipsync_cache
+
+    max_batch_frames = load_models()
+    try:
+        lipsync_cache = LipSyncCache()
+    except OSError as e:
+        print(f"Warning: Lip-sync cache disabled: {e}")
+    scheduler = LipSyncScheduler(render_windows, max_batch_frames=max_batch_frames)
+    scheduler.start()
     # Pre-load Eva
     try:
         load_avatar("eva")
@@ -90,6 +120,7 @@ async def lifespan(app: FastAPI):
         print(f"Warning: Could not pre-load Eva: {e}")
     yield
     print("Streaming Lip-Sync service shutting down...")
+    scheduler.stop()
 
 
 app = FastAPI(title="Streaming Lip-Sync v2", lifespan=lifespan)
@@ -109,6 +140,37 @@ feature_extractor = None
 device = None
 timesteps = None
 
+# Cross-session UNet + VAE batching (started in lifespan)
+scheduler: Optional[LipSyncScheduler] = None
+
+# Content-hashed window features / frames for repeated utterances (opened in lifespan)
+lipsync_cache: Optional[LipSyncCache] = None
+# Cached entries are only valid for this feature pipeline
+CACHE_VERSION = f"{WHISPER_PATH}|{SAMPLE_RATE}|{FPS}|{BATCH_SIZE}|{AUDIO_FEATURE_LENGTH}"
+
+
+def _weights_identity(path: str) -> str:
+    """Size + mtime of a weights file (or every file under a weights directory)"""
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    parts = []
+    for p in paths:
+        try:
+            stat = os.stat(p)
+            parts.append(f"{p}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(p)
+    return "|".join(parts)
+
+
+# Cached frames are only valid for these weights and this JPEG quality
+# (each avatar folds its own content in, see load_avatar)
+RENDER_VERSION = content_digest(
+    _weights_identity(UNET_MODEL_PATH), _weights_identity(UNET_CONFIG_PATH),
+    _weights_identity(VAE_PATH), FRAME_JPEG_QUALITY,
+)
+
 # Avatar cache
 avatars = {}
 
@@ -122,14 +184,16 @@ class AvatarData:
     latent: torch.Tensor = None  # [1, 8, 32, 32]
     mask: np.ndarray = None
     mask_coords: List = field(default_factory=list)
+    compositor: FrameCompositor = None  # background + face box, shared by sessions
+    render_digest: str = ""  # latent + frame + face box + RENDER_VERSION, keys cached frames
 
 
 # ============================================================================
 # MODEL LOADING
 # ============================================================================
 
-def load_models():
-    """Load all models into GPU memory"""
+def load_models() -> int:
+    """Load all models into GPU memory; returns the max frames per UNet + VAE batch"""
     global vae, unet, pe, whisper, feature_extractor, device, timesteps
 
     print("🚀 Loading models...")
@@ -137,9 +201,9 @@ def load_models():
 
     # MuseTalk
     vae, unet, pe = load_all_model(
-        unet_model_path="/workspace/MuseTalk/models/musetalk/pytorch_model.bin",
-        vae_type="sd-vae",
-        unet_config="/workspace/MuseTalk/models/musetalk/musetalk.json",
+        unet_model_path=UNET_MODEL_PATH,
+        vae_type=VAE_TYPE,
+        unet_config=UNET_CONFIG_PATH,
         device=device
     )
 
@@ -157,8 +221,10 @@ def load_models():
     whisper = whisper.to(device=device, dtype=torch.float16).eval()
     whisper.requires_grad_(False)
 
-    # Warmup
+    # Warmup (also measures activation memory per frame)
     print("🔥 Warming up...")
+    torch.cuda.reset_peak_memory_stats(device)
+    base_memory = torch.cuda.memory_allocated(device)
     dummy_latent = torch.randn(BATCH_SIZE, 8, 32, 32).to(device).half()
     dummy_audio = torch.randn(BATCH_SIZE, 50, 384).to(device).half()
     for _ in range(3):
@@ -166,7 +232,41 @@ def load_models():
             pred = unet.model(dummy_latent, timesteps, encoder_hidden_states=dummy_audio).sample
             _ = vae.decode_latents(pred)
 
-    print("✅ Models loaded!")
+    # VRAM-aware batch cap: free memory / activation memory per frame
+    per_frame = max(1, (torch.cuda.max_memory_allocated(device) - base_memory) // BATCH_SIZE)
+    free_memory, _ = torch.cuda.mem_get_info(device)
+    fits = int(free_memory * LIPSYNC_VRAM_FRACTION / per_frame)
+    max_batch_frames = max(BATCH_SIZE, min(LIPSYNC_MAX_BATCH_FRAMES, fits))
+
+    print(f"✅ Models loaded! (max batch: {max_batch_frames} frames, {per_frame / 2**20:.0f}MB/frame)")
+    return max_batch_frames
+
+
+@torch.no_grad()
+def render_windows(windows: List[Tuple[torch.Tensor, torch.Tensor]]) -> List[np.ndarray]:
+    """
+    One UNet + VAE pass over frame windows from any number of sessions
+    windows: (avatar latent [1, 8, 32, 32], audio embedding [N, 50, 384]) per session
+    Returns: decoded faces [N, H, W, C] per window
+    """
+    sizes = [embedding.shape[0] for _, embedding in windows]
+
+    # Each session's own avatar latent, broadcast over its frames
+    latent_batch = torch.cat([
+        latent.to(device=device, dtype=unet.model.dtype).expand(n, -1, -1, -1)
+        for (latent, _), n in zip(windows, sizes)
+    ])
+    audio_embedding = torch.cat([embedding for _, embedding in windows])
+
+    pred_latents = unet.model(
+        latent_batch,
+        timesteps,
+        encoder_hidden_states=audio_embedding
+    ).sample
+
+    pred_latents = pred_latents.to(device=device, dtype=vae.vae.dtype)
+    recon_batch = vae.decode_latents(pred_latents)  # [B, H, W, C]
+    return np.split(recon_batch, np.cumsum(sizes)[:-1])
 
 
 def load_avatar(avatar_id: str) -> AvatarData:
@@ -195,6 +295,11 @@ def load_avatar(avatar_id: str) -> AvatarData:
         avatar.coord = pickle.load(f)[0]
 
     avatar.frame = cv2.imread(frame_path)
+    avatar.compositor = FrameCompositor(avatar.frame, avatar.coord)
+    # Re-preprocessing an avatar under the same id must not replay its old frames
+    avatar.render_digest = content_digest(
+        avatar.latent.detach().float().cpu().numpy(), avatar.frame, tuple(avatar.coord), RENDER_VERSION
+    )
 
     if os.path.exists(mask_path):
         avatar.mask = cv2.imread(mask_path)
@@ -217,22 +322,38 @@ class StreamingProcessor:
     Real-time batch processing lip-sync
 
     Strategy:
-    1. Buffer audio until we have BATCH_SIZE frames worth (320ms)
-    2. Extract Whisper features for entire buffer
-    3. Process BATCH_SIZE frames in one GPU call (~123ms)
+    1. Buffer audio (fixed-size ring) until we have BATCH_SIZE frames worth (320ms)
+    2. Extract Whisper features for the chunk plus 80ms of preceding audio
+    3. Submit the BATCH_SIZE frame window to the scheduler, which renders it
+       in one UNet + VAE pass together with other sessions' windows
     4. Return frames immediately
     """
 
-    def __init__(self, avatar_id: str = "eva"):
+    def __init__(self, avatar_id: str = "eva", output_mode: str = "frame", session_id: Optional[str] = None):
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {output_mode}")
         self.avatar = load_avatar(avatar_id)
-        self.audio_buffer = np.array([], dtype=np.float32)
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.output_mode = output_mode  # "frame": full JPEG, "patch": face box only
+        self.audio_buffer = AudioRingBuffer(AUDIO_BUFFER_SAMPLES, history=AUDIO_CONTEXT_SAMPLES)
         self.frame_index = 0
         self.total_process_time = 0
         self.total_frames = 0
+        self.cached_frames = 0  # served from the lip-sync cache
+
+    def add_audio(self, audio: np.ndarray) -> int:
+        """Add audio samples to buffer (float32, 16kHz); returns how many fit"""
+        return self.audio_buffer.write(audio)
 
-    def add_audio(self, audio: np.ndarray):
-        """Add audio samples to buffer (float32, 16kHz)"""
-        self.audio_buffer = np.concatenate([self.audio_buffer, audio.astype(np.float32)])
+    async def feed(self, audio: np.ndarray) -> AsyncIterator[List[Tuple[bytes, int]]]:
+        """Add any amount of audio, yielding each batch as soon as it's ready"""
+        offset = 0
+        while True:
+            offset += self.add_audio(audio[offset:])
+            while self.can_process():
+                yield await self.process_batch()
+            if offset >= len(audio):
+                return
 
     def can_process(self) -> bool:
         """Check if we have enough audio for one batch"""
@@ -243,21 +364,13 @@ class StreamingProcessor:
         return int(len(self.audio_buffer) / SAMPLE_RATE * 1000)
 
     @torch.no_grad()
-    def process_batch(self) -> List[Tuple[bytes, int]]:
+    def prepare_window(self, chunk_audio: np.ndarray, context: int) -> torch.Tensor:
         """
-        Process one batch of frames
-        Returns: List of (jpeg_bytes, frame_index) tuples
+        Whisper features + PE for one BATCH_SIZE frame window
+        chunk_audio: `context` samples of left context followed by the chunk
+        Returns: audio embedding [BATCH_SIZE, 50, 384]
         """
-        global vae, unet, pe, whisper, feature_extractor, device, timesteps
-
-        if not self.can_process():
-            return []
-
-        # Extract chunk from buffer
-        chunk_audio = self.audio_buffer[:CHUNK_SAMPLES].copy()
-        self.audio_buffer = self.audio_buffer[CHUNK_SAMPLES:]
-
-        start_time = time.time()
+        global pe, whisper, feature_extractor, device
 
         # ============ 1. WHISPER FEATURES ============
         # Extract mel spectrogram
@@ -275,8 +388,8 @@ class StreamingProcessor:
         # Calculate frame positions in whisper features
         whisper_idx_mult = AUDIO_FPS / FPS  # 2.0
 
-        # Pad whisper features
-        pad_left = int(whisper_idx_mult * AUDIO_PADDING_LEFT)
+        # Pad whisper features (left context frames replace zero padding)
+        pad_left = int(whisper_idx_mult * AUDIO_PADDING_LEFT) - context // SAMPLES_PER_FEATURE
         pad_right = int(whisper_idx_mult * AUDIO_PADDING_RIGHT * 3)
         whisper_padded = torch.cat([
             torch.zeros(1, pad_left, *whisper_feat.shape[2:], device=device, dtype=torch.float16),
@@ -304,41 +417,61 @@ class StreamingProcessor:
         audio_batch = torch.cat(audio_prompts, dim=0)
 
         # ============ 3. PE (Positional Encoding) ============
-        audio_embedding = pe(audio_batch)
+        return pe(audio_batch)
+
+    async def process_batch(self) -> List[Tuple[bytes, int]]:
+        """
+        Process one batch of frames
+        Returns: List of (jpeg_bytes, frame_index) tuples
+        """
+        if not self.can_process():
+            return []
 
-        # ============ 4. UNET (Batch) ============
-        # Repeat latent for batch
-        latent_batch = self.avatar.latent.repeat(BATCH_SIZE, 1, 1, 1).to(device=device, dtype=unet.model.dtype)
+        start_time = time.time()
 
-        pred_latents = unet.model(
-            latent_batch,
-            timesteps,
-            encoder_hidden_states=audio_embedding
-        ).sample
+        # Chunk + already-consumed left context, as a view into the ring (no copy)
+        chunk_audio, context = self.audio_buffer.window(CHUNK_SAMPLES, AUDIO_CONTEXT_SAMPLES)
+        key = window_key(chunk_audio, context, CACHE_VERSION) if lipsync_cache is not None else None
 
-        # ============ 5. VAE DECODE ============
-        pred_latents = pred_latents.to(device=device, dtype=vae.vae.dtype)
-        recon_batch = vae.decode_latents(pred_latents)  # [B, H, W, C]
+        # ============ 0. CACHE: same audio already rendered for this avatar ============
+        jpegs = None
+        if key is not None:
+            jpegs = await asyncio.to_thread(
+                lipsync_cache.get_frames, key, self.avatar.avatar_id, self.output_mode, self.avatar.render_digest
+            )
+
+        if jpegs is None:
+            # ============ 1-3. WHISPER + PE (cached per window, off the event loop) ============
+            cached = await asyncio.to_thread(lipsync_cache.get_features, key) if key is not None else None
+            if cached is not None:
+                audio_embedding = torch.from_numpy(cached).to(device=device)
+            else:
+                audio_embedding = await asyncio.to_thread(self.prepare_window, chunk_audio, context)
+        self.audio_buffer.consume(CHUNK_SAMPLES)
+
+        if jpegs is None:
+            # ============ 4-5. UNET + VAE (batched across sessions) ============
+            window = (self.avatar.latent, audio_embedding)
+            if scheduler is not None:
+                recon_batch = await scheduler.render(self.session_id, window, BATCH_SIZE)
+            else:
+                recon_batch = (await asyncio.to_thread(render_windows, [window]))[0]
+
+            # ============ 6. BLEND & ENCODE (face box only, parallel) ============
+            jpegs = await asyncio.to_thread(self.avatar.compositor.encode, list(recon_batch), self.output_mode)
+
+            if key is not None:
+                features = audio_embedding.cpu().numpy() if cached is None else None
+                # Written in the background: frames go out without waiting on disk
+                asyncio.get_running_loop().run_in_executor(None, self._store_window, key, features, jpegs)
+        else:
+            self.cached_frames += len(jpegs)
 
         process_time = (time.time() - start_time) * 1000
 
-        # ============ 6. BLEND & ENCODE ============
         results = []
-        x1, y1, x2, y2 = self.avatar.coord
-
-        for i, recon_frame in enumerate(recon_batch):
-            # Blend onto source
-            output = self.avatar.frame.copy()
-            face_resized = cv2.resize(
-                recon_frame.astype(np.uint8),
-                (x2 - x1, y2 - y1),
-                interpolation=cv2.INTER_LINEAR
-            )
-            output[y1:y2, x1:x2] = face_resized
-
-            # Encode JPEG
-            _, jpeg = cv2.imencode('.jpg', output, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            results.append((jpeg.tobytes(), self.frame_index))
+        for jpeg in jpegs:
+            results.append((jpeg, self.frame_index))
             self.frame_index += 1
 
         self.total_process_time += process_time
@@ -349,13 +482,19 @@ class StreamingProcessor:
 
         return results
 
-    def flush(self) -> List[Tuple[bytes, int]]:
+    def _store_window(self, key: str, features: Optional[np.ndarray], jpegs: List[bytes]):
+        """Write a rendered window to the lip-sync cache"""
+        if features is not None:
+            lipsync_cache.put_features(key, features)
+        lipsync_cache.put_frames(key, self.avatar.avatar_id, self.output_mode, jpegs, self.avatar.render_digest)
+
+    async def flush(self) -> List[Tuple[bytes, int]]:
         """Process any remaining audio (may be less than full batch)"""
         results = []
 
         # Process full batches
         while self.can_process():
-            results.extend(self.process_batch())
+            results.extend(await self.process_batch())
 
         # Handle remaining (< BATCH_SIZE frames)
         if len(self.audio_buffer) > 0:
@@ -364,27 +503,30 @@ class StreamingProcessor:
             remaining_frames = int(remaining_samples / SAMPLE_RATE * FPS)
 
             if remaining_frames > 0:
-                # Pad audio to full chunk
-                pad_needed = CHUNK_SAMPLES - len(self.audio_buffer)
-                self.audio_buffer = np.concatenate([
-                    self.audio_buffer,
-                    np.zeros(pad_needed, dtype=np.float32)
-                ])
-
-                batch_results = self.process_batch()
+                # Pad audio to full chunk, in place in the ring
+                self.audio_buffer.pad(CHUNK_SAMPLES - remaining_samples)
+
+                batch_results = await self.process_batch()
                 # Only return the frames we actually have audio for
                 results.extend(batch_results[:remaining_frames])
+            else:
+                # Less than one frame of audio: drop it
+                self.audio_buffer.clear()
 
         return results
 
     def get_stats(self) -> dict:
-        """Get processing statistics"""
-        return {
+        """Get processing statistics (scheduler: this session's fps and queue wait)"""
+        stats = {
             "total_frames": self.total_frames,
             "total_time_ms": self.total_process_time,
             "avg_per_frame_ms": self.total_process_time / max(1, self.total_frames),
-            "effective_fps": 1000 * self.total_frames / max(1, self.total_process_time)
+            "effective_fps": 1000 * self.total_frames / max(1, self.total_process_time),
+            "cached_frames": self.cached_frames
         }
+        if scheduler is not None:
+            stats["scheduler"] = scheduler.session_stats(self.session_id)
+        return stats
 
 
 # ============================================================================
@@ -399,10 +541,23 @@ async def health():
         "batch_size": BATCH_SIZE,
         "chunk_ms": CHUNK_DURATION_MS,
         "target_fps": FPS,
+        "max_batch_frames": scheduler.max_batch_frames if scheduler else BATCH_SIZE,
         "avatars": list(avatars.keys())
     }
 
 
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Cross-session batching: occupancy, queue wait, per-session fps"""
+    return scheduler.get_stats() if scheduler else {}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Lip-sync window cache: hits, entries, disk use"""
+    return lipsync_cache.get_stats() if lipsync_cache else {}
+
+
 @app.get("/avatars")
 async def list_avatars():
     """List available avatars"""
@@ -419,13 +574,15 @@ async def websocket_lipsync(ws: WebSocket):
     WebSocket streaming lip-sync
 
     Input (JSON):
-    - {"type": "config", "avatar": "eva"}
+    - {"type": "config", "avatar": "eva", "output": "frame" | "patch"}
     - {"type": "audio", "data": "<base64 float32 array>"}
     - {"type": "audio_wav", "data": "<base64 wav file>"}
     - {"type": "end"}
     - {"type": "ping"}
 
     Output (JSON):
+    - {"type": "config_ok", "avatar": "eva", "output": "patch", "background": "<base64 jpeg>", "box": {...}}
+      (patch output only: draw background once, then paste each frame's jpeg at box)
     - {"type": "frame", "data": "<base64 jpeg>", "index": N, "batch_ms": T}
     - {"type": "done", "stats": {...}}
     - {"type": "pong"}
@@ -436,6 +593,8 @@ async def websocket_lipsync(ws: WebSocket):
 
     processor = None
     avatar_id = "eva"
+    output_mode = "frame"
+    session_id = uuid.uuid4().hex[:12]  # scheduler stats key, kept across "end" resets
 
     try:
         while True:
@@ -447,23 +606,29 @@ async def websocket_lipsync(ws: WebSocket):
 
                 if msg_type == "config":
                     avatar_id = data.get("avatar", "eva")
-                    processor = StreamingProcessor(avatar_id)
-                    await ws.send_json({"type": "config_ok", "avatar": avatar_id})
+                    output_mode, error = resolve_mode(data.get("output", "frame"))
+                    if error:
+                        await ws.send_json({"type": "error", "message": error})
+                    processor = StreamingProcessor(avatar_id, output_mode, session_id)
+                    reply = {"type": "config_ok", "avatar": avatar_id, "output": output_mode}
+                    if output_mode == "patch":
+                        compositor = processor.avatar.compositor
+                        reply["background"] = base64.b64encode(compositor.background_jpeg()).decode()
+                        reply["box"] = compositor.patch_box()
+                    await ws.send_json(reply)
 
                 elif msg_type == "audio":
                     if processor is None:
-                        processor = StreamingProcessor(avatar_id)
+                        processor = StreamingProcessor(avatar_id, output_mode, session_id)
 
                     # Decode base64 float32 audio
                     audio_b64 = data.get("data", "")
                     if audio_b64:
                         audio_bytes = base64.b64decode(audio_b64)
                         audio = np.frombuffer(audio_bytes, dtype=np.float32)
-                        processor.add_audio(audio)
 
-                        # Process if we have enough
-                        while processor.can_process():
-                            frames = processor.process_batch()
+                        # Process each batch as soon as we have enough
+                        async for frames in processor.feed(audio):
                             for jpeg_bytes, idx in frames:
                                 await ws.send_json({
                                     "type": "frame",
@@ -473,18 +638,16 @@ async def websocket_lipsync(ws: WebSocket):
 
                 elif msg_type == "audio_wav":
                     if processor is None:
-                        processor = StreamingProcessor(avatar_id)
+                        processor = StreamingProcessor(avatar_id, output_mode, session_id)
 
                     # Decode WAV file
                     wav_b64 = data.get("data", "")
                     if wav_b64:
                         wav_bytes = base64.b64decode(wav_b64)
                         audio, _ = librosa.load(io.BytesIO(wav_bytes), sr=SAMPLE_RATE)
-                        processor.add_audio(audio)
 
                         # Process all
-                        while processor.can_process():
-                            frames = processor.process_batch()
+                        async for frames in processor.feed(audio):
                             for jpeg_bytes, idx in frames:
                                 await ws.send_json({
                                     "type": "frame",
@@ -495,7 +658,7 @@ async def websocket_lipsync(ws: WebSocket):
                 elif msg_type == "end":
                     if processor:
                         # Flush remaining
-                        frames = processor.flush()
+                        frames = await processor.flush()
                         for jpeg_bytes, idx in frames:
                             await ws.send_json({
                                 "type": "frame",
@@ -507,7 +670,7 @@ async def websocket_lipsync(ws: WebSocket):
                             "type": "done",
                             "stats": processor.get_stats()
                         })
-                        processor = StreamingProcessor(avatar_id)  # Reset
+                        processor = StreamingProcessor(avatar_id, output_mode, session_id)  # Reset
 
                 elif msg_type == "ping":
                     await ws.send_json({"type": "pong"})
@@ -515,13 +678,11 @@ async def websocket_lipsync(ws: WebSocket):
             elif "bytes" in msg:
                 # Raw bytes: assume float32 audio
                 if processor is None:
-                    processor = StreamingProcessor(avatar_id)
+                    processor = StreamingProcessor(avatar_id, output_mode, session_id)
 
                 audio = np.frombuffer(msg["bytes"], dtype=np.float32)
-                processor.add_audio(audio)
 
-                while processor.can_process():
-                    frames = processor.process_batch()
+                async for frames in processor.feed(audio):
                     for jpeg_bytes, idx in frames:
                         await ws.send_bytes(jpeg_bytes)
 
@@ -535,6 +696,9 @@ async def websocket_lipsync(ws: WebSocket):
             await ws.send_json({"type": "error", "message": str(e)})
         except (RuntimeError, ConnectionError):
             pass
+    finally:
+        if scheduler is not None:
+            scheduler.close_session(session_id)
 
 
 @app.post("/lipsync/test")
@@ -544,13 +708,11 @@ async def test_lipsync(avatar: str = "eva"):
 
     # Generate 1 second of test audio (16000 samples)
     test_audio = np.random.randn(16000).astype(np.float32) * 0.1
-    processor.add_audio(test_audio)
 
     frames = []
-    while processor.can_process():
-        batch = processor.process_batch()
+    async for batch in processor.feed(test_audio):
         frames.extend(batch)
-    frames.extend(processor.flush())
+    frames.extend(await processor.flush())
 
     return {
         "frames_generated": len(frames),
@@ -627,19 +789,8 @@ class IdleAnimator:
         pred_latent = pred_latent.to(device=device, dtype=vae.vae.dtype)
         recon = vae.decode_latents(pred_latent)
 
-        # Blend
-        x1, y1, x2, y2 = self.avatar.coord
-        output = self.avatar.frame.copy()
-        face_resized = cv2.resize(
-            recon[0].astype(np.uint8),
-            (x2 - x1, y2 - y1),
-            interpolation=cv2.INTER_LINEAR
-        )
-        output[y1:y2, x1:x2] = face_resized
-
-        # Encode
-        _, jpeg = cv2.imencode('.jpg', output, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        return jpeg.tobytes()
+        # Blend face box into the background and encode
+        return self.avatar.compositor.render(recon[0])
 
 
 # Global idle animator
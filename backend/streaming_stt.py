@@ -0,0 +1,381 @@
+"""
+Streaming STT - incremental, VAD-gated transcription of raw PCM frames
+
+The blob path (transcribe_audio) waits for the whole WAV upload and then
+decodes it in one pass, so STT latency grows with the utterance and the LLM
+cannot start before the user has finished. A StreamingTranscriber instead
+consumes mono int16 PCM as it arrives:
+
+1. Energy VAD on 20ms frames (adaptive noise floor, 200ms pre-roll)
+2. While the user speaks, the current segment is re-decoded every
+   STT_STREAM_PARTIAL_MS of new audio -> "partial" transcripts; words two
+   consecutive hypotheses agree on are reported as "stable"
+3. Sliding window: once a segment reaches STT_STREAM_WINDOW_S (or half of it
+   at a short pause) its text is committed and decoding restarts from there,
+   so each pass decodes a bounded window whatever the utterance length
+4. STT_STREAM_ENDPOINT_MS of trailing silence ends the utterance -> "final".
+   If nothing was voiced since the last partial, that hypothesis is reused
+   and the final costs no extra decode
+5. When a partial is fully stable and the user has already been silent for
+   STT_STREAM_SPECULATE_MS, it is flagged `speculate`: callers can start the
+   LLM on it (SpeculativeStream) and adopt the result if the final matches
+
+The decoder is injected (async (audio_float32_16k, prompt) -> text), so the
+same session works with Whisper in-process or behind a batching worker.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional
+
+import numpy as np
+
+STT_SAMPLE_RATE = 16000  # Whisper input rate
+
+STT_STREAM_VAD_THRESHOLD = float(os.getenv("STT_STREAM_VAD_THRESHOLD", "0.012"))
+STT_STREAM_PARTIAL_MS = int(os.getenv("STT_STREAM_PARTIAL_MS", "300"))
+STT_STREAM_ENDPOINT_MS = int(os.getenv("STT_STREAM_ENDPOINT_MS", "600"))
+STT_STREAM_SPECULATE_MS = int(os.getenv("STT_STREAM_SPECULATE_MS", "250"))
+STT_STREAM_WINDOW_S = float(os.getenv("STT_STREAM_WINDOW_S", "10"))
+STT_STREAM_MAX_UTTERANCE_S = float(os.getenv("STT_STREAM_MAX_UTTERANCE_S", "30"))
+
+VAD_FRAME_MS = 20
+PREROLL_MS = 200
+MIN_SPEECH_MS = 120   # Shorter voiced bursts are treated as noise
+PAUSE_COMMIT_MS = 200  # Short pause where a long segment may be committed
+TAIL_PAD_MS = 200      # Silence kept after the last voiced frame when decoding
+
+Decoder = Callable[[np.ndarray, str], Awaitable[str]]
+
+
+@dataclass
+class TranscriptEvent:
+    """A partial or final transcript of the current utterance."""
+    type: str  # "partial" or "final"
+    text: str
+    stable: str
+    utterance: int
+    audio_ms: int
+    decode_ms: float = 0.0
+    speculate: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def normalize_transcript(text: str) -> str:
+    """Casefolded words without punctuation (for comparing hypotheses)."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.casefold()).split())
+
+
+def _common_prefix(a: List[str], b: List[str]) -> List[str]:
+    prefix = []
+    for x, y in zip(a, b):
+        if normalize_transcript(x) != normalize_transcript(y):
+            break
+        prefix.append(y)
+    return prefix
+
+
+def _join(*parts: str) -> str:
+    return " ".join(p for p in parts if p).strip()
+
+
+class StreamingTranscriber:
+    """Incremental transcription session for one audio input stream."""
+
+    def __init__(
+        self,
+        decode: Decoder,
+        sample_rate: int = STT_SAMPLE_RATE,
+        vad_threshold: float = STT_STREAM_VAD_THRESHOLD,
+        partial_ms: int = STT_STREAM_PARTIAL_MS,
+        endpoint_ms: int = STT_STREAM_ENDPOINT_MS,
+        speculate_ms: int = STT_STREAM_SPECULATE_MS,
+        window_s: float = STT_STREAM_WINDOW_S,
+        max_utterance_s: float = STT_STREAM_MAX_UTTERANCE_S,
+    ):
+        self.decode = decode
+        self.sample_rate = sample_rate
+        self.vad_threshold = vad_threshold
+        self.partial_ms = partial_ms
+        self.endpoint_ms = endpoint_ms
+        self.speculate_ms = speculate_ms
+        self.window_ms = window_s * 1000
+        self.max_utterance_ms = max_utterance_s * 1000
+
+        self._frame_samples = sample_rate * VAD_FRAME_MS // 1000
+        self._remainder = b""
+        self._preroll: Deque[np.ndarray] = deque(maxlen=PREROLL_MS // VAD_FRAME_MS)
+        self._noise_floor = 0.0
+        self.utterance = 0
+        self._reset_utterance()
+
+        self.stats = {
+            "utterances": 0,
+            "partials": 0,
+            "decodes": 0,
+            "decode_ms": 0.0,
+            "reused_finals": 0,
+            "committed_segments": 0,
+            "speculations": 0,
+            "discarded_noise": 0,
+        }
+
+    def _reset_utterance(self) -> None:
+        self.in_speech = False
+        self._frames: List[np.ndarray] = []
+        self._segment_start = 0      # First frame of the uncommitted segment
+        self._committed = ""
+        self._voiced_ms = 0
+        self._silence_ms = 0
+        self._since_decode_ms = 0
+        self._voiced_frames = 0      # Frame count up to the last voiced frame
+        self._decoded_frames = 0     # Frame count covered by the last decode
+        self._hypothesis: List[str] = []
+        self._speculated = False
+
+    # ----------------------------------------------------------------- input
+
+    async def feed(self, pcm: bytes) -> List[TranscriptEvent]:
+        """Consume mono int16 PCM; returns any transcripts it produced."""
+        data = self._remainder + pcm
+        frame_bytes = self._frame_samples * 2
+        usable = len(data) - len(data) % frame_bytes
+        self._remainder = data[usable:]
+
+        events = []
+        samples = np.frombuffer(data[:usable], dtype=np.int16)
+        for start in range(0, len(samples), self._frame_samples):
+            event = await self._process_frame(samples[start:start + self._frame_samples])
+            if event is not None:
+                events.append(event)
+        return events
+
+    async def finish(self) -> Optional[TranscriptEvent]:
+        """End the current utterance now (client signalled end of speech)."""
+        self._remainder = b""
+        if self.in_speech and self._voiced_ms >= MIN_SPEECH_MS:
+            return await self._finalize()
+        self._reset_utterance()
+        return None
+
+    def _is_voiced(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean((frame.astype(np.float32) / 32768.0) ** 2)))
+        voiced = rms > max(self.vad_threshold, self._noise_floor * 3)
+        if not voiced:
+            self._noise_floor = 0.95 * self._noise_floor + 0.05 * rms
+        return voiced
+
+    async def _process_frame(self, frame: np.ndarray) -> Optional[TranscriptEvent]:
+        voiced = self._is_voiced(frame)
+
+        if not self.in_speech:
+            if not voiced:
+                self._preroll.append(frame)
+                return None
+            self.in_speech = True
+            self._frames = list(self._preroll)
+            self._preroll.clear()
+
+        self._frames.append(frame)
+        self._since_decode_ms += VAD_FRAME_MS
+        if voiced:
+            self._voiced_ms += VAD_FRAME_MS
+            self._silence_ms = 0
+            self._voiced_frames = len(self._frames)
+        else:
+            self._silence_ms += VAD_FRAME_MS
+
+        utterance_ms = len(self._frames) * VAD_FRAME_MS
+        if self._silence_ms >= self.endpoint_ms or utterance_ms >= self.max_utterance_ms:
+            if self._voiced_ms < MIN_SPEECH_MS:
+                self.stats["discarded_noise"] += 1
+                self._reset_utterance()
+                return None
+            return await self._finalize()
+
+        segment_ms = (len(self._frames) - self._segment_start) * VAD_FRAME_MS
+        if segment_ms >= self.window_ms or (
+            self._silence_ms >= PAUSE_COMMIT_MS and segment_ms >= self.window_ms / 2
+        ):
+            await self._commit_segment()
+            return None
+
+        if self._voiced_ms < MIN_SPEECH_MS or self._voiced_frames <= self._segment_start:
+            return None
+        # Decode on schedule, and once more as soon as the pause is long
+        # enough to speculate on
+        speculate_now = (not self._speculated and self._silence_ms >= self.speculate_ms
+                         and bool(self._hypothesis))
+        if self._since_decode_ms >= self.partial_ms or speculate_now:
+            return await self._partial()
+        return None
+
+    # --------------------------------------------------------------- decoding
+
+    def _segment_audio(self) -> np.ndarray:
+        """Uncommitted audio up to the last voiced frame (+ pad), float32 16kHz."""
+        end = min(len(self._frames), self._voiced_frames + TAIL_PAD_MS // VAD_FRAME_MS)
+        frames = self._frames[self._segment_start:end]
+        if not frames:
+            return np.zeros(0, dtype=np.float32)
+        audio = np.concatenate(frames).astype(np.float32) / 32768.0
+        if self.sample_rate != STT_SAMPLE_RATE:
+            count = int(len(audio) * STT_SAMPLE_RATE / self.sample_rate)
+            positions = np.linspace(0, len(audio) - 1, count)
+            audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+        return audio
+
+    async def _decode_segment(self) -> str:
+        start = time.time()
+        text = await self.decode(self._segment_audio(), self._committed)
+        elapsed = (time.time() - start) * 1000
+        self.stats["decodes"] += 1
+        self.stats["decode_ms"] += elapsed
+        self._last_decode_ms = elapsed
+        self._decoded_frames = len(self._frames)
+        self._since_decode_ms = 0
+        return (text or "").strip()
+
+    def _needs_decode(self) -> bool:
+        """False when only silence was added since the last decode."""
+        return not self._hypothesis or self._voiced_frames > self._decoded_frames
+
+    async def _partial(self) -> TranscriptEvent:
+        self._last_decode_ms = 0.0
+        if self._needs_decode():
+            words = (await self._decode_segment()).split()
+            stable = _common_prefix(self._hypothesis, words)
+            self._hypothesis = words
+        else:
+            # Nothing new was said: the previous hypothesis is confirmed
+            self._since_decode_ms = 0
+            stable = self._hypothesis
+
+        event = TranscriptEvent(
+            type="partial",
+            text=_join(self._committed, " ".join(self._hypothesis)),
+            stable=_join(self._committed, " ".join(stable)),
+            utterance=self.utterance,
+            audio_ms=len(self._frames) * VAD_FRAME_MS,
+            decode_ms=round(self._last_decode_ms, 1),
+        )
+        if (not self._speculated and event.text and event.stable == event.text
+                and self._silence_ms >= self.speculate_ms):
+            event.speculate = True
+            self._speculated = True
+            self.stats["speculations"] += 1
+        self.stats["partials"] += 1
+        return event
+
+    async def _commit_segment(self) -> None:
+        """Fix the current window's text and slide past it."""
+        text = " ".join(self._hypothesis) if not self._needs_decode() else await self._decode_segment()
+        self._committed = _join(self._committed, text)
+        self._segment_start = len(self._frames)
+        self._voiced_frames = max(self._voiced_frames, self._segment_start)
+        self._decoded_frames = self._segment_start
+        self._hypothesis = []
+        self.stats["committed_segments"] += 1
+
+    async def _finalize(self) -> TranscriptEvent:
+        self._last_decode_ms = 0.0
+        if self._voiced_frames <= self._segment_start:
+            tail = ""  # Only silence after the last committed window
+        elif self._needs_decode():
+            tail = await self._decode_segment()
+        else:
+            tail = " ".join(self._hypothesis)
+            self.stats["reused_finals"] += 1
+        text = _join(self._committed, tail)
+        event = TranscriptEvent(
+            type="final",
+            text=text,
+            stable=text,
+            utterance=self.utterance,
+            audio_ms=len(self._frames) * VAD_FRAME_MS,
+            decode_ms=round(self._last_decode_ms, 1),
+        )
+        self.utterance += 1
+        self.stats["utterances"] += 1
+        self._reset_utterance()
+        return event
+
+    def get_stats(self) -> dict:
+        """Decode counts and average decode time for this session."""
+        decodes = self.stats["decodes"]
+        return {
+            **self.stats,
+            "decode_ms": round(self.stats["decode_ms"], 1),
+            "avg_decode_ms": round(self.stats["decode_ms"] / decodes, 1) if decodes else 0.0,
+            "in_speech": self.in_speech,
+        }
+
+
+class SpeculativeStream:
+    """Runs a token stream ahead of the final transcript.
+
+    Tokens are buffered as they arrive; tokens() replays them and then
+    follows the live stream (adopt), cancel() stops it (discard).
+    """
+
+    def __init__(self, text: str, factory: Callable[[], AsyncIterator[str]]):
+        self.text = text
+        self.started = time.time()
+        self._tokens: List[str] = []
+        self._done = asyncio.Event()
+        self._changed = asyncio.Event()
+        self.error: Optional[BaseException] = None
+        self._task = asyncio.create_task(self._run(factory))
+
+    async def _run(self, factory: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for token in factory():
+                self._tokens.append(token)
+                self._changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+            self._changed.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def output(self) -> str:
+        return "".join(self._tokens)
+
+    def matches(self, text: str) -> bool:
+        """Whether a final transcript is the text this stream answered."""
+        return normalize_transcript(text) == normalize_transcript(self.text)
+
+    async def tokens(self) -> AsyncIterator[str]:
+        """Buffered tokens, then live ones until the stream ends."""
+        index = 0
+        while True:
+            while index < len(self._tokens):
+                yield self._tokens[index]
+                index += 1
+            if self._done.is_set():
+                if index >= len(self._tokens):
+                    break
+                continue
+            self._changed.clear()
+            if index < len(self._tokens) or self._done.is_set():
+                continue
+            await self._changed.wait()
+
+    async def cancel(self) -> None:
+        """Stop the stream (no-op if already finished)."""
+        if not self._task.done():
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
@@ -8,18 +8,28 @@ Architecture:
 - Generate audio for first chunk immediately (TTFA target: <50ms)
 - Stream subsequent chunks in parallel
 - Yield audio data progressively
+
+Synthesis never runs on the event loop: chunks are generated in worker
+threads, with chunk N+1 synthesizing while chunk N is being sent. The
+per-stream look-ahead is bounded (STREAM_TTS_LOOKAHEAD) so one long reply
+can't hold every TTS worker.
 """
 
 import asyncio
+import os
 import re
 import io
 import time
-from typing import AsyncGenerator, Optional
+from collections import deque
+from typing import AsyncGenerator, Awaitable, Callable, Iterable, Optional
 import numpy as np
 
 # WAV header constants
 WAV_HEADER_SIZE = 44
 
+# Chunks synthesized ahead of the one being sent, per stream
+STREAM_TTS_LOOKAHEAD = int(os.getenv("STREAM_TTS_LOOKAHEAD", "1"))
+
 # Pre-compiled regex patterns for better latency
 _SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
 _SUB_CHUNK_PATTERN = re.compile(r'(?<=,)\s+|(?<=;)\s+|\s+(?:et|ou|mais|donc|car)\s+')
@@ -138,12 +148,52 @@ def create_wav_header(sample_rate: int, num_samples: int, channels: int = 1, bit
     return header.getvalue()
 
 
+async def pipelined_synthesis(
+    chunks: Iterable[str],
+    synthesize: Callable[[str], Awaitable],
+    lookahead: Optional[int] = None
+) -> AsyncGenerator[tuple[str, object, float], None]:
+    """Run synthesize() over chunks with a bounded look-ahead.
+
+    Yields (chunk_text, result, elapsed_ms) in chunk order. While the caller
+    handles chunk N, at most `lookahead` following chunks are in flight.
+    Pending work is cancelled if the consumer stops early.
+    """
+    if lookahead is None:
+        lookahead = STREAM_TTS_LOOKAHEAD
+    remaining = iter(chunks)
+    pending = deque()
+
+    def schedule_next() -> None:
+        chunk_text = next(remaining, None)
+        if chunk_text is not None:
+            pending.append((chunk_text, time.time(), asyncio.ensure_future(synthesize(chunk_text))))
+
+    try:
+        for _ in range(max(0, lookahead) + 1):
+            schedule_next()
+
+        while pending:
+            chunk_text, start_time, task = pending.popleft()
+            result = await task
+            yield chunk_text, result, (time.time() - start_time) * 1000
+            schedule_next()
+    finally:
+        for _, _, task in pending:
+            task.cancel()
+
+
 async def stream_tts_gpu(
     text: str,
-    speed: float = 1.0
+    speed: float = 1.0,
+    lookahead: Optional[int] = None
 ) -> AsyncGenerator[bytes, None]:
     """Stream TTS audio using MMS-TTS GPU with sentence chunking.
 
+    Synthesis runs in worker threads, pipelined with sending. Chunks are
+    synthesized straight to raw PCM, so no per-chunk WAV header has to be
+    stripped.
+
     Yields:
         WAV audio bytes chunk by chunk (first chunk includes header).
         Each chunk can be concatenated for a complete WAV file.
@@ -152,7 +202,7 @@ async def stream_tts_gpu(
         - Time to first byte: <50ms
         - Chunk generation: 30-70ms per chunk
     """
-    from fast_tts import init_fast_tts, fast_tts, _sample_rate, _initialized
+    from fast_tts import init_fast_tts, fast_tts_pcm, _sample_rate, _initialized
 
     if not _initialized:
         if not init_fast_tts():
@@ -163,44 +213,37 @@ async def stream_tts_gpu(
         return
 
     first_chunk = True
-    total_samples_so_far = 0
-
-    for chunk_text in chunks:
-        start_time = time.time()
 
-        # Generate audio for this chunk
-        wav_data = fast_tts(chunk_text)
+    async def synthesize(chunk_text: str) -> Optional[bytes]:
+        return await asyncio.to_thread(fast_tts_pcm, chunk_text)
 
-        if not wav_data:
+    async for chunk_text, pcm_data, elapsed in pipelined_synthesis(chunks, synthesize, lookahead):
+        if not pcm_data:
             continue
 
-        elapsed = (time.time() - start_time) * 1000
-
         if first_chunk:
-            # First chunk: yield complete WAV data
-            yield wav_data
+            # First chunk: WAV header + samples
+            yield create_wav_header(_sample_rate, len(pcm_data) // 2) + pcm_data
             first_chunk = False
             print(f"🔊 TTS First chunk: {elapsed:.0f}ms - '{chunk_text[:30]}...'")
         else:
-            # Subsequent chunks: yield only audio data (skip header)
+            # Subsequent chunks: samples only
             # This allows chunked WAV streaming
-            yield wav_data[WAV_HEADER_SIZE:]
+            yield pcm_data
             print(f"🔊 TTS Chunk: {elapsed:.0f}ms - '{chunk_text[:30]}...'")
 
-        # Small yield to prevent blocking
-        await asyncio.sleep(0)
-
 
 async def stream_tts_gpu_mp3(
     text: str,
-    speed: float = 1.0
+    speed: float = 1.0,
+    lookahead: Optional[int] = None
 ) -> AsyncGenerator[bytes, None]:
     """Stream TTS as MP3 chunks using MMS-TTS GPU.
 
-    Uses lameenc for fast MP3 encoding.
+    Uses lameenc for fast MP3 encoding. Synthesis is pipelined in worker
+    threads; encoding stays sequential since the encoder is stateful.
     """
-    from fast_tts import init_fast_tts, _model, _tokenizer, _device, _sample_rate, _initialized
-    import torch
+    from fast_tts import init_fast_tts, _synthesize, _sample_rate, _initialized
 
     if not _initialized:
         if not init_fast_tts():
@@ -223,32 +266,25 @@ async def stream_tts_gpu_mp3(
     if not chunks:
         return
 
-    for chunk_text in chunks:
-        start_time = time.time()
-
-        # Generate audio
-        inputs = _tokenizer(chunk_text, return_tensors="pt").to(_device)
-
-        with torch.inference_mode():
-            output = _model(**inputs).waveform
-
-        audio = output.squeeze().cpu().numpy()
-        max_val = np.max(np.abs(audio))
+    def synthesize_pcm(chunk_text: str) -> bytes:
+        audio = _synthesize(chunk_text)
+        max_val = np.max(np.abs(audio)) if audio.size else 0
         if max_val > 0:
             audio = audio / max_val * 0.95
-        audio_int16 = (audio * 32767).astype(np.int16)
+        return (audio * 32767).astype(np.int16).tobytes()
+
+    async def synthesize(chunk_text: str) -> bytes:
+        return await asyncio.to_thread(synthesize_pcm, chunk_text)
 
+    async for chunk_text, pcm, elapsed in pipelined_synthesis(chunks, synthesize, lookahead):
         # Encode to MP3
-        mp3_data = encoder.encode(audio_int16.tobytes())
+        mp3_data = await asyncio.to_thread(encoder.encode, pcm)
 
-        elapsed = (time.time() - start_time) * 1000
         print(f"🔊 TTS MP3 Chunk: {elapsed:.0f}ms - '{chunk_text[:30]}...'")
 
         if mp3_data:
             yield bytes(mp3_data)
 
-        await asyncio.sleep(0)
-
     # Flush encoder
     final_data = encoder.flush()
     if final_data:
@@ -271,7 +307,7 @@ async def fast_first_byte_tts(
         # Play first_audio immediately (~30-50ms)
         # Then iterate rest for remaining audio
     """
-    from fast_tts import init_fast_tts, fast_tts, _initialized
+    from fast_tts import init_fast_tts, fast_tts, fast_tts_pcm, _initialized
 
     if not _initialized:
         if not init_fast_tts():
@@ -282,9 +318,9 @@ async def fast_first_byte_tts(
     if not chunks:
         return b"", _empty_generator()
 
-    # Generate first chunk synchronously for minimum latency
+    # Generate first chunk on its own for minimum latency
     start = time.time()
-    first_audio = fast_tts(chunks[0])
+    first_audio = await asyncio.to_thread(fast_tts, chunks[0])
     elapsed = (time.time() - start) * 1000
 
     if not first_audio:
@@ -293,12 +329,13 @@ async def fast_first_byte_tts(
     print(f"🚀 TTS First byte: {elapsed:.0f}ms - '{chunks[0][:30]}...'")
 
     # Return first chunk and generator for the rest
+    async def synthesize(chunk_text: str) -> Optional[bytes]:
+        return await asyncio.to_thread(fast_tts_pcm, chunk_text)
+
     async def remaining_generator() -> AsyncGenerator[bytes, None]:
-        for chunk_text in chunks[1:]:
-            wav_data = fast_tts(chunk_text)
-            if wav_data:
-                yield wav_data[WAV_HEADER_SIZE:]  # Skip header for continuation
-            await asyncio.sleep(0)
+        async for _, pcm_data, _ in pipelined_synthesis(chunks[1:], synthesize):
+            if pcm_data:
+                yield pcm_data  # Raw samples continue the first chunk's WAV
 
     return first_audio, remaining_generator()
 
@@ -0,0 +1,113 @@
+"""
+Tests for audio_ring.py
+Fixed-capacity float32 ring buffer used by the streaming lip-sync processor
+"""
+
+import numpy as np
+import pytest
+
+from audio_ring import AudioRingBuffer
+
+
+def _ramp(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+class TestAudioRingBuffer:
+    """Tests for AudioRingBuffer."""
+
+    def test_write_and_window(self):
+        """Test buffered samples come back in order."""
+        ring = AudioRingBuffer(16)
+        assert ring.write(_ramp(0, 10)) == 10
+        view, context = ring.window(8)
+        assert context == 0
+        np.testing.assert_array_equal(view, _ramp(0, 8))
+        assert len(ring) == 10
+
+    def test_window_is_view_across_wraparound(self):
+        """Test windows stay contiguous views when the data wraps around."""
+        ring = AudioRingBuffer(8)
+        ring.write(_ramp(0, 6))
+        ring.consume(6)
+        ring.write(_ramp(6, 7))   # wraps past the end of storage
+        view, _ = ring.window(7)
+        np.testing.assert_array_equal(view, _ramp(6, 7))
+        assert np.shares_memory(view, ring._data)
+        assert not view.flags.writeable
+
+    def test_write_takes_only_what_fits(self):
+        """Test the capacity is fixed and the caller is told how much was taken."""
+        ring = AudioRingBuffer(8)
+        assert ring.write(_ramp(0, 12)) == 8
+        assert ring.write(_ramp(8, 4)) == 0
+        ring.consume(5)
+        assert ring.write(_ramp(8, 4)) == 4
+        np.testing.assert_array_equal(ring.window(7)[0], _ramp(5, 7))
+
+    def test_context_kept_after_consume(self):
+        """Test consumed samples remain readable as left context."""
+        ring = AudioRingBuffer(16, history=4)
+        ring.write(_ramp(0, 12))
+        ring.consume(6)
+        view, context = ring.window(4, context=8)
+        assert context == 4
+        np.testing.assert_array_equal(view, _ramp(2, 8))
+
+    def test_context_limited_at_start(self):
+        """Test context never reaches before the first sample."""
+        ring = AudioRingBuffer(16, history=4)
+        ring.write(_ramp(0, 6))
+        ring.consume(2)
+        view, context = ring.window(3, context=4)
+        assert context == 2
+        np.testing.assert_array_equal(view, _ramp(0, 5))
+
+    def test_context_not_overwritten(self):
+        """Test retained context counts against free space."""
+        ring = AudioRingBuffer(8, history=3)
+        ring.write(_ramp(0, 8))
+        ring.consume(5)
+        assert ring.free == 2
+        assert ring.write(_ramp(8, 5)) == 2
+        view, context = ring.window(5, context=3)
+        np.testing.assert_array_equal(view, _ramp(2, 8))
+
+    def test_pad_in_place(self):
+        """Test pad() appends silence without reallocating storage."""
+        ring = AudioRingBuffer(8)
+        storage = ring._data
+        ring.write(_ramp(1, 3))
+        assert ring.pad(5) == 5
+        assert ring._data is storage
+        np.testing.assert_array_equal(ring.window(8)[0], [1, 2, 3, 0, 0, 0, 0, 0])
+
+    def test_overread_rejected(self):
+        """Test reading or consuming more than is buffered raises."""
+        ring = AudioRingBuffer(8)
+        ring.write(_ramp(0, 3))
+        with pytest.raises(ValueError):
+            ring.window(4)
+        with pytest.raises(ValueError):
+            ring.consume(4)
+
+    def test_long_stream_constant_memory(self):
+        """Test a long stream through a small ring keeps every sample in order."""
+        ring = AudioRingBuffer(10, history=2)
+        audio = _ramp(0, 1000)
+        out, offset = [], 0
+        while offset < len(audio) or len(ring) >= 4:
+            offset += ring.write(audio[offset:offset + 7])
+            while len(ring) >= 4:
+                view, context = ring.window(4, context=2)
+                out.append(view[context:].copy())
+                ring.consume(4)
+        np.testing.assert_array_equal(np.concatenate(out), audio)
+        assert ring.nbytes == 2 * 10 * 4
+
+    def test_invalid_sizes(self):
+        """Test capacity and history are validated."""
+        with pytest.raises(ValueError):
+            AudioRingBuffer(0)
+        with pytest.raises(ValueError):
+            AudioRingBuffer(8, history=8)
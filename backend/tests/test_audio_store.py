@@ -0,0 +1,291 @@
+"""
+Tests for audio_store.py
+Unified content-addressed TTS audio store
+"""
+
+import asyncio
+import io
+import wave
+
+import pytest
+from unittest.mock import patch
+
+from audio_store import (
+    AudioStore,
+    canonical_text,
+    detect_format,
+    make_key,
+    wav_to_pcm,
+)
+
+
+def _wav(pcm: bytes, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+MP3 = b"ID3" + b"\x00" * 61
+
+
+class TestKeys:
+    """Tests for content addressing helpers."""
+
+    def test_canonical_text_collapses_whitespace(self):
+        """Test that equivalent whitespace maps to one text."""
+        assert canonical_text("  Bonjour   toi\n") == "Bonjour toi"
+
+    def test_make_key_ignores_whitespace(self):
+        """Test that keys are stable across whitespace differences."""
+        assert make_key("Bonjour  toi", "eva") == make_key(" Bonjour toi ", "eva")
+
+    def test_make_key_separates_voice_and_namespace(self):
+        """Test that voice, rate and namespace are part of the address."""
+        base = make_key("Salut", "eva")
+        assert base != make_key("Salut", "other")
+        assert base != make_key("Salut", "eva", rate="+10%")
+        assert base != make_key("Salut", "eva", namespace="chunk")
+        assert len(base) == 16
+
+    def test_detect_format(self):
+        """Test container detection for wav, mp3 and raw pcm."""
+        assert detect_format(_wav(b"\x01\x00" * 10)) == "wav"
+        assert detect_format(MP3) == "mp3"
+        assert detect_format(b"\xff\xfb\x90\x00") == "mp3"
+        assert detect_format(b"\x01\x02\x03\x04") == "pcm"
+
+    def test_wav_to_pcm(self):
+        """Test extracting samples from a WAV file."""
+        pcm = b"\x01\x00\x02\x00" * 8
+        assert wav_to_pcm(_wav(pcm)) == pcm
+        assert wav_to_pcm(MP3) is None
+
+
+class TestMemoryTier:
+    """Tests for the in-memory LRU tier."""
+
+    def test_put_get_roundtrip(self):
+        """Test basic store and lookup."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        assert store.put("Bonjour", MP3, "eva")
+        assert store.get("Bonjour", "eva") == MP3
+        assert store.get("Bonjour", "other") is None
+
+    def test_format_variants(self):
+        """Test that wav and mp3 of the same utterance coexist."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        wav = _wav(b"\x01\x00" * 50)
+        store.put("Salut", wav, "eva")
+        store.put("Salut", MP3, "eva")
+        assert store.get("Salut", "eva", fmt="wav") == wav
+        assert store.get("Salut", "eva", fmt="mp3") == MP3
+        assert store.get("Salut", "eva") == MP3  # mp3 preferred when any
+
+    def test_pcm_derived_from_wav(self):
+        """Test that a PCM request is served from a cached WAV."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        pcm = b"\x03\x00" * 40
+        store.put("Coucou", _wav(pcm), "eva")
+        assert store.get("Coucou", "eva", fmt="pcm") == pcm
+        assert store.get_stats()["derived_hits"] == 1
+
+    def test_byte_budget_evicts_lru(self):
+        """Test that the memory tier evicts least recently used entries."""
+        store = AudioStore(memory_mb=1, disk_mb=0, max_entry_bytes=512 * 1024)
+        blob = b"\x01" * (400 * 1024)
+        store.put("a", blob, fmt="pcm")
+        store.put("b", blob, fmt="pcm")
+        store.get("a", fmt="pcm")  # touch a
+        store.put("c", blob, fmt="pcm")
+        assert store.get("b", fmt="pcm") is None
+        assert store.get("a", fmt="pcm") == blob
+        assert store.get("c", fmt="pcm") == blob
+
+    def test_rejects_empty_and_oversized_audio(self):
+        """Test that empty or oversized audio is not stored."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        assert store.put("vide", b"") is False
+        assert store.put("long", b"\x01" * (200 * 1024), fmt="pcm") is False
+
+    def test_stats_and_entries(self):
+        """Test hit/miss accounting and entry listing."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        store.put("Bonjour", MP3, "eva")
+        store.get("Bonjour", "eva")
+        store.get("Inconnu", "eva")
+        stats = store.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate_percent"] == 50.0
+        entries = store.get_entries()
+        assert entries[0]["text"] == "Bonjour"
+        assert entries[0]["format"] == "mp3"
+
+
+class TestDiskTier:
+    """Tests for the shared mmap disk tier."""
+
+    def test_visible_across_instances(self, tmp_path):
+        """Test that one worker's writes are served to another worker."""
+        writer = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path))
+        reader = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path), refresh_interval_ms=0)
+        assert reader.get("Bonsoir", "eva") is None
+        writer.put("Bonsoir", MP3, "eva")
+        assert reader.get("Bonsoir", "eva") == MP3
+        assert reader.get_stats()["disk_hits"] == 1
+
+    def test_refresh_rate_limited(self, tmp_path):
+        """Test misses don't rescan the disk more than once per interval."""
+        writer = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path))
+        reader = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path), refresh_interval_ms=60000)
+        writer.put("Bonsoir", MP3, "eva")
+        with patch.object(reader, "_refresh_disk") as refresh:
+            for _ in range(5):
+                assert reader.get("Bonsoir", "eva") is None
+        refresh.assert_not_called()
+        reader._last_refresh = 0.0  # interval elapsed
+        assert reader.get("Bonsoir", "eva") == MP3
+
+    def test_survives_restart(self, tmp_path):
+        """Test that a new store reloads existing segments."""
+        AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path)).put("Bonne nuit", MP3, "eva")
+        store = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path))
+        assert store.get("Bonne nuit", "eva") == MP3
+
+    def test_rotation_respects_budget(self, tmp_path):
+        """Test that old segments are dropped to stay within the disk budget."""
+        store = AudioStore(memory_mb=1, disk_mb=1, disk_path=str(tmp_path), max_entry_bytes=512 * 1024)
+        blob = b"\x02" * (100 * 1024)
+        for i in range(30):
+            store.put(f"phrase {i}", blob, fmt="pcm")
+        disk_bytes = sum(p.stat().st_size for p in tmp_path.glob("segment-*.bin"))
+        assert disk_bytes <= 1024 * 1024 + 200 * 1024
+        assert len(list(tmp_path.glob("segment-*.bin"))) <= 2
+
+    def test_clear_disk(self, tmp_path):
+        """Test clearing both tiers."""
+        store = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path))
+        store.put("Bonjour", MP3, "eva")
+        store.clear(include_disk=True)
+        assert store.get("Bonjour", "eva") is None
+        assert list(tmp_path.glob("segment-*.bin")) == []
+
+
+class TestGetOrGenerate:
+    """Tests for single-flight generation."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_generate_once(self):
+        """Test that concurrent requests for one utterance synthesize once."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return MP3
+
+        results = await asyncio.gather(
+            *(store.get_or_generate("Salut", generate, "eva") for _ in range(5))
+        )
+        assert results == [MP3] * 5
+        assert calls == 1
+        assert store.get_stats()["coalesced"] == 4
+        assert store.get("Salut", "eva") == MP3
+
+    @pytest.mark.asyncio
+    async def test_generation_error_propagates(self):
+        """Test that a failing generator does not poison the store."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+
+        async def boom():
+            raise RuntimeError("tts down")
+
+        with pytest.raises(RuntimeError):
+            await store.get_or_generate("Salut", boom, "eva")
+        assert store.get("Salut", "eva") is None
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_not_shared(self):
+        """Test waiters retry when the generating caller is cancelled."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return MP3
+
+        leader = asyncio.create_task(store.get_or_generate("Salut", generate, "eva"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(store.get_or_generate("Salut", generate, "eva"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await asyncio.wait_for(waiter, 2) == MP3
+        assert calls == 2
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    @pytest.mark.asyncio
+    async def test_store_false_coalesces_without_caching(self):
+        """Test store=False still generates once but keeps nothing."""
+        store = AudioStore(memory_mb=1, disk_mb=0)
+
+        async def generate():
+            await asyncio.sleep(0.01)
+            return MP3
+
+        results = await asyncio.gather(
+            *(store.get_or_generate("Long", generate, "eva", store=False) for _ in range(3))
+        )
+        assert results == [MP3] * 3
+        assert store.get_stats()["generations"] == 1
+        assert store.get("Long", "eva") is None
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_runs_off_the_loop(self, tmp_path):
+        """Test disk lookups and appends happen in a worker thread, memory hits inline."""
+        import threading
+
+        store = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path), refresh_interval_ms=0)
+        loop_thread = threading.current_thread()
+        threads = []
+        find_disk, put_disk = store._find_disk, store._put_disk
+
+        def record(fn):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return fn(*args)
+            return wrapper
+
+        async def generate():
+            return MP3
+
+        with patch.object(store, "_find_disk", side_effect=record(find_disk)), \
+             patch.object(store, "_put_disk", side_effect=record(put_disk)):
+            assert await store.get_or_generate("Salut", generate, "eva") == MP3
+            assert len(threads) == 2
+            assert await store.get_or_generate("Salut", generate, "eva") == MP3  # memory hit
+        assert len(threads) == 2
+        assert loop_thread not in threads
+        assert AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path)).get("Salut", "eva") == MP3
+
+    @pytest.mark.asyncio
+    async def test_memory_hit_while_disk_lock_held(self, tmp_path):
+        """Test a stuck disk operation doesn't block memory hits on the loop."""
+        store = AudioStore(memory_mb=1, disk_mb=4, disk_path=str(tmp_path))
+        store.put("Salut", MP3, "eva")
+        acquired = store._disk_lock.acquire(blocking=False)
+        assert acquired
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: asyncio.run(store.get_async("Salut", "eva")))
+        finally:
+            store._disk_lock.release()
+        assert result == MP3
@@ -0,0 +1,134 @@
+"""
+Tests for audio_transport.py
+Fixed-duration PCM/Opus frame transport for the voice websockets
+"""
+
+from unittest.mock import patch
+
+import audio_transport as at
+from audio_transport import (
+    AudioFramer,
+    TransportConfig,
+    FLAG_END,
+    FLAG_START,
+    FRAME_HEADER_SIZE,
+    negotiate_transport,
+    parse_frame_header,
+)
+
+
+class TestNegotiation:
+    """Tests for negotiate_transport."""
+
+    def test_defaults_to_blob(self):
+        """Test clients that don't ask for frames keep blob mode."""
+        assert negotiate_transport(None, 16000).mode == "blob"
+        assert negotiate_transport({"mode": "blob"}, 16000).mode == "blob"
+        assert negotiate_transport("frames", 16000).mode == "blob"
+
+    def test_frames_pcm(self):
+        """Test a PCM frame request is accepted as-is."""
+        config = negotiate_transport({"mode": "frames", "codec": "pcm16", "frame_ms": 40}, 16000)
+        assert config.is_frames
+        assert config.codec == "pcm16"
+        assert config.frame_ms == 40
+        assert config.samples_per_frame == 640
+
+    def test_opus_falls_back_to_pcm_when_unavailable(self):
+        """Test Opus is downgraded to PCM without opuslib."""
+        with patch.object(at, "OPUS_AVAILABLE", False):
+            config = negotiate_transport({"mode": "frames", "codecs": ["opus", "pcm16"]}, 16000)
+        assert config.codec == "pcm16"
+
+    def test_opus_chosen_when_available(self):
+        """Test the client's first supported codec wins."""
+        with patch.object(at, "OPUS_AVAILABLE", True):
+            assert negotiate_transport({"mode": "frames", "codecs": ["opus"]}, 16000).codec == "opus"
+            # Opus does not support arbitrary sample rates
+            assert negotiate_transport({"mode": "frames", "codecs": ["opus"]}, 22050).codec == "pcm16"
+
+    def test_invalid_frame_duration_uses_default(self):
+        """Test unsupported frame durations fall back to the default."""
+        config = negotiate_transport({"mode": "frames", "frame_ms": 33}, 16000)
+        assert config.frame_ms == 20
+
+    def test_to_dict(self):
+        """Test the config_ok description of each mode."""
+        assert TransportConfig().to_dict() == {"mode": "blob"}
+        info = TransportConfig(mode="frames").to_dict()
+        assert info["mode"] == "frames"
+        assert info["codec"] == "pcm16"
+        assert info["sample_rate"] == 16000
+
+
+class TestAudioFramer:
+    """Tests for AudioFramer PCM framing."""
+
+    def _framer(self, frame_ms=20):
+        return AudioFramer(TransportConfig(mode="frames", frame_ms=frame_ms, sample_rate=16000))
+
+    def test_fixed_duration_frames(self):
+        """Test PCM is cut into fixed-size, zero-padded frames."""
+        framer = self._framer()
+        pcm = b"\x01\x00" * 700  # 43.75ms at 16kHz
+        frames = framer.frames(pcm)
+        assert len(frames) == 3
+        assert all(len(f) == FRAME_HEADER_SIZE + 640 for f in frames)
+        assert frames[-1].endswith(b"\x00" * 100)
+
+    def test_sequence_and_timestamps(self):
+        """Test seq and timestamp_ms are monotonic across utterances."""
+        framer = self._framer()
+        first = framer.frames(b"\x01\x00" * 640)
+        second = framer.frames(b"\x02\x00" * 320)
+        headers = [parse_frame_header(f) for f in first + second]
+        assert [h["seq"] for h in headers] == [0, 1, 2]
+        assert [h["timestamp_ms"] for h in headers] == [0, 20, 40]
+        assert [h["utterance"] for h in headers] == [0, 0, 1]
+        assert framer.next_seq == 3
+
+    def test_start_and_end_flags(self):
+        """Test utterance boundaries are flagged."""
+        framer = self._framer()
+        flags = [parse_frame_header(f)["flags"] for f in framer.frames(b"\x01\x00" * 960)]
+        assert flags[0] & FLAG_START
+        assert not flags[0] & FLAG_END
+        assert flags[-1] & FLAG_END
+        single = parse_frame_header(framer.frames(b"\x01\x00" * 10)[0])["flags"]
+        assert single == FLAG_START | FLAG_END
+
+    def test_payload_roundtrip(self):
+        """Test the concatenated payloads reproduce the PCM."""
+        framer = self._framer(frame_ms=10)
+        pcm = bytes(range(256)) * 5
+        payload = b"".join(f[FRAME_HEADER_SIZE:] for f in framer.frames(pcm))
+        assert payload[:len(pcm)] == pcm
+
+    def test_empty_and_odd_input(self):
+        """Test empty PCM yields no frames and odd lengths are trimmed."""
+        framer = self._framer()
+        assert framer.frames(b"") == []
+        assert len(framer.frames(b"\x01\x00\x02")) == 1
+        assert framer.get_stats()["pcm_bytes"] == 2
+
+    def test_stats(self):
+        """Test framing statistics."""
+        framer = self._framer()
+        framer.frames(b"\x01\x00" * 640)
+        stats = framer.get_stats()
+        assert stats["utterances"] == 1
+        assert stats["frames"] == 2
+        assert stats["codec"] == "pcm16"
+        assert stats["compression_ratio"] == 1.0
+
+    def test_lazy_frames_advance_only_when_taken(self):
+        """Test an utterance abandoned mid-way leaves no gap before the next one."""
+        framer = self._framer()
+        frames = framer.iter_frames(framer.payloads(b"\x01\x00" * 1600))  # 5 frames
+        next(frames)
+        next(frames)
+        following = framer.frames(b"\x02\x00" * 320)
+        header = parse_frame_header(following[0])
+        assert header["seq"] == 2 and header["timestamp_ms"] == 40
+        assert header["utterance"] == 1
+        assert framer.get_stats()["frames"] == 3
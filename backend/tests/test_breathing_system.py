@@ -13,7 +13,9 @@ import os
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from breathing_system import NaturalBreathingSystem, breathing_system, make_natural
+from breathing_system import (
+    NaturalBreathingSystem, breathing_system, make_natural, pick_natural_variant, NATURAL_VARIANTS
+)
 
 
 class TestClassConstants:
@@ -391,6 +393,41 @@ class TestMakeNatural:
         assert len(result) > 0
 
 
+class TestNaturalVariants:
+    """Tests for seeded naturalization variants."""
+
+    TEXT = (
+        "Je pense que tu devrais essayer cette approche. C'est vraiment intéressant "
+        "ce que tu me racontes là, vraiment. Et puis voilà, on verra bien demain."
+    )
+
+    def test_same_variant_is_deterministic(self):
+        """Test the same (text, variant) always gives the same result."""
+        results = set()
+        for seed in range(20):
+            random.seed(seed)  # Global randomness must not matter
+            results.add(make_natural(self.TEXT, variant=1))
+        assert len(results) == 1
+
+    def test_variants_differ(self):
+        """Test different variants produce some variety."""
+        results = {make_natural(self.TEXT, variant=v) for v in range(10)}
+        assert len(results) > 1
+
+    def test_variant_does_not_touch_global_random(self):
+        """Test seeded variants leave the global random state alone."""
+        random.seed(123)
+        expected = random.random()
+        random.seed(123)
+        make_natural(self.TEXT, variant=2)
+        assert random.random() == expected
+
+    def test_pick_natural_variant_in_range(self):
+        """Test pick_natural_variant stays within NATURAL_VARIANTS."""
+        for _ in range(50):
+            assert 0 <= pick_natural_variant() < max(1, NATURAL_VARIANTS)
+
+
 class TestEdgeCases:
     """Tests for edge cases."""
 
@@ -0,0 +1,191 @@
+"""
+Tests for conversation_log.py
+Append-only message persistence with group commit
+"""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from conversation_log import ConversationLog
+
+
+def _rows(path, session_id=None):
+    conn = sqlite3.connect(path)
+    try:
+        if session_id is None:
+            return conn.execute("SELECT session_id, role, content FROM messages ORDER BY id").fetchall()
+        return conn.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+class TestSyncMode:
+    """Tests for write-through mode (no writer task)."""
+
+    def test_one_row_per_message(self, tmp_path):
+        """Test each append stores exactly one small row."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path)
+        log.append("s1", "user", "Salut")
+        log.append("s1", "assistant", "Coucou!")
+        assert _rows(path, "s1") == [("user", "Salut"), ("assistant", "Coucou!")]
+        assert log.get_stats()["rows_written"] == 2
+
+    def test_wal_mode(self, tmp_path):
+        """Test the database uses the WAL journal."""
+        path = str(tmp_path / "eva.db")
+        ConversationLog(path)
+        conn = sqlite3.connect(path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_load_returns_last_n(self, tmp_path):
+        """Test loading reads only the most recent rows, oldest first."""
+        log = ConversationLog(str(tmp_path / "eva.db"), load_limit=3)
+        for i in range(10):
+            log.append("s1", "user", f"m{i}")
+        assert [m["content"] for m in log.load("s1")] == ["m7", "m8", "m9"]
+        assert len(log.load("s1", limit=5)) == 5
+        assert log.load("unknown") is None
+
+    def test_clear(self, tmp_path):
+        """Test clearing deletes only that session."""
+        log = ConversationLog(str(tmp_path / "eva.db"))
+        log.append("s1", "user", "a")
+        log.append("s2", "user", "b")
+        log.clear("s1")
+        assert log.load("s1") is None
+        assert log.load("s2") == [{"role": "user", "content": "b"}]
+        assert log.count_sessions() == 1
+
+    def test_legacy_json_is_migrated(self, tmp_path):
+        """Test sessions saved as a JSON blob are moved into message rows."""
+        path = str(tmp_path / "eva.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE conversations (session_id TEXT PRIMARY KEY, messages TEXT)")
+        conn.execute("INSERT INTO conversations VALUES (?, ?)", ("old", json.dumps([
+            {"role": "system", "content": "prompt"},
+            {"role": "user", "content": "Bonjour"},
+            {"role": "assistant", "content": "Salut!"},
+        ])))
+        conn.commit()
+        conn.close()
+
+        log = ConversationLog(path)
+        assert log.load("old") == [
+            {"role": "user", "content": "Bonjour"},
+            {"role": "assistant", "content": "Salut!"},
+        ]
+        assert _rows(path, "old") == [("user", "Bonjour"), ("assistant", "Salut!")]
+        assert log.get_stats()["migrated_sessions"] == 1
+
+
+class TestWriterTask:
+    """Tests for the group-commit writer."""
+
+    @pytest.mark.asyncio
+    async def test_group_commit(self, tmp_path):
+        """Test messages appended together are committed in one batch."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, flush_ms=20)
+        log.start()
+        for i in range(50):
+            log.append(f"s{i % 5}", "user", f"m{i}")
+        assert _rows(path) == []  # Nothing written synchronously
+        await asyncio.sleep(0.2)
+        assert len(_rows(path)) == 50
+        stats = log.get_stats()
+        assert stats["batches"] == 1
+        assert stats["avg_batch"] == 50
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_load_sees_queued_writes(self, tmp_path):
+        """Test reads include messages still waiting for the writer."""
+        log = ConversationLog(str(tmp_path / "eva.db"), flush_ms=1000)
+        log.append("s1", "user", "stored")
+        log.start()
+        log.append("s1", "assistant", "queued")
+        assert [m["content"] for m in log.load("s1")] == ["stored", "queued"]
+        log.clear("s1")
+        log.append("s1", "user", "after clear")
+        assert log.load("s1") == [{"role": "user", "content": "after clear"}]
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending(self, tmp_path):
+        """Test shutdown writes everything still queued."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, flush_ms=1000)
+        log.start()
+        log.append("s1", "user", "dernier message")
+        await log.close()
+        assert _rows(path, "s1") == [("user", "dernier message")]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_bounded(self, tmp_path):
+        """Test large backlogs are split into max_batch transactions."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, flush_ms=0, max_batch=10)
+        log.start()
+        for i in range(35):
+            log.append("s1", "user", str(i))
+        await asyncio.sleep(0.2)
+        assert len(_rows(path)) == 35
+        assert log.get_stats()["max_batch"] == 10
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_no_sync_write_on_loop(self, tmp_path):
+        """Test appends on an event loop start the writer instead of writing inline."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, flush_ms=1000)
+        log.append("s1", "user", "Salut")
+        assert log.running
+        assert _rows(path) == []
+        assert await log.load_async("s1") == [{"role": "user", "content": "Salut"}]
+        await log.close()
+        assert _rows(path, "s1") == [("user", "Salut")]
+
+    @pytest.mark.asyncio
+    async def test_commit_soon_skips_group_wait(self, tmp_path):
+        """Test commit_soon() has the writer commit without the group-commit delay."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, flush_ms=5000)
+        log.start()
+        log.append("s1", "user", "urgent")
+        log.commit_soon()
+        for _ in range(50):
+            if _rows(path):
+                break
+            await asyncio.sleep(0.01)
+        assert _rows(path, "s1") == [("user", "urgent")]
+        await log.close()
+
+
+class TestRetention:
+    """Tests for per-conversation retention."""
+
+    def test_sessions_trimmed_to_retain(self, tmp_path):
+        """Test each session keeps only its newest rows."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, retain=5)
+        for i in range(12):
+            log.append("s1", "user", f"m{i}")
+        log.append("s2", "user", "autre")
+        assert [content for _, content in _rows(path, "s1")] == [f"m{i}" for i in range(7, 12)]
+        assert _rows(path, "s2") == [("user", "autre")]
+        assert log.get_stats()["rows_trimmed"] == 7
+
+    def test_retain_zero_keeps_everything(self, tmp_path):
+        """Test retention can be disabled."""
+        path = str(tmp_path / "eva.db")
+        log = ConversationLog(path, retain=0)
+        for i in range(30):
+            log.append("s1", "user", str(i))
+        assert len(_rows(path, "s1")) == 30
@@ -4,6 +4,7 @@ Tests for eva_her.py - HER Integration Module.
 Tests the optimized emotion detection with frozensets.
 """
 
+import asyncio
 import pytest
 import sys
 import os
@@ -651,3 +652,188 @@ class TestStoreInteraction:
         await her.store_interaction("user1", "hello", "hi", "joy")
 
         mock_memory.extract_and_store.assert_called_once_with("user1", "hello", "hi", "joy")
+
+
+class TestHERStageRunner:
+    """Tests for the bounded HER stage executor."""
+
+    @pytest.mark.asyncio
+    async def test_returns_result_and_records_latency(self):
+        """Test a stage within budget returns its value."""
+        from eva_her import HERStageRunner
+
+        runner = HERStageRunner(workers=2)
+        assert await runner.run("memory", 500, lambda a, b: a + b, 2, 3) == 5
+        stats = runner.get_stats()["stages"]["memory"]
+        assert stats["completed"] == 1
+        assert stats["timeouts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_missed(self):
+        """Test a stage past its budget is dropped without blocking the caller."""
+        import time
+        from eva_her import HERStageRunner, _STAGE_MISSED
+
+        runner = HERStageRunner(workers=1)
+        start = time.perf_counter()
+        assert await runner.run("memory", 20, time.sleep, 0.3) is _STAGE_MISSED
+        assert time.perf_counter() - start < 0.2
+        assert runner.get_stats()["stages"]["memory"]["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_error_returns_missed(self):
+        """Test a failing stage is reported as missed."""
+        from eva_her import HERStageRunner, _STAGE_MISSED
+
+        def boom():
+            raise RuntimeError("chroma down")
+
+        runner = HERStageRunner(workers=1)
+        assert await runner.run("memory", 500, boom) is _STAGE_MISSED
+        assert runner.get_stats()["stages"]["memory"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_backlog_full(self):
+        """Test timed-out stages still hold slots, so overload is rejected early."""
+        import threading
+        from eva_her import HERStageRunner, _STAGE_MISSED
+
+        release = threading.Event()
+        runner = HERStageRunner(workers=1, max_pending=1)
+        assert await runner.run("memory", 10, release.wait) is _STAGE_MISSED
+        assert await runner.run("memory", 10, lambda: "x") is _STAGE_MISSED
+        assert runner.get_stats()["stages"]["memory"]["rejected"] == 1
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert await runner.run("memory", 500, lambda: "x") == "x"
+
+
+class TestProcessMessage:
+    """Tests for the fan-out pre-processing pipeline."""
+
+    def _her(self, **config):
+        from eva_her import EvaHER, HERConfig
+
+        her = EvaHER(HERConfig(**config))
+        her.presence = MagicMock()
+        her.presence.should_stay_silent.return_value = (False, "")
+        her.presence.get_response_delay.return_value = 0.4
+        her.inner_thoughts = MagicMock()
+        return her
+
+    @pytest.mark.asyncio
+    async def test_stages_run_in_parallel(self):
+        """Test voice emotion and memory overlap instead of running back to back."""
+        import time
+        from eva_voice_emotion import VoiceEmotion
+
+        her = self._her(memory_budget_ms=1000, voice_emotion_budget_ms=1000)
+        her.memory = MagicMock()
+        her.memory.get_context_memories.side_effect = lambda u, m: time.sleep(0.15) or {"profile": {}}
+        her.voice_emotion = MagicMock()
+        detected = VoiceEmotion("joy", 0.8, 0.6, 0.7, 0.5, {})
+
+        def detect(audio):
+            time.sleep(0.15)
+            return detected
+
+        with patch("eva_her.detect_voice_emotion_bytes", side_effect=detect), \
+             patch("eva_her.process_for_thoughts", return_value="Hmm..."):
+            start = time.perf_counter()
+            result = await her.process_message("user1", "je suis content", voice_audio=b"wav")
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.28
+        assert result["memory_context"] == {"profile": {}}
+        assert result["thought_prefix"] == "Hmm..."
+        assert result["user_emotion"] == "joy"
+        assert result["missed_stages"] == []
+
+    @pytest.mark.asyncio
+    async def test_thoughts_run_on_loop_with_final_emotion(self):
+        """Test thoughts stay single-threaded and see the voice emotion."""
+        import threading
+        from eva_voice_emotion import VoiceEmotion
+
+        her = self._her()
+        her.voice_emotion = MagicMock()
+        detected = VoiceEmotion("sadness", 0.8, 0.6, -0.7, 0.2, {})
+        seen = {}
+
+        def thoughts(user_id, message, emotion):
+            seen["thread"] = threading.current_thread()
+            seen["emotion"] = emotion
+            return "Oh..."
+
+        with patch("eva_her.detect_voice_emotion_bytes", return_value=detected), \
+             patch("eva_her.process_for_thoughts", side_effect=thoughts):
+            result = await her.process_message("user1", "super", voice_audio=b"wav")
+
+        assert seen == {"thread": threading.current_thread(), "emotion": "sadness"}
+        assert result["thought_prefix"] == "Oh..."
+        assert "thoughts" not in her.stages.get_stats()["stages"]
+
+    @pytest.mark.asyncio
+    async def test_slow_memory_gives_partial_context(self):
+        """Test a memory lookup past its budget doesn't hold the response."""
+        import time
+
+        her = self._her(memory_budget_ms=30)
+        her.memory = MagicMock()
+        her.memory.get_context_memories.side_effect = lambda u, m: time.sleep(0.3)
+
+        with patch("eva_her.process_for_thoughts", return_value=None):
+            start = time.perf_counter()
+            result = await her.process_message("user1", "salut")
+
+        assert time.perf_counter() - start < 0.2
+        assert result["memory_context"] is None
+        assert result["missed_stages"] == ["memory"]
+        assert result["response_delay"] == 0.4
+
+    @pytest.mark.asyncio
+    async def test_voice_emotion_from_bytes(self):
+        """Test voice audio is analysed off-loop and overrides text emotion."""
+        from eva_voice_emotion import VoiceEmotion
+
+        her = self._her()
+        her.voice_emotion = MagicMock()
+        detected = VoiceEmotion("sadness", 0.8, 0.6, -0.7, 0.2, {})
+
+        with patch("eva_her.detect_voice_emotion_bytes", return_value=detected) as detect, \
+             patch("eva_her.process_for_thoughts", return_value=None):
+            result = await her.process_message("user1", "super", voice_audio=b"wav")
+
+        detect.assert_called_once_with(b"wav")
+        assert result["user_emotion"] == "sadness"
+        assert result["voice_emotion_details"]["valence"] == -0.7
+        assert result["response_emotion"] == "tenderness"
+
+    @pytest.mark.asyncio
+    async def test_voice_emotion_miss_falls_back_to_text(self):
+        """Test text emotion is used when voice emotion misses its budget."""
+        import time
+
+        her = self._her(voice_emotion_budget_ms=20)
+        her.voice_emotion = MagicMock()
+
+        with patch("eva_her.detect_voice_emotion_bytes", side_effect=lambda b: time.sleep(0.3)), \
+             patch("eva_her.process_for_thoughts", return_value=None):
+            result = await her.process_message("user1", "je suis triste", voice_audio=b"wav")
+
+        assert result["user_emotion"] == "sadness"
+        assert "voice_emotion" in result["missed_stages"]
+
+    @pytest.mark.asyncio
+    async def test_silence_skips_thoughts(self):
+        """Test thoughts aren't generated (or marked spoken) when Eva stays silent."""
+        her = self._her()
+        her.presence.should_stay_silent.return_value = (True, "empathic")
+
+        with patch("eva_her.process_for_thoughts", return_value="Oh...") as thoughts:
+            result = await her.process_message("user1", "je suis triste")
+
+        thoughts.assert_not_called()
+        assert result["should_stay_silent"] is True
+        assert result["thought_prefix"] is None
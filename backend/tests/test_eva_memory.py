@@ -1785,8 +1785,8 @@ class TestContextCacheOptimization:
         assert len(system._context_cache) <= 100
 
 
-class TestAsyncFallbackBranches:
-    """Tests for async fallback branches when aiofiles is not available (Sprint 539)."""
+class TestAsyncSaveToStore:
+    """Tests for async saves into the per-user store."""
 
     @pytest.fixture
     def temp_storage(self):
@@ -1796,35 +1796,22 @@ class TestAsyncFallbackBranches:
         shutil.rmtree(temp_dir, ignore_errors=True)
 
     @pytest.mark.asyncio
-    async def test_save_profiles_async_fallback(self, temp_storage):
-        """Test _save_profiles_async falls back to sync when AIOFILES_AVAILABLE=False (lines 232-234)."""
+    async def test_save_profiles_async_writes_row(self, temp_storage):
+        """Test _save_profiles_async upserts the profile row."""
         from eva_memory import EvaMemorySystem
-        import eva_memory
 
         system = EvaMemorySystem(storage_path=temp_storage)
         profile = system.get_or_create_profile("fallback_user")
         profile.name = "Fallback Test"
 
-        # Temporarily disable aiofiles
-        original = eva_memory.AIOFILES_AVAILABLE
-        eva_memory.AIOFILES_AVAILABLE = False
-        try:
-            await system._save_profiles_async()
-        finally:
-            eva_memory.AIOFILES_AVAILABLE = original
+        await system._save_profiles_async(["fallback_user"])
 
-        # Verify save worked
-        profiles_path = os.path.join(temp_storage, "profiles.json")
-        assert os.path.exists(profiles_path)
-        with open(profiles_path, 'r') as f:
-            data = json.load(f)
-            assert data["fallback_user"]["name"] == "Fallback Test"
+        assert system.store.get_profile("fallback_user")["name"] == "Fallback Test"
 
     @pytest.mark.asyncio
-    async def test_save_core_memories_async_fallback(self, temp_storage):
-        """Test _save_core_memories_async falls back to sync when AIOFILES_AVAILABLE=False (lines 278-281)."""
+    async def test_save_core_memories_async_writes_row(self, temp_storage):
+        """Test _save_core_memories_async upserts the core memory row."""
         from eva_memory import EvaMemorySystem, MemoryEntry
-        import eva_memory
 
         system = EvaMemorySystem(storage_path=temp_storage)
         # Directly add to core_memories to avoid ChromaDB
@@ -1837,20 +1824,10 @@ class TestAsyncFallbackBranches:
         )
         system.core_memories["core_fallback_user"].append(core_memory)
 
-        # Temporarily disable aiofiles
-        original = eva_memory.AIOFILES_AVAILABLE
-        eva_memory.AIOFILES_AVAILABLE = False
-        try:
-            await system._save_core_memories_async()
-        finally:
-            eva_memory.AIOFILES_AVAILABLE = original
+        await system._save_core_memories_async()
 
-        # Verify save worked
-        core_path = os.path.join(temp_storage, "core_memories.json")
-        assert os.path.exists(core_path)
-        with open(core_path, 'r') as f:
-            data = json.load(f)
-            assert "core_fallback_user" in data
+        stored = system.store.get_core_memories("core_fallback_user")
+        assert [m["content"] for m in stored] == ["Important fallback test memory"]
 
 
 class TestProactiveTopicsGoalBranch:
@@ -1995,3 +1972,397 @@ class TestExceptionHandlingBranches:
         # Should not raise, returns session memories only
         memories = system.retrieve_memories("retrieve_error_user", "query")
         assert isinstance(memories, list)
+
+
+class TestWriteBehindIngestion:
+    """Tests for MemoryIngestor and the read-your-writes retrieval overlay."""
+
+    @pytest.fixture
+    def temp_storage(self):
+        """Create temporary storage directory."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _system(temp_storage, **ingest_options):
+        from eva_memory import EvaMemorySystem, MemoryIngestor
+
+        system = EvaMemorySystem(storage_path=temp_storage)
+        system.collection = MagicMock()
+        system.collection.query.return_value = {"ids": [[]], "documents": [[]], "metadatas": [[]]}
+        options = dict(batch_size=10, max_delay_s=60)
+        options.update(ingest_options)
+        system._ingestor = MemoryIngestor(system._write_to_collection, **options)
+        return system
+
+    def test_retrieve_does_not_flush(self, temp_storage):
+        """Test pending memories are read from the overlay, not forced into the store."""
+        system = self._system(temp_storage)
+        memory = system.add_memory("user", "J'adore le jazz", importance=0.6)
+        system.session_memories.clear()
+
+        memories = system.retrieve_memories("user", "jazz")
+        assert [m.id for m in memories] == [memory.id]
+        system.collection.add.assert_not_called()
+        system.close()
+
+    def test_overlay_filters_user_and_type(self, temp_storage):
+        """Test the overlay only returns the caller's memories of the requested type."""
+        system = self._system(temp_storage)
+        system.add_memory("alice", "Alice aime le thé", memory_type="semantic")
+        system.add_memory("alice", "Alice a couru", memory_type="episodic")
+        system.add_memory("bob", "Bob aime le café", memory_type="semantic")
+
+        pending = system._ingestor.pending("alice", "semantic")
+        assert [m.content for m in pending] == ["Alice aime le thé"]
+        system.close()
+
+    def test_no_duplicates_once_written(self, temp_storage):
+        """Test a memory both in the store and the overlay is returned once."""
+        system = self._system(temp_storage)
+        memory = system.add_memory("user", "Souvenir", importance=0.6)
+        system.collection.query.return_value = {
+            "ids": [[memory.id]],
+            "documents": [["Souvenir"]],
+            "metadatas": [[{"memory_type": "episodic", "importance": "0.6"}]],
+        }
+        memories = system.retrieve_memories("user", "souvenir")
+        assert [m.id for m in memories] == [memory.id]
+        system.close()
+
+    def test_full_batch_written_in_background(self, temp_storage):
+        """Test the worker writes one collection.add per full batch."""
+        system = self._system(temp_storage, batch_size=3)
+        for i in range(3):
+            system.add_memory("user", f"Souvenir {i}")
+
+        assert system.flush_ingest(timeout=2)
+        system.collection.add.assert_called_once()
+        assert len(system.collection.add.call_args.kwargs["ids"]) == 3
+        assert system._ingestor.pending_count() == 0
+        stats = system.get_ingest_stats()
+        assert stats["written"] == 3 and stats["batches"] == 1
+        system.close()
+
+    def test_max_delay_writes_partial_batch(self, temp_storage):
+        """Test a lone memory is written after max_delay_s without a flush."""
+        system = self._system(temp_storage, max_delay_s=0.05)
+        system.add_memory("user", "Souvenir")
+        deadline = time.time() + 2
+        while system._ingestor.pending_count() and time.time() < deadline:
+            time.sleep(0.01)
+        system.collection.add.assert_called_once()
+        system.close()
+
+    def test_failed_write_retried(self, temp_storage):
+        """Test a failed batch stays in the overlay and is written on retry."""
+        system = self._system(temp_storage, retry_s=0.01)
+        system.collection.add.side_effect = [Exception("Vector store error"), None]
+        system.add_memory("user", "Souvenir")
+        assert system.flush_ingest(timeout=2)
+        assert system.collection.add.call_count == 2
+        stats = system.get_ingest_stats()
+        assert stats["retried"] == 1 and stats["written"] == 1 and stats["failed"] == 0
+        assert system._ingestor.pending_count() == 0
+        system.close()
+
+    def test_overlay_kept_between_retries(self, temp_storage):
+        """Test a memory whose write failed is still visible while it waits to retry."""
+        system = self._system(temp_storage, retry_s=60)
+        system.collection.add.side_effect = Exception("Vector store error")
+        memory = system.add_memory("user", "Souvenir")
+        assert not system.flush_ingest(timeout=0.2)
+        assert [m.id for m in system._ingestor.pending("user")] == [memory.id]
+        assert system.get_ingest_stats()["failed"] == 0
+
+    def test_failed_write_dropped_after_max_retries(self, temp_storage):
+        """Test persistent store failures end in a counted drop, not a wedged queue."""
+        system = self._system(temp_storage, max_retries=2, retry_s=0.01)
+        system.collection.add.side_effect = Exception("Vector store error")
+        system.add_memory("user", "Souvenir")
+        assert system.flush_ingest(timeout=2)
+        assert system.collection.add.call_count == 3
+        stats = system.get_ingest_stats()
+        assert stats["failed"] == 1 and stats["retried"] == 2
+        assert system._ingestor.pending_count() == 0
+        system.close()
+
+    def test_close_drains_queue(self, temp_storage):
+        """Test close() writes queued memories before stopping the worker."""
+        system = self._system(temp_storage)
+        system.add_memory("user", "Souvenir")
+        system.close()
+        system.collection.add.assert_called_once()
+
+    def test_precomputed_embeddings(self, temp_storage):
+        """Test an embed callable's vectors are passed to collection.add."""
+        from eva_memory import MemoryIngestor
+
+        system = self._system(temp_storage)
+        system._ingestor = MemoryIngestor(
+            system._write_to_collection,
+            embed=lambda docs: [[float(len(d))] for d in docs],
+            batch_size=1,
+        )
+        system.add_memory("user", "abc")
+        assert system.flush_ingest(timeout=2)
+        assert system.collection.add.call_args.kwargs["embeddings"] == [[3.0]]
+        system.close()
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache and embedding reuse across a turn."""
+
+    @pytest.fixture
+    def temp_storage(self):
+        """Create temporary storage directory."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    class FakeEmbedder:
+        """Embeds text as [len(text)], recording each batch."""
+
+        def __init__(self):
+            self.calls = []
+
+        def __call__(self, texts):
+            self.calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+    def test_embed_many_batches_misses(self):
+        """Test only uncached texts are embedded, in one call."""
+        from eva_memory import EmbeddingCache
+
+        embedder = self.FakeEmbedder()
+        cache = EmbeddingCache(embedder)
+        cache.embed("a")
+        assert cache.embed_many(["a", "bb", "ccc", "bb"]) == [[1.0], [2.0], [3.0], [2.0]]
+        assert embedder.calls == [["a"], ["bb", "ccc"]]
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 3 and stats["batches"] == 2
+
+    def test_lru_eviction(self):
+        """Test the least recently used text is evicted past max_size."""
+        from eva_memory import EmbeddingCache
+
+        cache = EmbeddingCache(self.FakeEmbedder(), max_size=2)
+        cache.embed_many(["a", "b"])
+        cache.get("a")
+        cache.embed("c")
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_get_never_computes(self):
+        """Test get() is a pure lookup."""
+        from eva_memory import EmbeddingCache
+
+        embedder = self.FakeEmbedder()
+        assert EmbeddingCache(embedder).get("a") is None
+        assert embedder.calls == []
+
+    def test_turn_embeds_message_once(self, temp_storage):
+        """Test retrieval and storage of the same message share one embedding."""
+        from eva_memory import EmbeddingCache, EvaMemorySystem
+
+        embedder = self.FakeEmbedder()
+        system = EvaMemorySystem(storage_path=temp_storage)
+        system.collection = MagicMock()
+        system.collection.query.return_value = {"ids": [[]], "documents": [[]], "metadatas": [[]]}
+        system.embeddings = EmbeddingCache(embedder)
+
+        message = "Je suis fatigué aujourd'hui"
+        system.get_context_memories("user", message, use_cache=False)
+        assert system.collection.query.call_args.kwargs["query_embeddings"] == [[float(len(message))]]
+
+        system.extract_and_store("user", message, "Repose-toi bien")
+        assert system.flush_ingest(timeout=2)
+        assert embedder.calls == [[message]]
+        assert system.collection.add.call_args.kwargs["embeddings"] == [[float(len(message))]]
+        system.close()
+
+    def test_without_embedder_store_embeds(self, temp_storage):
+        """Test retrieval falls back to query_texts when no embedder is set."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=temp_storage)
+        system.collection = MagicMock()
+        system.collection.query.return_value = {"ids": [[]], "documents": [[]], "metadatas": [[]]}
+        system.embeddings = None
+        system.retrieve_memories("user", "bonjour")
+        assert system.collection.query.call_args.kwargs["query_texts"] == ["bonjour"]
+        assert system.get_embedding_stats() == {"enabled": False}
+
+
+class TestPerUserStore:
+    """Tests for per-user sharded profile and core-memory storage."""
+
+    @pytest.fixture
+    def temp_storage(self):
+        """Create temporary storage directory."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_profiles_load_lazily(self, temp_storage):
+        """Test a new instance loads nothing until a user is accessed."""
+        from eva_memory import EvaMemorySystem
+
+        system1 = EvaMemorySystem(storage_path=temp_storage)
+        for uid in ("a", "b", "c"):
+            system1.get_or_create_profile(uid)
+
+        system2 = EvaMemorySystem(storage_path=temp_storage)
+        assert len(system2.user_profiles) == 0
+        assert "b" in system2.user_profiles
+        assert system2.user_profiles["b"].user_id == "b"
+        assert sorted(dict.keys(system2.user_profiles)) == ["b"]
+        assert sorted(system2.known_user_ids()) == ["a", "b", "c"]
+
+    def test_flush_writes_only_dirty_users(self, temp_storage):
+        """Test a flush writes one row per dirty user, not every user."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=temp_storage)
+        for i in range(20):
+            system.get_or_create_profile(f"user{i}", immediate_save=False)
+        system.flush_pending_saves()
+        written = system.store.stats["rows_written"]
+
+        system.update_profile("user3", immediate_save=False, name="Trois")
+        system.flush_pending_saves()
+        assert system.store.stats["rows_written"] - written == 1
+        assert system.store.get_profile("user3")["name"] == "Trois"
+
+    def test_core_memories_persist_per_user(self, temp_storage):
+        """Test dirty core memories are flushed and reloaded for their user."""
+        from eva_memory import EvaMemorySystem
+
+        system1 = EvaMemorySystem(storage_path=temp_storage)
+        system1.add_memory("user", "Important", memory_type="semantic", importance=0.9)
+        system1.flush_pending_saves()
+
+        system2 = EvaMemorySystem(storage_path=temp_storage)
+        assert [m.content for m in system2.core_memories.get("user", [])] == ["Important"]
+        assert system2.core_memories.get("nobody", []) == []
+        system2.core_memories["nobody"].append("x")
+        assert system2.core_memories["nobody"] == ["x"]
+
+    def test_missing_user_looked_up_once(self, temp_storage):
+        """Test repeated lookups of an unknown user don't hit the store again."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=temp_storage)
+        reads = system.store.stats["reads"]
+        for _ in range(5):
+            assert system.user_profiles.get("ghost") is None
+        assert system.store.stats["reads"] - reads == 1
+
+    def test_migrates_legacy_json(self, temp_storage):
+        """Test profiles.json and core_memories.json are imported once."""
+        from eva_memory import EvaMemorySystem
+
+        with open(os.path.join(temp_storage, "profiles.json"), "w") as f:
+            json.dump({"old": {"user_id": "old", "name": "Ancien"}}, f)
+        with open(os.path.join(temp_storage, "core_memories.json"), "w") as f:
+            json.dump({"old": [{"id": "m1", "content": "Souvenir", "memory_type": "semantic",
+                                "timestamp": 1.0}]}, f)
+
+        system = EvaMemorySystem(storage_path=temp_storage)
+        assert system.user_profiles["old"].name == "Ancien"
+        assert system.core_memories["old"][0].content == "Souvenir"
+        assert not os.path.exists(os.path.join(temp_storage, "profiles.json"))
+        assert os.path.exists(os.path.join(temp_storage, "profiles.json.migrated"))
+
+
+class TestContextCache:
+    """Tests for the TTL + LRU memory context cache."""
+
+    def test_normalized_message_key(self):
+        """Test case and whitespace differences share an entry; long prefixes don't."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache()
+        cache.put("u", "Salut  Eva", {"ctx": 1})
+        assert cache.get("u", "salut eva ") == {"ctx": 1}
+        prefix = "x" * 60
+        cache.put("u", prefix + "a", {"ctx": "a"})
+        assert cache.get("u", prefix + "b") is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache(max_size=2)
+        cache.put("u", "a", {"a": 1})
+        cache.put("u", "b", {"b": 1})
+        cache.get("u", "a")
+        cache.put("u", "c", {"c": 1})
+        assert cache.get("u", "b") is None
+        assert cache.get("u", "a") == {"a": 1}
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are misses."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache(ttl_s=0.0)
+        cache.put("u", "a", {"a": 1})
+        assert cache.get("u", "a") is None
+        assert cache.get_stats()["expired"] == 1
+        assert len(cache) == 0
+
+    def test_invalidate_single_user(self):
+        """Test invalidation drops only that user's entries."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache()
+        cache.put("alice", "a", {"a": 1})
+        cache.put("bob", "a", {"b": 1})
+        cache.invalidate("alice")
+        assert cache.get("alice", "a") is None
+        assert cache.get("bob", "a") == {"b": 1}
+
+    def test_stale_build_not_stored(self):
+        """Test a context built before an invalidation is discarded on put."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache()
+        generation = cache.generation("u")
+        cache.invalidate("u")
+        cache.put("u", "a", {"stale": True}, generation)
+        assert cache.get("u", "a") is None
+
+    def test_hit_rate(self):
+        """Test hit-rate metrics."""
+        from eva_memory import ContextCache
+
+        cache = ContextCache()
+        cache.get("u", "a")
+        cache.put("u", "a", {})
+        cache.get("u", "a")
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+    def test_new_memory_invalidates_user(self, tmp_path):
+        """Test adding a memory makes the next context build see it."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=str(tmp_path))
+        first = system.get_context_memories("u", "parle-moi de jazz")
+        system.add_memory("u", "Adore le jazz", memory_type="semantic", importance=0.9)
+        second = system.get_context_memories("u", "parle-moi de jazz")
+        assert first is not second
+        assert "Adore le jazz" in second["context_string"]
+        assert system.get_context_memories("u", "Parle-moi de jazz") is second
+
+    @pytest.mark.asyncio
+    async def test_sync_and_async_share_cache(self, tmp_path):
+        """Test a context built by the async path is reused by the sync path."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=str(tmp_path))
+        built = await system.get_context_memories_async("u", "bonjour")
+        assert system.get_context_memories("u", "bonjour") is built
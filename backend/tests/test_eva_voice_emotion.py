@@ -991,3 +991,130 @@ class TestEdgeCases:
         # Should have history
         assert len(detector._pitch_history) <= 5
         assert len(detector._energy_history) <= 5
+
+
+# ============================================================================
+# Single-STFT / Batched Feature Pipeline Tests
+# ============================================================================
+
+def _voiced_clip(seconds, f0=180.0, seed=0):
+    """Vibrato tone with a syllable-like envelope plus a little noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * 16000)) / 16000
+    freq = f0 * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+    envelope = (0.5 + 0.5 * np.sin(2 * np.pi * 2 * t)) ** 2
+    audio = np.sin(2 * np.pi * np.cumsum(freq) / 16000) * envelope
+    return (audio + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+class TestBatchedFeatureExtraction:
+    """Tests for the single-STFT, batchable feature pipeline."""
+
+    def test_batch_without_librosa(self):
+        """Test every clip maps to None without librosa."""
+        from eva_voice_emotion import VoiceEmotionDetector
+
+        with patch("eva_voice_emotion.LIBROSA_AVAILABLE", False):
+            result = VoiceEmotionDetector().extract_features_batch([np.zeros(16000)] * 3)
+        assert result == [None, None, None]
+
+    def test_matches_librosa_helpers(self):
+        """Test features equal librosa's per-feature helpers on one clip."""
+        from eva_voice_emotion import VoiceEmotionDetector, LIBROSA_AVAILABLE
+
+        if not LIBROSA_AVAILABLE:
+            pytest.skip("librosa not available")
+        import librosa
+
+        audio = _voiced_clip(1.5)
+        audio = audio / np.max(np.abs(audio))
+        features = VoiceEmotionDetector().extract_features(audio)
+
+        rms = librosa.feature.rms(y=audio)[0]
+        assert features.energy_mean == pytest.approx(np.mean(rms), rel=1e-4)
+        assert features.energy_std == pytest.approx(np.std(rms), rel=1e-4)
+        assert features.pause_ratio == pytest.approx(np.mean(rms < 0.02))
+        assert features.spectral_centroid == pytest.approx(
+            np.mean(librosa.feature.spectral_centroid(y=audio, sr=16000)), rel=1e-4)
+        assert features.spectral_rolloff == pytest.approx(
+            np.mean(librosa.feature.spectral_rolloff(y=audio, sr=16000)), rel=1e-4)
+        assert features.zero_crossing_rate == pytest.approx(
+            np.mean(librosa.feature.zero_crossing_rate(audio)), rel=1e-2)
+        np.testing.assert_allclose(
+            features.mfcc_mean,
+            np.mean(librosa.feature.mfcc(y=audio, sr=16000, n_mfcc=13), axis=1),
+            atol=1e-3,
+        )
+        onsets = librosa.onset.onset_detect(y=audio, sr=16000)
+        assert features.speech_rate == pytest.approx(len(onsets) / 1.5)
+
+        pitches, magnitudes = librosa.piptrack(y=audio, sr=16000, fmin=50, fmax=500)
+        best = pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+        assert features.pitch_mean == pytest.approx(np.mean(best[best > 0]), rel=1e-4)
+
+    def test_batch_matches_single(self):
+        """Test padding clips into one batch doesn't change their features."""
+        from eva_voice_emotion import VoiceEmotionDetector, LIBROSA_AVAILABLE
+
+        if not LIBROSA_AVAILABLE:
+            pytest.skip("librosa not available")
+
+        detector = VoiceEmotionDetector()
+        clips = [_voiced_clip(1.3, 150, 1), _voiced_clip(2.7, 220, 2), _voiced_clip(0.9, 120, 3)]
+        batch = detector.extract_features_batch(clips)
+
+        for clip, batched in zip(clips, batch):
+            single = detector.extract_features(clip)
+            for name in ("pitch_mean", "pitch_std", "pitch_range", "energy_mean",
+                         "speech_rate", "pause_ratio", "spectral_centroid",
+                         "spectral_rolloff", "zero_crossing_rate"):
+                assert getattr(batched, name) == pytest.approx(getattr(single, name), rel=1e-4)
+            np.testing.assert_allclose(batched.mfcc_mean, single.mfcc_mean, atol=1e-3)
+
+    def test_batch_keeps_positions_of_short_clips(self):
+        """Test clips too short to analyse stay None at their own index."""
+        from eva_voice_emotion import VoiceEmotionDetector, LIBROSA_AVAILABLE
+
+        if not LIBROSA_AVAILABLE:
+            pytest.skip("librosa not available")
+
+        result = VoiceEmotionDetector().extract_features_batch(
+            [np.zeros(1000, dtype=np.float32), _voiced_clip(1.0), np.zeros(10, dtype=np.float32)]
+        )
+        assert result[0] is None and result[2] is None
+        assert result[1] is not None
+
+    def test_silent_clip_uses_default_pitch(self):
+        """Test a clip with no pitched frame falls back to the default pitch."""
+        from eva_voice_emotion import VoiceEmotionDetector, LIBROSA_AVAILABLE
+
+        if not LIBROSA_AVAILABLE:
+            pytest.skip("librosa not available")
+
+        features = VoiceEmotionDetector().extract_features(np.zeros(16000, dtype=np.float32))
+        assert features.pitch_mean == 150.0
+        assert features.pause_ratio == 1.0
+
+    def test_detect_emotion_batch_updates_baseline_in_order(self):
+        """Test batched detection matches sequential detect_emotion calls."""
+        from eva_voice_emotion import VoiceEmotionDetector, LIBROSA_AVAILABLE
+
+        if not LIBROSA_AVAILABLE:
+            pytest.skip("librosa not available")
+
+        clips = [_voiced_clip(1.0, f0, seed) for seed, f0 in enumerate((140, 180, 220, 160))]
+        sequential = VoiceEmotionDetector()
+        expected = [sequential.detect_emotion(clip) for clip in clips]
+        batched = VoiceEmotionDetector()
+        result = batched.detect_emotion_batch(clips)
+
+        assert [r.emotion for r in result] == [e.emotion for e in expected]
+        assert list(batched._pitch_history) == pytest.approx(list(sequential._pitch_history))
+
+    def test_detect_voice_emotion_batch(self):
+        """Test the module-level batch helper returns one result per clip."""
+        from eva_voice_emotion import detect_voice_emotion_batch, VoiceEmotion
+
+        result = detect_voice_emotion_batch([np.zeros(100, dtype=np.float32)] * 2)
+        assert len(result) == 2
+        assert all(isinstance(r, VoiceEmotion) for r in result)
@@ -13,11 +13,17 @@ Tests:
 - Device selection (4 tests)
 - Lameenc encoder (5 tests)
 - Edge cases (8 tests)
+- Micro-batching scheduler (10 tests)
+- Per-thread MP3 encoder pool and PCM output (6 tests)
 """
 
+import asyncio
 import pytest
 import sys
 import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from unittest.mock import MagicMock, patch, AsyncMock
 import numpy as np
 import io
@@ -63,8 +69,9 @@ class TestModuleState:
         assert isinstance(ft._tts_executor, ThreadPoolExecutor)
 
     def test_tts_executor_max_workers(self):
-        """Test _tts_executor has 2 max workers."""
-        assert ft._tts_executor._max_workers == 2
+        """Test _tts_executor is sized by TTS_WORKERS."""
+        assert ft._tts_executor._max_workers == ft.TTS_WORKERS
+        assert ft.TTS_WORKERS >= 1
 
     def test_tts_executor_thread_name_prefix(self):
         """Test _tts_executor thread name prefix."""
@@ -176,8 +183,8 @@ class TestInitFastTts:
 
     def test_init_pre_initializes_lameenc(self):
         """Test init attempts to pre-initialize lameenc."""
-        # _lameenc_encoder should exist as module variable
-        assert hasattr(ft, '_lameenc_encoder')
+        # _mp3_encoder_pool should exist as module variable
+        assert hasattr(ft, '_mp3_encoder_pool')
 
 
 class TestFastTts:
@@ -427,12 +434,12 @@ class TestFastTtsMp3:
         original = ft._initialized
         original_device = ft._device
         original_stream = ft._cuda_stream
-        original_encoder = ft._lameenc_encoder
+        original_encoder = ft._mp3_encoder_pool
         original_sr = ft._sample_rate
         ft._initialized = True
         ft._device = "cpu"
         ft._cuda_stream = None
-        ft._lameenc_encoder = None
+        ft._mp3_encoder_pool = None
         ft._sample_rate = 16000
 
         mock_inputs = MagicMock()
@@ -453,12 +460,12 @@ class TestFastTtsMp3:
         ft._initialized = original
         ft._device = original_device
         ft._cuda_stream = original_stream
-        ft._lameenc_encoder = original_encoder
+        ft._mp3_encoder_pool = original_encoder
         ft._sample_rate = original_sr
 
     def test_fast_tts_mp3_uses_pre_initialized_encoder(self):
         """Test fast_tts_mp3 uses pre-initialized lameenc encoder."""
-        assert hasattr(ft, '_lameenc_encoder')
+        assert hasattr(ft, '_mp3_encoder_pool')
 
     @patch.object(ft, '_tokenizer')
     @patch.object(ft, '_model')
@@ -468,12 +475,12 @@ class TestFastTtsMp3:
         original = ft._initialized
         original_device = ft._device
         original_stream = ft._cuda_stream
-        original_encoder = ft._lameenc_encoder
+        original_encoder = ft._mp3_encoder_pool
         original_sr = ft._sample_rate
         ft._initialized = True
         ft._device = "cpu"
         ft._cuda_stream = None
-        ft._lameenc_encoder = None
+        ft._mp3_encoder_pool = None
         ft._sample_rate = 16000
 
         mock_inputs = MagicMock()
@@ -495,7 +502,7 @@ class TestFastTtsMp3:
         ft._initialized = original
         ft._device = original_device
         ft._cuda_stream = original_stream
-        ft._lameenc_encoder = original_encoder
+        ft._mp3_encoder_pool = original_encoder
         ft._sample_rate = original_sr
 
     @patch.object(ft, '_tokenizer')
@@ -506,12 +513,12 @@ class TestFastTtsMp3:
         original = ft._initialized
         original_device = ft._device
         original_stream = ft._cuda_stream
-        original_encoder = ft._lameenc_encoder
+        original_encoder = ft._mp3_encoder_pool
         original_sr = ft._sample_rate
         ft._initialized = True
         ft._device = "cpu"
         ft._cuda_stream = None
-        ft._lameenc_encoder = None
+        ft._mp3_encoder_pool = None
         ft._sample_rate = 16000
 
         mock_inputs = MagicMock()
@@ -533,7 +540,7 @@ class TestFastTtsMp3:
         ft._initialized = original
         ft._device = original_device
         ft._cuda_stream = original_stream
-        ft._lameenc_encoder = original_encoder
+        ft._mp3_encoder_pool = original_encoder
         ft._sample_rate = original_sr
 
     def test_fast_tts_mp3_with_empty_string(self):
@@ -562,7 +569,7 @@ class TestFastTtsMp3:
     @patch('fast_tts.lameenc', create=True)
     def test_fast_tts_mp3_fallback_encoder_creation(self, mock_lameenc):
         """Test fast_tts_mp3 creates fallback encoder if global not available."""
-        # If _lameenc_encoder is None, it should try to create new encoder
+        # If _mp3_encoder_pool is None, it should try to create new encoder
         mock_encoder = MagicMock()
         mock_encoder.encode.return_value = b'mp3data'
         mock_encoder.flush.return_value = b''
@@ -572,7 +579,12 @@ class TestFastTtsMp3:
 
 
 class TestAsyncWrappers:
-    """Tests for async wrapper functions."""
+    """Tests for async wrapper functions (unbatched path)."""
+
+    @pytest.fixture(autouse=True)
+    def no_batcher(self):
+        with patch.object(ft, '_batcher', None):
+            yield
 
     @pytest.mark.asyncio
     async def test_async_fast_tts_calls_fast_tts(self):
@@ -639,9 +651,9 @@ class TestCudaStream:
         stream = ft._cuda_stream
         assert stream is None or hasattr(stream, 'synchronize')
 
-    def test_lameenc_encoder_is_defined(self):
-        """Test _lameenc_encoder is defined."""
-        assert hasattr(ft, '_lameenc_encoder')
+    def test_mp3_encoder_pool_is_defined(self):
+        """Test _mp3_encoder_pool is defined."""
+        assert hasattr(ft, '_mp3_encoder_pool')
 
     @patch('fast_tts.torch')
     def test_cuda_stream_created_on_cuda_device(self, mock_torch):
@@ -812,7 +824,7 @@ class TestEdgeCases:
     def test_concurrent_calls(self):
         """Test thread safety with concurrent calls."""
         # ThreadPoolExecutor should handle concurrent access
-        assert ft._tts_executor._max_workers == 2
+        assert ft._tts_executor._max_workers == ft.TTS_WORKERS
 
     def test_module_reimport_safe(self):
         """Test module can be safely reimported."""
@@ -899,3 +911,268 @@ class TestWavOutput:
         assert test_int16.dtype == np.int16
         assert test_int16[0] > 0
         assert test_int16[1] < 0
+
+
+class TestTTSBatcher:
+    """Tests for the TTSBatcher micro-batching scheduler."""
+
+    def test_single_request_resolves(self):
+        """Test a single request is synthesized and resolved."""
+        batcher = ft.TTSBatcher(lambda texts: [np.ones(len(t)) for t in texts], max_batch_size=4, max_wait_ms=1)
+        batcher.start()
+        try:
+            audio = batcher.submit("abc").result(timeout=2)
+            assert len(audio) == 3
+        finally:
+            batcher.stop()
+
+    def test_concurrent_requests_share_one_batch(self):
+        """Test requests queued within the wait window run in one forward."""
+        calls = []
+
+        def synthesize(texts):
+            calls.append(list(texts))
+            return [np.full(len(t), i, dtype=np.float32) for i, t in enumerate(texts)]
+
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=4, max_wait_ms=200)
+        futures = [batcher.submit(t) for t in ["a", "bb", "ccc"]]
+        batcher.start()
+        try:
+            results = [f.result(timeout=2) for f in futures]
+        finally:
+            batcher.stop()
+
+        assert calls == [["a", "bb", "ccc"]]
+        assert [len(r) for r in results] == [1, 2, 3]
+        assert results[2][0] == 2
+
+    def test_batch_respects_max_size(self):
+        """Test batches never exceed max_batch_size."""
+        sizes = []
+
+        def synthesize(texts):
+            sizes.append(len(texts))
+            return [np.zeros(1) for _ in texts]
+
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit(str(i)) for i in range(5)]
+        batcher.start()
+        try:
+            for f in futures:
+                f.result(timeout=2)
+        finally:
+            batcher.stop()
+
+        assert max(sizes) <= 2
+        assert sum(sizes) == 5
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test a failed forward fails all futures of the batch."""
+        def synthesize(texts):
+            raise RuntimeError("forward failed")
+
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=4, max_wait_ms=50)
+        futures = [batcher.submit("a"), batcher.submit("b")]
+        batcher.start()
+        try:
+            for f in futures:
+                with pytest.raises(RuntimeError):
+                    f.result(timeout=2)
+        finally:
+            batcher.stop()
+
+        assert batcher.stats["errors"] == 1
+
+    def test_stats_report_fill_and_delay(self):
+        """Test stats include batch fill and queue delay."""
+        batcher = ft.TTSBatcher(lambda texts: [np.zeros(1) for _ in texts], max_batch_size=4, max_wait_ms=50)
+        futures = [batcher.submit("a"), batcher.submit("b")]
+        batcher.start()
+        try:
+            for f in futures:
+                f.result(timeout=2)
+        finally:
+            batcher.stop()
+
+        stats = batcher.get_stats()
+        assert stats["items"] == 2
+        assert stats["avg_batch_fill"] > 0
+        assert stats["avg_queue_delay_ms"] >= 0
+        assert stats["max_batch_size"] == 4
+
+    def test_cancelled_request_skipped(self):
+        """Test a request cancelled while queued is dropped and the worker survives."""
+        calls = []
+
+        def synthesize(texts):
+            calls.append(list(texts))
+            return [np.zeros(1) for _ in texts]
+
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=4, max_wait_ms=50)
+        cancelled, kept = batcher.submit("a"), batcher.submit("b")
+        assert cancelled.cancel()
+        batcher.start()
+        try:
+            kept.result(timeout=2)
+            batcher.submit("c").result(timeout=2)
+            assert batcher._thread.is_alive()
+        finally:
+            batcher.stop()
+
+        assert calls == [["b"], ["c"]]
+        assert batcher.stats["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_batched_tts_does_not_kill_worker(self):
+        """Test a cancelled TTS task (barge-in) leaves the batcher serving."""
+        def synthesize(texts):
+            time.sleep(0.05)
+            return [np.zeros(10, dtype=np.float32) for _ in texts]
+
+        original, original_init = ft._batcher, ft._initialized
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=2, max_wait_ms=0)
+        batcher.start()
+        ft._batcher, ft._initialized = batcher, True
+        try:
+            with patch.object(ft, '_to_wav_bytes', return_value=b'wav'):
+                task = asyncio.create_task(ft.async_fast_tts("Hello"))
+                await asyncio.sleep(0.02)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                await asyncio.sleep(0.06)
+                assert batcher._thread.is_alive()
+                assert await asyncio.wait_for(ft.async_fast_tts("Again"), 2) == b'wav'
+        finally:
+            ft._batcher, ft._initialized = original, original_init
+            batcher.stop()
+
+    def test_sync_synthesize_times_out(self):
+        """Test the blocking path gives up instead of waiting forever."""
+        release = threading.Event()
+
+        def synthesize(texts):
+            release.wait(2)
+            return [np.zeros(1) for _ in texts]
+
+        original, original_init = ft._batcher, ft._initialized
+        batcher = ft.TTSBatcher(synthesize, max_batch_size=1, max_wait_ms=0)
+        batcher.start()
+        ft._batcher, ft._initialized = batcher, True
+        try:
+            with patch.object(ft, 'TTS_BATCH_TIMEOUT_S', 0.05):
+                batcher.submit("busy")  # Holds the worker
+                with pytest.raises(FutureTimeoutError):
+                    ft._synthesize("late")
+        finally:
+            release.set()
+            ft._batcher, ft._initialized = original, original_init
+            batcher.stop()
+
+    def test_get_batch_stats_when_disabled(self):
+        """Test get_batch_stats reports disabled without a batcher."""
+        original = ft._batcher
+        ft._batcher = None
+        assert ft.get_batch_stats() == {"enabled": False}
+        ft._batcher = original
+
+    @pytest.mark.asyncio
+    async def test_async_fast_tts_uses_batcher(self):
+        """Test async_fast_tts routes through the batcher when enabled."""
+        original = ft._batcher
+        original_init = ft._initialized
+        batcher = ft.TTSBatcher(lambda texts: [np.zeros(100, dtype=np.float32) for _ in texts], max_batch_size=2, max_wait_ms=1)
+        batcher.start()
+        ft._batcher = batcher
+        ft._initialized = True
+        try:
+            with patch.object(ft, '_to_wav_bytes', return_value=b'wav') as mock_encode:
+                result = await ft.async_fast_tts("Hello")
+            assert result == b'wav'
+            assert len(mock_encode.call_args[0][0]) == 100
+        finally:
+            ft._batcher = original
+            ft._initialized = original_init
+            batcher.stop()
+
+
+class _FakeEncoder:
+    """lameenc.Encoder stand-in that, like the real one, is unusable after flush()."""
+
+    def __init__(self):
+        self.flushed = False
+        self.settings = {}
+
+    def set_bit_rate(self, value):
+        self.settings["bit_rate"] = value
+
+    def set_in_sample_rate(self, value):
+        self.settings["sample_rate"] = value
+
+    def set_channels(self, value):
+        self.settings["channels"] = value
+
+    def set_quality(self, value):
+        self.settings["quality"] = value
+
+    def encode(self, pcm):
+        if self.flushed:
+            raise RuntimeError("Encoder not initialised")
+        return bytearray(b"mp3:" + pcm[:4])
+
+    def flush(self):
+        self.flushed = True
+        return bytearray(b"|")
+
+
+class TestMP3EncoderPool:
+    """Tests for per-thread MP3 encoders and the raw PCM path."""
+
+    @pytest.fixture
+    def pool(self):
+        fake_lameenc = MagicMock()
+        fake_lameenc.Encoder.side_effect = _FakeEncoder
+        with patch.dict(sys.modules, {"lameenc": fake_lameenc}):
+            yield ft.MP3EncoderPool(16000)
+
+    def test_encoder_reusable_across_calls(self, pool):
+        """Test a thread can encode repeatedly despite single-use encoders."""
+        assert pool.encode(b"\x01\x02\x03\x04") == b"mp3:\x01\x02\x03\x04|"
+        assert pool.encode(b"\x05\x06\x07\x08") == b"mp3:\x05\x06\x07\x08|"
+        stats = pool.get_stats()
+        assert stats["encodes"] == 2
+        assert stats["threads"] == 1
+
+    def test_threads_get_distinct_encoders(self, pool):
+        """Test concurrent threads never share an encoder."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=3)
+        try:
+            results = list(executor.map(lambda i: pool.encode(bytes([i]) * 4), range(12)))
+        finally:
+            executor.shutdown(wait=True)
+        assert results == [b"mp3:" + bytes([i]) * 4 + b"|" for i in range(12)]
+        assert 1 <= pool.get_stats()["threads"] <= 3
+
+    def test_encoder_settings(self, pool):
+        """Test pooled encoders use the fast mono settings."""
+        encoder = pool._new_encoder()
+        assert encoder.settings == {"bit_rate": 48, "sample_rate": 16000, "channels": 1, "quality": 9}
+
+    def test_to_pcm_bytes_is_normalized_int16(self):
+        """Test raw PCM output is peak-normalized little-endian int16."""
+        pcm = ft._to_pcm_bytes(np.array([0.0, 0.5, -1.0], dtype=np.float32))
+        samples = np.frombuffer(pcm, dtype="<i2")
+        assert len(pcm) == 6
+        assert samples[2] == -int(0.95 * 32767)
+
+    def test_fast_tts_pcm_not_initialized(self):
+        """Test fast_tts_pcm returns None when init fails."""
+        with patch.object(ft, '_initialized', False), patch.object(ft, 'init_fast_tts', return_value=False):
+            assert ft.fast_tts_pcm("Bonjour") is None
+
+    def test_get_encoder_stats(self):
+        """Test encoder stats report the worker count."""
+        with patch.object(ft, '_mp3_encoder_pool', None):
+            assert ft.get_encoder_stats() == {"workers": ft.TTS_WORKERS, "mp3": None}
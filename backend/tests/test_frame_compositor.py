@@ -0,0 +1,137 @@
+"""
+Tests for frame_compositor.py
+Region-only compositing and parallel JPEG encoding of lip-sync frames
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import frame_compositor
+from frame_compositor import FrameCompositor
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """Replace the JPEG encoder with one recording what it was given."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_encode(image, quality=85):
+        with lock:
+            calls.append((image.shape, quality, threading.current_thread().name))
+        return bytes([int(image[0, 0, 0]), quality]) + image.tobytes()
+
+    monkeypatch.setattr(frame_compositor, "encode_jpeg", fake_encode)
+    return calls
+
+
+def _background(height=40, width=60):
+    return np.full((height, width, 3), 7, dtype=np.uint8)
+
+
+def _patch(value, size=(10, 20)):
+    return np.full((size[0], size[1], 3), value, dtype=np.uint8)
+
+
+class TestFrameCompositor:
+    """Tests for FrameCompositor."""
+
+    def test_composite_only_touches_box(self):
+        """Test the patch lands in the box and the background is left intact."""
+        background = _background()
+        compositor = FrameCompositor(background, (5, 10, 25, 20))
+        frame = compositor.composite(_patch(200))
+        assert (frame[10:20, 5:25] == 200).all()
+        frame[10:20, 5:25] = 7
+        assert (frame == 7).all()
+        assert (background == 7).all()
+
+    def test_canvas_reused_per_thread(self):
+        """Test frames on one thread reuse one canvas instead of copying the background."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20))
+        first = compositor.composite(_patch(1))
+        second = compositor.composite(_patch(2))
+        assert first is second
+        assert compositor.get_stats()["canvases"] == 1
+
+    def test_float_patch_cast(self):
+        """Test model output in float is cast to uint8."""
+        compositor = FrameCompositor(_background(), (0, 0, 20, 10))
+        frame = compositor.composite(_patch(0).astype(np.float32) + 99.7)
+        assert frame.dtype == np.uint8 and frame[0, 0, 0] == 99
+
+    def test_box_clamped_to_frame(self):
+        """Test a box hanging off the frame is clipped."""
+        compositor = FrameCompositor(_background(), (-5, 30, 20, 50))
+        assert compositor.box == (0, 30, 20, 40)
+        assert compositor.patch_box() == {"x": 0, "y": 30, "w": 20, "h": 10, "width": 60, "height": 40}
+
+    def test_empty_box_rejected(self):
+        """Test a box outside the frame raises."""
+        with pytest.raises(ValueError):
+            FrameCompositor(_background(), (70, 0, 90, 10))
+
+    def test_encode_preserves_order(self, encoded):
+        """Test parallel encoding returns JPEGs in patch order."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20))
+        jpegs = compositor.encode([_patch(i) for i in range(16)])
+        assert len(jpegs) == 16
+        for i, jpeg in enumerate(jpegs):
+            frame = np.frombuffer(jpeg[2:], dtype=np.uint8).reshape(40, 60, 3)
+            assert (frame[10:20, 5:25] == i).all()
+        assert {shape for shape, _, _ in encoded} == {(40, 60, 3)}
+        assert all(name.startswith("frame-encode") for _, _, name in encoded)
+
+    def test_patch_mode_encodes_box_only(self, encoded):
+        """Test patch mode encodes the face box, not the frame."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20), quality=70)
+        jpegs = compositor.encode([_patch(3), _patch(4)], mode="patch")
+        assert [shape for shape, _, _ in encoded] == [(10, 20, 3)] * 2
+        assert [jpeg[0] for jpeg in jpegs] == [3, 4]
+        assert compositor.get_stats() == {"frames": 0, "patches": 2, "canvases": 0}
+
+    def test_quality_override(self, encoded):
+        """Test a per-call quality overrides the compositor default."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20), quality=70)
+        compositor.render(_patch(1))
+        compositor.render(_patch(1), quality=95)
+        assert [quality for _, quality, _ in encoded] == [70, 95]
+
+    def test_background_encoded_once(self, encoded):
+        """Test the static background is encoded on first use only."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20))
+        assert compositor.background_jpeg() is compositor.background_jpeg()
+        assert len(encoded) == 1
+
+    def test_unknown_mode(self):
+        """Test an unknown wire mode is rejected."""
+        compositor = FrameCompositor(_background(), (5, 10, 25, 20))
+        with pytest.raises(ValueError):
+            compositor.encode([_patch(0)], mode="video")
+
+
+class TestResolveMode:
+    """Tests for resolve_mode, shared by the three lip-sync services."""
+
+    def test_known_modes(self):
+        """Test supported modes pass through without an error."""
+        assert frame_compositor.resolve_mode("frame") == ("frame", None)
+        assert frame_compositor.resolve_mode("patch") == ("patch", None)
+
+    def test_unknown_mode_falls_back_to_frame(self):
+        """Test an unknown mode is reported and replaced by full frames."""
+        mode, error = frame_compositor.resolve_mode("video")
+        assert mode == "frame"
+        assert "video" in error
+
+
+def test_avatar_engine_copy_in_sync():
+    """Test avatar-engine ships the same module (its image only contains avatar-engine/)."""
+    here = Path(frame_compositor.__file__)
+    copy = here.parent.parent / "avatar-engine" / "frame_compositor.py"
+    if not copy.exists():
+        pytest.skip("avatar-engine not checked out next to backend")
+    assert copy.read_bytes() == here.read_bytes(), "Update avatar-engine/frame_compositor.py too"
@@ -0,0 +1,138 @@
+"""
+Tests for lipsync_cache.py
+Content-hashed disk cache of lip-sync window features and frames
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from lipsync_cache import LipSyncCache, content_digest, window_key
+
+
+def _window(seed, n=64):
+    return np.random.default_rng(seed).standard_normal(n).astype(np.float32)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LipSyncCache(directory=str(tmp_path), budget_mb=1)
+
+
+class TestWindowKey:
+    """Tests for window_key."""
+
+    def test_same_audio_same_key(self):
+        """Test identical windows share an address regardless of array identity."""
+        assert window_key(_window(1), 0) == window_key(_window(1).copy(), 0)
+
+    def test_key_depends_on_content_context_and_version(self):
+        """Test samples, context length and pipeline version all change the key."""
+        base = window_key(_window(1), 0, "v1")
+        assert window_key(_window(2), 0, "v1") != base
+        assert window_key(_window(1), 16, "v1") != base
+        assert window_key(_window(1), 0, "v2") != base
+
+
+class TestContentDigest:
+    """Tests for content_digest."""
+
+    def test_digest_tracks_content(self):
+        """Test a changed latent, frame or config value changes the digest."""
+        latent, frame = _window(1), np.zeros((4, 4, 3), dtype=np.uint8)
+        base = content_digest(latent, frame, (1, 2, 3, 4), "q85")
+        assert content_digest(latent.copy(), frame.copy(), (1, 2, 3, 4), "q85") == base
+        assert content_digest(_window(2), frame, (1, 2, 3, 4), "q85") != base
+        assert content_digest(latent, frame + 1, (1, 2, 3, 4), "q85") != base
+        assert content_digest(latent, frame, (1, 2, 3, 5), "q85") != base
+        assert content_digest(latent, frame, (1, 2, 3, 4), "q90") != base
+
+
+class TestLipSyncCache:
+    """Tests for LipSyncCache."""
+
+    def test_features_round_trip(self, cache):
+        """Test features come back with their dtype and shape."""
+        features = np.random.default_rng(0).standard_normal((8, 50, 384)).astype(np.float16)
+        key = window_key(_window(1), 0)
+        assert cache.get_features(key) is None
+        cache.put_features(key, features)
+        restored = cache.get_features(key)
+        assert restored.dtype == np.float16
+        np.testing.assert_array_equal(restored, features)
+        assert cache.get_stats()["feature_hits"] == 1
+
+    def test_frames_per_avatar_and_mode(self, cache):
+        """Test rendered frames are keyed by avatar and output mode."""
+        key = window_key(_window(1), 0)
+        frames = [b"\xff\xd8jpeg-0", b"", b"\xff\xd8jpeg-2"]
+        cache.put_frames(key, "eva", "frame", frames)
+        assert cache.get_frames(key, "eva", "frame") == frames
+        assert cache.get_frames(key, "eva", "patch") is None
+        assert cache.get_frames(key, "adam", "frame") is None
+        assert cache.get_stats()["frame_hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+    def test_frames_per_render_digest(self, cache):
+        """Test a re-preprocessed avatar or new weights miss instead of replaying stale frames."""
+        key = window_key(_window(1), 0)
+        cache.put_frames(key, "eva", "frame", [b"old"], render="aaaa")
+        assert cache.get_frames(key, "eva", "frame", render="aaaa") == [b"old"]
+        assert cache.get_frames(key, "eva", "frame", render="bbbb") is None
+        assert cache.get_frames(key, "eva", "frame") is None
+
+    def test_frames_disabled(self, tmp_path):
+        """Test frame caching can be turned off while features stay cached."""
+        cache = LipSyncCache(directory=str(tmp_path), budget_mb=1, cache_frames=False)
+        cache.put_frames("k", "eva", "frame", [b"x"])
+        assert cache.get_frames("k", "eva", "frame") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_lru_budget(self, cache):
+        """Test the least recently used entries are evicted past the budget."""
+        blob = [b"x" * 300_000]
+        cache.put_frames("a", "eva", "frame", blob)
+        cache.put_frames("b", "eva", "frame", blob)
+        cache.put_frames("c", "eva", "frame", blob)
+        assert cache.get_frames("a", "eva", "frame") is not None  # a is now most recent
+        cache.put_frames("d", "eva", "frame", blob)
+        assert cache.get_frames("b", "eva", "frame") is None
+        assert cache.get_frames("a", "eva", "frame") is not None
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1 and stats["disk_mb"] <= stats["budget_mb"]
+
+    def test_oversized_entry_skipped(self, tmp_path):
+        """Test an entry bigger than the whole budget is not written."""
+        cache = LipSyncCache(directory=str(tmp_path), budget_mb=0)
+        cache.put_frames("a", "eva", "frame", [b"x"])
+        assert cache.get_stats()["writes"] == 0
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test entries and their LRU order are reloaded from disk."""
+        cache = LipSyncCache(directory=str(tmp_path), budget_mb=1)
+        blob = [b"x" * 300_000]
+        cache.put_frames("old", "eva", "frame", blob)
+        cache.put_frames("new", "eva", "frame", blob)
+        past = time.time() - 60
+        os.utime(tmp_path / "old-eva-frame.frames", (past, past))
+
+        reopened = LipSyncCache(directory=str(tmp_path), budget_mb=1)
+        assert reopened.get_stats()["entries"] == 2
+        reopened.put_frames("c", "eva", "frame", blob)
+        reopened.put_frames("d", "eva", "frame", blob)
+        assert reopened.get_frames("old", "eva", "frame") is None
+        assert reopened.get_frames("new", "eva", "frame") == blob
+
+    def test_avatar_id_sanitized(self, cache, tmp_path):
+        """Test avatar ids can't escape the cache directory."""
+        cache.put_frames("k", "../evil", "frame", [b"x"])
+        assert cache.get_frames("k", "../evil", "frame") == [b"x"]
+        assert all(not name.startswith("..") for name in os.listdir(tmp_path))
+
+    def test_clear(self, cache, tmp_path):
+        """Test clear() removes every entry from disk."""
+        cache.put_features("k", np.zeros(4, dtype=np.float16))
+        cache.clear()
+        assert cache.get_features("k") is None
+        assert os.listdir(tmp_path) == []
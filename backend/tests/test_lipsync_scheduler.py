@@ -0,0 +1,181 @@
+"""
+Tests for lipsync_scheduler.py
+Cross-session batching of lip-sync frame windows
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from lipsync_scheduler import LipSyncScheduler
+
+
+class RecordingRenderer:
+    """Batch renderer echoing each window as (avatar, frame count)."""
+
+    def __init__(self, delay=0.0, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, windows):
+        with self.lock:
+            self.batches.append([avatar for avatar, _ in windows])
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return [[f"{avatar}-{i}" for i in range(frames)] for avatar, frames in windows]
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(renderer, **kwargs):
+        options = dict(max_batch_frames=16, max_wait_ms=30)
+        options.update(kwargs)
+        scheduler = LipSyncScheduler(renderer, **options)
+        scheduler.start()
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+class TestLipSyncScheduler:
+    """Tests for LipSyncScheduler."""
+
+    def test_each_session_gets_its_own_frames(self, make_scheduler):
+        """Test results are routed back to the window that asked for them."""
+        scheduler = make_scheduler(RecordingRenderer())
+        a = scheduler.submit("s1", ("eva", 2), 2)
+        b = scheduler.submit("s2", ("adam", 3), 3)
+        assert a.result(timeout=2) == ["eva-0", "eva-1"]
+        assert b.result(timeout=2) == ["adam-0", "adam-1", "adam-2"]
+
+    def test_sessions_share_a_pass(self, make_scheduler):
+        """Test windows from concurrent sessions go through one render call."""
+        renderer = RecordingRenderer()
+        scheduler = make_scheduler(renderer, max_wait_ms=100)
+        futures = [scheduler.submit(f"s{i}", (f"avatar{i}", 8), 8) for i in range(2)]
+        for future in futures:
+            future.result(timeout=2)
+        assert renderer.batches == [["avatar0", "avatar1"]]
+        assert scheduler.get_stats()["sessions_per_batch"] == {2: 1}
+
+    def test_frame_budget_respected(self, make_scheduler):
+        """Test a batch never exceeds max_batch_frames and windows aren't split."""
+        renderer = RecordingRenderer()
+        scheduler = make_scheduler(renderer, max_batch_frames=16, max_wait_ms=100)
+        futures = [scheduler.submit(f"s{i}", (f"a{i}", 8), 8) for i in range(3)]
+        for future in futures:
+            future.result(timeout=2)
+        assert renderer.batches == [["a0", "a1"], ["a2"]]
+
+    def test_full_batch_does_not_wait(self, make_scheduler):
+        """Test a full batch is rendered without waiting for the deadline."""
+        scheduler = make_scheduler(RecordingRenderer(), max_batch_frames=8, max_wait_ms=5000)
+        start = time.perf_counter()
+        scheduler.submit("s1", ("eva", 8), 8).result(timeout=2)
+        assert time.perf_counter() - start < 1
+
+    def test_oversized_window_rendered_alone(self, make_scheduler):
+        """Test a window larger than the budget still goes through, alone."""
+        renderer = RecordingRenderer()
+        scheduler = make_scheduler(renderer, max_batch_frames=4, max_wait_ms=0)
+        assert len(scheduler.submit("s1", ("eva", 6), 6).result(timeout=2)) == 6
+        assert renderer.batches == [["eva"]]
+
+    def test_error_fails_whole_batch(self, make_scheduler):
+        """Test a render failure reaches every window of the batch."""
+        scheduler = make_scheduler(RecordingRenderer(fail=RuntimeError("OOM")), max_wait_ms=50)
+        futures = [scheduler.submit(f"s{i}", ("eva", 8), 8) for i in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=2)
+        assert scheduler.get_stats()["errors"] == 1
+
+    def test_per_session_stats(self, make_scheduler):
+        """Test per-session frames, windows, queue wait and fps."""
+        scheduler = make_scheduler(RecordingRenderer(delay=0.02), max_batch_frames=8, max_wait_ms=0)
+        for _ in range(3):
+            scheduler.submit("s1", ("eva", 8), 8).result(timeout=2)
+        session = scheduler.session_stats("s1")
+        assert session["frames"] == 24 and session["windows"] == 3
+        assert session["fps"] > 0
+        stats = scheduler.get_stats()
+        assert stats["frames"] == 24 and stats["batches"] == 3
+        assert stats["avg_batch_occupancy"] == 1.0
+        assert set(stats["sessions"]) == {"s1"}
+
+    def test_queue_time_metrics(self, make_scheduler):
+        """Test windows queued behind a busy renderer report their wait."""
+        scheduler = make_scheduler(RecordingRenderer(delay=0.05), max_batch_frames=8, max_wait_ms=0)
+        futures = [scheduler.submit(f"s{i}", ("eva", 8), 8) for i in range(3)]
+        for future in futures:
+            future.result(timeout=2)
+        stats = scheduler.get_stats()
+        assert stats["max_queue_ms"] >= 80
+        assert stats["p95_queue_ms"] >= stats["p50_queue_ms"]
+        assert scheduler.session_stats("s2")["max_queue_ms"] >= 80
+        assert stats["pending"] == 0
+
+    def test_close_session_drops_stats(self, make_scheduler):
+        """Test a closed session no longer appears in the stats."""
+        scheduler = make_scheduler(RecordingRenderer(), max_wait_ms=0)
+        scheduler.submit("s1", ("eva", 8), 8).result(timeout=2)
+        scheduler.close_session("s1")
+        assert scheduler.get_stats()["sessions"] == {}
+        assert scheduler.session_stats("s1")["frames"] == 0
+
+    def test_set_max_batch_frames(self):
+        """Test the VRAM-derived cap replaces the default."""
+        scheduler = LipSyncScheduler(RecordingRenderer(), max_batch_frames=32)
+        scheduler.set_max_batch_frames(12)
+        assert scheduler.get_stats()["max_batch_frames"] == 12
+
+    def test_stop_serves_queued_windows(self):
+        """Test stop() still renders windows queued before it."""
+        scheduler = LipSyncScheduler(RecordingRenderer(), max_wait_ms=10000)
+        scheduler.start()
+        future = scheduler.submit("s1", ("eva", 1), 1)
+        scheduler.stop(timeout=2)
+        assert future.result(timeout=2) == ["eva-0"]
+
+    @pytest.mark.asyncio
+    async def test_async_render(self, make_scheduler):
+        """Test concurrent session coroutines are batched through render()."""
+        renderer = RecordingRenderer()
+        scheduler = make_scheduler(renderer, max_batch_frames=32, max_wait_ms=50)
+        results = await asyncio.gather(*(scheduler.render(f"s{i}", (f"a{i}", 8), 8) for i in range(4)))
+        assert [r[0] for r in results] == ["a0-0", "a1-0", "a2-0", "a3-0"]
+        assert renderer.batches == [["a0", "a1", "a2", "a3"]]
+
+    def test_cancelled_window_skipped(self, make_scheduler):
+        """Test a window cancelled while queued is dropped and the worker survives."""
+        renderer = RecordingRenderer()
+        scheduler = make_scheduler(renderer, max_wait_ms=100)
+        cancelled = scheduler.submit("s1", ("eva", 4), 4)
+        kept = scheduler.submit("s2", ("adam", 4), 4)
+        assert cancelled.cancel()
+        assert kept.result(timeout=2) == ["adam-0", "adam-1", "adam-2", "adam-3"]
+        assert renderer.batches == [["adam"]]
+        assert scheduler.get_stats()["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_render_does_not_kill_worker(self, make_scheduler):
+        """Test cancelling an awaiting session mid-batch leaves the worker serving."""
+        scheduler = make_scheduler(RecordingRenderer(delay=0.05), max_wait_ms=0)
+        task = asyncio.create_task(scheduler.render("s1", ("eva", 2), 2))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.06)
+        assert scheduler._thread.is_alive()
+        assert await asyncio.wait_for(scheduler.render("s2", ("adam", 1), 1), 2) == ["adam-0"]
@@ -0,0 +1,209 @@
+"""
+Tests for llm_hedging.py
+Speculative LLM provider racing and TTFT histograms
+"""
+
+import asyncio
+
+import pytest
+
+from llm_hedging import ProviderRacer, TTFTHistogram
+
+
+def _provider(tokens, delay=0.0, fail=None, log=None, name=""):
+    """Build a stream factory yielding tokens after an initial delay."""
+    def factory():
+        async def stream():
+            try:
+                await asyncio.sleep(delay)
+                if fail is not None:
+                    raise fail
+                for token in tokens:
+                    yield token
+            except asyncio.CancelledError:
+                if log is not None:
+                    log.append(f"cancelled:{name}")
+                raise
+            finally:
+                if log is not None:
+                    log.append(f"closed:{name}")
+        return stream()
+    return factory
+
+
+async def _collect(racer, providers, winners=None):
+    def on_winner(name, ttft_ms):
+        if winners is not None:
+            winners.append(name)
+    return [token async for token in racer.race(providers, on_winner)]
+
+
+class TestTTFTHistogram:
+    """Tests for TTFTHistogram."""
+
+    def test_empty_quantile(self):
+        """Test an empty histogram has no quantile."""
+        assert TTFTHistogram().quantile(0.9) is None
+
+    def test_quantiles_follow_distribution(self):
+        """Test quantile estimates land in the right buckets."""
+        histogram = TTFTHistogram()
+        for _ in range(90):
+            histogram.observe(45)
+        for _ in range(10):
+            histogram.observe(900)
+        assert 40 <= histogram.quantile(0.5) <= 50
+        assert 40 <= histogram.quantile(0.9) <= 50
+        assert 750 <= histogram.quantile(0.99) <= 1000
+
+    def test_decay_tracks_recent_behaviour(self):
+        """Test old observations fade once counts are halved."""
+        histogram = TTFTHistogram(max_count=100)
+        for _ in range(100):
+            histogram.observe(30)
+        for _ in range(300):
+            histogram.observe(400)
+        assert histogram.quantile(0.5) > 300
+        assert histogram.count == 400
+
+    def test_stats(self):
+        """Test summary statistics."""
+        histogram = TTFTHistogram()
+        histogram.observe(100)
+        histogram.observe(200)
+        stats = histogram.get_stats()
+        assert stats["count"] == 2
+        assert stats["mean_ms"] == 150.0
+        assert stats["p50_ms"] is not None
+
+
+class TestHedgeDelay:
+    """Tests for histogram-driven hedge delay."""
+
+    def test_default_until_enough_samples(self):
+        """Test the configured delay is used for unknown providers."""
+        racer = ProviderRacer(default_delay_ms=250, min_samples=5)
+        assert racer.hedge_delay_ms("groq") == 250
+        racer.record_ttft("groq", 60)
+        assert racer.hedge_delay_ms("groq") == 250
+
+    def test_delay_follows_quantile_with_clamp(self):
+        """Test the delay tracks the provider's p90, within bounds."""
+        racer = ProviderRacer(default_delay_ms=250, min_delay_ms=40, max_delay_ms=500, min_samples=5)
+        for _ in range(20):
+            racer.record_ttft("fast", 95)
+            racer.record_ttft("tiny", 5)
+            racer.record_ttft("slow", 4000)
+        assert 75 <= racer.hedge_delay_ms("fast") <= 100
+        assert racer.hedge_delay_ms("tiny") == 40
+        assert racer.hedge_delay_ms("slow") == 500
+
+
+    def test_censored_losers_hold_the_delay_up(self):
+        """Test hedged-away slow requests keep the delay from ratcheting down."""
+        racer = ProviderRacer(default_delay_ms=250, min_samples=5)
+        for _ in range(16):
+            racer.record_ttft("primary", 95)
+        for _ in range(4):
+            racer.record_censored("primary", 260)  # Lost to the hedge after 260ms
+        assert racer.hedge_delay_ms("primary") >= 260
+
+    def test_censored_counted_above_elapsed(self):
+        """Test a censored sample lands in the bucket above its elapsed time."""
+        histogram = TTFTHistogram()
+        histogram.observe_censored(95)
+        assert histogram.quantile(0.5) > 100
+        assert histogram.count == 1
+        assert histogram.get_stats()["mean_ms"] is None
+
+
+class TestProviderRacer:
+    """Tests for ProviderRacer.race."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_never_hedges(self):
+        """Test a primary answering within the delay runs alone."""
+        racer = ProviderRacer(default_delay_ms=200)
+        log = []
+        winners = []
+        tokens = await _collect(racer, [
+            ("a", _provider(["Bon", "jour"], name="a")),
+            ("b", _provider(["x"], log=log, name="b")),
+        ], winners)
+        assert tokens == ["Bon", "jour"]
+        assert winners == ["a"]
+        assert log == []  # Secondary never started
+        assert racer.get_stats()["hedged"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """Test the secondary wins when the primary stalls, and the loser is cancelled."""
+        racer = ProviderRacer(default_delay_ms=20)
+        log = []
+        winners = []
+        tokens = await _collect(racer, [
+            ("slow", _provider(["late"], delay=1.0, log=log, name="slow")),
+            ("fast", _provider(["vite", "!"], delay=0.0, name="fast")),
+        ], winners)
+        assert tokens == ["vite", "!"]
+        assert winners == ["fast"]
+        assert "cancelled:slow" in log
+        stats = racer.get_stats()
+        assert stats["hedged"] == 1
+        assert stats["wins"] == {"fast": 1}
+        assert stats["providers"]["fast"]["count"] == 1
+        assert stats["providers"]["slow"]["censored"] == 1
+        assert stats["providers"]["slow"]["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_primary_can_still_win_after_hedge(self):
+        """Test a hedged primary that answers first keeps the stream."""
+        racer = ProviderRacer(default_delay_ms=10)
+        winners = []
+        tokens = await _collect(racer, [
+            ("a", _provider(["primaire"], delay=0.03)),
+            ("b", _provider(["secours"], delay=0.5)),
+        ], winners)
+        assert tokens == ["primaire"]
+        assert winners == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_failure_fails_over_immediately(self):
+        """Test an erroring primary is replaced without waiting for the delay."""
+        racer = ProviderRacer(default_delay_ms=5000)
+        start = asyncio.get_running_loop().time()
+        tokens = await _collect(racer, [
+            ("a", _provider([], fail=RuntimeError("down"))),
+            ("b", _provider(["ok"])),
+        ])
+        assert tokens == ["ok"]
+        assert asyncio.get_running_loop().time() - start < 1.0
+        assert racer.get_stats()["failovers"] == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_stream_counts_as_failure(self):
+        """Test a provider that yields nothing is failed over."""
+        racer = ProviderRacer(default_delay_ms=5000)
+        tokens = await _collect(racer, [("a", _provider([])), ("b", _provider(["ok"]))])
+        assert tokens == ["ok"]
+
+    @pytest.mark.asyncio
+    async def test_all_fail_raises_last_error(self):
+        """Test the race raises when no provider produces a token."""
+        racer = ProviderRacer(default_delay_ms=10)
+        with pytest.raises(RuntimeError, match="b down"):
+            await _collect(racer, [
+                ("a", _provider([], fail=RuntimeError("a down"))),
+                ("b", _provider([], fail=RuntimeError("b down"))),
+            ])
+        assert racer.get_stats()["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_consumer_close_closes_winner(self):
+        """Test closing the race early closes the winning stream."""
+        racer = ProviderRacer(default_delay_ms=100)
+        log = []
+        race = racer.race([("a", _provider(["1", "2", "3"], log=log, name="a"))])
+        assert await race.__anext__() == "1"
+        await race.aclose()
+        assert "closed:a" in log
@@ -0,0 +1,199 @@
+"""
+Tests for memory_consolidation.py
+Embedding-based episodic -> semantic consolidation and pruning
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from memory_consolidation import MemoryConsolidator
+
+
+class FakeCollection:
+    """In-memory stand-in for the Chroma collection API used by the memory system."""
+
+    def __init__(self):
+        self.rows = {}  # id -> (document, metadata, embedding)
+
+    def add(self, ids, documents, metadatas, embeddings=None):
+        self.upsert(ids, documents, metadatas, embeddings)
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        for i, memory_id in enumerate(ids):
+            embedding = embeddings[i] if embeddings is not None else None
+            self.rows[memory_id] = (documents[i], metadatas[i], embedding)
+
+    def delete(self, ids):
+        for memory_id in ids:
+            self.rows.pop(memory_id, None)
+
+    def get(self, where, include=None):
+        ids = [i for i, (_, meta, _) in self.rows.items() if meta.get("user_id") == where["user_id"]]
+        return {
+            "ids": ids,
+            "documents": [self.rows[i][0] for i in ids],
+            "metadatas": [self.rows[i][1] for i in ids],
+            "embeddings": [self.rows[i][2] for i in ids],
+        }
+
+    def query(self, **kwargs):
+        return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+def _direction(index, noise=0.0, dim=8):
+    """Unit vector along axis `index`, optionally nudged off-axis."""
+    vector = np.zeros(dim)
+    vector[index] = 1.0
+    vector[(index + 1) % dim] = noise
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def system(tmp_path):
+    from eva_memory import EvaMemorySystem
+
+    system = EvaMemorySystem(storage_path=str(tmp_path))
+    system.collection = FakeCollection()
+    system.embeddings = None
+    yield system
+    system.close()
+
+
+def _store(system, user_id, content, vector, importance=0.5, age_s=0.0):
+    memory = system.add_memory(user_id, content, importance=importance,
+                               embedding=vector, use_batch=False)
+    if age_s:
+        document, meta, embedding = system.collection.rows[memory.id]
+        meta = {**meta, "timestamp": str(time.time() - age_s)}
+        system.collection.rows[memory.id] = (document, meta, embedding)
+    return memory
+
+
+class TestMemoryConsolidator:
+    """Tests for MemoryConsolidator."""
+
+    def test_similar_memories_merge_into_semantic(self, system):
+        """Test a cluster reaching the threshold is replaced by one semantic memory."""
+        system.consolidation_threshold = 3
+        for i, noise in enumerate((0.0, 0.1, 0.2)):
+            _store(system, "u", f"On a parlé de jazz et de saxophone {i}", _direction(0, noise))
+        _store(system, "u", "Réunion de travail difficile", _direction(4))
+
+        result = system.consolidate_memories("u")
+
+        assert result == {"pruned": 0, "clustered": 4, "merged": 3}
+        semantic = [(doc, meta) for doc, meta, _ in system.collection.rows.values()
+                    if meta["memory_type"] == "semantic"]
+        assert len(semantic) == 1
+        assert "jazz" in semantic[0][0] and "saxophone" in semantic[0][0]
+        assert semantic[0][1]["consolidated_count"] == 3
+        assert len(system.collection.rows) == 2
+
+    def test_incremental_growth_updates_summary(self, system):
+        """Test later similar memories fold into the existing summary."""
+        system.consolidation_threshold = 2
+        _store(system, "u", "jazz ce soir", _direction(0))
+        _store(system, "u", "concert de jazz", _direction(0, 0.1))
+        system.consolidate_memories("u")
+        _store(system, "u", "encore du jazz", _direction(0, 0.05))
+        system.consolidate_memories("u")
+
+        semantic = [meta for _, meta, _ in system.collection.rows.values() if meta["memory_type"] == "semantic"]
+        assert len(semantic) == 1
+        assert semantic[0]["consolidated_count"] == 3
+        assert len(system.collection.rows) == 1
+        assert system.consolidator.get_stats()["summaries"] == 1
+
+    def test_dissimilar_memories_stay_episodic(self, system):
+        """Test memories below the similarity threshold are left alone."""
+        system.consolidation_threshold = 2
+        for i in range(4):
+            _store(system, "u", f"sujet {i}", _direction(i))
+        assert system.consolidate_memories("u")["merged"] == 0
+        assert len(system.collection.rows) == 4
+
+    def test_decayed_memories_pruned(self, system):
+        """Test old low-importance episodic memories are deleted, semantic kept."""
+        old = _store(system, "u", "vieux détail", _direction(0), importance=0.3, age_s=60 * 86400)
+        fresh = _store(system, "u", "détail récent", _direction(1), importance=0.3)
+        fact = system.add_memory("u", "User's name is Léa", memory_type="semantic",
+                                 importance=0.9, embedding=_direction(2), use_batch=False)
+        document, meta, embedding = system.collection.rows[fact.id]
+        system.collection.rows[fact.id] = (document, {**meta, "timestamp": "1.0"}, embedding)
+
+        assert system.consolidate_memories("u")["pruned"] == 1
+        assert old.id not in system.collection.rows
+        assert fresh.id in system.collection.rows and fact.id in system.collection.rows
+        assert [m.id for m, _ in system.lexical_index.search("u", "vieux", k=5)] == []
+
+    def test_per_user_cap(self, system):
+        """Test the store is capped per user, evicting the least important first."""
+        system.consolidator.max_per_user = 3
+        memories = [_store(system, "u", f"sujet {i}", _direction(i), importance=0.1 * (i + 1))
+                    for i in range(5)]
+        system.consolidate_memories("u")
+        assert sorted(system.collection.rows) == sorted(m.id for m in memories[2:])
+
+    def test_restart_folds_into_stored_summary(self, system):
+        """Test a fresh consolidator seeds clusters from stored summaries."""
+        system.consolidation_threshold = 2
+        _store(system, "u", "jazz ce soir", _direction(0))
+        _store(system, "u", "concert de jazz", _direction(0, 0.1))
+        system.consolidate_memories("u")
+        summary_id = next(iter(system.collection.rows))
+
+        system.consolidator = MemoryConsolidator(system)  # Process restart
+        _store(system, "u", "encore du jazz", _direction(0, 0.05))
+        _store(system, "u", "toujours du jazz", _direction(0, 0.02))
+        result = system.consolidate_memories("u")
+
+        assert result["merged"] == 2
+        assert list(system.collection.rows) == [summary_id]
+        document, meta, _ = system.collection.rows[summary_id]
+        assert meta["consolidated_count"] == 4
+        assert "jazz" in document
+        stats = system.consolidator.get_stats()
+        assert stats["seeded"] == 1 and stats["summaries"] == 0
+
+    def test_per_user_cap_evicts_summaries(self, system):
+        """Test summaries count towards the cap and can be evicted; plain facts can't."""
+        system.consolidation_threshold = 2
+        _store(system, "u", "jazz", _direction(0), importance=0.3)
+        _store(system, "u", "jazz encore", _direction(0, 0.1), importance=0.3)
+        system.consolidate_memories("u")
+        summary_id = next(iter(system.collection.rows))
+        fact = system.add_memory("u", "User's name is Léa", memory_type="semantic",
+                                 importance=0.1, embedding=_direction(2), use_batch=False)
+        fresh = _store(system, "u", "sujet récent", _direction(4), importance=0.9)
+
+        system.consolidator.max_per_user = 2
+        system.consolidate_memories("u")
+
+        assert sorted(system.collection.rows) == sorted([fact.id, fresh.id])
+        assert summary_id not in {c.id for c in system.consolidator._clusters["u"]}
+
+    def test_users_are_isolated(self, system):
+        """Test one user's memories never join another user's clusters."""
+        system.consolidation_threshold = 2
+        _store(system, "alice", "jazz", _direction(0))
+        _store(system, "bob", "jazz", _direction(0))
+        system.consolidate_memories("alice")
+        system.consolidate_memories("bob")
+        assert all(meta["memory_type"] == "episodic" for _, meta, _ in system.collection.rows.values())
+
+    def test_run_pending_only_marked_users(self, system):
+        """Test the background pass only visits users with new episodic memories."""
+        _store(system, "u", "jazz", _direction(0))
+        stats = system.run_consolidation()
+        assert stats["users"] == 1
+        assert system.run_consolidation()["users"] == 0
+
+    def test_no_vector_store_is_noop(self, tmp_path):
+        """Test consolidation without a collection does nothing."""
+        from eva_memory import EvaMemorySystem
+
+        system = EvaMemorySystem(storage_path=str(tmp_path))
+        system.collection = None
+        assert MemoryConsolidator(system).consolidate_user("u") == {"pruned": 0, "clustered": 0, "merged": 0}
@@ -0,0 +1,252 @@
+"""
+Tests for memory_index.py
+BM25 lexical index and hybrid fusion ranking of EVA memories
+"""
+
+import time
+
+import pytest
+
+from eva_memory import MemoryEntry
+from memory_index import HybridRanker, LexicalIndex, tokenize
+
+
+def _memory(memory_id, content, importance=0.5, age_s=0.0, memory_type="episodic"):
+    return MemoryEntry(
+        id=memory_id,
+        content=content,
+        memory_type=memory_type,
+        timestamp=time.time() - age_s,
+        importance=importance
+    )
+
+
+class TestTokenize:
+    """Tests for tokenize."""
+
+    def test_drops_stopwords_and_case(self):
+        """Test function words and case don't reach the index."""
+        assert tokenize("J'adore LE jazz et la Musique") == ["adore", "jazz", "musique"]
+
+    def test_keeps_accents(self):
+        """Test accented words stay whole."""
+        assert tokenize("Café à Besançon") == ["café", "besançon"]
+
+
+class TestLexicalIndex:
+    """Tests for LexicalIndex."""
+
+    def test_rare_term_ranks_first(self):
+        """Test BM25 favors documents matching rarer query terms."""
+        index = LexicalIndex()
+        index.add("u", _memory("1", "Balade au parc avec le chien"))
+        index.add("u", _memory("2", "Le chien Rex adore le parc"))
+        index.add("u", _memory("3", "Concert de jazz au parc"))
+        hits = index.search("u", "Rex parc", k=3)
+        assert hits[0][0].id == "2"
+        assert len(hits) == 3
+
+    def test_users_are_isolated(self):
+        """Test a user's search never returns another user's memories."""
+        index = LexicalIndex()
+        index.add("alice", _memory("1", "jazz"))
+        index.add("bob", _memory("2", "jazz"))
+        assert [m.id for m, _ in index.search("alice", "jazz", k=5)] == ["1"]
+
+    def test_type_filter(self):
+        """Test memory_type restricts results."""
+        index = LexicalIndex()
+        index.add("u", _memory("1", "aime le jazz", memory_type="semantic"))
+        index.add("u", _memory("2", "a écouté du jazz"))
+        assert [m.id for m, _ in index.search("u", "jazz", k=5, memory_type="semantic")] == ["1"]
+
+    def test_remove(self):
+        """Test removed memories leave no postings."""
+        index = LexicalIndex()
+        index.add("u", _memory("1", "jazz manouche"))
+        index.add("u", _memory("2", "jazz"))
+        index.remove("u", ["1"])
+        assert [m.id for m, _ in index.search("u", "manouche jazz", k=5)] == ["2"]
+        assert index.get_stats() == {"users": 1, "loaded_users": 0, "memories": 1, "terms": 1,
+                                     "evictions": 0}
+
+    def test_duplicate_add_is_ignored(self):
+        """Test re-indexing the same id doesn't double its weight."""
+        index = LexicalIndex()
+        memory = _memory("1", "jazz")
+        index.add("u", memory)
+        index.add("u", memory)
+        assert index.get_stats()["memories"] == 1
+
+    def test_lru_eviction(self):
+        """Test the least recently used user is evicted whole past max_users."""
+        index = LexicalIndex(max_users=2)
+        index.load("a", [_memory("1", "jazz")])
+        index.add("b", _memory("2", "jazz"))
+        index.search("a", "jazz", k=5)      # a is now most recent
+        index.add("c", _memory("3", "jazz"))
+        assert index.search("b", "jazz", k=5) == []
+        assert index.is_loaded("a") and not index.is_loaded("c")
+        assert index.get_stats()["evictions"] == 1
+
+        index.add("b", _memory("2", "jazz"))
+        assert not index.has_user("a")      # evicted users must be loaded again
+
+    def test_no_query_terms(self):
+        """Test a stopword-only query returns nothing."""
+        index = LexicalIndex()
+        index.add("u", _memory("1", "jazz"))
+        assert index.search("u", "le la les", k=5) == []
+
+
+class TestHybridRanker:
+    """Tests for HybridRanker."""
+
+    def test_relevance_beats_recency(self):
+        """Test a strong vector match outranks a recent unrelated memory."""
+        ranker = HybridRanker()
+        old = _memory("old", "x", age_s=30 * 86400)
+        new = _memory("new", "y")
+        ranked = ranker.rank([new, old], [0.1, 0.95], [0.0, 0.0], k=2)
+        assert [m.id for m in ranked] == ["old", "new"]
+
+    def test_decay_never_negative(self):
+        """Test old memories keep a positive score (no linear 1-day cliff)."""
+        ranker = HybridRanker(vector_weight=0, lexical_weight=0, importance_weight=0, recency_weight=1)
+        old = _memory("old", "x", age_s=10 * 86400)
+        ancient = _memory("ancient", "x", age_s=100 * 86400)
+        assert [m.id for m in ranker.rank([ancient, old], [0, 0], [0, 0], k=2)] == ["old", "ancient"]
+
+    def test_half_life(self):
+        """Test recency halves every half-life."""
+        ranker = HybridRanker(vector_weight=0, lexical_weight=0, importance_weight=1, recency_weight=1,
+                              half_life_h=24)
+        now = time.time()
+        a = _memory("a", "x", importance=0.55)   # 0.55 + 0.5
+        b = _memory("b", "x", importance=0.0)    # 0.0 + 1.0
+        c = _memory("c", "x", importance=0.7)    # 0.7 + 0.25
+        a.timestamp, b.timestamp, c.timestamp = now - 86400, now, now - 2 * 86400
+        assert [m.id for m in ranker.rank([c, b, a], [0] * 3, [0] * 3, k=3, now=now)] == ["a", "b", "c"]
+
+    def test_min_importance_filters(self):
+        """Test candidates under min_importance are dropped, not just ranked low."""
+        ranker = HybridRanker()
+        low = _memory("low", "x", importance=0.2)
+        high = _memory("high", "x", importance=0.9)
+        assert [m.id for m in ranker.rank([low, high], [1, 0], [0, 0], k=5, min_importance=0.5)] == ["high"]
+
+    def test_top_k(self):
+        """Test only k candidates are returned, best first."""
+        ranker = HybridRanker()
+        memories = [_memory(str(i), "x") for i in range(50)]
+        ranked = ranker.rank(memories, [i / 50 for i in range(50)], [0.0] * 50, k=3)
+        assert [m.id for m in ranked] == ["49", "48", "47"]
+
+    def test_lexical_normalized(self):
+        """Test raw BM25 scores are scaled by the best lexical hit."""
+        ranker = HybridRanker(vector_weight=0, lexical_weight=1, importance_weight=0, recency_weight=0)
+        a, b = _memory("a", "x"), _memory("b", "x")
+        assert [m.id for m in ranker.rank([a, b], [0, 0], [3.0, 12.0], k=2)] == ["b", "a"]
+
+    def test_empty(self):
+        """Test no candidates ranks to an empty list."""
+        assert HybridRanker().rank([], [], [], k=5) == []
+
+
+class TestHybridRetrieval:
+    """Tests for EvaMemorySystem retrieval through the hybrid engine."""
+
+    @pytest.fixture
+    def system(self, tmp_path):
+        from eva_memory import EvaMemorySystem
+        return EvaMemorySystem(storage_path=str(tmp_path))
+
+    def test_lexical_match_found_without_vector_store(self, system):
+        """Test an older keyword match beats newer unrelated session memories."""
+        system.add_memory("u", "Mon chat s'appelle Moustache", importance=0.5)
+        for i in range(5):
+            system.add_memory("u", f"Discussion banale {i}", importance=0.5)
+        system.session_memories["u"] = system.session_memories["u"][-2:]
+        memories = system.retrieve_memories("u", "Comment va Moustache ?", n_results=2)
+        assert memories[0].content == "Mon chat s'appelle Moustache"
+
+    def test_vector_query_not_overfetched(self, system):
+        """Test Chroma is asked for n_results, with distances fused into the rank."""
+        from unittest.mock import MagicMock
+
+        system.collection = MagicMock()
+        system.collection.get.return_value = {"ids": [], "documents": [], "metadatas": []}
+        system.collection.query.return_value = {
+            "ids": [["far", "near"]],
+            "documents": [["Souvenir lointain", "Souvenir proche"]],
+            "metadatas": [[{"importance": "0.5", "timestamp": str(time.time())}] * 2],
+            "distances": [[0.9, 0.1]],
+        }
+        memories = system.retrieve_memories("u", "souvenir", n_results=2, memory_type="episodic")
+        assert system.collection.query.call_args.kwargs["n_results"] == 2
+        assert system.collection.query.call_args.kwargs["where"] == {
+            "$and": [{"user_id": "u"}, {"memory_type": "episodic"}]
+        }
+        assert [m.id for m in memories] == ["near", "far"]
+
+    @staticmethod
+    def _wait_loaded(system, user_id, timeout=2.0):
+        deadline = time.time() + timeout
+        while not system.lexical_index.is_loaded(user_id) and time.time() < deadline:
+            time.sleep(0.01)
+        return system.lexical_index.is_loaded(user_id)
+
+    def test_stored_memories_indexed_once(self, system):
+        """Test stored memories are loaded into the index off the retrieval path, once."""
+        from unittest.mock import MagicMock
+
+        system.collection = MagicMock()
+        system.collection.query.side_effect = Exception("offline")
+        system.collection.get.return_value = {
+            "ids": ["m1"],
+            "documents": ["Elle joue du violoncelle"],
+            "metadatas": [{"memory_type": "semantic", "importance": "0.8", "timestamp": "1.0"}],
+        }
+        system.retrieve_memories("u", "violoncelle")
+        assert self._wait_loaded(system, "u")
+        assert [m.id for m in system.retrieve_memories("u", "violoncelle")] == ["m1"]
+        system.collection.get.assert_called_once()
+        system.close()
+
+    def test_first_retrieval_does_not_wait_for_load(self, system):
+        """Test a slow store read doesn't hold the first retrieval."""
+        import threading
+        from unittest.mock import MagicMock
+
+        release = threading.Event()
+        system.collection = MagicMock()
+        system.collection.query.side_effect = Exception("offline")
+        system.collection.get.side_effect = lambda **kwargs: release.wait(2) and {
+            "ids": [], "documents": [], "metadatas": []}
+
+        start = time.perf_counter()
+        system.retrieve_memories("u", "violoncelle")
+        assert time.perf_counter() - start < 0.5
+        assert not system.lexical_index.is_loaded("u")
+        release.set()
+        assert self._wait_loaded(system, "u")
+        system.close()
+
+    def test_failed_load_retried(self, system):
+        """Test a user is only marked loaded once the store read succeeds."""
+        from unittest.mock import MagicMock
+
+        system.collection = MagicMock()
+        system.collection.query.side_effect = Exception("offline")
+        system.collection.get.side_effect = [
+            Exception("offline"),
+            {"ids": ["m1"], "documents": ["violoncelle"], "metadatas": [{}]},
+        ]
+        system.retrieve_memories("u", "violoncelle")
+        system._get_ingestor().flush()
+        assert not self._wait_loaded(system, "u", timeout=0.1)
+
+        system.retrieve_memories("u", "violoncelle")
+        assert self._wait_loaded(system, "u")
+        assert system.collection.get.call_count == 2
+        system.close()
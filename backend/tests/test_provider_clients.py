@@ -0,0 +1,151 @@
+"""
+Tests for provider_clients.py
+Shared per-provider connection pools and inference-free warm-up
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from provider_clients import ProviderClients, ProviderSpec, default_specs
+
+
+def _pool(handler, **kwargs):
+    specs = [
+        ProviderSpec("cloud", "https://llm.example/v1", headers={"Authorization": "Bearer k"},
+                     warm_path="/models"),
+        ProviderSpec("local", "http://127.0.0.1:11434", http2=False, warm_path="/api/tags"),
+        ProviderSpec("plain", "http://127.0.0.1:8001", http2=False),
+    ]
+    return ProviderClients(specs, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def _recorder(status=200):
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, str(request.url), request.headers.get("authorization")))
+        return httpx.Response(status, json={"data": []})
+    return seen, handler
+
+
+class TestClients:
+    """Tests for shared client creation."""
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared(self):
+        """Test every caller gets the same pool for a provider."""
+        _, handler = _recorder()
+        pool = _pool(handler)
+        assert pool.get("cloud") is pool.get("cloud")
+        assert pool.get("cloud") is not pool.get("local")
+        await pool.aclose()
+
+    def test_general_pool_separate_from_ollama(self):
+        """Test the app-wide pool keeps its own, larger limits."""
+        specs = {spec.name: spec for spec in default_specs()}
+        assert specs["general"].max_connections == 50 and specs["general"].http2
+        assert specs["general"].warm_path is None
+        assert specs["ollama"].max_connections < specs["general"].max_connections
+
+    def test_unknown_provider_raises(self):
+        """Test unregistered providers are rejected."""
+        pool = ProviderClients([])
+        assert not pool.has("groq")
+        with pytest.raises(KeyError):
+            pool.get("groq")
+
+    @pytest.mark.asyncio
+    async def test_base_url_and_headers(self):
+        """Test requests carry the provider's base URL and auth header."""
+        seen, handler = _recorder()
+        pool = _pool(handler)
+        await pool.get("cloud").post("/chat/completions", json={})
+        assert seen == [("POST", "https://llm.example/v1/chat/completions", "Bearer k")]
+        assert pool.get_stats()["providers"]["cloud"]["requests"] == 1
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_resets(self):
+        """Test closing drops the pools so they can be recreated."""
+        _, handler = _recorder()
+        pool = _pool(handler)
+        first = pool.get("local")
+        await pool.aclose()
+        assert first.is_closed
+        assert pool.get("local") is not first
+        await pool.aclose()
+
+
+class TestWarm:
+    """Tests for inference-free warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_warm_uses_metadata_endpoints(self):
+        """Test warm-up only issues GETs on the configured warm paths."""
+        seen, handler = _recorder()
+        pool = _pool(handler)
+        latencies = await pool.warm()
+        assert set(latencies) == {"cloud", "local"}  # plain has no warm path
+        assert all(latency is not None for latency in latencies.values())
+        assert sorted(url for _, url, _ in seen) == [
+            "http://127.0.0.1:11434/api/tags",
+            "https://llm.example/v1/models",
+        ]
+        assert all(method == "GET" for method, _, _ in seen)
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_error_status_still_warms(self):
+        """Test an HTTP error response still counts as a warm connection."""
+        _, handler = _recorder(status=401)
+        pool = _pool(handler)
+        assert (await pool.warm(["cloud"]))["cloud"] is not None
+        assert pool.get_stats()["providers"]["cloud"]["warmups"] == 1
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_connection_failure_is_reported(self):
+        """Test unreachable providers are counted, not raised."""
+        def handler(request):
+            raise httpx.ConnectError("refused")
+        pool = _pool(handler)
+        assert await pool.warm(["local"]) == {"local": None}
+        assert pool.get_stats()["providers"]["local"]["warm_failures"] == 1
+        await pool.aclose()
+
+
+class TestKeepWarm:
+    """Tests for idle connection keep-warm."""
+
+    @pytest.mark.asyncio
+    async def test_idle_providers(self):
+        """Test only created, warmable providers idle past the threshold are listed."""
+        _, handler = _recorder()
+        pool = _pool(handler, keepwarm_s=10)
+        pool.get("cloud")
+        pool.get("plain")
+        await pool.get("local").get("/api/tags")
+        now = pool._last_activity["local"]
+        assert pool.idle_providers(now) == ["cloud"]
+        assert set(pool.idle_providers(now + 11)) == {"cloud", "local"}
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_loop_rewarms_idle_connections(self):
+        """Test the background loop touches idle providers and stops on close."""
+        seen, handler = _recorder()
+        pool = _pool(handler, keepwarm_s=0.02)
+        pool.get("cloud")
+        task = pool.start_keepwarm()
+        assert pool.start_keepwarm() is task
+        await asyncio.sleep(0.1)
+        assert any(url.endswith("/models") for _, url, _ in seen)
+        assert pool.get_stats()["keepwarm_running"]
+        await pool.aclose()
+        assert task.done()
+
+    def test_disabled_keepwarm(self):
+        """Test a zero interval disables the loop."""
+        assert ProviderClients([], keepwarm_s=0).start_keepwarm() is None
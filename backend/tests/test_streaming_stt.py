@@ -0,0 +1,256 @@
+"""
+Tests for streaming_stt.py
+VAD-gated incremental transcription and speculative LLM streams
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from streaming_stt import (
+    SpeculativeStream,
+    StreamingTranscriber,
+    normalize_transcript,
+)
+
+RATE = 16000
+
+
+def _pcm(ms, amplitude=0.0):
+    """Mono int16 PCM: a 220Hz tone (speech stand-in) or silence."""
+    t = np.arange(RATE * ms // 1000) / RATE
+    audio = amplitude * np.sin(2 * np.pi * 220 * t)
+    return (audio * 32767).astype(np.int16).tobytes()
+
+
+def _speech(ms):
+    return _pcm(ms, 0.3)
+
+
+def _silence(ms):
+    return _pcm(ms)
+
+
+class FakeDecoder:
+    """Decoder returning one word per 100ms of audio, recording each call."""
+
+    def __init__(self, words=None):
+        self.words = words or [f"mot{i}" for i in range(1000)]
+        self.calls = []
+
+    async def __call__(self, audio, prompt):
+        self.calls.append((len(audio), prompt))
+        return " ".join(self.words[:len(audio) * 10 // RATE])
+
+
+async def _feed_all(stt, chunks, chunk_ms=20):
+    """Feed PCM in websocket-sized chunks, collecting every event."""
+    events = []
+    for data in chunks:
+        step = RATE * chunk_ms // 1000 * 2
+        for start in range(0, len(data), step):
+            events.extend(await stt.feed(data[start:start + step]))
+    return events
+
+
+def _transcriber(decoder, **kwargs):
+    options = dict(partial_ms=300, endpoint_ms=600, speculate_ms=250, window_s=10)
+    options.update(kwargs)
+    return StreamingTranscriber(decoder, **options)
+
+
+class TestNormalizeTranscript:
+    """Tests for normalize_transcript."""
+
+    def test_ignores_case_and_punctuation(self):
+        """Test hypotheses differing only in case/punctuation compare equal."""
+        assert normalize_transcript("Salut, ça va ?") == normalize_transcript("salut ça va")
+
+    def test_keeps_apostrophes(self):
+        """Test elisions stay one word."""
+        assert normalize_transcript("J'ai faim!") == "j'ai faim"
+
+
+class TestStreamingTranscriber:
+    """Tests for StreamingTranscriber."""
+
+    @pytest.mark.asyncio
+    async def test_silence_never_decodes(self):
+        """Test pure silence produces no events and no decode."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder)
+        assert await _feed_all(stt, [_silence(2000)]) == []
+        assert decoder.calls == []
+        assert not stt.in_speech
+
+    @pytest.mark.asyncio
+    async def test_partials_then_final(self):
+        """Test partials are emitted while speaking and a final at the endpoint."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder)
+        events = await _feed_all(stt, [_speech(1200), _silence(800)])
+
+        partials = [e for e in events if e.type == "partial"]
+        finals = [e for e in events if e.type == "final"]
+        assert len(partials) >= 3
+        assert len(finals) == 1
+        assert finals[0].text.startswith("mot0 mot1")
+        assert finals[0].utterance == 0
+        assert stt.utterance == 1
+        assert not stt.in_speech
+
+    @pytest.mark.asyncio
+    async def test_partials_grow_and_stabilize(self):
+        """Test stable text is a prefix agreed on by consecutive hypotheses."""
+        stt = _transcriber(FakeDecoder())
+        events = await _feed_all(stt, [_speech(1500)])
+        partials = [e for e in events if e.type == "partial"]
+        assert [len(p.text) for p in partials] == sorted(len(p.text) for p in partials)
+        for partial in partials:
+            assert partial.text.startswith(partial.stable)
+        assert partials[-1].stable
+
+    @pytest.mark.asyncio
+    async def test_final_reuses_last_hypothesis(self):
+        """Test trailing silence alone doesn't trigger another decode."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder)
+        await _feed_all(stt, [_speech(1000), _silence(300)])
+        decodes = len(decoder.calls)
+        events = await _feed_all(stt, [_silence(400)])
+
+        assert events[-1].type == "final"
+        assert len(decoder.calls) == decodes
+        assert stt.get_stats()["reused_finals"] == 1
+
+    @pytest.mark.asyncio
+    async def test_speculate_on_stable_pause(self):
+        """Test a fully stable partial after a short pause is flagged once."""
+        stt = _transcriber(FakeDecoder())
+        events = await _feed_all(stt, [_speech(1000), _silence(400)])
+        speculative = [e for e in events if e.speculate]
+        assert len(speculative) == 1
+        assert speculative[0].type == "partial"
+        assert speculative[0].stable == speculative[0].text
+
+        final = [e for e in await _feed_all(stt, [_silence(400)]) if e.type == "final"][0]
+        assert normalize_transcript(final.text) == normalize_transcript(speculative[0].text)
+
+    @pytest.mark.asyncio
+    async def test_short_noise_is_discarded(self):
+        """Test a click shorter than the minimum speech length is ignored."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder)
+        events = await _feed_all(stt, [_speech(60), _silence(1000)])
+        assert events == []
+        assert decoder.calls == []
+        assert stt.get_stats()["discarded_noise"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_bounds_decode_length(self):
+        """Test long speech is committed per window, keeping each decode bounded."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder, window_s=1.0, max_utterance_s=30)
+        events = await _feed_all(stt, [_speech(3500), _silence(800)])
+
+        assert max(length for length, _ in decoder.calls) <= RATE * 1.3
+        assert stt.get_stats()["committed_segments"] >= 3
+        # Later windows are decoded with the committed text as prompt
+        assert any(prompt for _, prompt in decoder.calls)
+        final = [e for e in events if e.type == "final"][0]
+        assert len(final.text.split()) >= 30
+
+    @pytest.mark.asyncio
+    async def test_finish_forces_final(self):
+        """Test finish() ends the utterance without waiting for silence."""
+        stt = _transcriber(FakeDecoder())
+        await _feed_all(stt, [_speech(800)])
+        event = await stt.finish()
+        assert event is not None and event.type == "final" and event.text
+        assert await stt.finish() is None
+
+    @pytest.mark.asyncio
+    async def test_odd_chunk_sizes_are_buffered(self):
+        """Test PCM split mid-frame (and mid-sample) is reassembled."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder)
+        data = _speech(1000) + _silence(800)
+        events = []
+        for start in range(0, len(data), 777):
+            events.extend(await stt.feed(data[start:start + 777]))
+        assert [e for e in events if e.type == "final"]
+
+    @pytest.mark.asyncio
+    async def test_resamples_to_16k(self):
+        """Test non-16kHz input is resampled before decoding."""
+        decoder = FakeDecoder()
+        stt = _transcriber(decoder, sample_rate=8000)
+        t = np.arange(8000) / 8000
+        speech = (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16).tobytes()
+        await stt.feed(speech)
+        await stt.finish()
+        # 1s of 8kHz audio (+ pre-roll/pad) decodes as ~1s at 16kHz
+        assert RATE * 0.9 <= decoder.calls[-1][0] <= RATE * 1.5
+
+
+class TestSpeculativeStream:
+    """Tests for SpeculativeStream."""
+
+    @staticmethod
+    def _factory(tokens, delay=0.0, log=None):
+        async def stream():
+            try:
+                for token in tokens:
+                    await asyncio.sleep(delay)
+                    yield token
+            except asyncio.CancelledError:
+                if log is not None:
+                    log.append("cancelled")
+                raise
+        return stream
+
+    @pytest.mark.asyncio
+    async def test_replays_buffered_tokens(self):
+        """Test tokens produced before adoption are replayed in order."""
+        spec = SpeculativeStream("bonjour", self._factory(["a", "b", "c"]))
+        await asyncio.sleep(0.01)
+        assert spec.done
+        assert [t async for t in spec.tokens()] == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_follows_live_tokens(self):
+        """Test adoption mid-stream yields buffered then live tokens."""
+        spec = SpeculativeStream("bonjour", self._factory(["a", "b", "c", "d"], delay=0.01))
+        await asyncio.sleep(0.015)
+        assert [t async for t in spec.tokens()] == ["a", "b", "c", "d"]
+        assert spec.output == "abcd"
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_stream(self):
+        """Test a discarded speculation cancels the underlying stream."""
+        log = []
+        spec = SpeculativeStream("bonjour", self._factory(["a"] * 100, delay=0.01, log=log))
+        await asyncio.sleep(0.02)
+        await spec.cancel()
+        assert log == ["cancelled"]
+        assert len(spec.output) < 100
+
+    @pytest.mark.asyncio
+    async def test_error_ends_stream(self):
+        """Test a failing stream ends tokens() and records the error."""
+        async def failing():
+            yield "a"
+            raise RuntimeError("boom")
+        spec = SpeculativeStream("bonjour", failing)
+        assert [t async for t in spec.tokens()] == ["a"]
+        assert isinstance(spec.error, RuntimeError)
+
+    def test_matches_normalized_text(self):
+        """Test matching ignores case and punctuation."""
+        async def run():
+            spec = SpeculativeStream("Salut, ça va", self._factory([]))
+            result = (spec.matches("salut ça va ?"), spec.matches("salut ça va bien"))
+            await spec.cancel()
+            return result
+        assert asyncio.run(run()) == (True, False)
@@ -17,6 +17,7 @@ from streaming_tts import (
     stream_tts_gpu_mp3,
     fast_first_byte_tts,
     _empty_generator,
+    pipelined_synthesis,
     WAV_HEADER_SIZE,
     _SENTENCE_SPLIT_PATTERN,
     _SUB_CHUNK_PATTERN,
@@ -189,6 +190,7 @@ class TestStreamTtsGpu:
         mock_fast_tts._sample_rate = 16000
         mock_fast_tts.init_fast_tts = MagicMock(return_value=True)
         mock_fast_tts.fast_tts = MagicMock(return_value=mock_wav)
+        mock_fast_tts.fast_tts_pcm = MagicMock(return_value=b'\x00' * 2000)
 
         with patch.dict('sys.modules', {'fast_tts': mock_fast_tts}):
             # Re-import to get fresh module
@@ -205,6 +207,97 @@ class TestStreamTtsGpu:
             assert isinstance(chunks, list)
 
 
+class TestPipelinedSynthesis:
+    """Tests for pipelined_synthesis look-ahead scheduling."""
+
+    @pytest.mark.asyncio
+    async def test_yields_results_in_order(self):
+        """Test results come back in chunk order even if later ones finish first."""
+        async def synthesize(text):
+            await asyncio.sleep(0.02 if text == "a" else 0)
+            return text.upper()
+
+        results = [r async for _, r, _ in pipelined_synthesis(["a", "b", "c"], synthesize, lookahead=2)]
+        assert results == ["A", "B", "C"]
+
+    @pytest.mark.asyncio
+    async def test_lookahead_bounds_in_flight(self):
+        """Test no more than lookahead + 1 chunks are synthesizing at once."""
+        in_flight = 0
+        peak = 0
+
+        async def synthesize(text):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+            return text
+
+        async for _ in pipelined_synthesis([str(i) for i in range(6)], synthesize, lookahead=1):
+            await asyncio.sleep(0.01)
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_next_chunk_generates_while_current_is_consumed(self):
+        """Test chunk N+1 is started before the consumer finishes chunk N."""
+        started = []
+
+        async def synthesize(text):
+            started.append(text)
+            return text
+
+        gen = pipelined_synthesis(["a", "b", "c"], synthesize, lookahead=1)
+        await gen.__anext__()
+        await asyncio.sleep(0)
+        assert "b" in started
+        assert "c" not in started
+        await gen.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cancels_pending_on_early_exit(self):
+        """Test pending look-ahead work is cancelled when consumer stops."""
+        cancelled = []
+
+        async def synthesize(text):
+            try:
+                await asyncio.sleep(0 if text == "a" else 1)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+            return text
+
+        gen = pipelined_synthesis(["a", "b", "c"], synthesize, lookahead=1)
+        await gen.__anext__()
+        await gen.aclose()
+        await asyncio.sleep(0)
+        assert cancelled == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_stream_tts_gpu_does_not_block_loop(self):
+        """Test stream_tts_gpu runs fast_tts off the event loop."""
+        import threading
+        loop_thread = threading.get_ident()
+        calls = []
+        pcm = b'\x01' * 20
+
+        def fake_tts(text):
+            calls.append(threading.get_ident())
+            return pcm
+
+        mock_fast_tts = MagicMock()
+        mock_fast_tts._initialized = True
+        mock_fast_tts._sample_rate = 16000
+        mock_fast_tts.fast_tts_pcm = fake_tts
+
+        with patch.dict('sys.modules', {'fast_tts': mock_fast_tts}):
+            chunks = [c async for c in stream_tts_gpu("Bonjour. Comment vas-tu aujourd'hui?")]
+
+        assert chunks[0] == create_wav_header(16000, 10) + pcm
+        assert all(c == pcm for c in chunks[1:])
+        assert calls and all(t != loop_thread for t in calls)
+
+
 class TestStreamTtsGpuMp3:
     """Tests for stream_tts_gpu_mp3 async function."""
 
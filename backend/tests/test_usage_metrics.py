@@ -0,0 +1,135 @@
+"""
+Tests for usage_metrics.py
+Buffered usage_stats writer with per-minute/per-endpoint rollups
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from usage_metrics import UsageMetrics
+
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestBuffering:
+    """Tests for in-memory buffering and bulk flushes."""
+
+    def test_record_does_not_write(self, tmp_path):
+        """Test events stay in memory until flushed."""
+        path = str(tmp_path / "eva.db")
+        metrics = UsageMetrics(path, flush_size=100)
+        metrics.record("s1", "llm", 120)
+        assert _count(path, "usage_stats") == 0
+        assert metrics.get_stats()["buffered"] == 1
+        assert metrics.flush() == 1
+        assert _count(path, "usage_stats") == 1
+
+    def test_size_threshold_flushes(self, tmp_path):
+        """Test reaching flush_size writes the batch in one flush."""
+        path = str(tmp_path / "eva.db")
+        metrics = UsageMetrics(path, flush_size=10)
+        for i in range(10):
+            metrics.record("s1", "llm", i)
+        assert _count(path, "usage_stats") == 10
+        assert metrics.get_stats()["flushes"] == 1
+
+    def test_raw_log_can_be_disabled(self, tmp_path):
+        """Test only rollups are written when the raw log is off."""
+        path = str(tmp_path / "eva.db")
+        metrics = UsageMetrics(path, raw_log=False)
+        metrics.record("s1", "llm", 100)
+        metrics.flush()
+        assert _count(path, "usage_stats") == 0
+        assert _count(path, "usage_rollup_minute") == 1
+
+
+class TestRollups:
+    """Tests for pre-aggregated rollups."""
+
+    def test_rollups_aggregate_per_minute_and_endpoint(self, tmp_path):
+        """Test one rollup row per (minute, endpoint) with latency aggregates."""
+        metrics = UsageMetrics(str(tmp_path / "eva.db"))
+        for latency in (100, 200, 300):
+            metrics.record("s1", "llm", latency)
+        metrics.record("s2", "voice_pipeline", 900)
+        metrics.flush()
+        metrics.record("s1", "llm", 400)
+        metrics.flush()
+
+        llm = metrics.get_timeseries(minutes=5, endpoint="llm")
+        assert len(llm) <= 2  # Two flushes may straddle a minute boundary
+        assert sum(row["count"] for row in llm) == 4
+        assert min(row["min_latency_ms"] for row in llm) == 100
+        assert max(row["max_latency_ms"] for row in llm) == 400
+        if len(llm) == 1:
+            assert llm[0]["avg_latency_ms"] == 250
+        assert metrics.get_timeseries(minutes=5, endpoint="voice_pipeline")[0]["count"] == 1
+
+    def test_summary_includes_buffered_events(self, tmp_path):
+        """Test stats combine rollups with not-yet-flushed events."""
+        metrics = UsageMetrics(str(tmp_path / "eva.db"))
+        metrics.record("s1", "llm", 100)
+        metrics.flush()
+        metrics.record("s1", "llm", 300)
+        metrics.record("s1", "voice_pipeline", 500)
+        summary = metrics.get_summary()
+        assert summary["total_requests"] == 3
+        assert summary["avg_latency_ms"] == 300
+        assert summary["requests_last_hour"] == 3
+        assert summary["calls_by_endpoint"]["llm"] == {"count": 2, "avg_latency_ms": 200}
+
+    def test_backfill_from_raw_rows(self, tmp_path):
+        """Test rollups are rebuilt from rows logged before they existed."""
+        path = str(tmp_path / "eva.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE usage_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, endpoint TEXT,
+                latency_ms INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO usage_stats (session_id, endpoint, latency_ms) VALUES (?, ?, ?)",
+            [("s1", "llm", 100), ("s1", "llm", 300), ("s2", "voice_pipeline", 50)],
+        )
+        conn.commit()
+        conn.close()
+
+        summary = UsageMetrics(path).get_summary()
+        assert summary["total_requests"] == 3
+        assert summary["calls_by_endpoint"]["llm"]["avg_latency_ms"] == 200
+        # Not backfilled twice
+        assert UsageMetrics(path).get_summary()["total_requests"] == 3
+
+
+class TestFlusherTask:
+    """Tests for the periodic flusher."""
+
+    @pytest.mark.asyncio
+    async def test_timer_flush(self, tmp_path):
+        """Test the flusher writes buffered events on its interval."""
+        path = str(tmp_path / "eva.db")
+        metrics = UsageMetrics(path, flush_s=0.02)
+        metrics.start()
+        metrics.record("s1", "llm", 100)
+        await asyncio.sleep(0.15)
+        assert _count(path, "usage_stats") == 1
+        await metrics.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes(self, tmp_path):
+        """Test shutdown writes what is still buffered."""
+        path = str(tmp_path / "eva.db")
+        metrics = UsageMetrics(path, flush_s=60)
+        metrics.start()
+        metrics.record("s1", "llm", 100)
+        await metrics.close()
+        assert _count(path, "usage_rollup_endpoint") == 1
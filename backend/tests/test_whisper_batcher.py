@@ -0,0 +1,189 @@
+"""
+Tests for whisper_batcher.py
+Length-bucketed multi-session Whisper batching
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from whisper_batcher import STT_SAMPLE_RATE, WhisperBatcher
+
+
+def _audio(seconds):
+    return np.zeros(int(seconds * STT_SAMPLE_RATE), dtype=np.float32)
+
+
+class RecordingTranscriber:
+    """Batch transcriber echoing each item's duration and prompt."""
+
+    def __init__(self, delay=0.0, fail=None):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append([len(audio) / STT_SAMPLE_RATE for audio, _ in items])
+        time.sleep(self.delay)
+        if self.fail is not None:
+            raise self.fail
+        return [f"{len(audio) / STT_SAMPLE_RATE:g}s {prompt}".strip() for audio, prompt in items]
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(transcriber, **kwargs):
+        options = dict(max_batch_size=4, max_wait_ms=30, buckets_s=(2, 5, 10, 30))
+        options.update(kwargs)
+        batcher = WhisperBatcher(transcriber, **options)
+        batcher.start()
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.stop()
+
+
+class TestBuckets:
+    """Tests for length bucketing."""
+
+    def test_bucket_for(self):
+        """Test utterances map to the smallest bucket that fits."""
+        batcher = WhisperBatcher(RecordingTranscriber(), buckets_s=(2, 5, 10, 30))
+        assert batcher.bucket_for(len(_audio(1))) == 0
+        assert batcher.bucket_for(len(_audio(2))) == 0
+        assert batcher.bucket_for(len(_audio(4.5))) == 1
+        assert batcher.bucket_for(len(_audio(29))) == 3
+        assert batcher.bucket_for(len(_audio(45))) == 4
+
+    def test_bucket_labels(self):
+        """Test labels used in the exported bucket counts."""
+        batcher = WhisperBatcher(RecordingTranscriber(), buckets_s=(5, 2))
+        assert batcher.buckets_s == [2, 5]
+        assert list(batcher.get_stats()["bucket_items"]) == ["<=2s", "<=5s", ">5s"]
+
+
+class TestWhisperBatcher:
+    """Tests for WhisperBatcher."""
+
+    def test_each_future_gets_its_own_result(self, make_batcher):
+        """Test results are routed back to the right caller."""
+        batcher = make_batcher(RecordingTranscriber())
+        futures = [batcher.submit(_audio(s), f"p{s}") for s in (1, 1.5, 0.5)]
+        assert [f.result(timeout=2) for f in futures] == ["1s p1", "1.5s p1.5", "0.5s p0.5"]
+
+    def test_concurrent_requests_share_a_batch(self, make_batcher):
+        """Test requests arriving within the wait window are decoded together."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_wait_ms=100)
+        futures = [batcher.submit(_audio(1)) for _ in range(3)]
+        for future in futures:
+            future.result(timeout=2)
+        assert transcriber.batches == [[1, 1, 1]]
+
+        stats = batcher.get_stats()
+        assert stats["batches"] == 1
+        assert stats["items"] == 3
+        assert stats["avg_batch_occupancy"] == 0.75
+        assert stats["batch_sizes"] == {3: 1}
+
+    def test_full_batch_does_not_wait(self, make_batcher):
+        """Test a full bucket is dispatched before the wait window expires."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_batch_size=2, max_wait_ms=5000)
+        start = time.perf_counter()
+        futures = [batcher.submit(_audio(1)) for _ in range(2)]
+        for future in futures:
+            future.result(timeout=2)
+        assert time.perf_counter() - start < 1.0
+        assert transcriber.batches == [[1, 1]]
+
+    def test_buckets_are_not_mixed(self, make_batcher):
+        """Test short and long utterances go to separate batches."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_wait_ms=50)
+        futures = [batcher.submit(_audio(s)) for s in (1, 8, 1.5, 9)]
+        for future in futures:
+            future.result(timeout=2)
+        assert sorted(transcriber.batches) == [[1, 1.5], [8, 9]]
+        assert batcher.get_stats()["bucket_items"]["<=2s"] == 2
+        assert batcher.get_stats()["bucket_items"]["<=10s"] == 2
+
+    def test_long_audio_decoded_alone(self, make_batcher):
+        """Test audio past the last bucket is never batched."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_wait_ms=50)
+        futures = [batcher.submit(_audio(40)) for _ in range(2)]
+        for future in futures:
+            future.result(timeout=2)
+        assert transcriber.batches == [[40], [40]]
+
+    def test_error_fails_whole_batch(self, make_batcher):
+        """Test a failing decode resolves every future in the batch with the error."""
+        batcher = make_batcher(RecordingTranscriber(fail=RuntimeError("cuda")), max_wait_ms=50)
+        futures = [batcher.submit(_audio(1)) for _ in range(2)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=2)
+        assert batcher.get_stats()["errors"] == 1
+
+    def test_queue_time_metrics(self, make_batcher):
+        """Test requests queued behind a busy worker report their wait."""
+        batcher = make_batcher(RecordingTranscriber(delay=0.05), max_batch_size=1, max_wait_ms=0)
+        futures = [batcher.submit(_audio(1)) for _ in range(3)]
+        for future in futures:
+            future.result(timeout=2)
+        stats = batcher.get_stats()
+        assert stats["max_queue_ms"] >= 80
+        assert stats["p95_queue_ms"] >= stats["p50_queue_ms"] > 0
+        assert stats["pending"] == 0
+
+    def test_stop_serves_queued_requests(self):
+        """Test stop() still resolves requests queued before it."""
+        batcher = WhisperBatcher(RecordingTranscriber(), max_wait_ms=10000)
+        batcher.start()
+        future = batcher.submit(_audio(1))
+        batcher.stop(timeout=2)
+        assert future.result(timeout=2) == "1s"
+
+    @pytest.mark.asyncio
+    async def test_async_transcribe(self, make_batcher):
+        """Test concurrent coroutines are batched through transcribe()."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_wait_ms=50)
+        texts = await asyncio.gather(*(batcher.transcribe(_audio(1), "x") for _ in range(4)))
+        assert texts == ["1s x"] * 4
+        assert transcriber.batches == [[1, 1, 1, 1]]
+
+    def test_cancelled_request_skipped(self, make_batcher):
+        """Test a request cancelled while queued is dropped and the worker survives."""
+        transcriber = RecordingTranscriber()
+        batcher = make_batcher(transcriber, max_wait_ms=100)
+        cancelled = batcher.submit(_audio(1))
+        kept = batcher.submit(_audio(1.5))
+        assert cancelled.cancel()
+        assert kept.result(timeout=2) == "1.5s"
+        assert transcriber.batches == [[1.5]]
+        assert batcher.get_stats()["cancelled"] == 1
+        assert batcher.submit(_audio(1)).result(timeout=2) == "1s"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_transcribe_does_not_kill_worker(self, make_batcher):
+        """Test cancelling an awaiting caller mid-batch leaves the worker serving."""
+        batcher = make_batcher(RecordingTranscriber(delay=0.05), max_wait_ms=0)
+        task = asyncio.create_task(batcher.transcribe(_audio(1)))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.06)
+        assert batcher._thread.is_alive()
+        assert await asyncio.wait_for(batcher.transcribe(_audio(2)), 2) == "2s"
@@ -3,7 +3,7 @@ TTS Streaming Optimizer - Sprint 575
 
 Optimizations for ultra-low latency TTS streaming:
 1. Pre-warm cache with common first chunks
-2. Chunk-level caching (not just full responses)
+2. Chunk-level caching (not just full responses), backed by the shared audio store
 3. Predictive pre-generation based on LLM streaming
 4. Parallel chunk processing for multi-sentence responses
 
@@ -13,81 +13,50 @@ Target metrics:
 """
 
 import asyncio
-import hashlib
 import time
-from collections import OrderedDict
 from typing import Optional, AsyncGenerator, Callable
-from dataclasses import dataclass, field
 
-
-@dataclass
-class ChunkCacheEntry:
-    """Cached TTS chunk with metadata."""
-    audio: bytes
-    text: str
-    generated_at: float
-    generation_time_ms: float
-    hit_count: int = 0
+from audio_store import AudioStore, audio_store
 
 
 class TTSChunkCache:
-    """LRU cache for TTS audio chunks.
+    """Chunk-level view over the shared audio store.
 
     Caches individual chunks rather than full responses,
-    enabling cache hits on partial matches.
+    enabling cache hits on partial matches. Entries live in the
+    process-wide AudioStore (namespace "chunk"), so they are shared with
+    every other TTS path and with other workers on the node.
     """
 
-    def __init__(self, max_size: int = 500):
-        self.max_size = max_size
-        self.cache: OrderedDict[str, ChunkCacheEntry] = OrderedDict()
+    NAMESPACE = "chunk"
+
+    def __init__(self, store: Optional[AudioStore] = None, voice: str = "mms"):
+        self.store = store or audio_store
+        self.voice = voice
         self.stats = {
             "hits": 0,
             "misses": 0,
-            "evictions": 0,
-            "total_generation_saved_ms": 0.0,
         }
 
     def _make_key(self, text: str) -> str:
-        """Create cache key from text."""
-        normalized = text.strip().lower()
-        return hashlib.md5(normalized.encode()).hexdigest()
+        """Normalize chunk text (store hashes it)."""
+        return text.strip().lower()
 
     def get(self, text: str) -> Optional[bytes]:
         """Get cached audio for text chunk."""
         key = self._make_key(text)
-
-        if key in self.cache:
-            entry = self.cache[key]
-            entry.hit_count += 1
+        audio = self.store.get(key, self.voice, namespace=self.NAMESPACE)
+        if audio is not None:
             self.stats["hits"] += 1
-            self.stats["total_generation_saved_ms"] += entry.generation_time_ms
-
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            return entry.audio
+            return audio
 
         self.stats["misses"] += 1
         return None
 
     def set(self, text: str, audio: bytes, generation_time_ms: float) -> None:
         """Cache audio for text chunk."""
-        key = self._make_key(text)
-
-        # Don't cache if already exists
-        if key in self.cache:
-            return
-
-        # Evict oldest if at capacity
-        while len(self.cache) >= self.max_size:
-            self.cache.popitem(last=False)
-            self.stats["evictions"] += 1
-
-        self.cache[key] = ChunkCacheEntry(
-            audio=audio,
-            text=text,
-            generated_at=time.time(),
-            generation_time_ms=generation_time_ms,
-        )
+        self.store.put(self._make_key(text), audio, self.voice, namespace=self.NAMESPACE,
+                       generation_time_ms=generation_time_ms)
 
     def get_stats(self) -> dict:
         """Get cache statistics."""
@@ -96,9 +65,8 @@ class TTSChunkCache:
 
         return {
             **self.stats,
-            "size": len(self.cache),
-            "max_size": self.max_size,
             "hit_rate_percent": round(hit_rate, 2),
+            "store": self.store.get_stats(),
         }
 
     def prewarm(self, chunks: list[str], generate_fn: Callable[[str], bytes]) -> int:
@@ -108,7 +76,8 @@ class TTSChunkCache:
         """
         generated = 0
         for chunk in chunks:
-            if self._make_key(chunk) not in self.cache:
+            key = self._make_key(chunk)
+            if self.store.get(key, self.voice, namespace=self.NAMESPACE) is None:
                 start = time.time()
                 audio = generate_fn(chunk)
                 if audio:
@@ -172,7 +141,7 @@ class StreamingTTSOptimizer:
     def __init__(
         self,
         generate_fn: Callable[[str], bytes],
-        cache_size: int = 500,
+        store: Optional[AudioStore] = None,
         enable_parallel: bool = True,
         max_parallel_chunks: int = 3,
     ):
@@ -180,12 +149,12 @@ class StreamingTTSOptimizer:
 
         Args:
             generate_fn: Function to generate TTS audio from text
-            cache_size: Maximum cached chunks
+            store: Audio store backing the chunk cache (shared singleton by default)
             enable_parallel: Enable parallel chunk generation
             max_parallel_chunks: Max chunks to generate in parallel
         """
         self.generate_fn = generate_fn
-        self.cache = TTSChunkCache(max_size=cache_size)
+        self.cache = TTSChunkCache(store=store)
         self.enable_parallel = enable_parallel
         self.max_parallel_chunks = max_parallel_chunks
         self._prewarm_task: Optional[asyncio.Task] = None
@@ -399,7 +368,6 @@ def init_tts_optimizer(generate_fn: Callable[[str], bytes]) -> StreamingTTSOptim
     global _optimizer
     _optimizer = StreamingTTSOptimizer(
         generate_fn=generate_fn,
-        cache_size=500,
         enable_parallel=True,
         max_parallel_chunks=3,
     )
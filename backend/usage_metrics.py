@@ -0,0 +1,303 @@
+"""
+Usage Metrics - buffered usage_stats sink with pre-aggregated rollups
+
+log_usage used to INSERT + commit() once per LLM call, and /stats scanned
+the whole usage_stats table (COUNT, AVG, time filter) on every request.
+Now:
+
+- record() appends to an in-memory buffer (no I/O on the request path)
+- A flusher task writes the buffer every USAGE_FLUSH_S seconds, or as soon
+  as USAGE_FLUSH_SIZE events are waiting, in one transaction
+- Each flush also upserts two rollup tables:
+      usage_rollup_minute(minute, endpoint, count, latency_sum, latency_min, latency_max)
+      usage_rollup_endpoint(endpoint, count, latency_sum)
+  so get_summary() reads a handful of pre-aggregated rows, plus whatever is
+  still buffered
+
+Raw rows are still appended to usage_stats (in bulk) unless USAGE_RAW_LOG=false.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+USAGE_FLUSH_S = float(os.getenv("USAGE_FLUSH_S", "2.0"))
+USAGE_FLUSH_SIZE = int(os.getenv("USAGE_FLUSH_SIZE", "500"))
+USAGE_RAW_LOG = os.getenv("USAGE_RAW_LOG", "true").lower() == "true"
+
+# (session_id, endpoint, latency_ms, timestamp)
+Event = Tuple[str, str, int, float]
+
+
+class UsageMetrics:
+    """Buffers usage events and keeps per-minute/per-endpoint rollups.
+
+    Without a running flusher (tests, scripts) events are written once the
+    buffer reaches flush_size, or on flush().
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        flush_s: float = USAGE_FLUSH_S,
+        flush_size: int = USAGE_FLUSH_SIZE,
+        raw_log: bool = USAGE_RAW_LOG,
+    ):
+        self.flush_s = flush_s
+        self.flush_size = flush_size
+        self.raw_log = raw_log
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                endpoint TEXT,
+                latency_ms INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        has_rollups = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage_rollup_endpoint'"
+        ).fetchone() is not None
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_rollup_minute (
+                minute INTEGER NOT NULL,
+                endpoint TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                latency_sum INTEGER NOT NULL,
+                latency_min INTEGER NOT NULL,
+                latency_max INTEGER NOT NULL,
+                PRIMARY KEY (minute, endpoint)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_rollup_endpoint (
+                endpoint TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                latency_sum INTEGER NOT NULL
+            )
+        """)
+        if not has_rollups:
+            self._backfill()
+        self._conn.commit()
+
+        self._lock = threading.Lock()  # Guards _buffer (record() may run in threads)
+        self._db_lock = threading.Lock()
+        self._buffer: List[Event] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "events_written": 0,
+            "write_errors": 0,
+        }
+
+    def _backfill(self) -> None:
+        """Build rollups from raw rows logged before the rollups existed."""
+        self._conn.execute("""
+            INSERT INTO usage_rollup_minute
+            SELECT CAST(strftime('%s', created_at) AS INTEGER) / 60, endpoint,
+                   COUNT(*), COALESCE(SUM(latency_ms), 0),
+                   COALESCE(MIN(latency_ms), 0), COALESCE(MAX(latency_ms), 0)
+            FROM usage_stats WHERE created_at IS NOT NULL AND endpoint IS NOT NULL
+            GROUP BY 1, 2
+        """)
+        self._conn.execute("""
+            INSERT INTO usage_rollup_endpoint
+            SELECT endpoint, COUNT(*), COALESCE(SUM(latency_ms), 0) FROM usage_stats
+            WHERE endpoint IS NOT NULL GROUP BY endpoint
+        """)
+
+    # ------------------------------------------------------------------ writes
+
+    def record(self, session_id: str, endpoint: str, latency_ms: int) -> None:
+        """Buffer one usage event (no I/O)."""
+        with self._lock:
+            self._buffer.append((session_id, endpoint, int(latency_ms), time.time()))
+            self.stats["recorded"] += 1
+            full = len(self._buffer) >= self.flush_size
+        if not full:
+            return
+        if self.running:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        else:
+            self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._flusher_task is not None and not self._flusher_task.done()
+
+    def _drain(self) -> List[Event]:
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        return events
+
+    def flush(self) -> int:
+        """Write buffered events and their rollups in one transaction."""
+        return self._write(self._drain())
+
+    def _write(self, events: List[Event]) -> int:
+        if not events:
+            return 0
+        minutes: Dict[Tuple[int, str], List[int]] = {}
+        endpoints: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for _, endpoint, latency, ts in events:
+            key = (int(ts // 60), endpoint)
+            agg = minutes.get(key)
+            if agg is None:
+                minutes[key] = [1, latency, latency, latency]
+            else:
+                agg[0] += 1
+                agg[1] += latency
+                agg[2] = min(agg[2], latency)
+                agg[3] = max(agg[3], latency)
+            endpoints[endpoint][0] += 1
+            endpoints[endpoint][1] += latency
+
+        with self._db_lock:
+            try:
+                if self.raw_log:
+                    self._conn.executemany(
+                        "INSERT INTO usage_stats (session_id, endpoint, latency_ms, created_at) "
+                        "VALUES (?, ?, ?, datetime(?, 'unixepoch'))",
+                        events,
+                    )
+                self._conn.executemany("""
+                    INSERT INTO usage_rollup_minute VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (minute, endpoint) DO UPDATE SET
+                        count = count + excluded.count,
+                        latency_sum = latency_sum + excluded.latency_sum,
+                        latency_min = MIN(latency_min, excluded.latency_min),
+                        latency_max = MAX(latency_max, excluded.latency_max)
+                """, [(m, e, *agg) for (m, e), agg in minutes.items()])
+                self._conn.executemany("""
+                    INSERT INTO usage_rollup_endpoint VALUES (?, ?, ?)
+                    ON CONFLICT (endpoint) DO UPDATE SET
+                        count = count + excluded.count,
+                        latency_sum = latency_sum + excluded.latency_sum
+                """, [(e, count, total) for e, (count, total) in endpoints.items()])
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                self.stats["write_errors"] += 1
+                print(f"Usage log error: {e}")
+                return 0
+        self.stats["flushes"] += 1
+        self.stats["events_written"] += len(events)
+        return len(events)
+
+    async def _flusher_loop(self) -> None:
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_s)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                events = self._drain()
+                if events:
+                    await asyncio.to_thread(self._write, events)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"⚠️ Usage flusher error: {e}")
+
+    def start(self) -> asyncio.Task:
+        """Start the periodic flusher on the running loop."""
+        if not self.running:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._flusher_task = asyncio.create_task(self._flusher_loop())
+        return self._flusher_task
+
+    async def close(self) -> None:
+        """Stop the flusher, write what is left and close the database."""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            await asyncio.gather(self._flusher_task, return_exceptions=True)
+            self._flusher_task = None
+        await asyncio.to_thread(self._flush_and_close)
+
+    def _flush_and_close(self) -> None:
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------- reads
+
+    def get_summary(self, window_minutes: int = 60) -> Dict[str, Any]:
+        """Totals, per-endpoint counts and recent volume from the rollups.
+
+        Buffered events that haven't been flushed yet are included.
+        """
+        since = int(time.time() // 60) - window_minutes + 1
+        with self._db_lock:
+            by_endpoint = {
+                endpoint: [count, latency_sum]
+                for endpoint, count, latency_sum in self._conn.execute(
+                    "SELECT endpoint, count, latency_sum FROM usage_rollup_endpoint"
+                )
+            }
+            recent = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM usage_rollup_minute WHERE minute >= ?",
+                (since,),
+            ).fetchone()[0]
+        with self._lock:
+            buffered = list(self._buffer)
+        for _, endpoint, latency, ts in buffered:
+            agg = by_endpoint.setdefault(endpoint, [0, 0])
+            agg[0] += 1
+            agg[1] += latency
+            if ts // 60 >= since:
+                recent += 1
+
+        total = sum(count for count, _ in by_endpoint.values())
+        latency_sum = sum(latency for _, latency in by_endpoint.values())
+        return {
+            "total_requests": total,
+            "avg_latency_ms": round(latency_sum / total) if total else 0,
+            "requests_last_hour": recent,
+            "calls_by_endpoint": {
+                endpoint: {"count": count, "avg_latency_ms": round(latency / count) if count else 0}
+                for endpoint, (count, latency) in sorted(by_endpoint.items(), key=lambda kv: -kv[1][0])
+            },
+        }
+
+    def get_timeseries(self, minutes: int = 60, endpoint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-minute rollup rows for the last `minutes` minutes (flushed data)."""
+        since = int(time.time() // 60) - minutes + 1
+        query = ("SELECT minute, endpoint, count, latency_sum, latency_min, latency_max "
+                 "FROM usage_rollup_minute WHERE minute >= ?")
+        params: Tuple = (since,)
+        if endpoint is not None:
+            query += " AND endpoint = ?"
+            params += (endpoint,)
+        with self._db_lock:
+            rows = self._conn.execute(query + " ORDER BY minute, endpoint", params).fetchall()
+        return [
+            {
+                "minute": minute * 60,
+                "endpoint": ep,
+                "count": count,
+                "avg_latency_ms": round(total / count) if count else 0,
+                "min_latency_ms": low,
+                "max_latency_ms": high,
+            }
+            for minute, ep, count, total, low, high in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer and flush counters."""
+        with self._lock:
+            buffered = len(self._buffer)
+        return {**self.stats, "buffered": buffered, "flusher_running": self.running}
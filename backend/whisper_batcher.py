@@ -0,0 +1,310 @@
+"""
+Whisper Batcher - multi-session STT decoding in shared encoder passes
+
+Every /stt, /voice and websocket voice turn used to call
+whisper_model.transcribe on its own, so utterances that finish at the same
+time serialized on the one model. WhisperBatcher puts a single worker thread
+in front of the model:
+
+1. submit() queues float32 16kHz audio (+ prompt) and returns a Future
+2. Requests are grouped by length bucket (STT_BATCH_BUCKETS_S), so a 1s
+   "oui" isn't decoded next to a 25s monologue
+3. The worker takes the bucket holding the oldest request, waits at most
+   STT_BATCH_MAX_WAIT_MS for it to fill up to STT_BATCH_MAX_SIZE, and runs
+   the whole group as one padded encoder pass + one batched greedy decode
+4. Each caller's future resolves with its own text
+
+Audio longer than the last bucket (one 30s Whisper window) is decoded alone
+with the regular sliding-window transcribe.
+
+get_stats() exports queue time (avg/p50/p95/max), batch occupancy and
+per-bucket counts.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STT_SAMPLE_RATE = 16000
+
+STT_BATCH_MAX_SIZE = int(os.getenv("STT_BATCH_MAX_SIZE", "8"))
+STT_BATCH_MAX_WAIT_MS = float(os.getenv("STT_BATCH_MAX_WAIT_MS", "10"))
+STT_BATCH_BUCKETS_S = tuple(
+    float(b) for b in os.getenv("STT_BATCH_BUCKETS_S", "2,5,10,30").split(",") if b.strip()
+)
+
+WHISPER_WINDOW_S = 30  # Encoder input length (3000 mel frames)
+QUEUE_SAMPLES = 512    # Recent queue times kept for percentiles
+
+Item = Tuple[np.ndarray, str]
+BatchTranscriber = Callable[[List[Item]], List[str]]
+
+
+def _settle(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    """Resolve a caller's future; one that is already done is left alone."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class WhisperBatcher:
+    """Length-bucketed micro-batching scheduler in front of Whisper.
+
+    Requests are queued from any thread or event loop; a single worker thread
+    owns the model, so it is never entered concurrently.
+    """
+
+    def __init__(
+        self,
+        transcribe_batch: BatchTranscriber,
+        max_batch_size: int = STT_BATCH_MAX_SIZE,
+        max_wait_ms: float = STT_BATCH_MAX_WAIT_MS,
+        buckets_s: Sequence[float] = STT_BATCH_BUCKETS_S,
+    ):
+        self.transcribe_batch = transcribe_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.buckets_s = sorted(buckets_s) or [WHISPER_WINDOW_S]
+        # One FIFO per bucket, plus one for audio longer than the last bucket
+        self._pending: List[Deque[tuple]] = [deque() for _ in range(len(self.buckets_s) + 1)]
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._queue_ms: Deque[float] = deque(maxlen=QUEUE_SAMPLES)
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "items": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "audio_s": 0.0,
+            "total_queue_ms": 0.0,
+            "max_queue_ms": 0.0,
+            "total_batch_ms": 0.0,
+            "batch_sizes": {},
+            "bucket_items": {self.bucket_label(i): 0 for i in range(len(self._pending))},
+        }
+
+    # ------------------------------------------------------------- lifecycle
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the worker thread; already queued requests are still served."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------------------------------------------------------------- submit
+
+    def bucket_for(self, samples: int) -> int:
+        """Index of the length bucket for an utterance of `samples` 16kHz samples."""
+        duration = samples / STT_SAMPLE_RATE
+        for index, limit in enumerate(self.buckets_s):
+            if duration <= limit:
+                return index
+        return len(self.buckets_s)
+
+    def bucket_label(self, index: int) -> str:
+        if index < len(self.buckets_s):
+            return f"<={self.buckets_s[index]:g}s"
+        return f">{self.buckets_s[-1]:g}s"
+
+    def submit(self, audio: np.ndarray, prompt: str = "") -> Future:
+        """Queue float32 16kHz audio for transcription. Resolves to its text."""
+        future: Future = Future()
+        bucket = self.bucket_for(len(audio))
+        with self._cond:
+            self._pending[bucket].append((audio, prompt, future, time.perf_counter()))
+            self.stats["requests"] += 1
+            self._cond.notify()
+        return future
+
+    async def transcribe(self, audio: np.ndarray, prompt: str = "") -> str:
+        """Await a batched transcription without holding an executor thread."""
+        return await asyncio.wrap_future(self.submit(audio, prompt))
+
+    # ---------------------------------------------------------------- worker
+
+    def _oldest_bucket(self) -> Optional[int]:
+        heads = [(q[0][3], i) for i, q in enumerate(self._pending) if q]
+        return min(heads)[1] if heads else None
+
+    def _collect(self) -> Optional[Tuple[int, list]]:
+        """Wait for the oldest request, then let its bucket fill until full or timed out."""
+        with self._cond:
+            while True:
+                bucket = self._oldest_bucket()
+                if bucket is not None:
+                    break
+                if not self._running:
+                    return None
+                self._cond.wait()
+
+            pending = self._pending[bucket]
+            # Long audio is decoded alone (sliding-window transcribe)
+            limit = 1 if bucket == len(self.buckets_s) else self.max_batch_size
+            deadline = pending[0][3] + self.max_wait_ms / 1000
+            while len(pending) < limit and self._running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = [pending.popleft() for _ in range(min(limit, len(pending)))]
+            return bucket, batch
+
+    def _run(self) -> None:
+        while True:
+            collected = self._collect()
+            if collected is None:
+                break
+            bucket, batch = collected
+
+            # Callers cancelled while queued (disconnect, barge-in) are dropped;
+            # the others can't be cancelled any more once marked running
+            live = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            self.stats["cancelled"] += len(batch) - len(live)
+            if live:
+                self._serve(bucket, live)
+
+    def _serve(self, bucket: int, batch: list) -> None:
+        start = time.perf_counter()
+        queue_ms = [(start - queued_at) * 1000 for _, _, _, queued_at in batch]
+        try:
+            texts = self.transcribe_batch([(audio, prompt) for audio, prompt, _, _ in batch])
+            if len(texts) != len(batch):
+                raise RuntimeError(f"transcriber returned {len(texts)} texts for {len(batch)} requests")
+        except Exception as e:
+            self.stats["errors"] += 1
+            for _, _, future, _ in batch:
+                _settle(future, error=e)
+            return
+
+        self._record(bucket, batch, queue_ms, (time.perf_counter() - start) * 1000)
+        for (_, _, future, _), text in zip(batch, texts):
+            _settle(future, text)
+
+    def _record(self, bucket: int, batch: list, queue_ms: List[float], batch_ms: float) -> None:
+        size = len(batch)
+        self.stats["batches"] += 1
+        self.stats["items"] += size
+        self.stats["audio_s"] += sum(len(audio) for audio, _, _, _ in batch) / STT_SAMPLE_RATE
+        self.stats["total_queue_ms"] += sum(queue_ms)
+        self.stats["max_queue_ms"] = max(self.stats["max_queue_ms"], max(queue_ms))
+        self.stats["total_batch_ms"] += batch_ms
+        self.stats["batch_sizes"][size] = self.stats["batch_sizes"].get(size, 0) + 1
+        self.stats["bucket_items"][self.bucket_label(bucket)] += size
+        with self._cond:
+            self._queue_ms.extend(queue_ms)
+
+    # ----------------------------------------------------------------- stats
+
+    def get_stats(self) -> dict:
+        """Queue time, batch occupancy and per-bucket statistics."""
+        batches = self.stats["batches"]
+        items = self.stats["items"]
+        avg_batch_size = items / batches if batches else 0.0
+        with self._cond:
+            pending = sum(len(q) for q in self._pending)
+            recent = sorted(self._queue_ms)
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 2)
+
+        return {
+            **self.stats,
+            "audio_s": round(self.stats["audio_s"], 1),
+            "total_queue_ms": round(self.stats["total_queue_ms"], 1),
+            "max_queue_ms": round(self.stats["max_queue_ms"], 2),
+            "total_batch_ms": round(self.stats["total_batch_ms"], 1),
+            "batch_sizes": dict(sorted(self.stats["batch_sizes"].items())),
+            "bucket_items": dict(self.stats["bucket_items"]),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": pending,
+            "avg_batch_size": round(avg_batch_size, 2),
+            "avg_batch_occupancy": round(avg_batch_size / self.max_batch_size, 3),
+            "avg_queue_ms": round(self.stats["total_queue_ms"] / items, 2) if items else 0.0,
+            "p50_queue_ms": percentile(0.5),
+            "p95_queue_ms": percentile(0.95),
+            "avg_batch_ms": round(self.stats["total_batch_ms"] / batches, 2) if batches else 0.0,
+        }
+
+
+def faster_whisper_batch(
+    model,
+    transcribe_single: Callable[[np.ndarray, str], str],
+    language: str = "fr",
+    default_prompt: str = "Conversation en français.",
+) -> BatchTranscriber:
+    """Batch transcriber for a faster-whisper WhisperModel.
+
+    Pads every utterance to one 30s mel window, runs them through the encoder
+    as a single batch and decodes greedily with per-request prompts.
+    Utterances longer than the window go through transcribe_single.
+    """
+    from faster_whisper.tokenizer import Tokenizer
+
+    tokenizer = Tokenizer(
+        model.hf_tokenizer,
+        model.model.is_multilingual,
+        task="transcribe",
+        language=language,
+    )
+    n_frames = model.feature_extractor.nb_max_frames
+    max_samples = WHISPER_WINDOW_S * STT_SAMPLE_RATE
+
+    def mel(audio: np.ndarray) -> np.ndarray:
+        features = model.feature_extractor(audio)[:, :n_frames]
+        if features.shape[-1] < n_frames:
+            features = np.pad(features, ((0, 0), (0, n_frames - features.shape[-1])))
+        return features
+
+    def transcribe_batch(items: List[Item]) -> List[str]:
+        if len(items) == 1 and len(items[0][0]) > max_samples:
+            return [transcribe_single(*items[0])]
+
+        encoder_output = model.encode(np.stack([mel(audio) for audio, _ in items]))
+        prompts = [
+            model.get_prompt(
+                tokenizer,
+                tokenizer.encode(" " + (prompt or default_prompt).strip()),
+                without_timestamps=True,
+            )
+            for _, prompt in items
+        ]
+        results = model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=1,
+            max_length=getattr(model, "max_length", 448),
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        return [tokenizer.decode(result.sequences_ids[0]).strip() for result in results]
+
+    return transcribe_batch